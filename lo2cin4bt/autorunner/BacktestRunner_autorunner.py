@@ -64,31 +64,47 @@ class BacktestRunnerAutorunner:
             from lo2cin4bt.backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
             
             engine = VectorBacktestEngine(data, config.get("dataloader", {}).get("frequency", "1D"), self.logger)
-            results = engine.run_backtests(backtester_config)
+            streaming = backtester_config.get("performance_params", {}).get("streaming", False)
+            result_sink = backtester.create_stream_sink(backtester_config) if streaming else None
+            results = engine.run_backtests(backtester_config, result_sink=result_sink)
             
             # 步驟 4: 設置結果到 backtester 並導出（自動化模式，不顯示用戶界面）
             backtester.results = results
-            
-            # 直接導出 parquet 文件，不顯示用戶選擇界面
-            from lo2cin4bt.backtester.TradeRecordExporter_backtester import TradeRecordExporter_backtester
-            exporter = TradeRecordExporter_backtester(
-                trade_records=pd.DataFrame(),
-                frequency=config.get("dataloader", {}).get("frequency", "1D"),
-                results=results,
-                data=data,
-                Backtest_id=backtester_config.get("Backtest_id", ""),
-                predictor_file_name=backtester.predictor_file_name,
-                predictor_column=backtester.predictor_column,
-                **backtester_config.get("trading_params", {})
-            )
-            exporter.export_to_parquet()
+
+            # 增量回測與兩階段篩選會停用串流，以引擎實際採用的模式決定是否導出
+            if engine.streaming:
+                # 串流模式逐區塊導出，讓績效分析處理本次所有檔案
+                exported_files = list(backtester.streamed_files)
+            else:
+                # 直接導出 parquet 文件，不顯示用戶選擇界面
+                from lo2cin4bt.backtester.TradeRecordExporter_backtester import TradeRecordExporter_backtester
+                exporter = TradeRecordExporter_backtester(
+                    trade_records=pd.DataFrame(),
+                    frequency=config.get("dataloader", {}).get("frequency", "1D"),
+                    results=results,
+                    data=data,
+                    Backtest_id=backtester_config.get("Backtest_id", ""),
+                    predictor_file_name=backtester.predictor_file_name,
+                    predictor_column=backtester.predictor_column,
+                    **backtester_config.get("trading_params", {})
+                )
+                # 增量回測只追加新K線到上次的檔案
+                if engine.incremental_append_path:
+                    exporter.append_to_parquet(engine.incremental_append_path)
+                else:
+                    exporter.export_to_parquet()
+                engine.save_incremental_state(exporter.last_exported_path)
+                exported_files = (
+                    [exporter.last_exported_path] if exporter.last_exported_path else []
+                )
             
             # 步驟 5: 收集結果
             final_results = {
                 "success": True,
                 "results": results,
                 "data_shape": data.shape,
-                "config": backtester_config
+                "config": backtester_config,
+                "exported_files": exported_files,
             }
             
             return final_results
@@ -117,6 +133,7 @@ class BacktestRunnerAutorunner:
         condition_pairs = backtester_config.get("condition_pairs", [])
         raw_indicator_params = backtester_config.get("indicator_params", {})
         trading_params = backtester_config.get("trading_params", {})
+        performance_params = backtester_config.get("performance_params", {})
         predictors = [backtester_config.get("selected_predictor", "X")]
         
         
@@ -156,7 +173,8 @@ class BacktestRunnerAutorunner:
             "condition_pairs": condition_pairs,
             "indicator_params": processed_indicator_params,
             "trading_params": trading_params,
-            "predictors": predictors
+            "predictors": predictors,
+            "performance_params": performance_params
         }
         
         
@@ -347,6 +347,27 @@ class ConfigValidator:
                     )
                     return False
 
+                workers = config.get("parallel_workers")
+                if workers is not None and not (
+                    (isinstance(workers, int) and not isinstance(workers, bool))
+                    or (isinstance(workers, str) and workers.strip().lower() == "auto")
+                ):
+                    self._display_validation_error(
+                        'parallel_workers 必須為整數或 "auto"', "績效追蹤器配置"
+                    )
+                    return False
+
+                memory_limit = config.get("memory_limit_mb")
+                if memory_limit is not None and (
+                    isinstance(memory_limit, bool)
+                    or not isinstance(memory_limit, (int, float))
+                    or memory_limit <= 0
+                ):
+                    self._display_validation_error(
+                        "memory_limit_mb 必須為正數", "績效追蹤器配置"
+                    )
+                    return False
+
             return True
             
         except Exception as e:
@@ -11,6 +11,8 @@ MetricsRunner_autorunner.py
 ------------------------------------------------------------
 - 由 Base_autorunner 調用，接收回測結果與 metrics 配置
 - 解析配置 → 選擇目標 Parquet → 計算績效 → 匯出結果 → 顯示摘要
+- parallel_workers > 1（或 "auto"）且有多個檔案時，以進程池並行分析，
+  依檔案大小排程並受 memory_limit_mb 限制，摘要仍按檔案列表順序顯示
 
 【維護與擴充重點】
 ------------------------------------------------------------
@@ -23,15 +25,20 @@ from __future__ import annotations
 
 import logging
 import os
+import time
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
-import pandas as pd
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 
-from ..metricstracker.MetricsExporter_metricstracker import MetricsExporter
+from ..metricstracker.ParallelMetrics_metricstracker import (
+    FileMetricsResult,
+    export_metrics_file,
+    export_metrics_files,
+    resolve_worker_count,
+)
 
 
 @dataclass
@@ -41,6 +48,10 @@ class MetricsTaskResult:
     output_path: Optional[str]
     status: str
     error: Optional[str] = None
+    n_rows: int = 0
+    read_seconds: float = 0.0
+    export_seconds: float = 0.0
+    total_seconds: float = 0.0
 
 
 class MetricsRunnerAutorunner:
@@ -76,43 +87,54 @@ class MetricsRunnerAutorunner:
             }
             return self.summary
 
+        # 同一檔案只分析一次，避免並行時多個進程寫入相同輸出
+        target_files = list(dict.fromkeys(os.path.abspath(p) for p in target_files))
         time_unit = self._resolve_time_unit(config)
         risk_free_rate = self._resolve_risk_free_rate(config)
-
-        task_results: List[MetricsTaskResult] = []
-        success_count = 0
-        failure_count = 0
-
-        self._display_info(
-            "開始績效分析",
-            details=[
-                f"分析檔案數：{len(target_files)}",
-                f"年化時間單位：{time_unit}",
-                f"無風險利率：{risk_free_rate:.4f}",
-            ],
+        workers = resolve_worker_count(
+            config.get("parallel_workers", 1), len(target_files)
         )
-
-        for file_path in target_files:
-            result = self._process_single_file(
-                file_path=file_path,
-                time_unit=time_unit,
-                risk_free_rate=risk_free_rate,
+        memory_limit_mb = config.get("memory_limit_mb")
+
+        details = [
+            f"分析檔案數：{len(target_files)}",
+            f"年化時間單位：{time_unit}",
+            f"無風險利率：{risk_free_rate:.4f}",
+        ]
+        if workers > 1:
+            details.append(f"並行進程數：{workers}")
+            if memory_limit_mb is not None:
+                details.append(f"記憶體上限：{float(memory_limit_mb):.0f} MB")
+        self._display_info("開始績效分析", details=details)
+
+        start_time = time.perf_counter()
+        if workers > 1:
+            task_results = self._process_files_parallel(
+                target_files, time_unit, risk_free_rate, workers, memory_limit_mb
             )
-            task_results.append(result)
-            if result.status == "success":
-                success_count += 1
-            else:
-                failure_count += 1
+        else:
+            task_results = [
+                self._process_single_file(
+                    file_path=file_path,
+                    time_unit=time_unit,
+                    risk_free_rate=risk_free_rate,
+                )
+                for file_path in target_files
+            ]
+        elapsed = time.perf_counter() - start_time
+        success_count = sum(result.status == "success" for result in task_results)
 
         self.summary = {
             "enabled": True,
             "executed": True,
             "success": success_count,
-            "failed": failure_count,
+            "failed": len(task_results) - success_count,
+            "parallel_workers": workers,
+            "elapsed_seconds": elapsed,
             "tasks": [result.__dict__ for result in task_results],
         }
 
-        self._display_summary(task_results)
+        self._display_summary(task_results, elapsed_seconds=elapsed, workers=workers)
         return self.summary
 
     # ------------------------------------------------------------------
@@ -151,8 +173,9 @@ class MetricsRunnerAutorunner:
 
         if file_selection_mode == "auto":
             if exported_abs:
+                # 本次回測導出的檔案（串流模式下為多個區塊檔）全部納入分析
                 exported_abs.sort(key=os.path.getmtime, reverse=True)
-                return [exported_abs[0]]
+                return exported_abs
             candidate = self._find_latest_parquet(parquet_directory)
             return [candidate] if candidate else []
 
@@ -225,17 +248,61 @@ class MetricsRunnerAutorunner:
             self._display_warning(warning)
             return MetricsTaskResult(abs_path, None, "failed", warning)
 
-        try:
-            df = pd.read_parquet(abs_path)
-            MetricsExporter.export(df, abs_path, time_unit, risk_free_rate)
-            output_path = self._derive_output_path(abs_path)
-            self._display_success(f"已匯出績效：{os.path.basename(output_path)}")
-            return MetricsTaskResult(abs_path, output_path, "success")
-        except Exception as exc:  # pragma: no cover (防止執行時意外)
-            error_msg = f"績效分析失敗：{exc}"
-            self.logger.exception(error_msg)
-            self._display_error(error_msg)
-            return MetricsTaskResult(abs_path, None, "failed", str(exc))
+        return self._handle_file_result(
+            export_metrics_file(abs_path, time_unit, risk_free_rate)
+        )
+
+    def _process_files_parallel(
+        self,
+        target_files: List[str],
+        time_unit: int,
+        risk_free_rate: float,
+        workers: int,
+        memory_limit_mb: Optional[float],
+    ) -> List[MetricsTaskResult]:
+        """以進程池並行分析多個檔案，結果按 target_files 順序返回"""
+        task_results: Dict[str, MetricsTaskResult] = {}
+
+        def on_result(result: FileMetricsResult) -> None:
+            # 完成時即顯示進度；摘要另按檔案列表順序顯示
+            task_results[result.source_path] = self._handle_file_result(result)
+
+        file_results = export_metrics_files(
+            target_files,
+            time_unit,
+            risk_free_rate,
+            max_workers=workers,
+            memory_limit_mb=(
+                float(memory_limit_mb) if memory_limit_mb is not None else None
+            ),
+            on_result=on_result,
+        )
+        return [task_results[result.source_path] for result in file_results]
+
+    def _handle_file_result(self, result: FileMetricsResult) -> MetricsTaskResult:
+        """顯示單一檔案的結果並轉為 MetricsTaskResult"""
+        timings = {
+            "n_rows": result.n_rows,
+            "read_seconds": result.read_seconds,
+            "export_seconds": result.export_seconds,
+            "total_seconds": result.total_seconds,
+        }
+        if result.status == "success":
+            output_path = self._derive_output_path(result.source_path)
+            self._display_success(
+                f"已匯出績效：{os.path.basename(output_path)}"
+                f"（{result.total_seconds:.2f} 秒）"
+            )
+            return MetricsTaskResult(
+                result.source_path, output_path, "success", **timings
+            )
+
+        error_msg = f"績效分析失敗：{result.error}"
+        self.logger.error("%s (%s)", error_msg, result.source_path)
+        self._display_error(error_msg)
+        return MetricsTaskResult(
+            result.source_path, None, "failed", result.error, **timings
+        )
 
     def _derive_output_path(self, parquet_path: str) -> str:
         orig_name = os.path.splitext(os.path.basename(parquet_path))[0]
@@ -244,11 +311,28 @@ class MetricsRunnerAutorunner:
         )
         return os.path.join(out_dir, f"{orig_name}_metrics.parquet")
 
-    def _display_summary(self, task_results: List[MetricsTaskResult]) -> None:
-        table = Table(title="📈 績效分析摘要", show_lines=True, border_style="#dbac30")
+    def _display_summary(
+        self,
+        task_results: List[MetricsTaskResult],
+        elapsed_seconds: Optional[float] = None,
+        workers: int = 1,
+    ) -> None:
+        caption = None
+        if elapsed_seconds is not None:
+            caption = f"總耗時 {elapsed_seconds:.2f} 秒，進程數 {workers}"
+        table = Table(
+            title="📈 績效分析摘要",
+            caption=caption,
+            show_lines=True,
+            border_style="#dbac30",
+        )
         table.add_column("檔案", style="white")
         table.add_column("輸出", style="#1e90ff")
         table.add_column("狀態", style="white")
+        table.add_column("記錄數", style="white", justify="right")
+        table.add_column("讀取(秒)", style="white", justify="right")
+        table.add_column("計算與匯出(秒)", style="white", justify="right")
+        table.add_column("總耗時(秒)", style="#dbac30", justify="right")
 
         for result in task_results:
             status_display = "✅ 成功" if result.status == "success" else "❌ 失敗"
@@ -256,7 +340,13 @@ class MetricsRunnerAutorunner:
                 os.path.basename(result.output_path) if result.output_path else "—"
             )
             table.add_row(
-                os.path.basename(result.source_path), output_display, status_display
+                os.path.basename(result.source_path),
+                output_display,
+                status_display,
+                f"{result.n_rows:,}",
+                f"{result.read_seconds:.2f}",
+                f"{result.export_seconds:.2f}",
+                f"{result.total_seconds:.2f}",
             )
 
         self.console.print(table)
@@ -77,7 +77,7 @@ flowchart TD
 import logging
 import re
 from collections import defaultdict
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import pandas as pd
 
@@ -177,6 +177,7 @@ class BaseBacktester:
         self.indicators_helper = IndicatorsBacktester(logger=self.logger)
         self.backtest_engine: Optional[Any] = None
         self.exporter = None
+        self.streamed_files: List[str] = []  # 串流模式下逐區塊導出的 Parquet 檔案
 
     def run(self, predictor_col: Optional[str] = None, limit_combinations: Optional[int] = None) -> None:
         """
@@ -200,7 +201,14 @@ class BaseBacktester:
 
         # 執行回測
         self.backtest_engine = BacktestEngine(self.data, self.frequency or "1D", self.logger, getattr(self, 'symbol', 'X'))
-        self.results = self.backtest_engine.run_backtests(config, limit_combinations=limit_combinations)
+        result_sink = (
+            self.create_stream_sink(config)
+            if (config.get("performance_params") or {}).get("streaming")
+            else None
+        )
+        self.results = self.backtest_engine.run_backtests(
+            config, limit_combinations=limit_combinations, result_sink=result_sink
+        )
 
         # 導出結果（步驟 6 的 panel 會在 _export_results 中適當時機觸發）
         self._export_results(config)
@@ -300,6 +308,27 @@ class BaseBacktester:
             self.predictor_column = str(selected)
             return selected
 
+    def create_stream_sink(self, config: Dict) -> Callable[[List[Dict]], None]:
+        """建立串流模式的區塊導出回調，每個區塊寫出一個 Parquet 檔案"""
+        self.streamed_files = []
+
+        def export_chunk(chunk_results: List[Dict]) -> None:
+            exporter = TradeRecordExporter_backtester(
+                trade_records=pd.DataFrame(),
+                frequency=self.frequency or "1D",
+                results=chunk_results,
+                data=self.data,
+                Backtest_id=config.get("Backtest_id", ""),
+                predictor_file_name=self.predictor_file_name,
+                predictor_column=self.predictor_column,
+                **config["trading_params"],
+            )
+            exporter.export_to_parquet()
+            if exporter.last_exported_path:
+                self.streamed_files.append(exporter.last_exported_path)
+
+        return export_chunk
+
     def _export_results(self, config: Dict) -> None:
         """導出結果"""
         if not self.results:
@@ -309,6 +338,20 @@ class BaseBacktester:
         # Step 6: 導出回測結果（在詢問CSV導出之前觸發）
         self._print_step_panel(6, "將回測結果導出為檔案格式")
 
+        if self.streamed_files:
+            # 串流模式已逐區塊導出，結果只保留摘要
+            console.print(
+                Panel(
+                    "\n".join(
+                        [f"串流模式已導出 {len(self.streamed_files)} 個 Parquet 檔案："]
+                        + self.streamed_files
+                    ),
+                    title="[bold #8f1511]👨‍💻 交易回測 Backtester[/bold #8f1511]",
+                    border_style="#dbac30",
+                )
+            )
+            return
+
         # 創建導出器並顯示智能摘要
         exporter = TradeRecordExporter_backtester(
             trade_records=pd.DataFrame(),
@@ -321,8 +364,14 @@ class BaseBacktester:
             **config["trading_params"],
         )
 
-        # 自動導出 parquet 文件（必須的）
-        exporter.export_to_parquet()
+        # 自動導出 parquet 文件（必須的）；增量回測只追加新K線到既有檔案
+        append_path = getattr(self.backtest_engine, "incremental_append_path", None)
+        if append_path:
+            exporter.append_to_parquet(append_path)
+        else:
+            exporter.export_to_parquet()
+        if hasattr(self.backtest_engine, "save_incremental_state"):
+            self.backtest_engine.save_incremental_state(exporter.last_exported_path)
 
         # 顯示智能摘要和操作選項
         exporter.display_backtest_summary()
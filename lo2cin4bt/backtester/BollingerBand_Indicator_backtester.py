@@ -79,6 +79,8 @@ flowchart TD
 - v2.0: 整合 Numba JIT 編譯優化
 - v2.1: 新增向量化批量計算
 - v2.2: 完善緩存機制與性能優化
+- v2.3: 滾動平均/標準差改為 O(n) 增量計算（補償求和、滑動 Welford 更新）
+- v2.4: 向量化路徑按 ma_length 共用均值/標準差，多個窗口長度時改用多窗口批量核心
 
 【參考】
 ------------------------------------------------------------
@@ -94,10 +96,11 @@ import numpy as np
 import pandas as pd
 
 from .IndicatorParams_backtester import IndicatorParams
+from .MovingAverage_Indicator_backtester import MULTI_WINDOW_MIN_LENGTHS
 
 # 優化：嘗試導入 Numba 進行 JIT 編譯加速
 try:
-    from numba import njit
+    from numba import njit, prange
 
     NUMBA_AVAILABLE = True
 except ImportError:
@@ -106,40 +109,153 @@ except ImportError:
 
 # 核心算法：純 Numba + ndarray 實現
 if NUMBA_AVAILABLE:
+    from .MovingAverage_Indicator_backtester import (
+        _calculate_sma_multi_njit,
+        _neumaier_add,
+    )
 
-    @njit(fastmath=True, cache=True)
+    # 滾動窗口核心：O(n) 增量更新（Neumaier 補償加法與 SMA 核心共用）
+    # 注意：補償求和與 Welford 更新依賴運算順序，這些函數不可開啟 fastmath
+    # 窗口內含 NaN/inf 時逐窗直接計算，保持與逐窗求和相同的結果
+
+    @njit(cache=True)
     def _calculate_rolling_mean_njit(data, window):
-        """使用 Numba 計算滾動平均"""
+        """使用 Numba 計算滾動平均（O(n) 滾動補償求和）"""
         n = len(data)
         result = np.zeros(n)
+        if window < 1:
+            return result
+
+        total = 0.0
+        compensation = 0.0
+        state_valid = False
+        bad_count = 0  # 窗口內非有限值數量
+
+        for i in range(n):
+            if not np.isfinite(data[i]):
+                bad_count += 1
+            if i >= window and not np.isfinite(data[i - window]):
+                bad_count -= 1
+            if i < window - 1:
+                continue
 
-        for i in range(window - 1, n):
-            sum_val = 0.0
-            for j in range(i - window + 1, i + 1):
-                sum_val += data[j]
-            result[i] = sum_val / window
+            start = i - window + 1
+            if bad_count > 0:
+                sum_val = 0.0
+                for j in range(start, i + 1):
+                    sum_val += data[j]
+                result[i] = sum_val / window
+                state_valid = False
+                continue
+
+            if state_valid:
+                total, compensation = _neumaier_add(total, compensation, data[i])
+                total, compensation = _neumaier_add(
+                    total, compensation, -data[start - 1]
+                )
+            else:
+                total = 0.0
+                compensation = 0.0
+                for j in range(start, i + 1):
+                    total, compensation = _neumaier_add(total, compensation, data[j])
+                state_valid = True
+            result[i] = (total + compensation) / window
 
         return result
 
-    @njit(fastmath=True, cache=True)
+    @njit(cache=True)
     def _calculate_rolling_std_njit(data, window):
-        """使用 Numba 計算滾動標準差"""
+        """
+        使用 Numba 計算滾動標準差（母體標準差，攤銷 O(n) 滑動 Welford 更新）
+
+        窗口滑動一格時以「新值替換舊值」同時更新均值與平方差和：
+        mean' = mean + (x_new - x_old) / w
+        M2'   = M2 + (x_new - x_old) * (x_new - mean' + x_old - mean)
+        """
         n = len(data)
         result = np.zeros(n)
+        if window < 1:
+            return result
+        if window == 1:
+            # 單點窗口標準差恆為 0（非有限值除外）
+            for i in range(n):
+                if not np.isfinite(data[i]):
+                    result[i] = np.nan
+            return result
+
+        shift = 0.0  # 平移量：狀態以 (x - shift) 維護
+        mean_val = 0.0
+        m2 = 0.0
+        state_valid = False
+        bad_count = 0  # 窗口內非有限值數量
+        # 滑動更新的捨入誤差會累積，定期以兩遍法重新同步（攤銷後仍為 O(n)）
+        resync_interval = max(window * 16, 1024)
+        updates = 0
+
+        for i in range(n):
+            if not np.isfinite(data[i]):
+                bad_count += 1
+            if i >= window and not np.isfinite(data[i - window]):
+                bad_count -= 1
+            if i < window - 1:
+                continue
 
-        for i in range(window - 1, n):
-            mean_val = 0.0
-            for j in range(i - window + 1, i + 1):
-                mean_val += data[j]
-            mean_val /= window
+            start = i - window + 1
+            if bad_count > 0:
+                window_mean = 0.0
+                for j in range(start, i + 1):
+                    window_mean += data[j]
+                window_mean /= window
+                var_val = 0.0
+                for j in range(start, i + 1):
+                    var_val += (data[j] - window_mean) ** 2
+                result[i] = np.sqrt(var_val / window)
+                state_valid = False
+                continue
 
-            var_val = 0.0
-            for j in range(i - window + 1, i + 1):
-                var_val += (data[j] - mean_val) ** 2
-            result[i] = np.sqrt(var_val / window)
+            need_init = not state_valid or updates >= resync_interval
+            if not need_init:
+                x_new = data[i] - shift
+                x_old = data[start - 1] - shift
+                delta = x_new - x_old
+                new_mean = mean_val + delta / window
+                new_m2 = m2 + delta * (x_new - new_mean + x_old - mean_val)
+                if new_m2 < m2 * 1e-3:
+                    # 大值離開窗口使平方差和驟降時有效位數不足，改為重新初始化
+                    need_init = True
+                else:
+                    mean_val = new_mean
+                    m2 = new_m2
+                    updates += 1
+            if need_init:
+                # 以兩遍法初始化窗口；以窗口首值平移，避免大均值小波動時的相消誤差
+                shift = data[start]
+                mean_val = 0.0
+                for j in range(start, i + 1):
+                    mean_val += data[j] - shift
+                mean_val /= window
+                m2 = 0.0
+                for j in range(start, i + 1):
+                    m2 += (data[j] - shift - mean_val) ** 2
+                state_valid = True
+                updates = 0
+            result[i] = np.sqrt(m2 / window)
 
         return result
 
+    @njit(parallel=True, cache=True)
+    def _calculate_rolling_std_multi_njit(data, windows):
+        """
+        以 prange 並行計算多個窗口長度的滾動標準差，返回 shape (n_time, n_windows)
+
+        標準差不以平方前綴和相減求得（大均值時相消誤差嚴重），每個窗口仍使用滑動 Welford 核心。
+        """
+        n_windows = len(windows)
+        out = np.zeros((n_windows, len(data)))
+        for k in prange(n_windows):
+            out[k, :] = _calculate_rolling_std_njit(data, windows[k])
+        return out.T
+
     @njit(fastmath=True, cache=True)
     def _generate_bollinger_signals_njit(
         predictor_values, ma_length, std_multiplier, strat_idx
@@ -385,25 +501,39 @@ class BollingerBandIndicator:
 
         # 批量計算所有參數的布林帶 - 使用Numba優化
         unique_combinations = list(set(zip(ma_lengths, std_multipliers)))
+        missing_combinations = [
+            (ma_length, std_multiplier)
+            for ma_length, std_multiplier in unique_combinations
+            if ma_length <= len(data)
+            and (ma_length, std_multiplier, predictor) not in global_boll_cache
+        ]
+
+        # 均值與標準差只依賴 ma_length，同一長度的不同倍數共用
+        missing_lengths = sorted({ma_length for ma_length, _ in missing_combinations})
+        rolling_stats = {}
+        if missing_lengths and len(missing_lengths) >= MULTI_WINDOW_MIN_LENGTHS:
+            # 網格包含多個窗口長度：多窗口核心一次計算所有均值與標準差
+            windows = np.asarray(missing_lengths, dtype=np.int64)
+            mean_matrix = _calculate_sma_multi_njit(predictor_values, windows)
+            std_matrix = _calculate_rolling_std_multi_njit(predictor_values, windows)
+            for k, ma_length in enumerate(missing_lengths):
+                rolling_stats[ma_length] = (mean_matrix[:, k], std_matrix[:, k])
+        else:
+            for ma_length in missing_lengths:
+                rolling_stats[ma_length] = (
+                    _calculate_rolling_mean_njit(predictor_values, ma_length),
+                    _calculate_rolling_std_njit(predictor_values, ma_length),
+                )
 
-        # print(f"🔧 計算 {len(unique_combinations)} 個唯一參數組合")  # 移除重複輸出
-
-        for ma_length, std_multiplier in unique_combinations:
-            if ma_length <= len(data):
-                cache_key = (ma_length, std_multiplier, predictor)
-                if cache_key not in global_boll_cache:
-                    # 使用Numba優化的函數計算布林帶
-                    ma_values = _calculate_rolling_mean_njit(
-                        predictor_values, ma_length
-                    )
-                    std_values = _calculate_rolling_std_njit(
-                        predictor_values, ma_length
-                    )
-
-                    upper_band = ma_values + (std_values * std_multiplier)
-                    lower_band = ma_values - (std_values * std_multiplier)
-
-                    global_boll_cache[cache_key] = (upper_band, lower_band, ma_values)
+        for ma_length, std_multiplier in missing_combinations:
+            ma_values, std_values = rolling_stats[ma_length]
+            upper_band = ma_values + (std_values * std_multiplier)
+            lower_band = ma_values - (std_values * std_multiplier)
+            global_boll_cache[(ma_length, std_multiplier, predictor)] = (
+                upper_band,
+                lower_band,
+                ma_values,
+            )
 
         # 為每個任務生成信號 - 使用Numba優化
         for i, (
@@ -41,6 +41,7 @@ flowchart TD
 - 向量化功能與單個指標功能保持邏輯一致
 - Numba 優化需要確保跨平台兼容性
 - 緩存機制需要正確管理記憶體使用
+- global_hl_cache 鍵為 (m_length, predictor)，值為滾動極值與連續等同天數，與 n_length/策略無關
 
 【常見易錯點】
 ------------------------------------------------------------
@@ -79,6 +80,7 @@ flowchart TD
 - v2.0: 整合 Numba JIT 編譯優化
 - v2.1: 新增向量化批量計算
 - v2.2: 完善緩存機制與性能優化
+- v2.3: 改以單調佇列 O(n) 滾動極值 + 連續等同天數生成信號，按 (m_length, 預測因子) 緩存
 
 【參考】
 ------------------------------------------------------------
@@ -108,12 +110,109 @@ except ImportError:
 # 核心算法：純 Numba + ndarray 實現
 if NUMBA_AVAILABLE:
 
-    @njit(fastmath=True, cache=True)  # type: ignore[misc]
+    @njit(cache=True)  # type: ignore[misc]
+    def _rolling_max_min_njit(predictor_values, m_length):  # type: ignore[no-untyped-def]
+        """
+        單調雙端佇列計算滾動最大/最小值，O(n)
+
+        第 i 天的窗口為 [max(0, i - m_length + 1), i]，與原本逐窗切片 .max()/.min() 一致。
+        """
+        if m_length < 1:
+            raise ValueError("m_length 必須大於 0")
+
+        n = len(predictor_values)
+        rolling_max = np.empty(n)
+        rolling_min = np.empty(n)
+        max_queue = np.empty(n, dtype=np.int64)
+        min_queue = np.empty(n, dtype=np.int64)
+        max_head = 0
+        max_tail = 0
+        min_head = 0
+        min_tail = 0
+
+        for i in range(n):
+            value = predictor_values[i]
+
+            while max_tail > max_head and predictor_values[max_queue[max_tail - 1]] <= value:
+                max_tail -= 1
+            max_queue[max_tail] = i
+            max_tail += 1
+            if max_queue[max_head] <= i - m_length:
+                max_head += 1
+
+            while min_tail > min_head and predictor_values[min_queue[min_tail - 1]] >= value:
+                min_tail -= 1
+            min_queue[min_tail] = i
+            min_tail += 1
+            if min_queue[min_head] <= i - m_length:
+                min_head += 1
+
+            rolling_max[i] = predictor_values[max_queue[max_head]]
+            rolling_min[i] = predictor_values[min_queue[min_head]]
+
+        return rolling_max, rolling_min
+
+    @njit(cache=True)  # type: ignore[misc]
+    def _equal_extreme_run_lengths_njit(
+        predictor_values, rolling_extreme
+    ):  # type: ignore[no-untyped-def]
+        """計算截至每天連續「數值等同滾動極值」的天數（容差 1e-10）"""
+        n = len(predictor_values)
+        run_lengths = np.zeros(n, dtype=np.int64)
+        run = 0
+        for i in range(n):
+            if abs(predictor_values[i] - rolling_extreme[i]) > 1e-10:
+                run = 0
+            else:
+                run += 1
+            run_lengths[i] = run
+        return run_lengths
+
+    @njit(cache=True)  # type: ignore[misc]
+    def _calculate_hl_extremes_njit(predictor_values, m_length):  # type: ignore[no-untyped-def]
+        """
+        計算只取決於 m_length 的中間結果，供同一預測因子的所有 n_length/策略共用
+
+        Returns:
+            (滾動最大值, 滾動最小值, 連續等同高位天數, 連續等同低位天數)
+        """
+        rolling_max, rolling_min = _rolling_max_min_njit(predictor_values, m_length)
+        high_run = _equal_extreme_run_lengths_njit(predictor_values, rolling_max)
+        low_run = _equal_extreme_run_lengths_njit(predictor_values, rolling_min)
+        return rolling_max, rolling_min, high_run, low_run
+
+    @njit(cache=True)  # type: ignore[misc]
+    def _hl_signals_from_runs_njit(
+        high_run, low_run, n_length, m_length, strat_idx
+    ):  # type: ignore[no-untyped-def]
+        """
+        由連續等同天數生成HL信號：第 i 天往前連續 n 天都等同各自過去 m 天的極值
+        等價於截至第 i 天的連續天數 >= n
+        """
+        n = len(high_run)
+        signals = np.zeros(n)
+
+        if strat_idx == 1 or strat_idx == 2:
+            run_lengths = high_run
+        elif strat_idx == 3 or strat_idx == 4:
+            run_lengths = low_run
+        else:
+            return signals
+        signal_value = 1.0 if strat_idx == 1 or strat_idx == 3 else -1.0
+
+        # 起始點為 m_length + n_length - 1，這樣檢查連續n天時，每天都有m天的歷史數據
+        for i in range(m_length + n_length - 1, n):
+            if run_lengths[i] >= n_length:
+                signals[i] = signal_value
+
+        return signals
+
+    @njit(cache=True)  # type: ignore[misc]
     def _generate_hl_signals_njit(
         predictor_values, n_length, m_length, strat_idx
-    ):  # type: ignore[no-untyped-def] # pylint: disable=too-complex
+    ):  # type: ignore[no-untyped-def]
         """
-        使用 Numba 生成HL等同信號 - 修正版本
+        使用 Numba 生成HL等同信號
         全程使用 ndarray，無 pandas 依賴
 
         邏輯：
@@ -121,107 +220,11 @@ if NUMBA_AVAILABLE:
         - HL2: 連續 n 日數值等同過去 m 天的歷史高位，發出賣出信號
         - HL3: 連續 n 日數值等同過去 m 天的歷史低位，發出買入信號
         - HL4: 連續 n 日數值等同過去 m 天的歷史低位，發出賣出信號
-        """
-        n = len(predictor_values)
-        signals = np.zeros(n)
-
-        # 生成信號
-        # 需要確保有足夠的數據進行連續次數檢查
-        # 起始點應該是 m_length + n_length - 1，這樣檢查連續n天時，每天都有m天的歷史數據
-        for i in range(m_length + n_length - 1, n):
-            # 計算過去m天的歷史高位和低位（包括當前第i天）
-            start_idx = i - m_length + 1  # 包含第i天
-            end_idx = i + 1  # 包含第i天
-
-            _ = predictor_values[start_idx:end_idx].max()  # historical_high
-            _ = predictor_values[start_idx:end_idx].min()  # historical_low
-
-            # 檢查連續n日是否都等同各自的歷史高位或低位
-            if strat_idx == 1:  # HL1: 連續n日等同高位做多
-                # 檢查連續n天，每天都要等同各自過去m天的最高值
-                # 確保有足夠的數據進行連續次數檢查
-                if i >= n_length - 1:
-                    all_equal_high = True
-                    for j in range(i - n_length + 1, i + 1):
-                        # 確保j不會超出範圍
-                        if j < 0:
-                            all_equal_high = False
-                            break
-                        # 計算第j天過去m天的最高值
-                        j_start = max(0, j - m_length + 1)
-                        j_end = j + 1
-                        j_historical_high = predictor_values[j_start:j_end].max()
-                        # 檢查第j天是否等同其過去m天的最高值
-                        if abs(predictor_values[j] - j_historical_high) > 1e-10:
-                            all_equal_high = False
-                            break
-                    if all_equal_high:
-                        signals[i] = 1.0
-
-            elif strat_idx == 2:  # HL2: 連續n日等同高位做空
-                # 檢查連續n天，每天都要等同各自過去m天的最高值
-                # 確保有足夠的數據進行連續次數檢查
-                if i >= n_length - 1:
-                    all_equal_high = True
-                    for j in range(i - n_length + 1, i + 1):
-                        # 確保j不會超出範圍
-                        if j < 0:
-                            all_equal_high = False
-                            break
-                        # 計算第j天過去m天的最高值
-                        j_start = max(0, j - m_length + 1)
-                        j_end = j + 1
-                        j_historical_high = predictor_values[j_start:j_end].max()
-                        # 檢查第j天是否等同其過去m天的最高值
-                        if abs(predictor_values[j] - j_historical_high) > 1e-10:
-                            all_equal_high = False
-                            break
-                    if all_equal_high:
-                        signals[i] = -1.0
-
-            elif strat_idx == 3:  # HL3: 連續n日等同低位做多
-                # 檢查連續n天，每天都要等同各自過去m天的最低值
-                # 確保有足夠的數據進行連續次數檢查
-                if i >= n_length - 1:
-                    all_equal_low = True
-                    for j in range(i - n_length + 1, i + 1):
-                        # 確保j不會超出範圍
-                        if j < 0:
-                            all_equal_low = False
-                            break
-                        # 計算第j天過去m天的最低值
-                        j_start = max(0, j - m_length + 1)
-                        j_end = j + 1
-                        j_historical_low = predictor_values[j_start:j_end].min()
-                        # 檢查第j天是否等同其過去m天的最低值
-                        if abs(predictor_values[j] - j_historical_low) > 1e-10:
-                            all_equal_low = False
-                            break
-                    if all_equal_low:
-                        signals[i] = 1.0
-
-            elif strat_idx == 4:  # HL4: 連續n日等同低位做空
-                # 檢查連續n天，每天都要等同各自過去m天的最低值
-                # 確保有足夠的數據進行連續次數檢查
-                if i >= n_length - 1:
-                    all_equal_low = True
-                    for j in range(i - n_length + 1, i + 1):
-                        # 確保j不會超出範圍
-                        if j < 0:
-                            all_equal_low = False
-                            break
-                        # 計算第j天過去m天的最低值
-                        j_start = max(0, j - m_length + 1)
-                        j_end = j + 1
-                        j_historical_low = predictor_values[j_start:j_end].min()
-                        # 檢查第j天是否等同其過去m天的最低值
-                        if abs(predictor_values[j] - j_historical_low) > 1e-10:
-                            all_equal_low = False
-                            break
-                    if all_equal_low:
-                        signals[i] = -1.0
 
-        return signals
+        滾動極值以單調佇列 O(n) 計算，再以連續天數判斷，總成本 O(n)。
+        """
+        _, _, high_run, low_run = _calculate_hl_extremes_njit(predictor_values, m_length)
+        return _hl_signals_from_runs_njit(high_run, low_run, n_length, m_length, strat_idx)
 
 
 class HLIndicator:
@@ -423,14 +426,26 @@ class HLIndicator:
         predictor_values = data[predictor].values.astype(np.float64)
         predictor_values = np.nan_to_num(predictor_values, nan=0.0)
 
-        # 直接為每個任務生成信號 - 真正的向量化處理
+        # 滾動極值與連續等同天數只取決於 (m_length, predictor)，跨任務共用
+        for m_length in sorted(set(m_lengths)):
+            cache_key = (m_length, predictor)
+            if cache_key not in global_hl_cache:
+                try:
+                    global_hl_cache[cache_key] = _calculate_hl_extremes_njit(
+                        predictor_values, m_length
+                    )
+                except Exception:
+                    # 無效的 m_length 留給下方任務迴圈按原方式記錄並置零
+                    pass
+
+        # 為每個任務生成信號 - 只需按 n_length 與策略讀取緩存的連續天數
         for i, (n_length, m_length, strat_idx, task_idx, indicator_idx) in enumerate(
             zip(n_lengths, m_lengths, strat_indices, task_indices, indicator_indices)
         ):
             try:
-                # 直接使用Numba優化的函數計算HL信號
-                signal_values = _generate_hl_signals_njit(
-                    predictor_values, n_length, m_length, strat_idx
+                _, _, high_run, low_run = global_hl_cache[(m_length, predictor)]
+                signal_values = _hl_signals_from_runs_njit(
+                    high_run, low_run, n_length, m_length, strat_idx
                 )
 
                 # 確保在有效期間之前不產生信號
@@ -449,6 +464,3 @@ class HLIndicator:
                         f"HL突破信號生成失敗 (task_idx={task_idx}, indicator_idx={indicator_idx}): {e}"
                     )
                 signals_matrix[:, task_idx, indicator_idx] = 0
-
-    # 注意：緩存機制已簡化，直接使用 _generate_hl_signals_njit 進行計算
-    # 如需緩存功能，可在 VectorBacktestEngine 中實現
@@ -0,0 +1,244 @@
+"""
+IncrementalState_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的「增量回測狀態」，讓每日追加新K線後的回測只推進新K線，
+不再重跑整段歷史。
+- 保存每個策略在最後一根K線的模擬終止狀態（持倉、權益、開倉價格、開倉權益、前一根資金曲線）
+- 保存交易記錄的接續狀態（已開倉交易數、未平倉交易的開倉索引、持倉期數）
+- 保存最後數根K線的開/平倉信號，下次執行時用來驗證指標暖機窗口是否足夠
+- 以歷史數據指紋與組合空間指紋確認新數據只是「追加」且參數網格未變
+- 指標只在「暖機窗口 + 新K線」上重新計算，窗口長度由各指標參數的回看長度決定
+
+【流程與數據流】
+------------------------------------------------------------
+- 完整回測後 VectorBacktestEngine 以 IncrementalBacktestState 記錄終止狀態，
+  導出 Parquet 後連同輸出路徑保存為 .npz
+- 下次執行時載入狀態並驗證指紋，通過則只在尾部窗口生成信號、從終止狀態續跑模擬，
+  新K線的記錄追加到既有 Parquet
+
+```mermaid
+flowchart TD
+    A[完整回測] -->|終止狀態 + 信號尾部| B[IncrementalBacktestState.save]
+    C[追加新K線] -->|載入 + 驗證指紋| B
+    C -->|暖機窗口 + 新K線| D[信號生成]
+    D -->|重疊K線信號一致| E[續跑模擬]
+    D -->|不一致| F[完整重跑]
+    E -->|新K線記錄| G[追加到既有 Parquet]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 新增指標時需在 indicator_lookback 補上其回看長度，否則該指標會使用完整歷史計算信號
+- EMA 等遞迴指標依賴整段歷史，回看長度返回 None（信號仍以完整歷史計算，模擬只推進新K線）
+- 狀態檔格式變動時需遞增 INCREMENTAL_STATE_VERSION，舊狀態會自動改為完整重跑
+- 終止狀態欄位順序與 TradeSimulator 的 SIMULATION_STATE_SIZE 定義一致
+
+【常見易錯點】
+------------------------------------------------------------
+- 歷史K線被修訂（非純追加）時指紋不符，必須完整重跑
+- 組合空間、預測因子、交易參數或收益 dtype 改變時狀態不可重用
+- 滾動核心在不同起點的浮點捨入可能不同，臨界信號以重疊K線驗證，不一致即完整重跑
+
+【範例】
+------------------------------------------------------------
+- state = IncrementalBacktestState.load("records/backtester/daily_state.npz")
+- state.save(path)
+- warmup = warmup_bars(config["indicator_params"].values(), trade_delay=1)
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 VectorBacktestEngine 在 performance_params.incremental_state 啟用時使用
+- 終止狀態由 TradeSimulator 的可續跑模擬核心讀寫
+- 新記錄由 TradeRecordExporter.append_to_parquet 追加到既有檔案
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# 狀態檔格式版本，格式變動時遞增
+INCREMENTAL_STATE_VERSION = 1
+
+# 保存並於下次執行時比對的信號尾部K線數
+SIGNAL_GUARD_BARS = 8
+
+
+def history_fingerprint(data: pd.DataFrame, n_bars: int, columns: List[str]) -> str:
+    """前 n_bars 根K線（含索引）在指定欄位上的數據指紋，用於確認新數據只是追加"""
+    columns = [col for col in dict.fromkeys(columns) if col in data.columns]
+    hashed = pd.util.hash_pandas_object(data[columns].iloc[:n_bars], index=True)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(",".join(columns).encode())
+    digest.update(np.ascontiguousarray(hashed.to_numpy()).tobytes())
+    return digest.hexdigest()
+
+
+def indicator_lookback(param: Any) -> Optional[int]:
+    """
+    單一指標參數計算最新一根K線信號所需的回看K線數
+
+    Returns:
+        Optional[int]: 回看K線數；None 表示依賴整段歷史（如 EMA）或無法判斷
+    """
+    indicator_type = getattr(param, "indicator_type", None)
+    get = getattr(param, "get_param", None)
+    if get is None:
+        return None
+
+    try:
+        if indicator_type == "MA":
+            if str(get("ma_type", "SMA")).upper() == "EMA":
+                return None
+            periods = [
+                int(get(name))
+                for name in ("period", "shortMA_period", "longMA_period")
+                if get(name) is not None
+            ]
+            if not periods:
+                return None
+            # 交叉策略比較前一根K線，連續策略再回看 m 根
+            return max(periods) + int(get("m", 1) or 1) + 1
+        if indicator_type == "BOLL":
+            return int(get("ma_length")) + 1
+        if indicator_type == "HL":
+            return int(get("m_length")) + int(get("n_length")) + 1
+        if indicator_type == "PERC":
+            return int(get("window")) + 1
+        if indicator_type == "VALUE":
+            return int(get("n_length", 1) or 1) + 1
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def warmup_bars(param_lists: Iterable[Iterable[Any]], trade_delay: int) -> Optional[int]:
+    """
+    增量回測的暖機窗口長度：最長指標回看 + 交易延遲 + 重疊驗證K線數
+
+    Returns:
+        Optional[int]: 窗口K線數；任一指標依賴整段歷史時返回 None
+    """
+    lookback = 1
+    for params in param_lists:
+        for param in params:
+            value = indicator_lookback(param)
+            if value is None:
+                return None
+            lookback = max(lookback, value)
+    return lookback + max(0, int(trade_delay)) + SIGNAL_GUARD_BARS
+
+
+class IncrementalBacktestState:
+    """
+    增量回測狀態 - 上次執行的終止狀態與驗證所需的指紋
+
+    Attributes:
+        n_bars (int): 已處理的K線數
+        history_fingerprint (str): 已處理K線的數據指紋
+        run_fingerprint (str): 組合空間、預測因子與交易參數的指紋
+        backtest_id_prefix (str): Backtest_id 前綴，追加記錄沿用相同 Backtest_id
+        simulation_state (np.ndarray): (n_tasks, SIMULATION_STATE_SIZE) 模擬終止狀態
+        trade_state (np.ndarray): (n_tasks, 3) 交易記錄接續狀態
+        entry_tail (np.ndarray): 最後數根K線的開倉信號 (n_guard, n_tasks)，int8
+        exit_tail (np.ndarray): 最後數根K線的平倉信號 (n_guard, n_tasks)，int8
+        output_path (Optional[str]): 追加記錄的 Parquet 檔案
+    """
+
+    def __init__(
+        self,
+        n_bars: int,
+        history_fingerprint: str,
+        run_fingerprint: str,
+        backtest_id_prefix: str,
+        simulation_state: np.ndarray,
+        trade_state: np.ndarray,
+        entry_tail: np.ndarray,
+        exit_tail: np.ndarray,
+        output_path: Optional[str] = None,
+    ):
+        self.n_bars = int(n_bars)
+        self.history_fingerprint = history_fingerprint
+        self.run_fingerprint = run_fingerprint
+        self.backtest_id_prefix = backtest_id_prefix
+        self.simulation_state = simulation_state
+        self.trade_state = trade_state
+        self.entry_tail = entry_tail
+        self.exit_tail = exit_tail
+        self.output_path = output_path
+
+    @property
+    def n_tasks(self) -> int:
+        return int(self.simulation_state.shape[0])
+
+    def save(self, path: str) -> None:
+        """以 .npz 原子寫入狀態（暫存檔 + rename）"""
+        meta = {
+            "version": INCREMENTAL_STATE_VERSION,
+            "n_bars": self.n_bars,
+            "history_fingerprint": self.history_fingerprint,
+            "run_fingerprint": self.run_fingerprint,
+            "backtest_id_prefix": self.backtest_id_prefix,
+            "output_path": self.output_path,
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                np.savez(
+                    handle,
+                    meta=np.array(json.dumps(meta)),
+                    simulation_state=self.simulation_state,
+                    trade_state=self.trade_state,
+                    entry_tail=self.entry_tail,
+                    exit_tail=self.exit_tail,
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IncrementalBacktestState"]:
+        """
+        載入狀態檔
+
+        Returns:
+            Optional[IncrementalBacktestState]: 檔案不存在時返回 None
+
+        Raises:
+            ValueError: 狀態檔格式版本不符或內容損壞
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                meta = json.loads(str(archive["meta"]))
+                arrays = {
+                    key: archive[key]
+                    for key in ("simulation_state", "trade_state", "entry_tail", "exit_tail")
+                }
+        except (OSError, KeyError, ValueError) as e:
+            raise ValueError(f"增量回測狀態檔無法讀取: {e}") from e
+
+        if meta.get("version") != INCREMENTAL_STATE_VERSION:
+            raise ValueError(
+                f"增量回測狀態檔版本 {meta.get('version')} 與目前版本 "
+                f"{INCREMENTAL_STATE_VERSION} 不符"
+            )
+        return cls(
+            meta["n_bars"],
+            meta["history_fingerprint"],
+            meta["run_fingerprint"],
+            meta["backtest_id_prefix"],
+            output_path=meta.get("output_path"),
+            **arrays,
+        )
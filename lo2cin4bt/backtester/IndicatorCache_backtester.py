@@ -0,0 +1,413 @@
+"""
+IndicatorCache_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的「引擎級指標緩存」，由 VectorBacktestEngine 在整個生命週期內
+持有一份，取代每次信號生成時新建的 global_ma_cache / global_boll_cache 等字典。
+- 開倉與平倉信號、不同策略分組、串流模式的各個區塊共用同一份指標中間結果
+- 以 (指標核心, 指標緩存鍵) 定址，各指標原有的緩存鍵已包含參數與預測因子
+- 按位元組數設定容量上限，超出時按最近最少使用（LRU）順序淘汰
+- 統計命中/計算次數，顯示網格實際重用了多少指標計算
+- 可選的磁碟緩存（DiskIndicatorStore）：中間結果以 npy/npz 檔保存在 records/cache，
+  以「預測因子數據指紋 + 指標核心 + 緩存鍵」的雜湊命名，跨次執行重用，按總大小淘汰
+
+【流程與數據流】
+------------------------------------------------------------
+- VectorBacktestEngine.__init__ 建立 IndicatorCache
+- _vectorized_generate_signals 以 namespace("MA") 等視圖傳給各指標的向量化函數
+- 指標函數照常以 dict 介面（in / [] / 賦值）讀寫緩存
+- 每次信號生成結束呼叫 end_batch()，此時才按容量淘汰
+- 啟用磁碟緩存時，記憶體未命中會先查詢磁碟，新計算的條目同時寫入磁碟
+
+```mermaid
+flowchart TD
+    A[VectorBacktestEngine] -->|建立| B[IndicatorCache]
+    B -->|namespace| C[IndicatorCacheView]
+    C -->|dict 介面| D[各指標 vectorized_calculate_*]
+    B -->|未命中 / 新條目| G[DiskIndicatorStore]
+    A -->|end_batch| B
+    B -->|stats| E[回測結果摘要]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 指標函數慣用「先檢查缺失 → 批量計算寫入 → 再逐任務讀取」，批次中途淘汰會導致讀取失敗，
+  因此淘汰只在 end_batch() 進行，單一批次內緩存可暫時超過上限
+- 記憶體緩存鍵只含預測因子名稱，不含數據內容；引擎數據變動時必須 clear()
+- 磁碟緩存鍵包含預測因子數據指紋，數據變動自然失效；指標核心算法變動時
+  必須遞增 DISK_CACHE_VERSION，使舊檔案不再被命中
+- 命中以「本批次首次讀到先前批次寫入的條目」計一次，計算以寫入新條目計一次，
+  兩者之比即為指標計算的節省比例
+
+【常見易錯點】
+------------------------------------------------------------
+- 緩存值必須視為唯讀，修改會影響之後所有批次
+- 容量上限設為 0 時每個批次結束即清空，等同舊版的單次緩存
+- 磁碟緩存只保存 ndarray 或 ndarray 的 tuple，其他值只留在記憶體
+- 多個進程共用同一目錄時各自維護索引，淘汰以各自所見的檔案為準
+
+【範例】
+------------------------------------------------------------
+- cache = IndicatorCache(max_mb=256)
+- ma_cache = cache.namespace("MA")；if key not in ma_cache: ma_cache[key] = values
+- cache.end_batch()；cache.stats()["hit_rate"]
+- cache.attach_disk_store(DiskIndicatorStore(max_mb=1024))
+- ma_cache = cache.namespace("MA", fingerprint=predictor_fingerprint(data, "Close"))
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 VectorBacktestEngine 建立與使用
+- 視圖傳給 MovingAverage / BollingerBand / HL / VALUE / Percentile 指標的向量化函數
+- 磁碟緩存由 performance_params.disk_cache 啟用，預設目錄 records/cache
+"""
+
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Dict, Hashable, Iterator, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 指標核心算法變動時遞增，使舊的磁碟緩存檔案失效
+DISK_CACHE_VERSION = 1
+
+
+def default_disk_cache_dir() -> str:
+    """預設磁碟緩存目錄：records/cache"""
+    return os.path.join(os.path.dirname(os.path.dirname(__file__)), "records", "cache")
+
+
+def predictor_fingerprint(data: pd.DataFrame, predictor: str) -> str:
+    """預測因子數據指紋（float64 數值內容的雜湊）"""
+    values = np.ascontiguousarray(data[predictor].values, dtype=np.float64)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(values.shape).encode())
+    digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def _estimate_nbytes(value: Any) -> int:
+    """估算緩存值佔用的位元組數（ndarray 或其 tuple/list）"""
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sum(_estimate_nbytes(item) for item in value)
+    return 64
+
+
+class DiskIndicatorStore:
+    """磁碟指標緩存 - 以 npy/npz 檔保存指標中間結果，總大小超出上限時淘汰最久未使用的檔案"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_mb: Optional[float] = 1024,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Args:
+            cache_dir: 緩存目錄，None 時使用 records/cache
+            max_mb: 總大小上限（MB），None 表示不限制
+            logger: 日誌記錄器
+        """
+        self.cache_dir = cache_dir or default_disk_cache_dir()
+        self.max_bytes = None if max_mb is None else max(0, int(float(max_mb) * 1024 * 1024))
+        self.logger = logger or logging.getLogger("DiskIndicatorStore")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # digest -> (路徑, 位元組數, 最近使用時間)
+        self._index: Dict[str, Tuple[str, int, float]] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.writes = 0
+        self.evictions = 0
+        self._scan()
+
+    def _scan(self) -> None:
+        """建立現有緩存檔案的索引"""
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith((".npy", ".npz")):
+                stat = entry.stat()
+                self._index[entry.name[:-4]] = (entry.path, stat.st_size, stat.st_mtime)
+                self.total_bytes += stat.st_size
+
+    @staticmethod
+    def make_key(fingerprint: str, kernel: str, key: Hashable) -> str:
+        """由數據指紋、指標核心與緩存鍵生成檔名雜湊"""
+        raw = f"{DISK_CACHE_VERSION}|{fingerprint}|{kernel}|{key!r}"
+        return hashlib.blake2b(raw.encode(), digest_size=20).hexdigest()
+
+    def __contains__(self, digest: object) -> bool:
+        return digest in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def load(self, digest: str) -> Tuple[bool, Any]:
+        """讀取緩存檔案，返回 (是否存在, 值)；檔案損壞時刪除並視為不存在"""
+        entry = self._index.get(digest)
+        if entry is None:
+            return False, None
+
+        path, size, _ = entry
+        try:
+            if path.endswith(".npy"):
+                value: Any = np.load(path, allow_pickle=False)
+            else:
+                with np.load(path, allow_pickle=False) as archive:
+                    value = tuple(archive[f"arr_{i}"] for i in range(len(archive.files)))
+        except (OSError, ValueError, EOFError) as e:
+            self.logger.warning(f"磁碟指標緩存 {path} 讀取失敗，已刪除: {e}")
+            self._remove(digest)
+            return False, None
+
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        self._index[digest] = (path, size, now)
+        self.hits += 1
+        return True, value
+
+    def save(self, digest: str, value: Any) -> None:
+        """寫入緩存檔案（先寫暫存檔再改名，避免中斷留下不完整檔案）"""
+        if digest in self._index:
+            return
+        if isinstance(value, np.ndarray):
+            suffix = ".npy"
+        elif isinstance(value, (tuple, list)) and all(
+            isinstance(item, np.ndarray) for item in value
+        ):
+            suffix = ".npz"
+        else:
+            return
+
+        path = os.path.join(self.cache_dir, digest + suffix)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as fh:
+                if suffix == ".npy":
+                    np.save(fh, value, allow_pickle=False)
+                else:
+                    np.savez(fh, *value)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            self.logger.warning(f"磁碟指標緩存寫入失敗: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        self._index[digest] = (path, size, time.time())
+        self.total_bytes += size
+        self.writes += 1
+
+    def trim(self) -> None:
+        """總大小超出上限時，按最近使用時間由舊到新刪除檔案"""
+        if self.max_bytes is None or self.total_bytes <= self.max_bytes:
+            return
+        for digest, _ in sorted(self._index.items(), key=lambda item: item[1][2]):
+            if self.total_bytes <= self.max_bytes:
+                break
+            self._remove(digest)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """刪除所有緩存檔案"""
+        for digest in list(self._index):
+            self._remove(digest)
+
+    def _remove(self, digest: str) -> None:
+        path, size, _ = self._index.pop(digest)
+        self.total_bytes -= size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class IndicatorCache:
+    """引擎級 LRU 指標緩存 - 按位元組數限制容量，統計命中與計算次數"""
+
+    def __init__(self, max_mb: Optional[float] = 256):
+        """
+        Args:
+            max_mb: 容量上限（MB），None 表示不限制
+        """
+        self.max_bytes: Optional[int] = None
+        self.set_max_mb(max_mb)
+        self._entries: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+        self._sizes: Dict[Tuple[str, Hashable], int] = {}
+        self._batch_keys: Set[Tuple[str, Hashable]] = set()
+        self.total_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_store: Optional[DiskIndicatorStore] = None
+
+    def attach_disk_store(self, disk_store: Optional[DiskIndicatorStore]) -> None:
+        """掛接（或以 None 移除）磁碟緩存"""
+        self.disk_store = disk_store
+
+    def set_max_mb(self, max_mb: Optional[float]) -> None:
+        """設定容量上限（MB），None 表示不限制"""
+        self.max_bytes = None if max_mb is None else max(0, int(float(max_mb) * 1024 * 1024))
+
+    def namespace(
+        self, kernel: str, fingerprint: Optional[str] = None
+    ) -> "IndicatorCacheView":
+        """
+        返回以指標核心名稱為前綴的 dict 視圖
+
+        Args:
+            kernel: 指標核心名稱（MA、BOLL 等）
+            fingerprint: 預測因子數據指紋，提供時該視圖的條目才會讀寫磁碟緩存
+        """
+        return IndicatorCacheView(self, kernel, fingerprint)
+
+    def lookup(
+        self, key: Tuple[str, Hashable], disk_key: Optional[str] = None
+    ) -> Tuple[bool, Any]:
+        """查詢條目，返回 (是否存在, 值)，並更新 LRU 順序與命中統計"""
+        if key not in self._entries:
+            if self.disk_store is None or disk_key is None:
+                return False, None
+            found, value = self.disk_store.load(disk_key)
+            if not found:
+                return False, None
+            # 磁碟命中：載入記憶體，本批次內的後續讀取不再重複計數
+            self._insert(key, value)
+            self.disk_hits += 1
+            return True, value
+        self._entries.move_to_end(key)
+        if key not in self._batch_keys:
+            self._batch_keys.add(key)
+            self.hits += 1
+        return True, self._entries[key]
+
+    def store(
+        self, key: Tuple[str, Hashable], value: Any, disk_key: Optional[str] = None
+    ) -> None:
+        """寫入條目（新條目計為一次計算，並同時寫入磁碟緩存）"""
+        if key in self._entries:
+            self.total_bytes -= self._sizes[key]
+        else:
+            self.misses += 1
+            if self.disk_store is not None and disk_key is not None:
+                self.disk_store.save(disk_key, value)
+        self._insert(key, value)
+
+    def _insert(self, key: Tuple[str, Hashable], value: Any) -> None:
+        self._batch_keys.add(key)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._sizes[key] = _estimate_nbytes(value)
+        self.total_bytes += self._sizes[key]
+
+    def discard(self, key: Tuple[str, Hashable]) -> None:
+        """刪除條目（不存在時忽略）"""
+        if key in self._entries:
+            del self._entries[key]
+            self.total_bytes -= self._sizes.pop(key)
+            self._batch_keys.discard(key)
+
+    def keys_in(self, kernel: str) -> Iterator[Hashable]:
+        """列出某指標核心的所有緩存鍵（不影響 LRU 順序）"""
+        for namespace, key in list(self._entries.keys()):
+            if namespace == kernel:
+                yield key
+
+    def end_batch(self) -> None:
+        """結束一個信號生成批次：解除本批次的保護，按容量淘汰最久未使用的條目"""
+        self._batch_keys.clear()
+        if self.disk_store is not None:
+            self.disk_store.trim()
+        if self.max_bytes is None:
+            return
+        while self._entries and self.total_bytes > self.max_bytes:
+            key, _ = self._entries.popitem(last=False)
+            self.total_bytes -= self._sizes.pop(key)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """清空所有條目（統計保留）"""
+        self._entries.clear()
+        self._sizes.clear()
+        self._batch_keys.clear()
+        self.total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中/計算/淘汰統計"""
+        reused = self.hits + self.disk_hits
+        lookups = reused + self.misses
+        stats = {
+            "entries": len(self._entries),
+            "size_mb": self.total_bytes / (1024 * 1024),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": reused / lookups if lookups else 0.0,
+        }
+        if self.disk_store is not None:
+            stats["disk_entries"] = len(self.disk_store)
+            stats["disk_size_mb"] = self.disk_store.total_bytes / (1024 * 1024)
+        return stats
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class IndicatorCacheView(MutableMapping):
+    """單一指標核心的緩存視圖，提供與原 global_*_cache 字典相同的介面"""
+
+    def __init__(self, cache: IndicatorCache, kernel: str, fingerprint: Optional[str] = None):
+        self.cache = cache
+        self.kernel = kernel
+        self.fingerprint = fingerprint
+        self._disk_keys: Dict[Hashable, str] = {}
+
+    def _disk_key(self, key: Hashable) -> Optional[str]:
+        if self.fingerprint is None or self.cache.disk_store is None:
+            return None
+        disk_key = self._disk_keys.get(key)
+        if disk_key is None:
+            disk_key = DiskIndicatorStore.make_key(self.fingerprint, self.kernel, key)
+            self._disk_keys[key] = disk_key
+        return disk_key
+
+    def __getitem__(self, key: Hashable) -> Any:
+        found, value = self.cache.lookup((self.kernel, key), self._disk_key(key))
+        if not found:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.cache.store((self.kernel, key), value, self._disk_key(key))
+
+    def __delitem__(self, key: Hashable) -> None:
+        if (self.kernel, key) not in self.cache._entries:  # pylint: disable=protected-access
+            raise KeyError(key)
+        self.cache.discard((self.kernel, key))
+
+    def __contains__(self, key: object) -> bool:
+        return self.cache.lookup((self.kernel, key), self._disk_key(key))[0]  # type: ignore[arg-type]
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return self.cache.keys_in(self.kernel)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.cache.keys_in(self.kernel))
+
+    def clear(self) -> None:
+        for key in list(self.cache.keys_in(self.kernel)):
+            self.cache.discard((self.kernel, key))
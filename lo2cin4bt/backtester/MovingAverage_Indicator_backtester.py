@@ -80,6 +80,8 @@ flowchart TD
 - v2.0: 整合 Numba JIT 編譯優化
 - v2.1: 新增向量化批量計算
 - v2.2: 完善緩存機制與錯誤處理
+- v2.3: SMA/WMA 改為 O(n) 滾動計算（Neumaier 補償求和），不再逐窗重新求和
+- v2.4: 新增多窗口批量 SMA 核心（補償前綴和 + prange），網格含多個窗口長度時一次計算
 
 【參考】
 ------------------------------------------------------------
@@ -98,13 +100,16 @@ from .IndicatorParams_backtester import IndicatorParams
 
 # 優化：嘗試導入 Numba 進行 JIT 編譯加速
 try:
-    from numba import njit
+    from numba import njit, prange
 
     NUMBA_AVAILABLE = True
 except ImportError:
     NUMBA_AVAILABLE = False
     print("Numba 未安裝，將使用標準 Python 計算。建議安裝 numba 以獲得更好的性能。")
 
+# 同一批次中未緩存的不同 SMA 窗口長度達到此數量時，改用多窗口批量核心一次計算
+MULTI_WINDOW_MIN_LENGTHS = 4
+
 # ============================================================================
 # 核心算法：統一的 MA 計算函數
 # ============================================================================
@@ -156,17 +161,63 @@ def _calculate_ma_unified(values, period, ma_type):
 
 if NUMBA_AVAILABLE:
 
-    @njit(fastmath=True)
+    # 滾動窗口核心：O(n) 增量更新 + Neumaier 補償求和
+    # 注意：補償求和依賴運算順序，這些函數不可開啟 fastmath（會允許重排而消去補償項）
+    # 窗口內含 NaN/inf 時逐窗直接計算，保持與逐窗求和相同的結果
+
+    @njit(cache=True)
+    def _neumaier_add(total, compensation, value):
+        """Neumaier 補償加法，返回 (新總和, 新補償項)"""
+        t = total + value
+        if abs(total) >= abs(value):
+            compensation += (total - t) + value
+        else:
+            compensation += (value - t) + total
+        return t, compensation
+
+    @njit(cache=True)
     def _calculate_sma_njit(data, window):
-        """使用 Numba 計算簡單移動平均"""
+        """使用 Numba 計算簡單移動平均（O(n) 滾動補償求和）"""
         n = len(data)
         result = np.zeros(n)
-
-        for i in range(window - 1, n):
-            sum_val = 0.0
-            for j in range(i - window + 1, i + 1):
-                sum_val += data[j]
-            result[i] = sum_val / window
+        if window < 1:
+            return result
+
+        total = 0.0
+        compensation = 0.0
+        state_valid = False
+        bad_count = 0  # 窗口內非有限值數量
+
+        for i in range(n):
+            if not np.isfinite(data[i]):
+                bad_count += 1
+            if i >= window and not np.isfinite(data[i - window]):
+                bad_count -= 1
+            if i < window - 1:
+                continue
+
+            start = i - window + 1
+            if bad_count > 0:
+                # 含非有限值的窗口直接求和，之後重新初始化滾動狀態
+                sum_val = 0.0
+                for j in range(start, i + 1):
+                    sum_val += data[j]
+                result[i] = sum_val / window
+                state_valid = False
+                continue
+
+            if state_valid:
+                total, compensation = _neumaier_add(total, compensation, data[i])
+                total, compensation = _neumaier_add(
+                    total, compensation, -data[start - 1]
+                )
+            else:
+                total = 0.0
+                compensation = 0.0
+                for j in range(start, i + 1):
+                    total, compensation = _neumaier_add(total, compensation, data[j])
+                state_valid = True
+            result[i] = (total + compensation) / window
 
         return result
 
@@ -186,22 +237,133 @@ if NUMBA_AVAILABLE:
 
         return result
 
-    @njit(fastmath=True)
+    @njit(cache=True)
     def _calculate_wma_njit(data, period):
-        """使用 Numba 計算加權移動平均"""
+        """
+        使用 Numba 計算加權移動平均（O(n)）
+
+        權重為 1..period（最新值權重最大），滾動關係：
+        加權和[i] = 加權和[i-1] + period * x[i] - 窗口和[i-1]
+        加權和與窗口和皆以 Neumaier 補償求和維護。
+        """
         n = len(data)
         result = np.zeros(n)
-        weights = np.arange(1, period + 1, dtype=np.float64)
-        weight_sum = np.sum(weights)
-
-        for i in range(period - 1, n):
-            sum_val = 0.0
-            for j in range(period):
-                sum_val += weights[j] * data[i - period + 1 + j]
-            result[i] = sum_val / weight_sum
+        if period < 1:
+            return result
+        weight_sum = period * (period + 1) / 2.0
+
+        window_total = 0.0
+        window_comp = 0.0
+        weighted_total = 0.0
+        weighted_comp = 0.0
+        state_valid = False
+        bad_count = 0  # 窗口內非有限值數量
+
+        for i in range(n):
+            if not np.isfinite(data[i]):
+                bad_count += 1
+            if i >= period and not np.isfinite(data[i - period]):
+                bad_count -= 1
+            if i < period - 1:
+                continue
+
+            start = i - period + 1
+            if bad_count > 0:
+                sum_val = 0.0
+                for j in range(period):
+                    sum_val += (j + 1.0) * data[start + j]
+                result[i] = sum_val / weight_sum
+                state_valid = False
+                continue
+
+            if state_valid:
+                # 先以上一窗口的窗口和扣減，再更新窗口和
+                previous_window = window_total + window_comp
+                weighted_total, weighted_comp = _neumaier_add(
+                    weighted_total, weighted_comp, period * data[i]
+                )
+                weighted_total, weighted_comp = _neumaier_add(
+                    weighted_total, weighted_comp, -previous_window
+                )
+                window_total, window_comp = _neumaier_add(
+                    window_total, window_comp, data[i]
+                )
+                window_total, window_comp = _neumaier_add(
+                    window_total, window_comp, -data[start - 1]
+                )
+            else:
+                window_total = 0.0
+                window_comp = 0.0
+                weighted_total = 0.0
+                weighted_comp = 0.0
+                for j in range(period):
+                    value = data[start + j]
+                    window_total, window_comp = _neumaier_add(
+                        window_total, window_comp, value
+                    )
+                    weighted_total, weighted_comp = _neumaier_add(
+                        weighted_total, weighted_comp, (j + 1.0) * value
+                    )
+                state_valid = True
+            result[i] = (weighted_total + weighted_comp) / weight_sum
 
         return result
 
+    @njit(cache=True)
+    def _compensated_prefix_sum_njit(data):
+        """
+        補償前綴和：以 (高位, 低位) 兩個陣列保存 sum(data[:i])
+
+        窗口和 = (hi[b] - hi[a]) + (lo[b] - lo[a])，精度接近逐窗補償求和。
+        """
+        n = len(data)
+        hi = np.zeros(n + 1)
+        lo = np.zeros(n + 1)
+        total = 0.0
+        compensation = 0.0
+        for i in range(n):
+            total, compensation = _neumaier_add(total, compensation, data[i])
+            hi[i + 1] = total
+            lo[i + 1] = compensation
+        return hi, lo
+
+    @njit(parallel=True, cache=True)
+    def _calculate_sma_multi_njit(data, windows):
+        """
+        一次計算多個窗口長度的簡單移動平均
+
+        先以單次掃描建立補償前綴和，再以 prange 並行展開各窗口（每個窗口 O(n)）。
+        數據含 NaN/inf 時前綴和不可用，改為並行調用逐窗口核心。
+
+        Returns:
+            np.ndarray: shape (n_time, n_windows)，每欄在記憶體中連續
+        """
+        n = len(data)
+        n_windows = len(windows)
+        out = np.zeros((n_windows, n))
+
+        all_finite = True
+        for i in range(n):
+            if not np.isfinite(data[i]):
+                all_finite = False
+                break
+
+        if not all_finite:
+            for k in prange(n_windows):
+                out[k, :] = _calculate_sma_njit(data, windows[k])
+            return out.T
+
+        hi, lo = _compensated_prefix_sum_njit(data)
+        for k in prange(n_windows):
+            window = windows[k]
+            if window < 1:
+                continue
+            for i in range(window - 1, n):
+                b = i + 1
+                a = b - window
+                out[k, i] = ((hi[b] - hi[a]) + (lo[b] - lo[a])) / window
+        return out.T
+
     # 統一向量化信號生成函數（整合所有策略）
     @njit(fastmath=True)
     def _vectorized_generate_ma_signals_njit(
@@ -400,6 +562,30 @@ class MACacheManager:
         self._cache[cache_key] = ma_values
         return ma_values
 
+    def prefill_sma(self, values, requests):
+        """
+        批量預先計算 SMA 並寫入緩存
+
+        Args:
+            values: 預測因子數值（已處理 NaN）
+            requests: [(period, ma_type, predictor 標籤), ...]，只處理 ma_type 為 SMA 的請求
+        """
+        missing = [
+            key
+            for key in requests
+            if str(key[1]).upper() == "SMA" and key not in self._cache
+        ]
+        periods = sorted({key[0] for key in missing})
+        if not NUMBA_AVAILABLE or len(periods) < MULTI_WINDOW_MIN_LENGTHS:
+            return
+
+        ma_matrix = _calculate_sma_multi_njit(
+            np.asarray(values, dtype=np.float64), np.asarray(periods, dtype=np.int64)
+        )
+        columns = {period: ma_matrix[:, k] for k, period in enumerate(periods)}
+        for key in missing:
+            self._cache[key] = columns[key[0]]
+
     def clear(self):
         """清空緩存"""
         self._cache.clear()
@@ -772,6 +958,26 @@ class MovingAverageIndicator:
         predictor_values = predictor_series.values.astype(np.float64)
         predictor_values = np.nan_to_num(predictor_values, nan=0.0)
 
+        # 網格包含多個 SMA 窗口長度時，先以多窗口核心一次算出所有均線
+        sma_requests = []
+        for _, _, param in tasks:
+            ma_type = param.get_param("ma_type", "SMA")
+            if param.get_param("mode", "single") == "single":
+                period = param.get_param("period")
+                if period is not None:
+                    sma_requests.append((period, ma_type, f"{predictor_name}_{period}"))
+            else:
+                short_period = param.get_param("shortMA_period")
+                long_period = param.get_param("longMA_period")
+                if short_period is not None and long_period is not None:
+                    sma_requests.append(
+                        (short_period, ma_type, f"{predictor_name}_short_{short_period}")
+                    )
+                    sma_requests.append(
+                        (long_period, ma_type, f"{predictor_name}_long_{long_period}")
+                    )
+        cache_manager.prefill_sma(predictor_values, sma_requests)
+
         # 處理所有任務
         for task_idx, indicator_idx, param in tasks:
             try:
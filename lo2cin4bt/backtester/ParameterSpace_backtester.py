@@ -0,0 +1,251 @@
+"""
+ParameterSpace_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的「惰性參數組合空間」，以混合進位（mixed-radix）
+編碼表示所有條件配對的參數笛卡兒積，不預先展開任何 tuple。
+- 支援 len()、整數索引、切片與迭代，行為與原本的組合列表一致
+- 整數索引透過混合進位解碼直接得到對應的參數組合
+- 切片返回共享參數定義的新視圖，不複製任何組合
+- 任務視圖按 (參數組合, 預測因子) 的整數索引定址，供引擎與子進程批次使用
+- TaskSubsetView 只暴露部分任務（兩階段篩選的前 K 名），保留原任務索引對應的 Backtest_id
+
+【流程與數據流】
+------------------------------------------------------------
+- VectorBacktestEngine.generate_parameter_combinations 建立 ParameterCombinationSpace
+- run_backtests 以切片實現 limit_combinations 與串流分塊
+- _generate_all_tasks_matrix 建立 TaskCombinationView 等任務視圖，以整數任務索引存取
+
+```mermaid
+flowchart TD
+    A[generate_parameter_combinations] -->|參數列表| B[ParameterCombinationSpace]
+    B -->|切片| C[limit_combinations / 串流區塊]
+    B -->|任務視圖| D[_generate_all_tasks_matrix]
+    D -->|整數索引| E[信號生成 / 結果批次]
+```
+
+【組合順序】
+------------------------------------------------------------
+- 條件配對依序排列；每個配對內部等同於
+  itertools.product(*開倉參數列表, *平倉參數列表)，最後一個指標變化最快
+- 每個組合為 開倉參數 + 平倉參數 + ("strategy_{配對序號}",)
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 組合順序必須與原本的巢狀 itertools.product 完全一致，否則結果與 strategy_id 對應錯亂
+- 視圖物件需可序列化（pickle），供多進程初始化使用
+- 任務索引 t 對應 參數組合索引 t // 預測因子數、預測因子索引 t % 預測因子數
+
+【常見易錯點】
+------------------------------------------------------------
+- 任一指標參數列表為空時該配對組合數為 0（與 itertools.product 一致）
+- 負索引與帶步長的切片需轉換為底層 range 後再解碼
+
+【範例】
+------------------------------------------------------------
+- space = ParameterCombinationSpace([(entry_lists, exit_lists, "strategy_1")])
+- len(space)、space[123]、space[:1000]、for combo in space: ...
+- TaskSubsetView(BacktestIdView(n_tasks), np.array([5, 42]))[1]  # 第 42 個任務的 Backtest_id
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 VectorBacktestEngine 建立與使用
+- 參數元素為 IndicatorParams 物件
+"""
+
+import bisect
+import hashlib
+import uuid
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, Union
+
+
+class ParameterCombinationSpace:
+    """惰性參數組合空間 - 以混合進位解碼支援隨機存取"""
+
+    def __init__(
+        self,
+        pairs: List[Tuple[List[List[Any]], List[List[Any]], str]],
+        indices: Optional[range] = None,
+    ):
+        """
+        Args:
+            pairs: 每個條件配對的 (開倉參數列表們, 平倉參數列表們, strategy_id)
+            indices: 此視圖涵蓋的全域組合索引範圍，None 表示全部
+        """
+        self._pairs = pairs
+        self._param_lists: List[List[List[Any]]] = []
+        self._radices: List[List[int]] = []
+        self._offsets: List[int] = []
+
+        total = 0
+        for entry_lists, exit_lists, _ in pairs:
+            param_lists = list(entry_lists) + list(exit_lists)
+            radices = [len(values) for values in param_lists]
+            size = 1
+            for radix in radices:
+                size *= radix
+            self._param_lists.append(param_lists)
+            self._radices.append(radices)
+            self._offsets.append(total)
+            total += size
+
+        self._total = total
+        self._indices = indices if indices is not None else range(total)
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(
+        self, key: Union[int, slice]
+    ) -> Union[Tuple[Any, ...], "ParameterCombinationSpace"]:
+        if isinstance(key, slice):
+            return ParameterCombinationSpace(self._pairs, self._indices[key])
+        return self._decode(self._indices[key])
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        for global_idx in self._indices:
+            yield self._decode(global_idx)
+
+    def __repr__(self) -> str:
+        return f"ParameterCombinationSpace(len={len(self)}, pairs={len(self._pairs)})"
+
+    def _locate(self, global_idx: int) -> Tuple[int, int]:
+        """返回 (條件配對索引, 配對內索引)"""
+        # bisect_right 會跳過組合數為 0 的配對（其 offset 與下一個配對相同）
+        pair_idx = bisect.bisect_right(self._offsets, global_idx) - 1
+        return pair_idx, global_idx - self._offsets[pair_idx]
+
+    def _decode(self, global_idx: int) -> Tuple[Any, ...]:
+        """混合進位解碼：最後一個指標變化最快，與 itertools.product 順序一致"""
+        pair_idx, local_idx = self._locate(global_idx)
+        param_lists = self._param_lists[pair_idx]
+        radices = self._radices[pair_idx]
+
+        combo: List[Any] = [None] * len(param_lists)
+        for position in range(len(param_lists) - 1, -1, -1):
+            local_idx, digit = divmod(local_idx, radices[position])
+            combo[position] = param_lists[position][digit]
+
+        return tuple(combo) + (self._pairs[pair_idx][2],)
+
+    def fingerprint(self) -> str:
+        """組合空間指紋：條件配對、各指標參數雜湊與索引範圍相同時相同（增量回測用）"""
+        digest = hashlib.blake2b(digest_size=16)
+        for entry_lists, exit_lists, strategy_id in self._pairs:
+            digest.update(f"{strategy_id}|{len(entry_lists)}|{len(exit_lists)}".encode())
+            for values in list(entry_lists) + list(exit_lists):
+                digest.update(b"[")
+                for param in values:
+                    digest.update(
+                        (
+                            param.get_param_hash()
+                            if hasattr(param, "get_param_hash")
+                            else repr(param)
+                        ).encode()
+                    )
+                digest.update(b"]")
+        indices = self._indices
+        digest.update(f"{indices.start}:{indices.stop}:{indices.step}".encode())
+        return digest.hexdigest()
+
+    def strategy_id(self, idx: int) -> str:
+        """只取得 strategy_id，不解碼整個組合"""
+        pair_idx, _ = self._locate(self._indices[idx])
+        return self._pairs[pair_idx][2]
+
+
+class TaskCombinationView(Sequence):
+    """任務索引 → 參數組合（每個組合重複 n_predictors 次）"""
+
+    def __init__(self, space: ParameterCombinationSpace, n_predictors: int):
+        self.space = space
+        self.n_predictors = max(1, n_predictors)
+
+    def __len__(self) -> int:
+        return len(self.space) * self.n_predictors
+
+    def __getitem__(self, task_idx: Any) -> Any:
+        if isinstance(task_idx, slice):
+            return [self[i] for i in range(*task_idx.indices(len(self)))]
+        if task_idx < 0:
+            task_idx += len(self)
+        if not 0 <= task_idx < len(self):
+            raise IndexError("task index out of range")
+        return self.space[task_idx // self.n_predictors]
+
+
+class TaskPredictorView(Sequence):
+    """任務索引 → 預測因子名稱"""
+
+    def __init__(self, predictors: List[str], n_combinations: int):
+        self.predictors = list(predictors)
+        self.n_combinations = n_combinations
+
+    def __len__(self) -> int:
+        return self.n_combinations * len(self.predictors)
+
+    def __getitem__(self, task_idx: Any) -> Any:
+        if isinstance(task_idx, slice):
+            return [self[i] for i in range(*task_idx.indices(len(self)))]
+        if task_idx < 0:
+            task_idx += len(self)
+        if not 0 <= task_idx < len(self):
+            raise IndexError("task index out of range")
+        return self.predictors[task_idx % len(self.predictors)]
+
+
+class TaskStrategyIdView(Sequence):
+    """任務索引 → strategy_id（不解碼參數組合）"""
+
+    def __init__(self, space: ParameterCombinationSpace, n_predictors: int):
+        self.space = space
+        self.n_predictors = max(1, n_predictors)
+
+    def __len__(self) -> int:
+        return len(self.space) * self.n_predictors
+
+    def __getitem__(self, task_idx: Any) -> Any:
+        if isinstance(task_idx, slice):
+            return [self[i] for i in range(*task_idx.indices(len(self)))]
+        if task_idx < 0:
+            task_idx += len(self)
+        if not 0 <= task_idx < len(self):
+            raise IndexError("task index out of range")
+        return self.space.strategy_id(task_idx // self.n_predictors)
+
+
+class BacktestIdView(Sequence):
+    """任務索引 → Backtest_id（本次執行的隨機前綴 + 任務索引，長度 16）"""
+
+    def __init__(self, n_tasks: int, prefix: Optional[str] = None):
+        self.n_tasks = n_tasks
+        self.prefix = prefix or uuid.uuid4().hex[:8]
+
+    def __len__(self) -> int:
+        return self.n_tasks
+
+    def __getitem__(self, task_idx: Any) -> Any:
+        if isinstance(task_idx, slice):
+            return [self[i] for i in range(*task_idx.indices(len(self)))]
+        if task_idx < 0:
+            task_idx += len(self)
+        if not 0 <= task_idx < len(self):
+            raise IndexError("task index out of range")
+        return f"{self.prefix}-{task_idx:07x}"
+
+
+class TaskSubsetView(Sequence):
+    """任務子集視圖 - 局部索引 i 對應底層視圖的任務 task_indices[i]"""
+
+    def __init__(self, view: Sequence, task_indices: Sequence[int]):
+        self.view = view
+        self.task_indices = task_indices
+
+    def __len__(self) -> int:
+        return len(self.task_indices)
+
+    def __getitem__(self, idx: Any) -> Any:
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        return self.view[int(self.task_indices[idx])]
@@ -8,6 +8,7 @@ Percentile_Indicator_backtester.py
 - 基於滾動百分位計算，提供動態閾值
 - 支援單百分位和百分位區間兩種模式
 - 內建 Numba JIT 優化，提升計算性能
+- 滾動百分位以滑動排序緩衝區計算，同一窗口的多個百分位一次完成
 - 支援向量化計算，適合批量參數優化
 
 架構流程：
@@ -38,6 +39,7 @@ C -->|PERC1-PERC6| E[策略信號生成]
 """
 
 import logging
+import math
 
 import numpy as np
 import pandas as pd
@@ -56,21 +58,111 @@ except ImportError:
 # 核心算法：純 Numba + ndarray 實現
 if NUMBA_AVAILABLE:
 
-    @njit(fastmath=True, cache=True)
-    def _calculate_rolling_percentile_njit(data, window, percentile):
-        """使用 Numba 計算滾動百分位"""
+    @njit(cache=True)
+    def _sorted_insert(buffer, count, value):
+        """把 value 插入已排序緩衝區的前 count 個元素中"""
+        pos = np.searchsorted(buffer[:count], value)
+        for j in range(count, pos, -1):
+            buffer[j] = buffer[j - 1]
+        buffer[pos] = value
+
+    @njit(cache=True)
+    def _sorted_remove(buffer, count, value):
+        """從已排序緩衝區的前 count 個元素中移除一個 value"""
+        pos = np.searchsorted(buffer[:count], value)
+        for j in range(pos, count - 1):
+            buffer[j] = buffer[j + 1]
+
+    @njit(cache=True)
+    def _sorted_replace(buffer, count, old_value, new_value):
+        """以 new_value 取代一個 old_value，只移動兩者之間的元素"""
+        pos = np.searchsorted(buffer[:count], old_value)
+        while pos > 0 and buffer[pos - 1] > new_value:
+            buffer[pos] = buffer[pos - 1]
+            pos -= 1
+        while pos < count - 1 and buffer[pos + 1] < new_value:
+            buffer[pos] = buffer[pos + 1]
+            pos += 1
+        buffer[pos] = new_value
+
+    @njit(cache=True)
+    def _sorted_percentile(buffer, count, percentile):
+        """已排序緩衝區的百分位（線性插值，與 np.percentile 一致）"""
+        if count == 1 or percentile == 0:
+            return buffer[0]
+        if percentile == 100:
+            return buffer[count - 1]
+        rank = 1 + (count - 1) * (percentile / 100.0)
+        f = math.floor(rank)
+        m = rank - f
+        k = int(f - 1)
+        return buffer[k] * (1 - m) + buffer[k + 1] * m
+
+    @njit(cache=True)
+    def _calculate_rolling_percentiles_njit(data, window, percentiles):
+        """
+        滑動排序緩衝區一次計算同一窗口的多個滾動百分位
+
+        每根K線以二分搜尋移除離開窗口的值、插入新值，各百分位直接讀取順序統計量，
+        複雜度 O(n·w)（僅搬移元素）取代逐窗排序的 O(n·w·log w)。
+        含非有限值的窗口直接以 np.percentile 計算，保持原本的 NaN/inf 行為。
+
+        Returns:
+            np.ndarray: 形狀 (n, len(percentiles))，窗口未滿處為 0
+        """
         n = len(data)
-        result = np.zeros(n)
+        n_percentiles = len(percentiles)
+        result = np.zeros((n, n_percentiles))
+        if window < 1 or window > n:
+            return result.astype(data.dtype)
+
+        for q in range(n_percentiles):
+            if percentiles[q] < 0 or percentiles[q] > 100:
+                raise ValueError("Percentiles must be in the range [0, 100]")
+
+        buffer = np.empty(window)
+        count = 0
+        non_finite = 0
+
+        for i in range(n):
+            value = data[i]
+            value_finite = np.isfinite(value)
+            replaced = False
+
+            if i >= window:
+                dropped = data[i - window]
+                if not np.isfinite(dropped):
+                    non_finite -= 1
+                elif value_finite:
+                    _sorted_replace(buffer, count, dropped, value)
+                    replaced = True
+                else:
+                    _sorted_remove(buffer, count, dropped)
+                    count -= 1
+
+            if not replaced:
+                if value_finite:
+                    _sorted_insert(buffer, count, value)
+                    count += 1
+                else:
+                    non_finite += 1
 
-        for i in range(window - 1, n):
-            # 提取窗口數據
-            window_data = data[i - window + 1 : i + 1]
-            # 使用 numpy 的百分位計算（更準確）
-            result[i] = np.percentile(window_data, percentile)
+            if i >= window - 1:
+                if non_finite == 0:
+                    for q in range(n_percentiles):
+                        result[i, q] = _sorted_percentile(buffer, count, percentiles[q])
+                else:
+                    result[i, :] = np.percentile(data[i - window + 1 : i + 1], percentiles)
 
         # 確保返回值的數據類型與輸入數據一致
         return result.astype(data.dtype)
 
+    @njit(cache=True)
+    def _calculate_rolling_percentile_njit(data, window, percentile):
+        """使用 Numba 計算滾動百分位（單一百分位）"""
+        percentiles = np.full(1, percentile, dtype=np.float64)
+        return _calculate_rolling_percentiles_njit(data, window, percentiles)[:, 0].copy()
+
     @njit(fastmath=True, cache=True)
     def _generate_percentile_signals_njit(
         predictor_values, percentile_values, strat_idx, window, m1=None, m2=None
@@ -325,10 +417,10 @@ class PercentileIndicator:
                     raise ValueError("m1, m2 參數必須由外部提供")
 
                 # 計算兩個百分位值
-                percentile1_values = _calculate_rolling_percentile_njit(
-                    predictor_values, window, m1
+                percentile_matrix = _calculate_rolling_percentiles_njit(
+                    predictor_values, window, np.array([m1, m2], dtype=np.float64)
                 )
-                _calculate_rolling_percentile_njit(predictor_values, window, m2)
+                percentile1_values = percentile_matrix[:, 0]
 
                 # 使用 Numba 計算信號
                 signal_values = _generate_percentile_signals_njit(
@@ -413,29 +505,50 @@ class PercentileIndicator:
         predictor_values = data[predictor].values.astype(np.float64)
         predictor_values = np.nan_to_num(predictor_values, nan=0.0)
 
-        # 批量計算所有參數的百分位值 - 使用Numba優化
-        unique_combinations = list(set(zip(windows, percentiles)))
+        # 批量計算所有參數的百分位值 - 按窗口分組，同一窗口的所有百分位一次滑動計算
+        percentiles_by_window = {}
+        range_bounds = iter(zip(m1_values, m2_values))
+        for window, percentile, strat_idx in zip(windows, percentiles, strat_indices):
+            needed = percentiles_by_window.setdefault(window, set())
+            if strat_idx in [1, 2, 3, 4]:
+                needed.add(percentile)
+            else:
+                needed.update(next(range_bounds))
 
-        for window, percentile in unique_combinations:
-            if window <= len(data):
-                cache_key = (window, percentile, predictor)
-                if cache_key not in global_percentile_cache:
-                    # 使用Numba優化的函數計算百分位
-                    if NUMBA_AVAILABLE:
-                        percentile_values = _calculate_rolling_percentile_njit(
-                            predictor_values, window, percentile
-                        )
-                    else:
-                        # 備用方案：使用pandas rolling
-                        percentile_values = (
-                            data[predictor]
-                            .rolling(window=window)
-                            .quantile(percentile / 100.0)
-                            .values
+        for window, window_percentiles in percentiles_by_window.items():
+            if window > len(data):
+                continue
+            missing = [
+                percentile
+                for percentile in sorted(window_percentiles)
+                if (window, percentile, predictor) not in global_percentile_cache
+            ]
+            if not missing:
+                continue
+
+            # 使用Numba優化的函數計算百分位
+            if NUMBA_AVAILABLE:
+                percentile_matrix = _calculate_rolling_percentiles_njit(
+                    predictor_values, window, np.array(missing, dtype=np.float64)
+                )
+                for k, percentile in enumerate(missing):
+                    global_percentile_cache[(window, percentile, predictor)] = (
+                        percentile_matrix[:, k].copy()
+                    )
+            else:
+                # 備用方案：使用pandas rolling
+                rolling = data[predictor].rolling(window=window)
+                for percentile in missing:
+                    global_percentile_cache[(window, percentile, predictor)] = (
+                        np.nan_to_num(
+                            rolling.quantile(percentile / 100.0).values, nan=0.0
                         )
-                        percentile_values = np.nan_to_num(percentile_values, nan=0.0)
+                    )
 
-                    global_percentile_cache[cache_key] = percentile_values
+        # 區間策略（strat_idx 5/6）在 m1_values / m2_values 中的位置，預先以累計計數得出
+        range_positions = (
+            np.cumsum(~np.isin(np.asarray(strat_indices), [1, 2, 3, 4])) - 1
+        )
 
         # 為每個任務生成信號 - 使用Numba優化
         for i, (window, percentile, strat_idx, task_idx, indicator_idx) in enumerate(
@@ -495,12 +608,8 @@ class PercentileIndicator:
 
                 else:  # strat_idx in [5, 6]
                     # 雙百分位區間策略
-                    m1 = m1_values[
-                        i - len([x for x in strat_indices[:i] if x in [1, 2, 3, 4]])
-                    ]
-                    m2 = m2_values[
-                        i - len([x for x in strat_indices[:i] if x in [1, 2, 3, 4]])
-                    ]
+                    m1 = m1_values[range_positions[i]]
+                    m2 = m2_values[range_positions[i]]
 
                     # 計算兩個百分位值
                     cache_key1 = (window, m1, predictor)
@@ -0,0 +1,338 @@
+"""
+Screening_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的「篩選核心」，把信號合併、交易模擬與摘要指標累計融合為
+單次掃描，只輸出每個策略的摘要指標，不保留任何逐K線矩陣。
+- 直接從信號庫（signal_bank + bank_index）逐K線合併開/平倉信號，不生成合併後的信號矩陣
+- 以 TradeSimulator 的 _trade_transition_njit 推進交易狀態，規則與完整回測完全一致
+- 掃描過程中累計總回報、temp Sharpe（與結果生成的 temp_sharpe 定義相同）、最大回撤、交易次數
+- 記憶體只有 O(任務數) 的摘要矩陣與 O(K線數 x 唯一信號數) 的信號庫，適合排名大量參數組合
+- temp_sharpe_columns / equity_column_stats 以 numpy 按欄計算已有權益矩陣的相同摘要指標
+
+【流程與數據流】
+------------------------------------------------------------
+- VectorBacktestEngine.screen_backtests 按區塊生成任務與策略分組
+- 每個分組計算信號庫後呼叫 screen_strategy_signals，摘要寫入全局摘要矩陣的對應列
+- 引擎把摘要矩陣與 Backtest_id / 策略 / 預測因子組成 DataFrame 返回
+
+```mermaid
+flowchart TD
+    A[策略分組] -->|信號庫 + 索引| B[screen_strategy_signals]
+    B -->|逐K線合併信號| C[_trade_transition_njit]
+    C -->|權益| D[累計摘要指標]
+    D -->|每策略一列| E[摘要矩陣 n_tasks x 4]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 信號合併規則需與 VectorBacktestEngine._vectorized_combine_signals_njit 保持一致
+  （所有指標皆為 1 → 1，皆為 -1 → -1，否則 0；索引 -1 視為 0）
+- 新增摘要指標時需同步更新 SCREENING_STATS、核心中的累計邏輯與 equity_column_stats
+- select_screened_tasks 假設所有指標越大越好，新增「越小越好」的指標時需轉換符號
+- 交易規則只在 TradeSimulator._trade_transition_njit 維護，本模組不得另寫狀態機
+
+【常見易錯點】
+------------------------------------------------------------
+- temp Sharpe 以資金曲線 pct_change（首根為 0）的均值/樣本標準差計算，不年化、不扣無風險利率
+- 最大回撤為負數小數值，與 MetricsCalculator 的 Max_drawdown 定義一致
+- 權益始終以 float64 計算，不受 float32_values 影響
+
+【範例】
+------------------------------------------------------------
+- screen_strategy_signals(entry_bank, entry_index, exit_bank, exit_index,
+  close_prices, open_prices, trading_params, rows, stats)
+- summary = VectorBacktestEngine(data, "1D").screen_backtests(config)
+- sharpes = temp_sharpe_columns(trade_results["equity_values"][:, batch])
+- selected = select_screened_tasks(stats, "temp_sharpe", top_k=200, filters={"trade_count": [5, None]})
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 VectorBacktestEngine.screen_backtests 與兩階段篩選模式（performance_params.screening_top_k / screening_filters）調用
+- VectorBacktestEngine._process_batch_results_optimized 以 temp_sharpe_columns 一次計算整個批次的 temp Sharpe
+- 交易狀態轉換來自 TradeSimulator_backtester
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+from numba import njit, prange
+
+from .TradeSimulator_backtester import _trade_transition_njit, numba_thread_limit
+
+# 摘要矩陣的欄位順序
+SCREENING_STATS = ("total_return", "temp_sharpe", "max_drawdown", "trade_count")
+
+# 篩選模式每個區塊的任務數，限制策略分組與信號庫的峰值記憶體
+SCREENING_CHUNK_TASKS = 50_000
+
+
+@njit(cache=True, inline="always")
+def _bank_signal_njit(
+    signal_bank: np.ndarray, bank_index: np.ndarray, s: int, row: int
+) -> float:
+    """第 s 個策略在第 row 根K線的合併信號：所有指標皆為 1 → 1，皆為 -1 → -1，否則 0"""
+    all_long = True
+    all_short = True
+    for i in range(bank_index.shape[1]):
+        column = bank_index[s, i]
+        value = signal_bank[row, column] if column >= 0 else 0.0
+        if value != 1.0:
+            all_long = False
+        if value != -1.0:
+            all_short = False
+    if all_long:
+        return 1.0
+    if all_short:
+        return -1.0
+    return 0.0
+
+
+@njit(parallel=True, cache=True)
+def _screen_strategies_njit(  # pylint: disable=too-complex
+    entry_bank: np.ndarray,
+    entry_index: np.ndarray,
+    exit_bank: np.ndarray,
+    exit_index: np.ndarray,
+    close_prices: np.ndarray,
+    open_prices: np.ndarray,
+    transaction_cost: float,
+    slippage: float,
+    trade_price: str,
+    trade_delay: int,
+    rows: np.ndarray,
+    stats: np.ndarray,
+) -> None:
+    """
+    融合篩選核心 - 合併信號、模擬交易並累計摘要指標，結果寫入 stats[rows[s]]
+
+    空倉時只合併開倉信號、持倉時只合併平倉信號（狀態轉換只會用到其中之一）。
+    """
+    n_time = entry_bank.shape[0]
+    n_strategies = entry_index.shape[0]
+    prices = close_prices if trade_price == "close" else open_prices
+    cost_factor = (1.0 - slippage) * (1.0 - transaction_cost)
+
+    for s in prange(n_strategies):
+        current_state = 0.0
+        equity = 1.0
+        open_price = 0.0
+        open_equity = 1.0
+        prev_equity_value = 100.0
+
+        first_value = 0.0
+        peak = 0.0
+        max_drawdown = 0.0
+        trade_count = 0
+        # Welford 累計資金曲線變動率的均值與平方差和
+        mean = 0.0
+        m2 = 0.0
+
+        for t in range(n_time):
+            entry_sig = 0.0
+            exit_sig = 0.0
+            signal_index = t - trade_delay
+            if 0 <= signal_index < n_time:
+                if current_state == 0.0:
+                    entry_sig = _bank_signal_njit(entry_bank, entry_index, s, signal_index)
+                else:
+                    exit_sig = _bank_signal_njit(exit_bank, exit_index, s, signal_index)
+
+            (
+                current_state,
+                equity,
+                open_price,
+                open_equity,
+                _,
+                action,
+            ) = _trade_transition_njit(
+                t,
+                entry_sig,
+                exit_sig,
+                prices[t],
+                cost_factor,
+                current_state,
+                equity,
+                open_price,
+                open_equity,
+                prev_equity_value,
+            )
+            if action == 1:
+                trade_count += 1
+
+            value = equity * 100.0
+            if t == 0:
+                first_value = value
+                peak = value
+                change = 0.0
+            else:
+                change = value / prev_equity_value - 1.0
+            prev_equity_value = value
+
+            delta = change - mean
+            mean += delta / (t + 1)
+            m2 += delta * (change - mean)
+
+            if value > peak:
+                peak = value
+            drawdown = (value - peak) / peak
+            if drawdown < max_drawdown:
+                max_drawdown = drawdown
+
+        row = rows[s]
+        if n_time == 0:
+            continue
+        stats[row, 0] = prev_equity_value / first_value - 1.0
+        std = np.sqrt(m2 / (n_time - 1)) if n_time > 1 else 0.0
+        stats[row, 1] = mean / std if std > 0.0 else -np.inf
+        stats[row, 2] = max_drawdown
+        stats[row, 3] = trade_count
+
+
+def screen_strategy_signals(
+    entry_bank: np.ndarray,
+    entry_index: np.ndarray,
+    exit_bank: np.ndarray,
+    exit_index: np.ndarray,
+    close_prices: np.ndarray,
+    open_prices: np.ndarray,
+    trading_params: Dict[str, Any],
+    rows: np.ndarray,
+    stats: np.ndarray,
+    n_threads: int = 1,
+) -> None:
+    """
+    篩選一個策略分組，摘要指標就地寫入 stats
+
+    Args:
+        entry_bank / exit_bank: [時間點, 唯一信號數] 信號庫
+        entry_index / exit_index: [策略數, 指標數] 信號庫索引，-1 表示無信號
+        trading_params: 交易參數（transaction_cost、slippage、trade_price、trade_delay）
+        rows: [策略數] 各策略在 stats 中的列索引
+        stats: [總任務數, len(SCREENING_STATS)] 摘要矩陣
+        n_threads: Numba 並行執行緒數
+    """
+    with numba_thread_limit(n_threads):
+        _screen_strategies_njit(
+            # 信號庫轉為列優先，每個唯一信號的時間序列連續存放
+            np.asfortranarray(entry_bank),
+            np.ascontiguousarray(entry_index, dtype=np.int64),
+            np.asfortranarray(exit_bank),
+            np.ascontiguousarray(exit_index, dtype=np.int64),
+            np.asarray(close_prices, dtype=np.float64),
+            np.asarray(open_prices, dtype=np.float64),
+            float(trading_params.get("transaction_cost", 0.001)),
+            float(trading_params.get("slippage", 0.0005)),
+            str(trading_params.get("trade_price", "close")),
+            int(trading_params.get("trade_delay", 0)),
+            np.ascontiguousarray(rows, dtype=np.int64),
+            stats,
+        )
+
+
+def temp_sharpe_columns(equity_values: np.ndarray) -> np.ndarray:
+    """
+    按欄計算 temp Sharpe：資金曲線 pct_change（首根為 0）的均值 / 樣本標準差
+
+    與 pd.Series(equity).pct_change().fillna(0) 的 mean() / std() 相同；
+    標準差為 0 或K線數不足兩根時為 -inf。
+
+    Args:
+        equity_values: [時間點, 欄數] 權益矩陣（或單一權益序列）
+
+    Returns:
+        np.ndarray: [欄數] temp Sharpe（float64）
+    """
+    values = np.asarray(equity_values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    n_time = values.shape[0]
+    if n_time < 2:
+        return np.full(values.shape[1], -np.inf)
+
+    # 首根變動率固定為 0，只需計算其餘 n_time - 1 根，均值與平方差和再補上首根的貢獻
+    changes = values[1:] / values[:-1]
+    changes -= 1.0
+    mean = changes.sum(axis=0) / n_time
+    changes -= mean
+    np.square(changes, out=changes)
+    std = np.sqrt((changes.sum(axis=0) + mean * mean) / (n_time - 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(std > 0, mean / std, -np.inf)
+
+
+def equity_column_stats(
+    equity_values: np.ndarray, trade_actions: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    按欄計算 SCREENING_STATS 摘要指標，定義與融合篩選核心一致
+
+    Args:
+        equity_values: [時間點, 欄數] 權益矩陣
+        trade_actions: [時間點, 欄數] 交易動作矩陣，None 時交易次數為 NaN
+
+    Returns:
+        np.ndarray: [欄數, len(SCREENING_STATS)] 摘要矩陣（float64）
+    """
+    values = np.asarray(equity_values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    stats = np.full((values.shape[1], len(SCREENING_STATS)), np.nan)
+    if values.shape[0] == 0:
+        return stats
+
+    peaks = np.maximum.accumulate(values, axis=0)
+    stats[:, 0] = values[-1] / values[0] - 1.0
+    stats[:, 1] = temp_sharpe_columns(values)
+    stats[:, 2] = ((values - peaks) / peaks).min(axis=0)
+    if trade_actions is not None:
+        stats[:, 3] = (np.asarray(trade_actions).reshape(values.shape) == 1).sum(axis=0)
+    return stats
+
+
+def select_screened_tasks(
+    stats: np.ndarray,
+    metric: str = "temp_sharpe",
+    top_k: Optional[int] = None,
+    filters: Optional[Dict[str, Sequence[Optional[float]]]] = None,
+) -> np.ndarray:
+    """
+    兩階段篩選的第二階段任務：先按門檻過濾，再按指標取前 K 名
+
+    所有摘要指標皆為越大越好（最大回撤為負數）；同分時任務索引小者優先，
+    篩選失敗（NaN）的任務一律排除。
+
+    Args:
+        stats: [總任務數, len(SCREENING_STATS)] 摘要矩陣
+        metric: 排名指標，SCREENING_STATS 之一
+        top_k: 保留名次數，None 表示保留所有通過門檻的任務
+        filters: {指標: [下限, 上限]}，邊界為 None 表示不限制，皆為閉區間
+
+    Returns:
+        np.ndarray: 入選的任務索引（按任務索引遞增排列）
+
+    Raises:
+        ValueError: 指標名稱不在 SCREENING_STATS 中
+    """
+    for name in [metric, *(filters or {})]:
+        if name not in SCREENING_STATS:
+            raise ValueError(
+                f"未知的篩選指標: {name}，可用指標: {', '.join(SCREENING_STATS)}"
+            )
+
+    values = stats[:, SCREENING_STATS.index(metric)]
+    mask = ~np.isnan(values)
+    for name, bounds in (filters or {}).items():
+        column = stats[:, SCREENING_STATS.index(name)]
+        lower, upper = (list(bounds) + [None, None])[:2]
+        if lower is not None:
+            mask &= column >= float(lower)
+        if upper is not None:
+            mask &= column <= float(upper)
+
+    candidates = np.flatnonzero(mask)
+    if top_k is not None and len(candidates) > top_k:
+        order = np.lexsort((candidates, -values[candidates]))
+        candidates = np.sort(candidates[order[: max(0, int(top_k))]])
+    return candidates
@@ -0,0 +1,204 @@
+"""
+SharedMatrix_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的「共享矩陣儲存器」，負責把向量化引擎的大型矩陣
+（開平倉信號、持倉、收益、交易動作、權益）放到跨進程共享的記憶體區段中，
+讓多進程結果生成只需傳遞區段名稱、形狀與欄位範圍，而不必序列化整個矩陣。
+- 支援 multiprocessing.shared_memory（預設）與 mmap 暫存檔兩種後端
+- 子進程依描述符附加到同一區段，以零拷貝視圖讀取批次欄位
+- 統一管理區段生命週期，確保回測結束後釋放與刪除
+
+【流程與數據流】
+------------------------------------------------------------
+- VectorBacktestEngine 建立 SharedMatrixStore，分配或寫入矩陣
+- 將 descriptors() 傳給子進程初始化函數
+- 子進程使用 attach_matrices 取得 numpy 視圖，按欄位範圍處理批次
+- 主進程在 finally 中呼叫 close() 釋放並刪除區段
+
+```mermaid
+flowchart TD
+    A[VectorBacktestEngine] -->|allocate/put| B[SharedMatrixStore]
+    B -->|descriptors| C[ProcessPoolExecutor initializer]
+    C -->|attach_matrices| D[子進程批次處理]
+    A -->|close| B
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 描述符只能包含可序列化的基本型別（名稱、形狀、dtype 字串、記憶體佈局、後端）
+- 子進程必須由主進程的進程池建立，才能與主進程共用 resource_tracker
+- 新增矩陣時只需在引擎端 put/allocate，子進程自動取得
+
+【常見易錯點】
+------------------------------------------------------------
+- 主進程在子進程仍在讀取時提前 close() 導致讀取失敗
+- 持有共享區段視圖時關閉區段會觸發 BufferError
+- /dev/shm 空間不足時建立區段失敗，應改用 mmap 後端或回退到複製模式
+
+【範例】
+------------------------------------------------------------
+- store = SharedMatrixStore(backend="shm")
+- store.put("entry_signals", entry_signals)
+- descriptors = store.descriptors()
+- views = attach_matrices(descriptors)  # 子進程
+- store.close()
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 VectorBacktestEngine 在多進程結果生成時使用
+- 描述符由子進程初始化函數 _init_shared_result_worker 使用
+"""
+
+import logging
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+
+    SHARED_MEMORY_AVAILABLE = True
+except ImportError:
+    SHARED_MEMORY_AVAILABLE = False
+
+
+class SharedMatrixStore:
+    """共享矩陣儲存器 - 管理跨進程共享的 numpy 矩陣"""
+
+    def __init__(
+        self,
+        backend: str = "shm",
+        scratch_dir: Optional[str] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        if backend not in ("shm", "mmap"):
+            raise ValueError(f"不支援的共享記憶體後端: {backend}")
+        if backend == "shm" and not SHARED_MEMORY_AVAILABLE:
+            backend = "mmap"
+
+        self.backend = backend
+        self.scratch_dir = scratch_dir
+        self.logger = logger or logging.getLogger("SharedMatrixStore")
+        self._segments: Dict[str, Any] = {}
+        self._descriptors: Dict[str, Dict[str, Any]] = {}
+        self._tmpdir: Optional[str] = None
+
+    def allocate(
+        self,
+        key: str,
+        shape: Tuple[int, ...],
+        dtype: Any = np.float64,
+        order: str = "C",
+    ) -> np.ndarray:
+        """在共享區段中分配一個零初始化矩陣（order 為 C 行優先或 F 列優先），返回可寫視圖"""
+        dtype = np.dtype(dtype)
+        nbytes = max(1, int(np.prod(shape)) * dtype.itemsize)
+
+        if self.backend == "shm":
+            segment = shared_memory.SharedMemory(create=True, size=nbytes)
+            array: np.ndarray = np.ndarray(
+                shape, dtype=dtype, buffer=segment.buf, order=order
+            )
+            array.fill(0)
+            self._segments[key] = segment
+            location = segment.name
+        else:
+            if self._tmpdir is None:
+                self._tmpdir = tempfile.mkdtemp(
+                    prefix="lo2cin4bt_shared_", dir=self.scratch_dir
+                )
+            location = os.path.join(self._tmpdir, f"{key}.dat")
+            array = np.memmap(
+                location, dtype=dtype, mode="w+", shape=shape, order=order
+            )
+            self._segments[key] = array
+
+        self._descriptors[key] = {
+            "backend": self.backend,
+            "location": location,
+            "shape": tuple(shape),
+            "dtype": dtype.str,
+            "order": order,
+        }
+        return array
+
+    def put(self, key: str, array: np.ndarray) -> np.ndarray:
+        """把現有矩陣複製到共享區段（保留列優先佈局），返回共享視圖"""
+        order = "F" if array.flags.f_contiguous and not array.flags.c_contiguous else "C"
+        shared = self.allocate(key, array.shape, array.dtype, order)
+        shared[...] = array
+        return shared
+
+    def descriptors(self) -> Dict[str, Dict[str, Any]]:
+        """返回可序列化的區段描述符（名稱、形狀、dtype）"""
+        return dict(self._descriptors)
+
+    def close(self) -> None:
+        """釋放並刪除所有共享區段"""
+        for key, segment in list(self._segments.items()):
+            try:
+                if self.backend == "shm":
+                    try:
+                        segment.close()
+                    except BufferError:
+                        # 仍有視圖引用該區段，刪除名稱即可，映射隨引用釋放
+                        pass
+                    segment.unlink()
+                else:
+                    segment.flush()
+                    location = self._descriptors[key]["location"]
+                    del segment
+                    if os.path.exists(location):
+                        os.remove(location)
+            except Exception as e:
+                self.logger.warning(f"釋放共享矩陣 {key} 失敗: {e}")
+
+        self._segments.clear()
+        self._descriptors.clear()
+
+        if self._tmpdir is not None:
+            try:
+                os.rmdir(self._tmpdir)
+            except OSError:
+                pass
+            self._tmpdir = None
+
+    def __enter__(self) -> "SharedMatrixStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def attach_matrices(
+    descriptors: Dict[str, Dict[str, Any]],
+) -> Tuple[Dict[str, np.ndarray], List[Any]]:
+    """
+    在子進程中依描述符附加共享矩陣
+
+    Returns:
+        Tuple[Dict[str, np.ndarray], List[Any]]: (矩陣視圖, 需保持存活的區段句柄)
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    handles: List[Any] = []
+
+    for key, desc in descriptors.items():
+        dtype = np.dtype(desc["dtype"])
+        shape = tuple(desc["shape"])
+        order = desc.get("order", "C")
+        if desc["backend"] == "shm":
+            # 進程池子進程與主進程共用 resource_tracker，重複註冊不會導致提前刪除
+            segment = shared_memory.SharedMemory(name=desc["location"])
+            arrays[key] = np.ndarray(shape, dtype=dtype, buffer=segment.buf, order=order)
+            handles.append(segment)
+        else:
+            arrays[key] = np.memmap(
+                desc["location"], dtype=dtype, mode="r", shape=shape, order=order
+            )
+            handles.append(arrays[key])
+
+    return arrays, handles
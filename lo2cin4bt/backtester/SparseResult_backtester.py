@@ -0,0 +1,305 @@
+"""
+SparseResult_backtester.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 回測框架的「稀疏交易事件結果」，在稀疏輸出模式下取代每個策略
+的逐K線 records DataFrame，只保存交易事件與信號變化點，需要時才重建完整記錄。
+- 每筆交易只保存開/平倉K線索引、方向、開/平倉價格與交易收益率
+- 開倉/平倉信號以變化點（索引 + 新值）保存，不保存逐K線序列
+- 價格數據與交易參數由同一次回測的所有結果共用（SparseRecordContext）
+- 讀取 result["records"] 時以延遲 0 的事件信號重新模擬並重建逐K線記錄，
+  結果與完整模式逐欄一致（Trade_group_id 同為確定性序號）
+- 結果記憶體由 O(K線數 × 策略數) 降為 O(交易數 + 信號變化數)
+
+【流程與數據流】
+------------------------------------------------------------
+- VectorBacktestEngine 在 sparse_records 模式下呼叫 build_sparse_result
+- 結果回到主進程後以 bind_sparse_context 重新綁定共用上下文
+- 導出或繪圖時讀取 result["records"]，由 materialize_records 重建
+
+```mermaid
+flowchart TD
+    A[VectorBacktestEngine] -->|持倉/動作/權益欄位| B[build_sparse_result]
+    B -->|交易事件 + 信號變化點| C[SparseBacktestResult]
+    C -->|result['records']| D[materialize_records]
+    D -->|事件信號重新模擬| E[TradeSimulator]
+    E -->|逐K線記錄| F[TradeRecordExporter / 繪圖]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 重建依賴 TradeSimulator 的狀態機：相同的開/平倉K線必定產生相同的權益序列
+- 緊湊 dtype 模式下重建的收益/權益需經過相同的 value dtype 轉換，才能與完整模式一致
+- 共用上下文不隨結果序列化，子進程返回的結果必須在主進程重新綁定
+- 交易記錄欄位變動時只需修改 TradeSimulator._build_records_frame
+
+【常見易錯點】
+------------------------------------------------------------
+- 未綁定上下文就讀取 records 會拋出 RuntimeError
+- 重建結果只在單槽緩存中保留最近一筆，長期持有請自行複製
+- dict 的 items()/values() 不包含 records（與串流摘要一致）
+
+【範例】
+------------------------------------------------------------
+- result = build_sparse_result(context, entry_signal, exit_signal, position, ...)
+- result["trade_count"]、result["trade_events"]["open_index"]
+- records = result["records"]  # 延遲重建完整逐K線記錄
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 VectorBacktestEngine 在 performance_params.sparse_records 啟用時使用
+- 重建使用 TradeSimulator_backtester 的模擬與記錄構建
+- 重建後的 records 由 TradeRecordExporter 照常導出
+"""
+
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .TradeSimulator_backtester import (
+    TradeSimulator_backtester,
+    _vectorized_trade_simulation_njit,
+)
+
+# 單槽緩存：最近一次重建的 (結果弱引用, records)
+_RECORDS_CACHE: Dict[str, Any] = {"owner": None, "records": None}
+
+
+class SparseRecordContext:
+    """稀疏結果共用的價格與交易參數上下文（同一次回測只建立一份）"""
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        trading_params: Dict[str, Any],
+        symbol: str = "X",
+        value_dtype: Any = np.float64,
+    ):
+        self.data = data
+        self.trading_params = trading_params
+        self.value_dtype = np.dtype(value_dtype)
+        self.n_time = len(data)
+        self.close_prices = data["Close"].values.astype(np.float64)
+        self.open_prices = data["Open"].values.astype(np.float64)
+        self.trade_prices = (
+            self.open_prices
+            if trading_params.get("trade_price", "close") == "open"
+            else self.close_prices
+        )
+        self.simulator = TradeSimulator_backtester(
+            data,
+            None,
+            None,
+            trading_params.get("transaction_cost", 0.001),
+            trading_params.get("slippage", 0.0005),
+            trading_params.get("trade_delay", 0),
+            trading_params.get("trade_price", "close"),
+            trading_instrument=symbol,
+        )
+
+
+class SparseBacktestResult(dict):
+    """
+    稀疏回測結果 - 與一般結果 dict 相同的鍵，records 在讀取時才重建
+
+    字典內保存 trade_events（交易事件陣列）與 signal_changes（信號變化點），
+    共用上下文以屬性保存且不參與序列化。
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.context: Optional[SparseRecordContext] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # 上下文包含整份價格數據，跨進程時不傳遞，由主進程重新綁定
+        return {"context": None}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.context = None
+
+    def __getitem__(self, key: Any) -> Any:
+        if key == "records" and not dict.__contains__(self, "records"):
+            return self.materialize_records()
+        return super().__getitem__(key)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if key == "records" and not dict.__contains__(self, "records"):
+            return self.materialize_records()
+        return super().get(key, default)
+
+    def __contains__(self, key: Any) -> bool:
+        return key == "records" or super().__contains__(key)
+
+    def bind(self, context: SparseRecordContext) -> "SparseBacktestResult":
+        """綁定共用上下文，返回自身"""
+        self.context = context
+        return self
+
+    def materialize_records(self) -> pd.DataFrame:
+        """由交易事件重建完整逐K線 records（單槽緩存最近一次結果）"""
+        owner = _RECORDS_CACHE["owner"]
+        if owner is not None and owner() is self:
+            return _RECORDS_CACHE["records"]
+
+        if self.context is None:
+            raise RuntimeError(
+                f"稀疏結果 {dict.get(self, 'Backtest_id')} 未綁定價格上下文，無法重建 records"
+            )
+
+        records = _reconstruct_records(self, self.context)
+        _RECORDS_CACHE["owner"] = weakref.ref(self)
+        _RECORDS_CACHE["records"] = records
+        return records
+
+
+def extract_trade_events(
+    position: np.ndarray, trade_actions: np.ndarray, prices: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """從單一策略的持倉與交易動作欄位提取交易事件（未平倉交易的 close_index 為 -1）"""
+    open_index = np.flatnonzero(trade_actions == 1)
+    close_bars = np.flatnonzero(trade_actions == 4)
+    n_trades = len(open_index)
+
+    close_index = np.full(n_trades, -1, dtype=np.int64)
+    close_index[: len(close_bars)] = close_bars
+
+    direction = np.where(position[open_index] > 0, 1, -1).astype(np.int8)
+    open_price = prices[open_index]
+
+    closed = close_index >= 0
+    close_price = np.full(n_trades, np.nan)
+    close_price[closed] = prices[close_index[closed]]
+
+    trade_return = np.full(n_trades, np.nan)
+    valid = closed & (open_price > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        long_return = (close_price - open_price) / open_price
+    trade_return[valid] = np.where(direction > 0, long_return, -long_return)[valid]
+
+    return {
+        "open_index": open_index.astype(np.int32),
+        "close_index": close_index.astype(np.int32),
+        "direction": direction,
+        "open_price": open_price,
+        "close_price": close_price,
+        "trade_return": trade_return,
+    }
+
+
+def encode_signal_changes(signal: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """以變化點編碼信號序列，返回 (變化索引, 變化後的值)"""
+    signal = np.asarray(signal, dtype=np.float64)
+    change_index = np.flatnonzero(np.diff(signal, prepend=0.0) != 0)
+    return change_index.astype(np.int32), signal[change_index]
+
+
+def decode_signal_changes(
+    change_index: np.ndarray, values: np.ndarray, n_time: int
+) -> np.ndarray:
+    """還原變化點編碼的信號序列"""
+    segment_values = np.concatenate(([0.0], values))
+    segment_lengths = np.diff(np.concatenate(([0], change_index, [n_time])))
+    return np.repeat(segment_values, segment_lengths)
+
+
+def build_sparse_result(
+    context: SparseRecordContext,
+    entry_signal: np.ndarray,
+    exit_signal: np.ndarray,
+    position: np.ndarray,
+    trade_actions: np.ndarray,
+    equity_values: np.ndarray,
+    predictor: str,
+    backtest_id: str,
+    entry_params: List[Any],
+    exit_params: List[Any],
+) -> SparseBacktestResult:
+    """由單一策略的模擬輸出建立稀疏結果（strategy_id 與 params 與完整模式相同）"""
+    simulator = context.simulator
+    events = extract_trade_events(
+        np.asarray(position), np.asarray(trade_actions), context.trade_prices
+    )
+    result = SparseBacktestResult(
+        {
+            "Backtest_id": backtest_id,
+            "strategy_id": simulator._generate_parameter_set_id(  # pylint: disable=protected-access
+                entry_params, exit_params, predictor
+            ),
+            "params": simulator._build_params_dict(  # pylint: disable=protected-access
+                entry_params, exit_params, predictor
+            ),
+            "warning_msg": None,
+            "error": None,
+            "trade_count": len(events["open_index"]),
+            "final_equity": (
+                float(equity_values[-1]) if len(equity_values) else None
+            ),
+            "trade_events": events,
+            "signal_changes": {
+                "entry": encode_signal_changes(entry_signal),
+                "exit": encode_signal_changes(exit_signal),
+            },
+        }
+    )
+    return result.bind(context)
+
+
+def _reconstruct_records(
+    result: SparseBacktestResult, context: SparseRecordContext
+) -> pd.DataFrame:
+    """以延遲 0 的事件信號重新模擬，並構建與完整模式一致的逐K線記錄"""
+    n_time = context.n_time
+    events = dict.__getitem__(result, "trade_events")
+    open_index = events["open_index"]
+    close_index = events["close_index"]
+    direction = events["direction"].astype(np.float64)
+
+    # 事件信號：開倉K線給方向，平倉K線給反向（與原信號在動作K線上的判斷一致）
+    entry_events = np.zeros((n_time, 1))
+    exit_events = np.zeros((n_time, 1))
+    entry_events[open_index, 0] = direction
+    closed = close_index >= 0
+    exit_events[close_index[closed], 0] = -direction[closed]
+
+    trading_params = context.trading_params
+    simulated = _vectorized_trade_simulation_njit(
+        entry_events,
+        exit_events,
+        context.close_prices,
+        context.open_prices,
+        float(trading_params.get("transaction_cost", 0.001)),
+        float(trading_params.get("slippage", 0.0005)),
+        str(trading_params.get("trade_price", "close")),
+        0,
+    )
+
+    value_dtype = context.value_dtype
+    returns = simulated["returns"][:, 0].astype(value_dtype).astype(np.float64)
+    equity_values = (
+        simulated["equity_values"][:, 0].astype(value_dtype).astype(np.float64)
+    )
+
+    signal_changes = dict.__getitem__(result, "signal_changes")
+    params = dict.__getitem__(result, "params")
+    return context.simulator._build_records_frame(  # pylint: disable=protected-access
+        decode_signal_changes(*signal_changes["entry"], n_time),
+        decode_signal_changes(*signal_changes["exit"], n_time),
+        simulated["positions"][:, 0],
+        returns,
+        simulated["trade_actions"][:, 0],
+        equity_values,
+        params["predictor"],
+        dict.__getitem__(result, "Backtest_id"),
+        dict.__getitem__(result, "strategy_id"),
+        trading_params,
+    )
+
+
+def bind_sparse_context(results: Any, context: SparseRecordContext) -> None:
+    """為子進程返回的稀疏結果重新綁定共用上下文"""
+    for result in results:
+        if isinstance(result, SparseBacktestResult) and result.context is None:
+            result.bind(context)
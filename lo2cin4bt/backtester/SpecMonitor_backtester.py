@@ -69,6 +69,8 @@ flowchart TD
 ------------------------------------------------------------
 - 獲取最優CPU核心數：cores, desc = SpecMonitor.get_optimal_core_count()
 - 檢查記憶體安全性：status = SpecMonitor.check_memory_safety(n_tasks)
+- 按 dtype 模式估算矩陣記憶體：mb = SpecMonitor.estimate_matrix_memory_mb(n_time, n_tasks, compact_dtypes=True)
+- 串流區塊大小：chunk, desc = SpecMonitor.get_stream_chunk_size(n_time, n_tasks)
 - 收集配置信息：config_info = SpecMonitor.collect_config_info(n_tasks)
 - 獲取記憶體使用量：memory_used = SpecMonitor.get_memory_usage()
 - 顯示向量化監控：SpecMonitor.display_vectorization_monitor(initial_memory, console)
@@ -328,7 +330,70 @@ class SpecMonitor:
             return threshold, config_info
 
     @staticmethod
-    def check_memory_safety(n_tasks: int) -> str:
+    def get_matrix_bytes_per_cell(
+        compact_dtypes: bool = False, float32_values: bool = False
+    ) -> int:
+        """
+        估算向量化引擎每個 (時間點, 任務) 單元佔用的位元組數
+
+        包含開倉/平倉信號、持倉、交易動作（float64 或 int8）以及收益、權益（float64 或 float32）
+        """
+        signal_bytes = 1 if compact_dtypes else 8
+        value_bytes = 4 if float32_values else 8
+        return 4 * signal_bytes + 2 * value_bytes
+
+    @staticmethod
+    def estimate_matrix_memory_mb(
+        n_time: int,
+        n_tasks: int,
+        compact_dtypes: bool = False,
+        float32_values: bool = False,
+    ) -> float:
+        """估算 n_time x n_tasks 信號與交易矩陣的記憶體需求（MB）"""
+        bytes_per_cell = SpecMonitor.get_matrix_bytes_per_cell(
+            compact_dtypes, float32_values
+        )
+        return n_time * n_tasks * bytes_per_cell / (1024 * 1024)
+
+    @staticmethod
+    def get_stream_chunk_size(
+        n_time: int,
+        n_tasks: int,
+        compact_dtypes: bool = False,
+        float32_values: bool = False,
+    ) -> Tuple[int, str]:
+        """
+        根據記憶體閾值計算串流模式下每個區塊的任務數
+
+        每個任務需要 n_time 個矩陣單元與 n_time 行交易記錄（約 400 bytes/行），
+        區塊預算取 warning 閾值的一半，保留空間給導出與其他程序。
+
+        Returns:
+            Tuple[int, str]: (區塊任務數, 配置說明)
+        """
+        memory_thresholds = SpecMonitor.get_memory_thresholds()
+        budget_mb = memory_thresholds["warning"] * 0.5
+
+        record_bytes_per_row = 400
+        per_task_mb = SpecMonitor.estimate_matrix_memory_mb(
+            n_time, 1, compact_dtypes, float32_values
+        ) + n_time * record_bytes_per_row / (1024 * 1024)
+
+        chunk_size = max(1, int(budget_mb / per_task_mb)) if per_task_mb > 0 else n_tasks
+        chunk_size = max(1, min(chunk_size, n_tasks))
+        config_info = (
+            f"🔁 串流區塊計算: 預算 {budget_mb:.0f}MB, 每任務約 {per_task_mb:.2f}MB, "
+            f"區塊大小={chunk_size} 個任務"
+        )
+        return chunk_size, config_info
+
+    @staticmethod
+    def check_memory_safety(
+        n_tasks: int,
+        n_time: Optional[int] = None,
+        compact_dtypes: bool = False,
+        float32_values: bool = False,
+    ) -> str:
         """檢查記憶體安全性，返回檢查結果信息"""
         try:
             if PSUTIL_AVAILABLE:
@@ -337,6 +402,11 @@ class SpecMonitor:
 
                 # 估算記憶體需求（向量化處理更高效，每個任務約需要0.1-0.2MB）
                 estimated_memory_mb = n_tasks * 0.25  # 更合理的估算
+                if n_time is not None:
+                    # 已知時間長度時加上信號與交易矩陣的實際大小（依 dtype 模式）
+                    estimated_memory_mb += SpecMonitor.estimate_matrix_memory_mb(
+                        n_time, n_tasks, compact_dtypes, float32_values
+                    )
                 estimated_memory_gb = estimated_memory_mb / 1024
 
                 # 根據總記憶體動態調整警告閾值
@@ -479,7 +549,12 @@ class SpecMonitor:
             }
 
     @staticmethod
-    def collect_config_info(n_tasks: int) -> List[str]:
+    def collect_config_info(
+        n_tasks: int,
+        n_time: Optional[int] = None,
+        compact_dtypes: bool = False,
+        float32_values: bool = False,
+    ) -> List[str]:
         """預先收集配置信息"""
         config_info = []
 
@@ -493,7 +568,9 @@ class SpecMonitor:
             config_info.append(core_info)
 
             # 記憶體安全檢查
-            memory_check_result = SpecMonitor.check_memory_safety(n_tasks)
+            memory_check_result = SpecMonitor.check_memory_safety(
+                n_tasks, n_time, compact_dtypes, float32_values
+            )
             if memory_check_result and memory_check_result.strip():
                 config_info.append(memory_check_result)
 
@@ -47,6 +47,7 @@ flowchart TD
 - 數據結構變動會影響下游分析
 - 大量數據顯示時記憶體使用過高
 - 跨平台檔案路徑處理不當
+- 增量追加後輸出路徑為資料夾，讀取 metadata 需使用 _common_metadata（pq.read_table 只返回第一個 part 檔的 metadata）
 
 【錯誤處理】
 ------------------------------------------------------------
@@ -61,6 +62,7 @@ flowchart TD
 - 顯示智能摘要：exporter.display_backtest_summary()
 - 導出CSV：exporter.export_to_csv(backtest_id)
 - 導出Parquet：exporter.export_to_parquet(backtest_id)
+- 增量追加：exporter.append_to_parquet(既有檔案或資料夾路徑)
 - 策略分析：exporter.display_results_by_strategy()
 
 【與其他模組的關聯】
@@ -78,6 +80,8 @@ flowchart TD
 - v2.0: 新增智能摘要與策略分析
 - v2.1: 完善分頁顯示與篩選功能
 - v2.2: 優化記憶體使用與錯誤處理
+- v2.3: 新增 append_to_parquet，增量回測的新K線記錄追加到既有 Parquet
+- v2.4: append_to_parquet 改為寫出新的 part 檔（既有檔案轉為同名資料夾），不再重寫全部歷史；metadata 另存於 _common_metadata
 
 【參考】
 ------------------------------------------------------------
@@ -108,6 +112,10 @@ from rich.text import Text
 
 console = Console()
 
+# 增量追加的 Parquet 資料夾佈局：part 檔依序號排列，metadata 另存（pyarrow 的資料集慣例）
+APPEND_PART_NAME = "part-{:05d}.parquet"
+DATASET_METADATA_FILE = "_common_metadata"
+
 
 class TradeRecordExporter_backtester:
     """導出交易記錄至 CSV 或 Parquet。"""
@@ -662,6 +670,96 @@ class TradeRecordExporter_backtester:
             )
             raise
 
+    def append_to_parquet(
+        self, filepath: str, backtest_id: Optional[str] = None
+    ) -> None:
+        """將本次結果的交易記錄追加到既有 Parquet（增量回測），並更新 metadata 的數據結束時間。
+
+        首次追加時，既有檔案改名為同名資料夾內的 part-00000.parquet（不重寫），之後每次追加
+        只寫出新K線的 part 檔；更新後的 metadata 另存於資料夾的 _common_metadata。
+        讀取整個資料夾即為完整歷史（pd.read_parquet 會略過 _ 開頭的檔案）。
+
+        Args:
+            filepath: 既有的 Parquet 檔案或增量資料夾
+            backtest_id: 指定要追加的回測ID，如果為None則追加所有結果
+        """
+        try:
+            results_to_export = self._get_results_to_export(backtest_id)
+            combined_records = self._combine_records(results_to_export)
+            if combined_records.empty:
+                # 沒有新K線：既有輸出已是最新
+                self.last_exported_path = filepath
+                return
+
+            parts = self._ensure_parquet_dataset(filepath)
+            first_schema = pq.read_schema(os.path.join(filepath, parts[0]))
+            columns = [
+                name
+                for name in first_schema.names
+                if not name.startswith("__index_level_")
+            ]
+            new_table = pa.Table.from_pandas(
+                combined_records.reindex(columns=columns),
+                schema=first_schema.remove_metadata(),
+                preserve_index=False,
+            ).replace_schema_metadata(first_schema.metadata)
+            part_path = os.path.join(filepath, APPEND_PART_NAME.format(len(parts)))
+            # 暫存檔以 _ 開頭，寫入中途失敗時不會被讀取
+            tmp_path = os.path.join(filepath, f"_{os.path.basename(part_path)}.tmp")
+            pq.write_table(new_table, tmp_path)
+            os.replace(tmp_path, part_path)
+
+            self._update_dataset_metadata(filepath, first_schema)
+            self.last_exported_path = filepath
+
+            self.logger.info(
+                f"已追加 {len(combined_records)} 筆交易記錄至 Parquet: {part_path}",
+                extra={"Backtest_id": self.Backtest_id},
+            )
+        except Exception as e:
+            self.logger.error(
+                f"Parquet 追加失敗: {e}",
+                extra={"Backtest_id": self.Backtest_id},
+            )
+            raise
+
+    @staticmethod
+    def _ensure_parquet_dataset(filepath: str) -> List[str]:
+        """單一 Parquet 檔案改為同名資料夾內的第一個 part 檔，返回已存在的 part 檔名（已排序）"""
+        if os.path.isfile(filepath):
+            staging = f"{filepath}.dataset.tmp"
+            os.makedirs(staging, exist_ok=True)
+            os.replace(filepath, os.path.join(staging, APPEND_PART_NAME.format(0)))
+            os.rename(staging, filepath)
+        return sorted(
+            name
+            for name in os.listdir(filepath)
+            if name.startswith("part-") and name.endswith(".parquet")
+        )
+
+    def _update_dataset_metadata(self, dirpath: str, first_schema: pa.Schema) -> None:
+        """將 batch_metadata 的 Data_end_time 更新為本次數據結束時間，寫入 _common_metadata"""
+        metadata_path = os.path.join(dirpath, DATASET_METADATA_FILE)
+        schema = (
+            pq.read_schema(metadata_path)
+            if os.path.exists(metadata_path)
+            else first_schema
+        )
+        metadata = dict(schema.metadata or {})
+        has_end_time = self.data is not None and "Time" in self.data.columns
+        if b"batch_metadata" in metadata and has_end_time:
+            batch_metadata = json.loads(metadata[b"batch_metadata"].decode("utf-8"))
+            data_end_time = str(self.data["Time"].max())
+            for meta in batch_metadata:
+                meta["Data_end_time"] = data_end_time
+            metadata[b"batch_metadata"] = json.dumps(
+                batch_metadata, ensure_ascii=False
+            ).encode("utf-8")
+
+        tmp_path = f"{metadata_path}.tmp"
+        pq.write_metadata(schema.with_metadata(metadata), tmp_path)
+        os.replace(tmp_path, metadata_path)
+
     def display_backtest_summary(self) -> None:
         """顯示回測摘要，包含預覽表格和操作選項。"""
         if not self.results:
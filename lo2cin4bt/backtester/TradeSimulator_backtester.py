@@ -38,7 +38,11 @@ flowchart TD
 - simulate_trades(): 單個策略交易模擬（向後兼容）
 - simulate_trades_vectorized(): 向量化交易模擬（供 VBT 調用）
 - generate_single_result(): 生成完整交易記錄
+- _build_records_frame(): 以欄位向量一次構建交易記錄 DataFrame
 - _vectorized_trade_simulation_njit(): Numba 加速的向量化交易邏輯
+- _vectorized_trade_simulation_resume_into_njit(): 可續跑的交易模擬，讀寫每個策略的終止狀態
+- _vectorized_trade_simulation_parallel_resume_into_njit(): prange 並行版本，按策略分配執行緒
+- _simulate_strategy_njit() / _trade_transition_njit(): 單一策略的時間迴圈（按交易延遲分段）與單根K線狀態轉換
 
 【維護與擴充重點】
 ------------------------------------------------------------
@@ -46,9 +50,11 @@ flowchart TD
 - 未來如需支援「反手開倉」等特殊行為，只需在本模組集中修改
 - 若信號產生邏輯有變動（如允許2, -2等複合信號），需同步調整本模組的判斷邏輯
 - **每次開發新 indicator 或信號型態時，務必檢查本模組的持倉/平倉判斷是否仍然正確**
-- 任何涉及 position, signal 判斷的邏輯都在本檔案 for 迴圈內
+- 任何涉及 position, signal 判斷的邏輯都在本檔案 _trade_transition_njit 內（串行、並行與篩選核心共用）
+- 成交價格序列（開盤/收盤）與成本係數在核心入口選定一次，內層迴圈不比較字串、不判斷信號索引邊界
 - 若有新信號型態，需同步更新本檔案的判斷分支
-- 若有交易記錄欄位變動，需同步更新 record 結構
+- 若有交易記錄欄位變動，需同步更新 _build_records_frame 的欄位順序
+- 交易記錄的逐K線狀態（交易序號、持倉期數、交易收益率）由 _build_trade_record_columns_njit 單次掃描生成
 - 向量化邏輯需要與單個策略邏輯保持一致
 
 【常見易錯點】
@@ -58,6 +64,7 @@ flowchart TD
 - 交易延遲、交易成本、滑點等皆可自訂，需注意參數傳遞正確
 - 向量化計算與單個策略計算結果不一致
 - 持倉狀態管理錯誤導致交易邏輯異常
+- 並行核心在行優先矩陣上仍正確但會跨步存取，引擎的信號與結果矩陣應使用列優先佈局
 
 【錯誤處理】
 ------------------------------------------------------------
@@ -90,6 +97,11 @@ flowchart TD
 - v2.0: 新增向量化交易模擬，統一接口
 - v2.1: 整合 Numba JIT 編譯優化
 - v2.2: 完善錯誤處理與邏輯驗證
+- v2.3: 交易記錄改為欄位向量構建，移除逐列 iloc 迴圈；Trade_group_id 改為確定性遞增序號
+- v2.4: 交易模擬可從保存的終止狀態續跑，記錄構建可接續既有交易序號（增量回測）
+- v2.5: 新增 prange 並行模擬核心與列優先矩陣佈局，由引擎依 CPU 核心數選擇串行或並行
+- v2.6: 模擬核心移除內層迴圈的字串比較與信號邊界判斷，成交價格與成本係數每次呼叫選定一次；模擬核心不再使用 fastmath
+- v2.7: 單根K線狀態轉換抽出為不寫矩陣的 _trade_transition_njit，與 Screening 篩選核心共用
 
 【參考】
 ------------------------------------------------------------
@@ -100,21 +112,415 @@ flowchart TD
 """
 
 import logging
-from typing import Any, Dict, List, Optional, Union
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Union
 
 import numpy as np
 import pandas as pd
 
 # 導入 Numba 進行 JIT 編譯加速
-from numba import njit
+from numba import config as numba_config
+from numba import get_num_threads, njit, prange, set_num_threads
 
 # 導入型別
 from .IndicatorParams_backtester import IndicatorParams
 
 
 # 核心算法：向量化 Numba 實現
-@njit(fastmath=True, cache=True)
-def _vectorized_trade_simulation_njit(  # pylint: disable=too-complex
+# 模擬狀態欄位數：持倉狀態、權益、開倉價格、開倉權益、前一根K線資金曲線
+SIMULATION_STATE_SIZE = 5
+
+# 模擬矩陣（K線數 x 策略數）達到此大小時，引擎才考慮使用並行模擬核心
+PARALLEL_SIMULATION_MIN_CELLS = 1_000_000
+
+
+@njit(cache=True, inline="always")
+def _trade_transition_njit(
+    t: int,
+    entry_sig: float,
+    exit_sig: float,
+    price: float,
+    cost_factor: float,
+    current_state: float,
+    equity: float,
+    open_price: float,
+    open_equity: float,
+    prev_equity_value: float,
+):
+    """
+    單一策略單根K線的狀態轉換（不寫入任何矩陣，模擬與篩選核心共用）
+
+    price 為已選定的成交價格序列（開盤或收盤）在第 t 根的值，cost_factor 為
+    (1 - 滑點) * (1 - 手續費)；返回 (持倉狀態, 權益, 開倉價格, 開倉權益, 當日收益率, 交易動作)
+    """
+    # 計算資金曲線和每日收益率
+    daily_return = 0.0
+    if t > 0 and current_state != 0.0 and open_price > 0.0:
+        if current_state == 1.0:  # 做多
+            price_return = (price - open_price) / open_price
+        else:  # 做空
+            price_return = (open_price - price) / open_price
+
+        # 計算資金曲線：開倉時權益 * (1 + 價格收益率)
+        equity = open_equity * (1.0 + price_return)
+
+        # 計算每日收益率：今日資金曲線 / 昨日資金曲線 - 1
+        if prev_equity_value > 0:
+            daily_return = (equity * 100.0) / prev_equity_value - 1.0
+
+    # 狀態轉換邏輯
+    action = 0
+    if current_state == 0.0:  # 空倉
+        if entry_sig == 1.0 or entry_sig == -1.0:  # 開多倉 / 開空倉
+            current_state = 1.0 if entry_sig == 1.0 else -1.0
+            action = 1
+            open_price = price  # 設置開倉價格
+            equity *= cost_factor  # 扣除滑點與手續費
+            open_equity = equity  # 記錄開倉時的權益（扣除成本後）
+    elif current_state == 1.0:  # 多倉
+        if exit_sig == -1.0:  # 平多倉
+            current_state = 0.0
+            action = 4
+            open_price = 0.0  # 重置開倉價格
+            open_equity = 1.0  # 重置開倉權益
+            equity *= cost_factor  # 扣除滑點與手續費
+    elif current_state == -1.0:  # 空倉
+        if exit_sig == 1.0:  # 平空倉
+            current_state = 0.0
+            action = 4
+            open_price = 0.0  # 重置開倉價格
+            open_equity = 1.0  # 重置開倉權益
+            equity *= cost_factor  # 扣除滑點與手續費
+
+    return current_state, equity, open_price, open_equity, daily_return, action
+
+
+@njit(cache=True, inline="always")
+def _advance_bar_njit(
+    t: int,
+    s: int,
+    entry_sig: float,
+    exit_sig: float,
+    price: float,
+    cost_factor: float,
+    current_state: float,
+    equity: float,
+    open_price: float,
+    open_equity: float,
+    prev_equity_value: float,
+    positions: np.ndarray,
+    returns: np.ndarray,
+    trade_actions: np.ndarray,
+    equity_values: np.ndarray,
+):
+    """
+    推進單一策略一根K線並寫入輸出矩陣
+
+    返回 (持倉狀態, 權益, 開倉價格, 開倉權益, 資金曲線)
+    """
+    (
+        current_state,
+        equity,
+        open_price,
+        open_equity,
+        daily_return,
+        action,
+    ) = _trade_transition_njit(
+        t,
+        entry_sig,
+        exit_sig,
+        price,
+        cost_factor,
+        current_state,
+        equity,
+        open_price,
+        open_equity,
+        prev_equity_value,
+    )
+
+    returns[t, s] = daily_return
+    trade_actions[t, s] = action
+    positions[t, s] = current_state
+    prev_equity_value = equity * 100.0
+    equity_values[t, s] = prev_equity_value
+    return current_state, equity, open_price, open_equity, prev_equity_value
+
+
+@njit(cache=True)
+def _simulate_strategy_njit(
+    s: int,
+    entry_signals: np.ndarray,
+    exit_signals: np.ndarray,
+    prices: np.ndarray,
+    cost_factor: float,
+    trade_delay: int,
+    start: int,
+    state: np.ndarray,
+    positions: np.ndarray,
+    returns: np.ndarray,
+    trade_actions: np.ndarray,
+    equity_values: np.ndarray,
+) -> None:
+    """
+    單一策略（第 s 欄）的交易狀態機，從第 start 根K線開始並寫回終止狀態
+
+    時間軸按交易延遲切成三段，內層迴圈不需判斷信號索引邊界：
+    t < trade_delay 時尚無可執行信號；之後第 t 根K線執行第 t - trade_delay 根的信號；
+    trade_delay 為負（前視）時最後 -trade_delay 根K線同樣沒有信號。
+    """
+    n_time = entry_signals.shape[0]
+
+    # 狀態機：最小化記憶依賴
+    current_state = state[s, 0]  # 0=空倉, 1=多倉, -1=空倉
+    equity = state[s, 1]
+    open_price = state[s, 2]  # 追蹤開倉價格
+    open_equity = state[s, 3]  # 追蹤開倉時的權益
+    prev_equity_value = state[s, 4]  # 前一根K線的資金曲線（不受輸出 dtype 影響）
+
+    first = min(max(start, trade_delay), n_time)
+    stop = max(first, min(n_time, n_time + trade_delay))
+
+    for t in range(start, first):
+        (
+            current_state,
+            equity,
+            open_price,
+            open_equity,
+            prev_equity_value,
+        ) = _advance_bar_njit(
+            t,
+            s,
+            0.0,
+            0.0,
+            prices[t],
+            cost_factor,
+            current_state,
+            equity,
+            open_price,
+            open_equity,
+            prev_equity_value,
+            positions,
+            returns,
+            trade_actions,
+            equity_values,
+        )
+
+    for t in range(first, stop):
+        signal_index = t - trade_delay
+        (
+            current_state,
+            equity,
+            open_price,
+            open_equity,
+            prev_equity_value,
+        ) = _advance_bar_njit(
+            t,
+            s,
+            entry_signals[signal_index, s],
+            exit_signals[signal_index, s],
+            prices[t],
+            cost_factor,
+            current_state,
+            equity,
+            open_price,
+            open_equity,
+            prev_equity_value,
+            positions,
+            returns,
+            trade_actions,
+            equity_values,
+        )
+
+    for t in range(stop, n_time):
+        (
+            current_state,
+            equity,
+            open_price,
+            open_equity,
+            prev_equity_value,
+        ) = _advance_bar_njit(
+            t,
+            s,
+            0.0,
+            0.0,
+            prices[t],
+            cost_factor,
+            current_state,
+            equity,
+            open_price,
+            open_equity,
+            prev_equity_value,
+            positions,
+            returns,
+            trade_actions,
+            equity_values,
+        )
+
+    state[s, 0] = current_state
+    state[s, 1] = equity
+    state[s, 2] = open_price
+    state[s, 3] = open_equity
+    state[s, 4] = prev_equity_value
+
+
+@njit(cache=True)
+def _vectorized_trade_simulation_resume_into_njit(
+    entry_signals: np.ndarray,
+    exit_signals: np.ndarray,
+    close_prices: np.ndarray,
+    open_prices: np.ndarray,
+    transaction_cost: float,
+    slippage: float,
+    trade_price: str,
+    trade_delay: int,
+    start: int,
+    state: np.ndarray,
+    positions: np.ndarray,
+    returns: np.ndarray,
+    trade_actions: np.ndarray,
+    equity_values: np.ndarray,
+) -> None:
+    """
+    可續跑的向量化交易模擬 - 從第 start 根K線開始，以 state 為初始狀態
+
+    state 形狀為 (n_strategies, SIMULATION_STATE_SIZE)，每列依序為
+    持倉狀態、權益、開倉價格、開倉權益、前一根K線資金曲線；模擬結束時寫回終止狀態，
+    供增量回測在新增K線上接續。輸出矩陣只寫入 start 之後的列。
+    """
+    n_strategies = entry_signals.shape[1]
+    # 成交價格序列與成本係數每次呼叫只決定一次，內層迴圈不再比較字串
+    prices = close_prices if trade_price == "close" else open_prices
+    cost_factor = (1.0 - slippage) * (1.0 - transaction_cost)
+
+    # 對每個策略進行優化的狀態機處理
+    for s in range(n_strategies):
+        _simulate_strategy_njit(
+            s,
+            entry_signals,
+            exit_signals,
+            prices,
+            cost_factor,
+            trade_delay,
+            start,
+            state,
+            positions,
+            returns,
+            trade_actions,
+            equity_values,
+        )
+
+
+@njit(parallel=True, cache=True)
+def _vectorized_trade_simulation_parallel_resume_into_njit(
+    entry_signals: np.ndarray,
+    exit_signals: np.ndarray,
+    close_prices: np.ndarray,
+    open_prices: np.ndarray,
+    transaction_cost: float,
+    slippage: float,
+    trade_price: str,
+    trade_delay: int,
+    start: int,
+    state: np.ndarray,
+    positions: np.ndarray,
+    returns: np.ndarray,
+    trade_actions: np.ndarray,
+    equity_values: np.ndarray,
+) -> None:
+    """
+    並行版可續跑交易模擬 - 以 prange 將策略分配到多個執行緒
+
+    各策略欄互不依賴，結果與串行版完全相同。輸入與輸出矩陣應為列優先（Fortran）佈局，
+    每個策略的時間序列連續存放，執行緒之間不會寫入同一快取行。
+    """
+    n_strategies = entry_signals.shape[1]
+    # 成交價格序列與成本係數每次呼叫只決定一次，內層迴圈不再比較字串
+    prices = close_prices if trade_price == "close" else open_prices
+    cost_factor = (1.0 - slippage) * (1.0 - transaction_cost)
+
+    for s in prange(n_strategies):
+        _simulate_strategy_njit(
+            s,
+            entry_signals,
+            exit_signals,
+            prices,
+            cost_factor,
+            trade_delay,
+            start,
+            state,
+            positions,
+            returns,
+            trade_actions,
+            equity_values,
+        )
+
+
+@contextmanager
+def numba_thread_limit(n_threads: int) -> Iterator[None]:
+    """暫時設定 Numba 並行核心的執行緒數，離開時恢復原設定"""
+    previous = get_num_threads()
+    set_num_threads(max(1, min(int(n_threads), numba_config.NUMBA_NUM_THREADS)))
+    try:
+        yield
+    finally:
+        set_num_threads(previous)
+
+
+def initial_simulation_state(n_strategies: int) -> np.ndarray:
+    """全新策略的模擬狀態：空倉、權益 1.0、資金曲線 100"""
+    state = np.zeros((n_strategies, SIMULATION_STATE_SIZE))
+    state[:, 1] = 1.0
+    state[:, 3] = 1.0
+    state[:, 4] = 100.0
+    return state
+
+
+@njit(cache=True)
+def _vectorized_trade_simulation_into_njit(
+    entry_signals: np.ndarray,
+    exit_signals: np.ndarray,
+    close_prices: np.ndarray,
+    open_prices: np.ndarray,
+    transaction_cost: float,
+    slippage: float,
+    trade_price: str,
+    trade_delay: int,
+    positions: np.ndarray,
+    returns: np.ndarray,
+    trade_actions: np.ndarray,
+    equity_values: np.ndarray,
+) -> None:
+    """
+    向量化交易模擬 - 結果寫入呼叫方預先分配的矩陣
+
+    輸出矩陣可為任意數值 dtype（例如 int8 持倉/動作、float32 權益/收益），
+    權益與收益在內部始終以 float64 計算，只在寫入時轉換。
+    """
+    n_strategies = entry_signals.shape[1]
+    state = np.zeros((n_strategies, SIMULATION_STATE_SIZE))
+    state[:, 1] = 1.0
+    state[:, 3] = 1.0
+    state[:, 4] = 100.0
+    _vectorized_trade_simulation_resume_into_njit(
+        entry_signals,
+        exit_signals,
+        close_prices,
+        open_prices,
+        transaction_cost,
+        slippage,
+        trade_price,
+        trade_delay,
+        0,
+        state,
+        positions,
+        returns,
+        trade_actions,
+        equity_values,
+    )
+
+
+@njit(cache=True)
+def _vectorized_trade_simulation_njit(
     entry_signals: np.ndarray,
     exit_signals: np.ndarray,
     close_prices: np.ndarray,
@@ -135,95 +541,145 @@ def _vectorized_trade_simulation_njit(  # pylint: disable=too-complex
     trade_actions = np.zeros((n_time, n_strategies))
     equity_values = np.zeros((n_time, n_strategies))
 
-    # 對每個策略進行優化的狀態機處理
-    for s in range(n_strategies):
-        # 狀態機：最小化記憶依賴
-        current_state = 0.0  # 0=空倉, 1=多倉, -1=空倉
-        equity = 1.0
-        open_price = 0.0  # 追蹤開倉價格
-        open_equity = 1.0  # 追蹤開倉時的權益
-
-        for t in range(n_time):
-            # 計算信號索引（考慮交易延遲）
-            signal_index = t - trade_delay
-            entry_sig = (
-                entry_signals[signal_index, s] if 0 <= signal_index < n_time else 0.0
-            )
-            exit_sig = (
-                exit_signals[signal_index, s] if 0 <= signal_index < n_time else 0.0
-            )
+    _vectorized_trade_simulation_into_njit(
+        entry_signals,
+        exit_signals,
+        close_prices,
+        open_prices,
+        transaction_cost,
+        slippage,
+        trade_price,
+        trade_delay,
+        positions,
+        returns,
+        trade_actions,
+        equity_values,
+    )
 
-            # 計算資金曲線和每日收益率
-            if t > 0 and current_state != 0.0 and open_price > 0.0:
-                if trade_price == "close":
-                    current_close = close_prices[t]
-                    if current_state == 1.0:  # 做多
-                        price_return = (current_close - open_price) / open_price
-                    else:  # 做空
-                        price_return = (open_price - current_close) / open_price
-                else:  # trade_price == 'open'
-                    current_open = open_prices[t]
-                    if current_state == 1.0:  # 做多
-                        price_return = (current_open - open_price) / open_price
-                    else:  # 做空
-                        price_return = (open_price - current_open) / open_price
-
-                # 計算資金曲線：開倉時權益 * (1 + 價格收益率)
-                equity = open_equity * (1.0 + price_return)
-                
-                # 計算每日收益率：今日資金曲線 / 昨日資金曲線 - 1
-                if equity_values[t-1, s] > 0:
-                    returns[t, s] = (equity * 100.0) / equity_values[t-1, s] - 1.0
-                else:
-                    returns[t, s] = 0.0
-            else:
-                returns[t, s] = 0.0
-
-            # 狀態轉換邏輯（優化版本）
-            if current_state == 0.0:  # 空倉
-                if entry_sig == 1.0:  # 開多倉
-                    current_state = 1.0
-                    trade_actions[t, s] = 1
-                    # 設置開倉價格
-                    if trade_price == "close":
-                        open_price = close_prices[t]
-                    else:
-                        open_price = open_prices[t]
-                    # 扣除滑點與手續費
-                    equity *= (1.0 - slippage) * (1.0 - transaction_cost)
-                    open_equity = equity  # 記錄開倉時的權益（扣除成本後）
-                elif entry_sig == -1.0:  # 開空倉
-                    current_state = -1.0
-                    trade_actions[t, s] = 1
-                    # 設置開倉價格
-                    if trade_price == "close":
-                        open_price = close_prices[t]
+    return {"positions": positions, "returns": returns, "trade_actions": trade_actions, "equity_values": equity_values}
+
+
+# 交易記錄 Position_type 代碼（0 表示無）
+_POSITION_TYPE_LABELS = np.array(
+    [None, "new_long", "new_short", "close_long", "close_short"], dtype=object
+)
+
+
+@njit(cache=True)
+def _build_trade_record_columns_njit(
+    position: np.ndarray,
+    trade_actions: np.ndarray,
+    prices: np.ndarray,
+    offset: int = 0,
+    trade_state: Optional[np.ndarray] = None,
+    prev_position: float = 0.0,
+):
+    """
+    單次掃描生成交易記錄的逐K線欄位（交易序號、持倉期數、收益率等）
+
+    position/trade_actions 為第 offset 根K線起的片段，prices 為完整價格序列；
+    trade_state 為片段開始前的 (已開倉交易數, 未平倉交易的開倉索引, 持倉期數)，
+    prev_position 為片段前一根K線的持倉，供增量回測接續既有記錄。
+
+    Returns:
+        tuple: (trade_no, open_index, position_type_code, holding_period_count,
+                holding_period, trade_return)，trade_no/open_index 為 -1 表示不在交易中，
+                open_index 為完整序列中的索引
+    """
+    n = len(position)
+    trade_no = np.full(n, -1, dtype=np.int64)
+    open_index = np.full(n, -1, dtype=np.int64)
+    position_type_code = np.zeros(n, dtype=np.int8)
+    holding_period_count = np.zeros(n, dtype=np.int64)
+    holding_period = np.full(n, np.nan)
+    trade_return = np.full(n, np.nan)
+
+    current_trade = -1
+    current_open = -1
+    n_trades = 0
+    count = 0
+    if trade_state is not None:
+        n_trades = trade_state[0]
+        current_open = trade_state[1]
+        count = trade_state[2]
+        if current_open >= 0:
+            current_trade = n_trades - 1
+
+    for i in range(n):
+        action = trade_actions[i]
+        if action == 1:  # 開倉
+            position_type_code[i] = 1 if position[i] > 0 else 2
+            current_trade = n_trades
+            current_open = offset + i
+            n_trades += 1
+            trade_no[i] = current_trade
+            open_index[i] = current_open
+            count = 0
+        elif action == 4:  # 平倉
+            last_position = position[i - 1] if i > 0 else prev_position
+            if last_position > 0:
+                position_type_code[i] = 3
+            elif last_position < 0:
+                position_type_code[i] = 4
+            trade_no[i] = current_trade
+            if current_trade >= 0:
+                open_index[i] = current_open
+                # 平倉當根也計入持倉期數
+                count += 1
+                holding_period[i] = count
+                open_price = prices[current_open]
+                if open_price > 0:
+                    if position_type_code[i] == 3:
+                        trade_return[i] = (prices[offset + i] - open_price) / open_price
                     else:
-                        open_price = open_prices[t]
-                    # 扣除滑點與手續費
-                    equity *= (1.0 - slippage) * (1.0 - transaction_cost)
-                    open_equity = equity  # 記錄開倉時的權益（扣除成本後）
-            elif current_state == 1.0:  # 多倉
-                if exit_sig == -1.0:  # 平多倉
-                    current_state = 0.0
-                    trade_actions[t, s] = 4
-                    open_price = 0.0  # 重置開倉價格
-                    open_equity = 1.0  # 重置開倉權益
-                    # 扣除滑點與手續費
-                    equity *= (1.0 - slippage) * (1.0 - transaction_cost)
-            elif current_state == -1.0:  # 空倉
-                if exit_sig == 1.0:  # 平空倉
-                    current_state = 0.0
-                    trade_actions[t, s] = 4
-                    open_price = 0.0  # 重置開倉價格
-                    open_equity = 1.0  # 重置開倉權益
-                    # 扣除滑點與手續費
-                    equity *= (1.0 - slippage) * (1.0 - transaction_cost)
-
-            positions[t, s] = current_state
-            equity_values[t, s] = equity * 100.0
+                        trade_return[i] = (open_price - prices[offset + i]) / open_price
+            current_trade = -1
+            current_open = -1
+            count = 0
+        elif current_trade >= 0:  # 持倉期間
+            count += 1
+            trade_no[i] = current_trade
+        holding_period_count[i] = count
+
+    return (
+        trade_no,
+        open_index,
+        position_type_code,
+        holding_period_count,
+        holding_period,
+        trade_return,
+    )
+
+
+@njit(cache=True)
+def _advance_trade_record_state_njit(
+    trade_actions: np.ndarray, start: int, offset: int, trade_state: np.ndarray
+) -> None:
+    """
+    依交易動作矩陣（n_time, n_strategies）第 start 列起的部分推進各策略的記錄狀態
 
-    return {"positions": positions, "returns": returns, "trade_actions": trade_actions, "equity_values": equity_values}
+    trade_state 形狀為 (n_strategies, 3)：已開倉交易數、未平倉交易的開倉索引
+    （完整序列索引，-1 表示空倉）、持倉期數；offset 為矩陣第 0 列在完整序列中的索引。
+    """
+    n_time, n_strategies = trade_actions.shape
+    for s in range(n_strategies):
+        n_trades = trade_state[s, 0]
+        current_open = trade_state[s, 1]
+        count = trade_state[s, 2]
+        for t in range(start, n_time):
+            action = trade_actions[t, s]
+            if action == 1:
+                n_trades += 1
+                current_open = offset + t
+                count = 0
+            elif action == 4:
+                current_open = -1
+                count = 0
+            elif current_open >= 0:
+                count += 1
+        trade_state[s, 0] = n_trades
+        trade_state[s, 1] = current_open
+        trade_state[s, 2] = count
 
 
 logger = logging.getLogger("lo2cin4bt")
@@ -337,7 +793,14 @@ class TradeSimulator_backtester:
         return result["records"], None  # 返回 records_df 和 warning_msg
 
     def simulate_trades_vectorized(  # pylint: disable=unused-argument
-        self, entry_signals_matrix: pd.Series, exit_signals_matrix: pd.Series, trading_params: Dict[str, Any]
+        self,
+        entry_signals_matrix: pd.Series,
+        exit_signals_matrix: pd.Series,
+        trading_params: Dict[str, Any],
+        out: Optional[Dict[str, np.ndarray]] = None,
+        state: Optional[np.ndarray] = None,
+        start: int = 0,
+        n_threads: int = 1,
     ) -> Dict[str, Any]:
         """
         向量化交易模擬 - 供 VBT 調用
@@ -346,21 +809,89 @@ class TradeSimulator_backtester:
             entry_signals_matrix: numpy.ndarray, shape (n_time, n_strategies)
             exit_signals_matrix: numpy.ndarray, shape (n_time, n_strategies)
             trading_params: dict, 包含交易參數
+            out: 可選，預先分配的輸出矩陣（positions/returns/trade_actions/equity_values），
+                可使用緊湊 dtype（int8 持倉/動作、float32 收益/權益）或共享記憶體
+            state: 可選，(n_strategies, SIMULATION_STATE_SIZE) 模擬狀態，
+                以其為初始狀態並就地寫回終止狀態（增量回測）
+            start: 開始模擬的K線索引，之前的列不寫入
+            n_threads: 大於 1 時使用 prange 並行核心，按策略分配到多個執行緒
 
         Returns:
             dict: 包含向量化交易結果
         """
-        # 使用 Numba 加速的向量化交易模擬
-        result = _vectorized_trade_simulation_njit(
-            entry_signals_matrix,
-            exit_signals_matrix,
-            self.data["Close"].values.astype(np.float64),
-            self.data["Open"].values.astype(np.float64),
-            trading_params.get("transaction_cost", 0.001),
-            trading_params.get("slippage", 0.0005),
-            trading_params.get("trade_price", "close"),
-            trading_params.get("trade_delay", 0),
-        )
+        close_prices = self.data["Close"].values.astype(np.float64)
+        open_prices = self.data["Open"].values.astype(np.float64)
+        n_time, n_strategies = entry_signals_matrix.shape
+
+        if n_threads > 1 or state is not None:
+            # 可續跑核心；預設輸出矩陣使用列優先佈局，每個策略的時間序列連續存放
+            if out is None:
+                out = {
+                    key: np.zeros((n_time, n_strategies), order="F")
+                    for key in ("positions", "returns", "trade_actions", "equity_values")
+                }
+            if state is None:
+                state = initial_simulation_state(n_strategies)
+            args = (
+                float(trading_params.get("transaction_cost", 0.001)),
+                float(trading_params.get("slippage", 0.0005)),
+                str(trading_params.get("trade_price", "close")),
+                int(trading_params.get("trade_delay", 0)),
+                int(start),
+                state,
+                out["positions"],
+                out["returns"],
+                out["trade_actions"],
+                out["equity_values"],
+            )
+            if n_threads > 1:
+                # 行優先信號先轉為列優先，避免各執行緒跨步讀取
+                with numba_thread_limit(n_threads):
+                    _vectorized_trade_simulation_parallel_resume_into_njit(
+                        np.asfortranarray(entry_signals_matrix),
+                        np.asfortranarray(exit_signals_matrix),
+                        close_prices,
+                        open_prices,
+                        *args,
+                    )
+            else:
+                _vectorized_trade_simulation_resume_into_njit(
+                    entry_signals_matrix,
+                    exit_signals_matrix,
+                    close_prices,
+                    open_prices,
+                    *args,
+                )
+            result = out
+        elif out is not None:
+            # 直接寫入呼叫方分配的矩陣，不產生 float64 中間結果
+            _vectorized_trade_simulation_into_njit(
+                entry_signals_matrix,
+                exit_signals_matrix,
+                close_prices,
+                open_prices,
+                float(trading_params.get("transaction_cost", 0.001)),
+                float(trading_params.get("slippage", 0.0005)),
+                str(trading_params.get("trade_price", "close")),
+                int(trading_params.get("trade_delay", 0)),
+                out["positions"],
+                out["returns"],
+                out["trade_actions"],
+                out["equity_values"],
+            )
+            result = out
+        else:
+            # 使用 Numba 加速的向量化交易模擬
+            result = _vectorized_trade_simulation_njit(
+                entry_signals_matrix,
+                exit_signals_matrix,
+                close_prices,
+                open_prices,
+                trading_params.get("transaction_cost", 0.001),
+                trading_params.get("slippage", 0.0005),
+                trading_params.get("trade_price", "close"),
+                trading_params.get("trade_delay", 0),
+            )
         positions = result["positions"]
         returns = result["returns"]
         trade_actions = result["trade_actions"]
@@ -387,152 +918,63 @@ class TradeSimulator_backtester:
         entry_params: Dict[str, Any],
         exit_params: Dict[str, Any],
         trading_params: Dict[str, Any],
+        offset: int = 0,
+        trade_state: Optional[np.ndarray] = None,
+        prev_position: float = 0.0,
     ) -> Dict[str, Any]:
         """
         生成單個任務的結果 - 移植自 VBT 的 _generate_single_result
-        """
-        import uuid
-
-        records = []
-        current_trade_group_id = None
-        open_price_map = {}
-        open_time_map = {}
-        holding_period_count = 0
-
-        for i in range(len(position)):
-            row = self.data.iloc[i]
-            # 確保使用正確的時間索引
-            if isinstance(self.data.index, pd.DatetimeIndex):
-                time_index = self.data.index[i]
-            elif "Time" in self.data.columns:
-                time_index = row["Time"]
-            else:
-                time_index = i  # 如果沒有時間索引，使用數字索引
-
-            # 根據trade_actions判斷交易類型
-            position_type = None
-            open_position_price = 0.0
-            close_position_price = 0.0
-            open_time = None
-            close_time = None
-            trade_group_id = None
-            transaction_cost = 0.0
-            slippage_cost = 0.0
-            holding_period = None
-            trade_return = None
-
-            # 根據trade_price設置當前時間點的價格（無論是否有交易動作）
-            trade_price = trading_params.get("trade_price", "close")
-            current_price = row["Open"] if trade_price == "open" else row["Close"]
-
-            if trade_actions[i] == 1:  # 開倉
-                if position[i] > 0:
-                    position_type = "new_long"
-                else:
-                    position_type = "new_short"
-                open_position_price = current_price
-                open_time = time_index
-                # 生成新的交易組ID
-                trade_group_id = f"T{str(uuid.uuid4())[:8]}"
-                current_trade_group_id = trade_group_id
-                # 記錄開倉價格和時間
-                open_price_map[trade_group_id] = open_position_price
-                open_time_map[trade_group_id] = open_time
-                # 計算交易成本
-                transaction_cost = trading_params.get("transaction_cost", 0.001)
-                slippage_cost = trading_params.get("slippage", 0.0005)
-                holding_period_count = 0
-            elif trade_actions[i] == 4:  # 平倉
-                close_position_price = current_price
-                close_time = time_index
-                # 補上平倉時的 Position_type
-                if i > 0:
-                    if position[i - 1] > 0:
-                        position_type = "close_long"
-                    elif position[i - 1] < 0:
-                        position_type = "close_short"
-                # 使用當前的交易組ID
-                trade_group_id = current_trade_group_id
-                # 計算交易成本
-                transaction_cost = trading_params.get("transaction_cost", 0.001)
-                slippage_cost = trading_params.get("slippage", 0.0005)
-                # 計算持倉期間和交易收益率
-                if trade_group_id and trade_group_id in open_time_map:
-                    open_time = open_time_map[trade_group_id]
-                    open_price = open_price_map[trade_group_id]
-                    # 先累加持倉期數（平倉當日也要計算）
-                    if current_trade_group_id is not None:
-                        holding_period_count += 1
-                    # 使用正確的 holding_period_count 作為 holding_period
-                    holding_period = holding_period_count
-                    # 計算交易收益率
-                    if open_price > 0:
-                        if position_type == "close_long":
-                            trade_return = (
-                                close_position_price - open_price
-                            ) / open_price
-                        else:  # close_short
-                            trade_return = (
-                                open_price - close_position_price
-                            ) / open_price
-                # 清理交易組記錄
-                if trade_group_id in open_price_map:
-                    open_price_map.pop(trade_group_id)
-                if trade_group_id in open_time_map:
-                    open_time_map.pop(trade_group_id)
-                current_trade_group_id = None
-                # 平倉後重置 holding_period_count 為 0
-                holding_period_count = 0
-            else:
-                # 持倉期間，累加持倉期數
-                if current_trade_group_id is not None:
-                    holding_period_count += 1
-                    trade_group_id = current_trade_group_id
-
-            record = {
-                "Time": time_index,
-                "Open": row["Open"],
-                "High": row["High"],
-                "Low": row["Low"],
-                "Close": row["Close"],
-                "Trading_instrument": getattr(self, 'trading_instrument', 'X'),
-                "Position_type": position_type,
-                "Open_position_price": open_position_price,
-                "Close_position_price": close_position_price,
-                "Position_size": position[i],
-                "Return": returns[i],
-                "Trade_group_id": trade_group_id,
-                "Trade_action": int(trade_actions[i]),
-                "Open_time": open_time,
-                "Close_time": close_time,
-                "Parameter_set_id": self._generate_parameter_set_id(
-                    entry_params, exit_params, predictor
-                ),
-                "Equity_value": equity_values[i],
-                "Transaction_cost": transaction_cost,
-                "Slippage_cost": slippage_cost,
-                "Predictor_value": (
-                    row[predictor] if predictor in self.data.columns else 0.0
-                ),
-                "Entry_signal": entry_signal[i],
-                "Exit_signal": exit_signal[i],
-                "Holding_period_count": holding_period_count,
-                "Holding_period": holding_period,
-                "Trade_return": trade_return,
-                "Backtest_id": backtest_id,
-            }
-            records.append(record)
 
-        # 轉換為DataFrame
-        records_df = pd.DataFrame(records)
+        offset 大於 0 時只生成第 offset 根K線起的記錄（增量回測），
+        trade_state/prev_position 見 _build_records_frame。
+        """
+        # 緊湊 dtype 模式下輸入可能為 int8/float32，輸出記錄統一使用 float64
+        position = np.asarray(position, dtype=np.float64)
+        returns = np.asarray(returns, dtype=np.float64)
+        equity_values = np.asarray(equity_values, dtype=np.float64)
+        entry_signal = np.asarray(entry_signal, dtype=np.float64)
+        exit_signal = np.asarray(exit_signal, dtype=np.float64)
 
         # 生成策略名稱
         strategy_name = self._generate_parameter_set_id(
             entry_params, exit_params, predictor
         )
 
+        records_df = self._build_records_frame(
+            entry_signal,
+            exit_signal,
+            position,
+            returns,
+            np.asarray(trade_actions),
+            equity_values,
+            predictor,
+            backtest_id,
+            strategy_name,
+            trading_params,
+            offset,
+            trade_state,
+            prev_position,
+        )
+
         # 轉換參數為字典格式 - 與BacktestEngine格式一致
-        params_dict = {
+        params_dict = self._build_params_dict(entry_params, exit_params, predictor)
+
+        result = {
+            "Backtest_id": backtest_id,
+            "strategy_id": strategy_name,
+            "params": params_dict,
+            "records": records_df,
+            "warning_msg": None,
+            "error": None,
+        }
+
+        return result
+
+    def _build_params_dict(
+        self, entry_params: List[Any], exit_params: List[Any], predictor: str
+    ) -> Dict[str, Any]:
+        """轉換參數為字典格式 - 與BacktestEngine格式一致"""
+        return {
             "entry": [
                 (
                     param.to_dict()
@@ -552,16 +994,122 @@ class TradeSimulator_backtester:
             "predictor": predictor,
         }
 
-        result = {
-            "Backtest_id": backtest_id,
-            "strategy_id": strategy_name,
-            "params": params_dict,
-            "records": records_df,
-            "warning_msg": None,
-            "error": None,
-        }
+    def _build_records_frame(
+        self,
+        entry_signal: np.ndarray,
+        exit_signal: np.ndarray,
+        position: np.ndarray,
+        returns: np.ndarray,
+        trade_actions: np.ndarray,
+        equity_values: np.ndarray,
+        predictor: str,
+        backtest_id: str,
+        parameter_set_id: str,
+        trading_params: Dict[str, Any],
+        offset: int = 0,
+        trade_state: Optional[np.ndarray] = None,
+        prev_position: float = 0.0,
+    ) -> pd.DataFrame:
+        """
+        以欄位向量一次構建交易記錄 DataFrame（取代逐列 iloc 迴圈）
 
-        return result
+        Trade_group_id 為每個回測內的遞增序號（T00000001 起），相同輸入產生相同記錄。
+        offset/trade_state/prev_position 供增量回測只構建第 offset 根K線起的新記錄，
+        交易序號、持倉期數與開倉時間接續既有記錄。
+        """
+        n = len(position)
+        history = self.data.iloc[: offset + n]
+        data = history.iloc[offset:]
+
+        # 確保使用正確的時間索引
+        if isinstance(history.index, pd.DatetimeIndex):
+            all_time_values = pd.Series(history.index)
+        elif "Time" in history.columns:
+            all_time_values = history["Time"].reset_index(drop=True)
+        else:
+            all_time_values = pd.Series(np.arange(offset + n))
+        time_values = all_time_values.iloc[offset:].reset_index(drop=True)
+
+        trade_price = trading_params.get("trade_price", "close")
+        all_prices = np.asarray(
+            history["Open" if trade_price == "open" else "Close"].to_numpy(),
+            dtype=np.float64,
+        )
+        open_col = data["Open"].to_numpy()
+        close_col = data["Close"].to_numpy()
+        prices = all_prices[offset:]
+
+        (
+            trade_no,
+            open_index,
+            position_type_code,
+            holding_period_count,
+            holding_period,
+            trade_return,
+        ) = _build_trade_record_columns_njit(
+            position, trade_actions, all_prices, offset, trade_state, prev_position
+        )
+
+        is_open = trade_actions == 1
+        is_close = trade_actions == 4
+        is_action = is_open | is_close
+
+        in_trade = trade_no >= 0
+        trade_group_id = np.full(n, None, dtype=object)
+        if in_trade.any():
+            first_trade = int(trade_no[in_trade].min())
+            group_ids = np.array(
+                [
+                    f"T{k + 1:08d}"
+                    for k in range(first_trade, int(trade_no.max()) + 1)
+                ],
+                dtype=object,
+            )
+            trade_group_id[in_trade] = group_ids[trade_no[in_trade] - first_trade]
+
+        has_open_time = open_index >= 0
+        open_time = all_time_values.take(np.where(has_open_time, open_index, 0))
+        open_time = open_time.reset_index(drop=True).where(has_open_time)
+        close_time = time_values.where(is_close)
+
+        transaction_cost = trading_params.get("transaction_cost", 0.001)
+        slippage = trading_params.get("slippage", 0.0005)
+
+        if predictor in data.columns:
+            predictor_value = data[predictor].to_numpy()
+        else:
+            predictor_value = np.zeros(n)
+
+        return pd.DataFrame(
+            {
+                "Time": time_values,
+                "Open": open_col,
+                "High": data["High"].to_numpy(),
+                "Low": data["Low"].to_numpy(),
+                "Close": close_col,
+                "Trading_instrument": getattr(self, "trading_instrument", "X"),
+                "Position_type": _POSITION_TYPE_LABELS[position_type_code],
+                "Open_position_price": np.where(is_open, prices, 0.0),
+                "Close_position_price": np.where(is_close, prices, 0.0),
+                "Position_size": position,
+                "Return": returns,
+                "Trade_group_id": trade_group_id,
+                "Trade_action": trade_actions.astype(np.int64),
+                "Open_time": open_time,
+                "Close_time": close_time,
+                "Parameter_set_id": parameter_set_id,
+                "Equity_value": equity_values,
+                "Transaction_cost": np.where(is_action, transaction_cost, 0.0),
+                "Slippage_cost": np.where(is_action, slippage, 0.0),
+                "Predictor_value": predictor_value,
+                "Entry_signal": entry_signal,
+                "Exit_signal": exit_signal,
+                "Holding_period_count": holding_period_count,
+                "Holding_period": holding_period,
+                "Trade_return": trade_return,
+                "Backtest_id": backtest_id,
+            }
+        )
 
     def _param_to_dict(self, param: Any) -> Dict[str, Any]:  # pylint: disable=unused-argument
         """將參數物件轉換為字典格式"""
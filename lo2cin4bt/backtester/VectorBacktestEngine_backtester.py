@@ -62,6 +62,9 @@ flowchart TD
 【範例】
 ------------------------------------------------------------
 - 執行向量化回測：VectorBacktestEngine(data, frequency).run_backtests(config)
+- 增量回測：performance_params.incremental_state 指定狀態檔，導出後呼叫 save_incremental_state(路徑)
+- 篩選模式：VectorBacktestEngine(data, frequency).screen_backtests(config) 返回每個任務的摘要 DataFrame
+- 兩階段篩選：performance_params.screening_top_k = 200，run_backtests 只返回前 200 名的完整結果
 - 批量參數組合：generate_parameter_combinations(config)
 - 向量化信號生成：_generate_all_signals_vectorized(all_tasks, condition_pairs)
 
@@ -80,6 +83,20 @@ flowchart TD
 - v2.0: 新增多進程並行處理
 - v2.1: 整合進度監控與性能優化
 - v2.2: 完善錯誤處理與系統適配
+- v2.3: 多進程結果生成改用共享記憶體矩陣，子進程只接收欄位範圍
+- v2.4: 新增緊湊 dtype 模式（int8 信號/持倉/動作，可選 float32 收益/權益）
+- v2.5: 新增串流模式，按記憶體閾值分塊執行並逐塊導出
+- v2.6: 參數組合改為惰性組合空間，任務以整數索引定址
+- v2.7: 新增稀疏輸出模式，結果只保存交易事件，records 在讀取時重建
+- v2.8: 指標緩存改為引擎級 LRU（IndicatorCache），跨開/平倉與策略分組共用並統計命中率
+- v2.9: 信號去重：相同 (指標, 參數, 預測因子) 的信號只計算一次存入信號庫，合併時按索引收集
+- v2.10: 新增可選磁碟指標緩存（records/cache），以預測因子數據指紋定址，跨次執行重用
+- v2.11: 新增增量回測（incremental_state），追加K線時從保存的終止狀態只推進新K線
+- v2.12: 信號與模擬矩陣改為列優先佈局；矩陣夠大且有多核心時以 prange 並行模擬各策略
+- v2.13: 新增篩選模式 screen_backtests，信號合併、模擬與摘要指標單次掃描，不保留逐K線矩陣
+- v2.14: 新增兩階段篩選（screening_top_k / screening_filters），只對入選任務生成完整記錄與導出
+- v2.15: 批次結果的 temp Sharpe 改為整批按欄以 numpy 計算，不再逐任務建立 pandas Series
+- v2.16: 策略分組預先記錄任務索引數組，分組信號以單次索引賦值分配，取代逐任務 list.index()
 
 【參考】
 ------------------------------------------------------------
@@ -90,12 +107,13 @@ flowchart TD
 """
 
 import gc
-import itertools
+import hashlib
+import json
 import logging
+import os
 import time
-import uuid
 from concurrent.futures import ProcessPoolExecutor, as_completed
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -105,11 +123,46 @@ from rich.text import Text
 
 from .BollingerBand_Indicator_backtester import BollingerBandIndicator
 from .HL_Indicator_backtester import HLIndicator
+from .IndicatorCache_backtester import (
+    DiskIndicatorStore,
+    IndicatorCache,
+    predictor_fingerprint,
+)
+from .IncrementalState_backtester import (
+    SIGNAL_GUARD_BARS,
+    IncrementalBacktestState,
+    history_fingerprint,
+    warmup_bars,
+)
 from .Indicators_backtester import IndicatorsBacktester
+from .ParameterSpace_backtester import (
+    BacktestIdView,
+    ParameterCombinationSpace,
+    TaskCombinationView,
+    TaskPredictorView,
+    TaskStrategyIdView,
+    TaskSubsetView,
+)
+from .SharedMatrix_backtester import SharedMatrixStore, attach_matrices
+from .SparseResult_backtester import (
+    SparseRecordContext,
+    bind_sparse_context,
+    build_sparse_result,
+)
+from .Screening_backtester import (
+    SCREENING_CHUNK_TASKS,
+    SCREENING_STATS,
+    screen_strategy_signals,
+    select_screened_tasks,
+    temp_sharpe_columns,
+)
 from .SpecMonitor_backtester import SpecMonitor
 from .TradeSimulator_backtester import (
+    PARALLEL_SIMULATION_MIN_CELLS,
     TradeSimulator_backtester,
+    _advance_trade_record_state_njit,
     _vectorized_trade_simulation_njit,
+    initial_simulation_state,
 )
 from .VALUE_Indicator_backtester import VALUEIndicator
 
@@ -177,15 +230,19 @@ class ProgressMonitor:
 if NUMBA_AVAILABLE:
 
     @njit(fastmath=True, cache=True)
-    def _vectorized_combine_signals_njit(signals_matrix: np.ndarray, is_exit_signals: bool) -> np.ndarray:
+    def _vectorized_combine_signals_njit(
+        signal_bank: np.ndarray, bank_index: np.ndarray, is_exit_signals: bool
+    ) -> np.ndarray:
         """
-        向量化信號合併
-        signals_matrix: [時間點, 策略數, 指標數]
+        向量化信號合併 - 按索引從信號庫收集各指標信號
+        signal_bank: [時間點, 唯一信號數]
+        bank_index: [策略數, 指標數]，-1 表示該指標位置無信號（視為 0）
         is_exit_signals: 是否為平倉信號
         返回: [時間點, 策略數]
         """
-        n_time, n_strategies, n_indicators = signals_matrix.shape
-        result = np.zeros((n_time, n_strategies))
+        n_time = signal_bank.shape[0]
+        n_strategies, n_indicators = bank_index.shape
+        result = np.zeros((n_time, n_strategies), dtype=signal_bank.dtype)
 
         for t in range(n_time):
             for s in range(n_strategies):
@@ -194,23 +251,18 @@ if NUMBA_AVAILABLE:
                 all_short = True
 
                 for i in range(n_indicators):
-                    if signals_matrix[t, s, i] != 1.0:
+                    column = bank_index[s, i]
+                    value = signal_bank[t, column] if column >= 0 else 0.0
+                    if value != 1.0:
                         all_long = False
-                    if signals_matrix[t, s, i] != -1.0:
+                    if value != -1.0:
                         all_short = False
 
-                if is_exit_signals:
-                    # 平倉信號：1 = 平多，-1 = 平空
-                    if all_long:  # 所有信號都是1
-                        result[t, s] = 1.0  # 平多
-                    elif all_short:  # 所有信號都是-1
-                        result[t, s] = -1.0  # 平空
-                else:
-                    # 開倉信號：1 = 開多，-1 = 開空
-                    if all_long:  # 所有信號都是1
-                        result[t, s] = 1.0  # 開多
-                    elif all_short:  # 所有信號都是-1
-                        result[t, s] = -1.0  # 開空
+                # 開倉信號：1 = 開多，-1 = 開空；平倉信號：1 = 平多，-1 = 平空
+                if all_long:  # 所有信號都是1
+                    result[t, s] = 1.0
+                elif all_short:  # 所有信號都是-1
+                    result[t, s] = -1.0
 
         return result
 
@@ -230,12 +282,31 @@ class VectorBacktestEngine:
 
         # 向量化配置
         self.max_memory_mb = 1000  # 最大記憶體使用量（MB）
-
-        # 全局緩存
-        self._ma_cache: Dict[str, Any] = {}
-        self._boll_cache: Dict[str, Any] = {}
-        self._hl_cache: Dict[str, Any] = {}
-        self._value_cache: Dict[str, Any] = {}
+        self.use_shared_memory = True  # 多進程結果生成時使用共享記憶體傳遞矩陣
+        self.shared_memory_backend = "shm"  # shm 或 mmap（暫存檔）
+        self.compact_dtypes = False  # 信號/持倉/交易動作使用 int8
+        self.float32_values = False  # 收益/權益使用 float32
+        self.streaming = False  # 按記憶體閾值分塊執行：信號→模擬→結果→導出→釋放
+        self.stream_chunk_size: Optional[int] = None  # 每塊任務數，None 時依記憶體閾值自動計算
+        self.sparse_records = False  # 結果只保存交易事件，records 在讀取時重建
+        self.indicator_cache_mb: Optional[float] = 256  # 引擎級指標緩存上限（MB），None 不限制
+        self.disk_cache = False  # 指標中間結果持久化到磁碟，跨次執行重用
+        self.disk_cache_dir: Optional[str] = None  # 磁碟緩存目錄，None 時為 records/cache
+        self.disk_cache_mb: Optional[float] = 1024  # 磁碟緩存總大小上限（MB），None 不限制
+        self.incremental_state: Optional[str] = None  # 增量回測狀態檔路徑，None 不啟用
+        self.parallel_simulation: Optional[bool] = None  # 並行交易模擬，None 時依矩陣大小與核心數自動選擇
+        self.screening_top_k: Optional[int] = None  # 兩階段篩選：只對前 K 名生成完整記錄，None 不限制
+        self.screening_metric = "temp_sharpe"  # 兩階段篩選的排名指標（SCREENING_STATS 之一）
+        self.screening_filters: Dict[str, List[Optional[float]]] = {}  # 兩階段篩選門檻 {指標: [下限, 上限]}
+        self.screening_summary: Optional[pd.DataFrame] = None  # 最近一次兩階段篩選的全部任務摘要
+        self.incremental_append_path: Optional[str] = None  # 本次結果只含新K線時應追加的 Parquet
+        self._pending_incremental_state: Optional[IncrementalBacktestState] = None
+        self._shared_store: Optional[SharedMatrixStore] = None
+        self._sparse_context: Optional[SparseRecordContext] = None
+
+        # 全局緩存：指標中間結果在開/平倉、策略分組與串流區塊之間共用
+        self.indicator_cache = IndicatorCache(self.indicator_cache_mb)
+        self._predictor_fingerprints: Dict[str, Optional[str]] = {}
         self._price_cache: Dict[str, Any] = {}
 
         # 預計算常用數據
@@ -255,24 +326,50 @@ class VectorBacktestEngine:
                 np.diff(self._price_cache["Close"]) / self._price_cache["Close"][:-1]
             )
 
-    def generate_parameter_combinations(self, config: Dict) -> List[Tuple]:
+    def __getstate__(self) -> Dict[str, Any]:
+        # 非共享記憶體路徑以綁定方法提交批次，每次提交都會序列化整個引擎：
+        # 指標緩存、上次執行的結果與中間狀態只屬於主進程，不傳給子進程
+        state = self.__dict__.copy()
+        for key in (
+            "results",
+            "indicator_cache",
+            "_price_cache",
+            "_shared_store",
+            "_sparse_context",
+            "screening_summary",
+            "_pending_incremental_state",
+        ):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.results = []
+        self.screening_summary = None
+        self._pending_incremental_state = None
+        self._shared_store = None
+        self._sparse_context = None
+        # 子進程使用空的記憶體緩存（不掛載磁碟緩存），價格緩存由數據重建
+        self.indicator_cache = IndicatorCache(self.indicator_cache_mb)
+        self._price_cache = {}
+        self._precompute_data()
+
+    def generate_parameter_combinations(self, config: Dict) -> ParameterCombinationSpace:
         """
-        生成參數組合 - 與原有引擎完全相同
+        生成參數組合 - 與原有引擎順序完全相同，但不預先展開
 
         Args:
             config (Dict): 回測配置，包含條件配對、指標參數、預測因子等
 
         Returns:
-            List[Tuple]: 所有參數組合的列表
+            ParameterCombinationSpace: 惰性參數組合空間，支援 len()、索引、切片與迭代
         """
         condition_pairs = config["condition_pairs"]
         indicator_params = config["indicator_params"]
-        config["predictors"]
-
 
-        all_combinations = []
+        pairs = []
 
-        # 為每個條件配對生成參數組合
+        # 為每個條件配對收集參數列表
         for i, pair in enumerate(condition_pairs):
             strategy_entry_params = []
             strategy_exit_params = []
@@ -295,56 +392,31 @@ class VectorBacktestEngine:
                 else:
                     strategy_exit_params.append([])
 
-            entry_combinations = self._generate_indicator_combinations(
-                pair["entry"], strategy_entry_params
-            )
-            exit_combinations = self._generate_indicator_combinations(
-                pair["exit"], strategy_exit_params
-            )
-            
-
-            # 組合開倉和平倉參數
-            for entry_combo in entry_combinations:
-                for exit_combo in exit_combinations:
-                    strategy_combo = entry_combo + exit_combo
-                    strategy_combo = strategy_combo + (f"strategy_{i + 1}",)
-                    all_combinations.append(strategy_combo)
-
-        return all_combinations
-
-    def _generate_indicator_combinations(
-        self, indicators: List[str], param_lists: List[List]
-    ) -> List[Tuple]:
-        """
-        為指標列表生成參數組合 - 與原有引擎完全相同
-
-        Args:
-            indicators (List[str]): 指標列表
-            param_lists (List[List]): 對應的參數列表
-
-        Returns:
-            List[Tuple]: 指標參數組合列表
-        """
-        if not indicators:
-            return [()]
+            # 組合開倉和平倉參數（順序等同 product(開倉組合) x product(平倉組合)）
+            pairs.append((strategy_entry_params, strategy_exit_params, f"strategy_{i + 1}"))
 
-        combinations = []
-        for combo in itertools.product(*param_lists):
-            combinations.append(combo)
+        return ParameterCombinationSpace(pairs)
 
-        return combinations
-
-    def run_backtests(self, config: Dict, limit_combinations: Optional[int] = None) -> List[Dict]:  # pylint: disable=too-complex
+    def run_backtests(
+        self,
+        config: Dict,
+        limit_combinations: Optional[int] = None,
+        result_sink: Optional[Callable[[List[Dict]], None]] = None,
+    ) -> List[Dict]:  # pylint: disable=too-complex
         """
         執行真正的向量化回測 - 一次性處理所有任務
 
         Args:
             config (Dict): 回測配置，包含條件配對、指標參數、預測因子、交易參數等
             limit_combinations (Optional[int], optional): 限制參數組合的數量. Defaults to None.
+            result_sink (Optional[Callable], optional): 串流模式下每個區塊完成後的導出回調，
+                調用後該區塊結果只保留摘要（不含 records）；串流模式必須提供. Defaults to None.
 
         Returns:
             List[Dict]: 回測結果列表，每個元素包含一個策略的回測結果
         """
+        self._apply_performance_params(config.get("performance_params") or {})
+
         all_combinations = self.generate_parameter_combinations(config)
         if limit_combinations is not None:
             self.logger.info(f"--- 參數組合數量已限制為: {limit_combinations} ---")
@@ -378,7 +450,10 @@ class VectorBacktestEngine:
 
         # 預先收集配置信息
         config_info = SpecMonitor.collect_config_info(
-            len(all_combinations) * len(predictors)
+            len(all_combinations) * len(predictors),
+            n_time=len(self.data),
+            compact_dtypes=self.compact_dtypes,
+            float32_values=self.float32_values,
         )
 
 
@@ -386,10 +461,71 @@ class VectorBacktestEngine:
         if config_info:
             SpecMonitor.display_config_info(config_info, console)
 
-        # 向量化處理 - 一次性處理所有任務
-        all_results = self._true_vectorized_backtest(
-            all_combinations, condition_pairs, predictors, trading_params
-        )
+        self.incremental_append_path = None
+        self._pending_incremental_state = None
+        self.screening_summary = None
+        run_fingerprint: Optional[str] = None
+        all_results: Optional[List[Dict]] = None
+        if self._screening_enabled():
+            if self.incremental_state or self.streaming:
+                # 第二階段只處理入選任務，記憶體已受前 K 名限制；增量狀態需要全部任務
+                console.print(
+                    Panel(
+                        "🔎 兩階段篩選只對入選任務生成記錄，本次停用增量回測與串流模式",
+                        title=Text("👨‍💻 交易回測 Backtester", style="bold #8f1511"),
+                        border_style="#dbac30",
+                    )
+                )
+                self.streaming = False
+            all_results = self._two_phase_backtest(
+                all_combinations, condition_pairs, predictors, trading_params, console
+            )
+        elif self.incremental_state:
+            if self.streaming:
+                # 增量狀態對應單一輸出檔，串流的逐區塊檔案無法追加
+                console.print(
+                    Panel(
+                        "🔁 增量回測需要單一輸出檔，本次停用串流模式",
+                        title=Text("👨‍💻 交易回測 Backtester", style="bold #8f1511"),
+                        border_style="#dbac30",
+                    )
+                )
+                self.streaming = False
+            run_fingerprint = self._incremental_run_fingerprint(
+                all_combinations, predictors, trading_params
+            )
+            all_results = self._incremental_vectorized_backtest(
+                all_combinations,
+                condition_pairs,
+                predictors,
+                trading_params,
+                config["indicator_params"],
+                run_fingerprint,
+                console,
+            )
+
+        if all_results is None and self.streaming:
+            if result_sink is None:
+                # 沒有導出回調時每個區塊的 records 都會留在記憶體，峰值與一次處理相同
+                raise ValueError("串流模式需要 result_sink 逐區塊導出結果")
+            # 串流處理 - 按記憶體閾值分塊，峰值記憶體受區塊大小限制
+            all_results = self._streaming_vectorized_backtest(
+                all_combinations,
+                condition_pairs,
+                predictors,
+                trading_params,
+                result_sink,
+                console,
+            )
+        elif all_results is None:
+            # 向量化處理 - 一次性處理所有任務
+            all_results = self._true_vectorized_backtest(
+                all_combinations,
+                condition_pairs,
+                predictors,
+                trading_params,
+                incremental_fingerprint=run_fingerprint,
+            )
 
         # 記憶體管理 - 使用動態閾值
         current_memory = SpecMonitor.get_memory_usage()
@@ -431,11 +567,7 @@ class VectorBacktestEngine:
             [
                 r
                 for r in all_results
-                if r.get("error") is None
-                and "records" in r
-                and isinstance(r.get("records"), pd.DataFrame)
-                and not r.get("records").empty
-                and (r.get("records")["Trade_action"] == 1).sum() > 0
+                if r.get("error") is None and self._count_open_trades(r) > 0
             ]
         )
         # 失敗：有錯誤
@@ -445,11 +577,9 @@ class VectorBacktestEngine:
         zero_trade_count = 0
 
         for r in all_results:
-            if r.get("error") is None:
-                records = r.get("records", pd.DataFrame())
-                # 檢查是否有開倉交易（Trade_action == 1）
-                if len(records) == 0 or (records["Trade_action"] == 1).sum() == 0:
-                    zero_trade_count += 1
+            # 檢查是否有開倉交易（Trade_action == 1）
+            if r.get("error") is None and self._count_open_trades(r) == 0:
+                zero_trade_count += 1
 
         # 添加診斷信息
         diagnostic_info = ""
@@ -457,13 +587,9 @@ class VectorBacktestEngine:
             # 分析無交易的原因
             sample_no_trade = None
             for r in all_results:
-                if r.get("error") is None:
-                    records = r.get("records", pd.DataFrame())
-                    if len(records) == 0 or (
-                        len(records) > 0 and (records["Trade_action"] == 1).sum() == 0
-                    ):
-                        sample_no_trade = r
-                        break
+                if r.get("error") is None and self._count_open_trades(r) == 0:
+                    sample_no_trade = r
+                    break
 
             if sample_no_trade:
                 entry_signal = sample_no_trade.get("entry_signal", None)
@@ -478,6 +604,12 @@ class VectorBacktestEngine:
                     )
 
 
+        cache_stats = self.indicator_cache.stats()
+        disk_cache_info = (
+            f"\n• 磁碟指標緩存：{cache_stats['disk_entries']} 檔 {cache_stats['disk_size_mb']:.1f} MB"
+            if "disk_entries" in cache_stats
+            else ""
+        )
         summary_text = f"""
 ✅ 向量化回測完成！
 
@@ -488,7 +620,8 @@ class VectorBacktestEngine:
 • 無交易：{zero_trade_count} ({zero_trade_count / total_backtests * 100:.1f}%)
 • 總耗時：{total_time:.1f}秒
 • 記憶體使用：{memory_used:.1f} MB
-• 平均速度：{total_backtests / total_time:.0f} 任務/秒{diagnostic_info}
+• 平均速度：{total_backtests / total_time:.0f} 任務/秒
+• 指標緩存：重用 {cache_stats["hits"]} / 磁碟載入 {cache_stats["disk_hits"]} / 計算 {cache_stats["misses"]} (命中率 {cache_stats["hit_rate"] * 100:.1f}%，{cache_stats["entries"]} 項 {cache_stats["size_mb"]:.1f} MB){disk_cache_info}{diagnostic_info}
 """
 
         console.print(
@@ -502,17 +635,76 @@ class VectorBacktestEngine:
         self.results = all_results
         return all_results
 
-    def _true_vectorized_backtest(
+    def screen_backtests(
+        self, config: Dict, limit_combinations: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        篩選模式 - 只計算每個任務的摘要指標，不生成逐K線矩陣與交易記錄
+
+        信號合併、交易模擬與摘要累計在 Screening 核心中單次掃描完成，記憶體只有
+        O(任務數) 的摘要與每個分組的信號庫，適合先排名大量參數組合。
+
+        Args:
+            config (Dict): 回測配置，與 run_backtests 相同
+            limit_combinations (Optional[int], optional): 限制參數組合的數量. Defaults to None.
+
+        Returns:
+            pd.DataFrame: 以任務索引為索引，欄位為 Backtest_id、strategy_id、predictor
+                與 SCREENING_STATS（total_return、temp_sharpe、max_drawdown、trade_count）
+        """
+        self._apply_performance_params(config.get("performance_params") or {})
+
+        all_combinations = self.generate_parameter_combinations(config)
+        if limit_combinations is not None:
+            all_combinations = all_combinations[:limit_combinations]
+        predictors = config["predictors"]
+
+        stats, all_tasks = self._screen_tasks(
+            all_combinations,
+            config["condition_pairs"],
+            predictors,
+            config["trading_params"],
+            Console(),
+        )
+        return self._screening_summary(stats, all_tasks)
+
+    def _screen_tasks(
         self,
-        all_combinations: List[Tuple],
+        all_combinations: ParameterCombinationSpace,
         condition_pairs: List[Dict],
         predictors: List[str],
         trading_params: Dict,
-    ) -> List[Dict]:
-        """向量化回測 - 一次性處理所有任務"""
-        total_backtests = len(all_combinations) * len(predictors)
+        console: Console,
+    ) -> Tuple[np.ndarray, Dict]:
+        """
+        按區塊篩選所有任務
+
+        Returns:
+            Tuple[np.ndarray, Dict]: ([總任務數, len(SCREENING_STATS)] 摘要矩陣, 全部任務視圖)
+        """
+        n_predictors = max(1, len(predictors))
+        n_tasks = len(all_combinations) * len(predictors)
+        all_tasks = self._generate_all_tasks_matrix(all_combinations, predictors)
+        chunk_combos = max(1, SCREENING_CHUNK_TASKS // n_predictors)
+        n_chunks = (len(all_combinations) + chunk_combos - 1) // chunk_combos
+
+        console.print(
+            Panel(
+                (
+                    f"🔎 篩選模式：{len(all_combinations)} 種參數組合 x "
+                    f"{len(predictors)} 個預測因子 = {n_tasks} 次回測，{n_chunks} 個區塊\n"
+                    "只計算總回報、temp Sharpe、最大回撤與交易次數，不生成交易記錄"
+                ),
+                title="[bold #8f1511]🚀 向量化回測引擎[/bold #8f1511]",
+                border_style="#dbac30",
+            )
+        )
+
+        stats = np.full((n_tasks, len(SCREENING_STATS)), np.nan)
+        close_prices = self._price_cache["Close"]
+        open_prices = self._price_cache["Open"]
+        n_time = len(self.data)
 
-        # 創建並行處理進度條
         from rich.progress import (
             BarColumn,
             Progress,
@@ -523,13 +715,10 @@ class VectorBacktestEngine:
             TimeRemainingColumn,
         )
 
-        console = Console()
-        parallel_progress = Progress(
+        screen_progress = Progress(
             SpinnerColumn(),
-            TextColumn("[bold green]{task.description}"),
-            BarColumn(
-                bar_width=40, complete_style="green", finished_style="bright_green"
-            ),
+            TextColumn("[bold cyan]{task.description}"),
+            BarColumn(bar_width=40, complete_style="cyan", finished_style="bright_cyan"),
             TaskProgressColumn(),
             TextColumn("({task.completed}/{task.total})"),
             TimeElapsedColumn(),
@@ -537,112 +726,801 @@ class VectorBacktestEngine:
             TimeRemainingColumn(),
             console=console,
         )
+        with screen_progress:
+            screen_task = screen_progress.add_task(
+                f"🔎 篩選 - {n_tasks} 次回測", total=n_tasks
+            )
+            for start in range(0, len(all_combinations), chunk_combos):
+                chunk_combinations = all_combinations[start : start + chunk_combos]
+                offset = start * n_predictors
+                chunk_tasks = self._generate_all_tasks_matrix(
+                    chunk_combinations, predictors, all_tasks["backtest_ids"].prefix
+                )
+                for group in self._group_strategies_by_indicator_count(
+                    chunk_tasks, condition_pairs
+                ):
+                    rows = offset + group["task_indices"]
+                    try:
+                        screen_strategy_signals(
+                            *self._strategy_group_signal_banks(group),
+                            close_prices,
+                            open_prices,
+                            trading_params,
+                            rows,
+                            stats,
+                            n_threads=self._simulation_threads(n_time, len(rows)),
+                        )
+                    except Exception as e:
+                        # 失敗的分組保留 NaN 摘要，排名時自然排在最後
+                        self.logger.warning(f"策略分組篩選失敗: {e}")
+                screen_progress.update(
+                    screen_task,
+                    completed=min(n_tasks, offset + len(chunk_combinations) * n_predictors),
+                )
 
-        # 先執行不需要進度條的步驟
-        # 步驟1: 生成任務矩陣
-        all_tasks = self._generate_all_tasks_matrix(all_combinations, predictors)
-
-        # 步驟2: 向量化信號生成
-        all_signals = self._generate_all_signals_vectorized(
-            all_tasks, condition_pairs
+        return stats, all_tasks
+
+    @staticmethod
+    def _screening_summary(stats: np.ndarray, all_tasks: Dict) -> pd.DataFrame:
+        """把摘要矩陣與任務視圖組成以任務索引為索引的 DataFrame"""
+        n_tasks = stats.shape[0]
+        summary = pd.DataFrame(
+            {
+                "Backtest_id": [all_tasks["backtest_ids"][i] for i in range(n_tasks)],
+                "strategy_id": [all_tasks["strategy_ids"][i] for i in range(n_tasks)],
+                "predictor": [all_tasks["predictors"][i] for i in range(n_tasks)],
+            }
         )
+        for column, name in enumerate(SCREENING_STATS):
+            summary[name] = stats[:, column]
+        summary.index.name = "task_idx"
+        return summary
+
+    def _screening_enabled(self) -> bool:
+        """兩階段篩選是否啟用（設定了前 K 名或篩選門檻）"""
+        return self.screening_top_k is not None or bool(self.screening_filters)
+
+    def _two_phase_backtest(
+        self,
+        all_combinations: ParameterCombinationSpace,
+        condition_pairs: List[Dict],
+        predictors: List[str],
+        trading_params: Dict,
+        console: Console,
+    ) -> List[Dict]:
+        """
+        兩階段回測 - 第一階段篩選所有任務的摘要指標，第二階段只對入選任務生成完整記錄
 
-        # 步驟3: 向量化交易模擬
-        all_trade_results = self._simulate_all_trades_vectorized(
-            all_signals, trading_params
+        入選任務沿用第一階段的 Backtest_id（同一前綴、原任務索引），全部任務的摘要
+        保存在 self.screening_summary
+        """
+        stats, all_tasks = self._screen_tasks(
+            all_combinations, condition_pairs, predictors, trading_params, console
         )
+        selected = select_screened_tasks(
+            stats, self.screening_metric, self.screening_top_k, self.screening_filters
+        )
+        self.screening_summary = self._screening_summary(stats, all_tasks)
+        self.screening_summary["selected"] = False
+        self.screening_summary.loc[selected, "selected"] = True
 
-        # 在創建進度條之前顯示配置信息
-        n_tasks = len(all_tasks["combinations"])
-        n_cores, _ = SpecMonitor.get_optimal_core_count()
-        
-        # 確認並行處理模式
+        top_k_info = (
+            f"前 {self.screening_top_k} 名" if self.screening_top_k is not None else "全部"
+        )
+        filter_info = (
+            f"，門檻 {self.screening_filters}" if self.screening_filters else ""
+        )
         console.print(
             Panel(
-                f"🔧 並行處理模式: {n_tasks} 個任務, {n_cores} 核心",
+                (
+                    f"🔎 第一階段完成：{stats.shape[0]} 次回測，按 {self.screening_metric} "
+                    f"取{top_k_info}{filter_info}\n"
+                    f"🔎 第二階段：對 {len(selected)} 個入選任務生成完整交易記錄"
+                ),
                 title=Text("👨‍💻 交易回測 Backtester", style="bold #8f1511"),
                 border_style="#dbac30",
             )
         )
+        if len(selected) == 0:
+            return []
 
-        # 動態計算批次大小
-        if n_tasks <= 100:
-            batch_size = max(20, n_tasks // 2)
-        elif n_tasks <= 1000:
-            batch_size = max(50, n_tasks // (n_cores * 2))
-        elif n_tasks <= 10000:
-            batch_size = max(200, n_tasks // (n_cores * 2))
+        return self._true_vectorized_backtest(
+            all_combinations,
+            condition_pairs,
+            predictors,
+            trading_params,
+            task_indices=selected,
+            backtest_id_prefix=all_tasks["backtest_ids"].prefix,
+        )
+
+    @staticmethod
+    def _count_open_trades(result: Dict[str, Any]) -> int:
+        """統計結果中的開倉次數，串流摘要與稀疏結果直接使用 trade_count"""
+        if "trade_count" in result:
+            return int(result["trade_count"])
+        records = result.get("records")
+        if not isinstance(records, pd.DataFrame) or records.empty:
+            return 0
+        return int((records["Trade_action"] == 1).sum())
+
+    @staticmethod
+    def _summarize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """將已導出的結果壓縮為摘要，釋放逐K線 records"""
+        summary = {key: value for key, value in result.items() if key != "records"}
+        summary["trade_count"] = VectorBacktestEngine._count_open_trades(result)
+        if "final_equity" not in summary:
+            records = result.get("records")
+            has_records = isinstance(records, pd.DataFrame) and not records.empty
+            summary["final_equity"] = (
+                float(records["Equity_value"].iloc[-1])
+                if has_records and "Equity_value" in records.columns
+                else None
+            )
+        summary["records"] = pd.DataFrame()
+        return summary
+
+    def _streaming_vectorized_backtest(
+        self,
+        all_combinations: ParameterCombinationSpace,
+        condition_pairs: List[Dict],
+        predictors: List[str],
+        trading_params: Dict,
+        result_sink: Callable[[List[Dict]], None],
+        console: Console,
+    ) -> List[Dict]:
+        """串流回測 - 按欄位區塊依序執行信號→模擬→結果→導出，完成後只保留摘要"""
+        n_predictors = max(1, len(predictors))
+        total_backtests = len(all_combinations) * n_predictors
+
+        if self.stream_chunk_size:
+            chunk_tasks, chunk_info = (
+                self.stream_chunk_size,
+                f"🔁 串流區塊大小（配置指定）: {self.stream_chunk_size} 個任務",
+            )
         else:
-            batch_size = max(400, n_tasks // (n_cores * 3))
+            chunk_tasks, chunk_info = SpecMonitor.get_stream_chunk_size(
+                len(self.data),
+                total_backtests,
+                compact_dtypes=self.compact_dtypes,
+                float32_values=self.float32_values,
+            )
+        # 同一參數組合的所有預測因子放在同一區塊
+        chunk_combos = max(1, chunk_tasks // n_predictors)
+        n_chunks = (len(all_combinations) + chunk_combos - 1) // chunk_combos
 
-        # 計算批次數量
-        n_batches = (n_tasks + batch_size - 1) // batch_size
+        console.print(
+            Panel(
+                f"{chunk_info}\n🔁 串流模式: {n_chunks} 個區塊，每區塊 {chunk_combos} 種參數組合",
+                title=Text("👨‍💻 交易回測 Backtester", style="bold #8f1511"),
+                border_style="#dbac30",
+            )
+        )
 
-        # 顯示批次配置
-        if n_batches == 1:
+        all_results: List[Dict] = []
+        for chunk_idx, start in enumerate(range(0, len(all_combinations), chunk_combos)):
+            chunk_combinations = all_combinations[start : start + chunk_combos]
             console.print(
                 Panel(
-                    f"🔧 單進程處理: {n_tasks} 個任務",
+                    f"🔁 區塊 {chunk_idx + 1}/{n_chunks}: {len(chunk_combinations)} 種參數組合",
                     title=Text("👨‍💻 交易回測 Backtester", style="bold #8f1511"),
                     border_style="#dbac30",
                 )
             )
-        else:
+            chunk_results = self._true_vectorized_backtest(
+                chunk_combinations, condition_pairs, predictors, trading_params
+            )
+
+            # 導出後只保留摘要，逐K線 records 隨區塊釋放
+            result_sink(chunk_results)
+            all_results.extend(self._summarize_result(r) for r in chunk_results)
+            del chunk_results
+            gc.collect()
+
+        return all_results
+
+    def _incremental_run_fingerprint(
+        self,
+        all_combinations: ParameterCombinationSpace,
+        predictors: List[str],
+        trading_params: Dict,
+    ) -> str:
+        """組合空間、預測因子、交易參數與收益 dtype 的指紋，任一改變時增量狀態不可重用"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(all_combinations.fingerprint().encode())
+        digest.update(
+            json.dumps(
+                {
+                    "predictors": list(predictors),
+                    "trading_params": trading_params,
+                    "float32_values": self.float32_values,
+                },
+                sort_keys=True,
+                default=str,
+            ).encode()
+        )
+        return digest.hexdigest()
+
+    @staticmethod
+    def _history_columns(predictors: List[str]) -> List[str]:
+        """歷史數據指紋涵蓋的欄位"""
+        return ["Time", "Open", "High", "Low", "Close", *predictors]
+
+    def _capture_incremental_state(
+        self,
+        all_tasks: Dict,
+        all_signals: Dict,
+        all_trade_results: Dict,
+        predictors: List[str],
+        run_fingerprint: str,
+    ) -> IncrementalBacktestState:
+        """記錄完整回測後各策略的終止狀態（模擬狀態、交易記錄接續狀態與信號尾部）"""
+        trade_actions = all_trade_results["trade_actions"]
+        n_time, n_tasks = trade_actions.shape
+        trade_state = np.zeros((n_tasks, 3), dtype=np.int64)
+        trade_state[:, 1] = -1
+        _advance_trade_record_state_njit(trade_actions, 0, 0, trade_state)
+
+        n_guard = min(SIGNAL_GUARD_BARS, n_time)
+        return IncrementalBacktestState(
+            n_time,
+            history_fingerprint(self.data, n_time, self._history_columns(predictors)),
+            run_fingerprint,
+            all_tasks["backtest_ids"].prefix,
+            all_trade_results["simulation_state"],
+            trade_state,
+            # 複製一份：信號矩陣可能位於回測結束即釋放的共享記憶體
+            np.array(all_signals["entry_signals"][n_time - n_guard :], dtype=np.int8),
+            np.array(all_signals["exit_signals"][n_time - n_guard :], dtype=np.int8),
+        )
+
+    def _load_resumable_state(
+        self, run_fingerprint: str, predictors: List[str], n_tasks: int
+    ) -> Tuple[Optional[IncrementalBacktestState], str]:
+        """載入並驗證增量狀態，返回 (狀態, 不可續跑的原因)"""
+        try:
+            state = IncrementalBacktestState.load(self.incremental_state)
+        except ValueError as e:
+            return None, str(e)
+        if state is None:
+            return None, "尚無增量狀態檔"
+        if state.run_fingerprint != run_fingerprint or state.n_tasks != n_tasks:
+            return None, "參數組合、預測因子或交易參數已變更"
+        if state.n_bars > len(self.data):
+            return None, "數據K線數少於上次已處理的K線數"
+        if not state.output_path or not os.path.exists(state.output_path):
+            return None, f"上次輸出的 Parquet 不存在: {state.output_path}"
+        fingerprint = history_fingerprint(
+            self.data, state.n_bars, self._history_columns(predictors)
+        )
+        if fingerprint != state.history_fingerprint:
+            return None, "已處理的歷史K線有變動（非單純追加）"
+        return state, ""
+
+    def _incremental_vectorized_backtest(  # pylint: disable=too-complex
+        self,
+        all_combinations: ParameterCombinationSpace,
+        condition_pairs: List[Dict],
+        predictors: List[str],
+        trading_params: Dict,
+        indicator_params: Dict[str, List[Any]],
+        run_fingerprint: str,
+        console: Console,
+    ) -> Optional[List[Dict]]:
+        """
+        增量回測 - 從上次的終止狀態只推進新增K線
+
+        信號只在「暖機窗口 + 新K線」上生成，重疊K線的信號需與上次保存的尾部一致；
+        模擬從終止狀態續跑，結果的 records 只包含新增K線。
+
+        Returns:
+            Optional[List[Dict]]: 新增K線的結果；狀態不可續跑時返回 None（改為完整回測）
+        """
+        n_tasks = len(all_combinations) * len(predictors)
+        state, reason = self._load_resumable_state(run_fingerprint, predictors, n_tasks)
+        if state is None:
             console.print(
                 Panel(
-                    f"🔧 批次配置: {n_batches} 個批次, 每批次約 {batch_size} 個任務",
+                    f"🔁 增量回測：{reason}，執行完整回測",
                     title=Text("👨‍💻 交易回測 Backtester", style="bold #8f1511"),
                     border_style="#dbac30",
                 )
             )
+            return None
 
-        # 步驟4: 並行結果生成（帶進度條）
-        with parallel_progress:
-            # 創建進度條任務
-            progress_task = parallel_progress.add_task(
-                "📊 [3/3] 生成回測結果", total=total_backtests
+        n_time = len(self.data)
+        n_new = n_time - state.n_bars
+        if n_new == 0:
+            console.print(
+                Panel(
+                    "🔁 增量回測：沒有新增K線，既有輸出已是最新",
+                    title=Text("👨‍💻 交易回測 Backtester", style="bold #8f1511"),
+                    border_style="#dbac30",
+                )
             )
-            
-            all_results = self._generate_all_results_vectorized(
-                all_tasks,
-                all_trade_results,
+            # 追加空結果不寫入任何檔案，下游沿用既有輸出
+            self.incremental_append_path = state.output_path
+            return []
+
+        trade_delay = int(trading_params.get("trade_delay", 0))
+        warmup = warmup_bars(indicator_params.values(), trade_delay)
+        window_start = 0 if warmup is None else max(0, state.n_bars - warmup)
+        start = state.n_bars - window_start
+        window = self.data.iloc[window_start:]
+
+        # 在尾部窗口上生成信號（窗口引擎沿用信號 dtype，不使用共享記憶體）
+        window_engine = VectorBacktestEngine(
+            window, self.frequency, self.logger, self.symbol
+        )
+        window_engine.compact_dtypes = self.compact_dtypes
+        window_engine.float32_values = self.float32_values
+        all_tasks = window_engine._generate_all_tasks_matrix(
+            all_combinations, predictors, state.backtest_id_prefix
+        )
+        signals = window_engine._generate_all_signals_vectorized(
+            all_tasks, condition_pairs
+        )
+        entry_signals = signals["entry_signals"]
+        exit_signals = signals["exit_signals"]
+
+        n_guard = state.entry_tail.shape[0]
+        guard = slice(start - n_guard, start)
+        if not (
+            np.array_equal(entry_signals[guard].astype(np.int8), state.entry_tail)
+            and np.array_equal(exit_signals[guard].astype(np.int8), state.exit_tail)
+        ):
+            console.print(
+                Panel(
+                    "🔁 增量回測：重疊K線的信號與上次不一致（暖機窗口不足），執行完整回測",
+                    title=Text("👨‍💻 交易回測 Backtester", style="bold #8f1511"),
+                    border_style="#dbac30",
+                )
+            )
+            return None
+
+        # 從終止狀態續跑，只寫入新增K線
+        window_len = len(window)
+        simulation_state = state.simulation_state.copy()
+        prev_positions = state.simulation_state[:, 0]
+        outputs = {
+            "positions": np.zeros(
+                (window_len, n_tasks), dtype=self._signal_dtype(), order="F"
+            ),
+            "returns": np.zeros(
+                (window_len, n_tasks), dtype=self._value_dtype(), order="F"
+            ),
+            "trade_actions": np.zeros(
+                (window_len, n_tasks), dtype=self._signal_dtype(), order="F"
+            ),
+            "equity_values": np.zeros(
+                (window_len, n_tasks), dtype=self._value_dtype(), order="F"
+            ),
+        }
+        window_simulator = TradeSimulator_backtester(
+            window,
+            None,
+            None,
+            trading_params.get("transaction_cost", 0.001),
+            trading_params.get("slippage", 0.0005),
+            trade_delay,
+            trading_params.get("trade_price", "close"),
+            trading_instrument=self.symbol,
+        )
+        window_simulator.simulate_trades_vectorized(
+            entry_signals,
+            exit_signals,
+            trading_params,
+            out=outputs,
+            state=simulation_state,
+            start=start,
+            n_threads=self._simulation_threads(window_len - start, n_tasks),
+        )
+
+        # 新增K線的記錄接續既有交易序號與開倉時間
+        record_simulator = TradeSimulator_backtester(
+            self.data,
+            None,
+            None,
+            trading_params.get("transaction_cost", 0.001),
+            trading_params.get("slippage", 0.0005),
+            trade_delay,
+            trading_params.get("trade_price", "close"),
+            trading_instrument=self.symbol,
+        )
+        results = []
+        for task_idx in range(n_tasks):
+            combo = all_tasks["combinations"][task_idx]
+            condition_pair = condition_pairs[self._parse_strategy_id(combo[-1])]
+            n_entry = len(condition_pair["entry"])
+            n_exit = len(condition_pair["exit"])
+            results.append(
+                record_simulator.generate_single_result(
+                    task_idx,
+                    entry_signals[start:, task_idx],
+                    exit_signals[start:, task_idx],
+                    outputs["positions"][start:, task_idx],
+                    outputs["returns"][start:, task_idx],
+                    outputs["trade_actions"][start:, task_idx],
+                    outputs["equity_values"][start:, task_idx],
+                    all_tasks["predictors"][task_idx],
+                    all_tasks["backtest_ids"][task_idx],
+                    list(combo[:n_entry]),
+                    list(combo[n_entry : n_entry + n_exit]),
+                    trading_params,
+                    offset=state.n_bars,
+                    trade_state=state.trade_state[task_idx],
+                    prev_position=float(prev_positions[task_idx]),
+                )
+            )
+
+        trade_state = state.trade_state.copy()
+        _advance_trade_record_state_njit(
+            outputs["trade_actions"], start, window_start, trade_state
+        )
+        n_guard = min(SIGNAL_GUARD_BARS, n_time)
+        self._pending_incremental_state = IncrementalBacktestState(
+            n_time,
+            history_fingerprint(self.data, n_time, self._history_columns(predictors)),
+            run_fingerprint,
+            state.backtest_id_prefix,
+            simulation_state,
+            trade_state,
+            entry_signals[window_len - n_guard :].astype(np.int8),
+            exit_signals[window_len - n_guard :].astype(np.int8),
+            state.output_path,
+        )
+        self.incremental_append_path = state.output_path
+
+        console.print(
+            Panel(
+                f"🔁 增量回測：新增 {n_new} 根K線 x {n_tasks} 個策略，"
+                f"指標暖機窗口 {start} 根K線"
+                + ("（含 EMA 等遞迴指標，使用完整歷史）" if warmup is None else ""),
+                title=Text("👨‍💻 交易回測 Backtester", style="bold #8f1511"),
+                border_style="#dbac30",
+            )
+        )
+        return results
+
+    def save_incremental_state(self, output_path: Optional[str] = None) -> None:
+        """
+        保存本次執行的增量回測狀態（需在導出 Parquet 後呼叫）
+
+        Args:
+            output_path: 本次導出的 Parquet 路徑；增量追加時可省略，沿用原檔案
+        """
+        state = self._pending_incremental_state
+        if not self.incremental_state or state is None:
+            return
+        if output_path:
+            state.output_path = output_path
+        if not state.output_path:
+            self.logger.warning("增量回測狀態未保存：缺少輸出的 Parquet 路徑")
+            return
+        state.save(self.incremental_state)
+        self._pending_incremental_state = None
+
+    def _apply_performance_params(self, performance_params: Dict[str, Any]) -> None:
+        """根據配置中的 performance_params 覆蓋引擎的向量化配置"""
+        if "shared_memory" in performance_params:
+            self.use_shared_memory = bool(performance_params["shared_memory"])
+        if "shared_memory_backend" in performance_params:
+            self.shared_memory_backend = str(performance_params["shared_memory_backend"])
+        if "compact_dtypes" in performance_params:
+            self.compact_dtypes = bool(performance_params["compact_dtypes"])
+        if "float32_values" in performance_params:
+            self.float32_values = bool(performance_params["float32_values"])
+        if "streaming" in performance_params:
+            self.streaming = bool(performance_params["streaming"])
+        if performance_params.get("stream_chunk_size"):
+            self.stream_chunk_size = int(performance_params["stream_chunk_size"])
+        if "sparse_records" in performance_params:
+            self.sparse_records = bool(performance_params["sparse_records"])
+        if "indicator_cache_mb" in performance_params:
+            value = performance_params["indicator_cache_mb"]
+            self.indicator_cache_mb = None if value is None else float(value)
+            self.indicator_cache.set_max_mb(self.indicator_cache_mb)
+        if "disk_cache" in performance_params:
+            self.disk_cache = bool(performance_params["disk_cache"])
+        if performance_params.get("disk_cache_dir"):
+            self.disk_cache_dir = str(performance_params["disk_cache_dir"])
+        if "disk_cache_mb" in performance_params:
+            value = performance_params["disk_cache_mb"]
+            self.disk_cache_mb = None if value is None else float(value)
+        self._configure_disk_cache()
+        if "incremental_state" in performance_params:
+            value = performance_params["incremental_state"]
+            self.incremental_state = str(value) if value else None
+        if "parallel_simulation" in performance_params:
+            value = performance_params["parallel_simulation"]
+            self.parallel_simulation = None if value is None else bool(value)
+        if "screening_top_k" in performance_params:
+            value = performance_params["screening_top_k"]
+            self.screening_top_k = None if value is None else int(value)
+        if performance_params.get("screening_metric"):
+            self.screening_metric = str(performance_params["screening_metric"])
+        if "screening_filters" in performance_params:
+            self.screening_filters = dict(performance_params["screening_filters"] or {})
+
+    def _configure_disk_cache(self) -> None:
+        """依 disk_cache 設定掛接或移除磁碟指標緩存"""
+        if not self.disk_cache:
+            self.indicator_cache.attach_disk_store(None)
+            return
+
+        store = self.indicator_cache.disk_store
+        if store is not None and (
+            self.disk_cache_dir is None or store.cache_dir == self.disk_cache_dir
+        ):
+            store.max_bytes = (
+                None
+                if self.disk_cache_mb is None
+                else max(0, int(self.disk_cache_mb * 1024 * 1024))
+            )
+            return
+
+        try:
+            self.indicator_cache.attach_disk_store(
+                DiskIndicatorStore(self.disk_cache_dir, self.disk_cache_mb, self.logger)
+            )
+        except OSError as e:
+            self.logger.warning(f"無法建立磁碟指標緩存，改為只使用記憶體緩存: {e}")
+            self.indicator_cache.attach_disk_store(None)
+
+    def _predictor_fingerprint(self, predictor: str) -> Optional[str]:
+        """預測因子數據指紋（只在啟用磁碟緩存時計算，按預測因子緩存）"""
+        if self.indicator_cache.disk_store is None:
+            return None
+        if predictor not in self._predictor_fingerprints:
+            try:
+                self._predictor_fingerprints[predictor] = predictor_fingerprint(
+                    self.data, predictor
+                )
+            except (KeyError, TypeError, ValueError):
+                self._predictor_fingerprints[predictor] = None
+        return self._predictor_fingerprints[predictor]
+
+    def _signal_dtype(self) -> Any:
+        """信號、持倉與交易動作矩陣的 dtype（只會出現 -1/0/1/4）"""
+        return np.int8 if self.compact_dtypes else np.float64
+
+    def _value_dtype(self) -> Any:
+        """收益與權益矩陣的 dtype"""
+        return np.float32 if self.float32_values else np.float64
+
+    @staticmethod
+    def _compute_result_batch_size(n_tasks: int, n_cores: int) -> int:
+        """根據任務數與核心數動態計算結果生成的批次大小"""
+        n_cores = max(1, n_cores)
+        if n_tasks <= 100:
+            # 小任務數也分批處理，避免單批次開銷
+            return max(20, n_tasks // 2)
+        if n_tasks <= 1000:
+            # 中等任務數，基於核心數計算
+            return max(50, n_tasks // (n_cores * 2))
+        if n_tasks <= 10000:
+            return max(200, n_tasks // (n_cores * 2))
+        return max(400, n_tasks // (n_cores * 3))
+
+    def _create_shared_store(self, n_tasks: int) -> Optional[SharedMatrixStore]:
+        """需要多進程結果生成時建立共享矩陣儲存器，否則返回 None"""
+        if not self.use_shared_memory:
+            return None
+        n_cores, _ = SpecMonitor.get_optimal_core_count()
+        if n_tasks <= self._compute_result_batch_size(n_tasks, n_cores):
+            # 單批次在主進程內處理，不需要共享
+            return None
+        try:
+            return SharedMatrixStore(
+                backend=self.shared_memory_backend, logger=self.logger
+            )
+        except Exception as e:
+            self.logger.warning(f"建立共享記憶體失敗，改用複製模式: {e}")
+            return None
+
+    def _allocate_matrix(
+        self, key: str, shape: Tuple[int, ...], dtype: Any = np.float64
+    ) -> np.ndarray:
+        """
+        分配結果矩陣，共享模式下直接分配在共享區段中
+
+        矩陣為列優先（Fortran）佈局：信號按策略欄寫入、模擬與結果生成按策略欄讀取，
+        每個策略的時間序列連續存放
+        """
+        if self._shared_store is not None:
+            try:
+                return self._shared_store.allocate(key, shape, dtype, order="F")
+            except Exception as e:
+                self.logger.warning(f"共享記憶體分配失敗，改用複製模式: {e}")
+                self._shared_store.close()
+                self._shared_store = None
+        return np.zeros(shape, dtype=dtype, order="F")
+
+    def _simulation_threads(self, n_time: int, n_strategies: int) -> int:
+        """
+        交易模擬的執行緒數 - 1 表示串行核心
+
+        parallel_simulation 為 None 時，只有模擬矩陣達到 PARALLEL_SIMULATION_MIN_CELLS
+        才使用並行核心（小矩陣的執行緒調度成本高於收益）；核心數取自 SpecMonitor
+        """
+        if self.parallel_simulation is False or n_strategies < 2:
+            return 1
+        if (
+            self.parallel_simulation is None
+            and n_time * n_strategies < PARALLEL_SIMULATION_MIN_CELLS
+        ):
+            return 1
+        n_cores, _ = SpecMonitor.get_optimal_core_count()
+        return max(1, min(n_cores, n_strategies))
+
+    def _true_vectorized_backtest(
+        self,
+        all_combinations: ParameterCombinationSpace,
+        condition_pairs: List[Dict],
+        predictors: List[str],
+        trading_params: Dict,
+        incremental_fingerprint: Optional[str] = None,
+        task_indices: Optional[np.ndarray] = None,
+        backtest_id_prefix: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        向量化回測 - 一次性處理所有任務
+
+        incremental_fingerprint 不為 None 時同時記錄各策略的終止狀態，供下次增量回測續跑；
+        task_indices 不為 None 時只處理這些任務（兩階段篩選的第二階段）
+        """
+        total_backtests = (
+            len(all_combinations) * len(predictors)
+            if task_indices is None
+            else len(task_indices)
+        )
+
+        # 創建並行處理進度條
+        from rich.progress import (
+            BarColumn,
+            Progress,
+            SpinnerColumn,
+            TaskProgressColumn,
+            TextColumn,
+            TimeElapsedColumn,
+            TimeRemainingColumn,
+        )
+
+        console = Console()
+        parallel_progress = Progress(
+            SpinnerColumn(),
+            TextColumn("[bold green]{task.description}"),
+            BarColumn(
+                bar_width=40, complete_style="green", finished_style="bright_green"
+            ),
+            TaskProgressColumn(),
+            TextColumn("({task.completed}/{task.total})"),
+            TimeElapsedColumn(),
+            TextColumn("•"),
+            TimeRemainingColumn(),
+            console=console,
+        )
+
+        # 多進程結果生成時，信號與交易矩陣直接放在共享記憶體中
+        self._shared_store = self._create_shared_store(total_backtests)
+        try:
+            # 先執行不需要進度條的步驟
+            # 步驟1: 生成任務矩陣
+            all_tasks = self._generate_all_tasks_matrix(
+                all_combinations, predictors, backtest_id_prefix, task_indices
+            )
+
+            # 步驟2: 向量化信號生成
+            all_signals = self._generate_all_signals_vectorized(
+                all_tasks, condition_pairs
+            )
+
+            # 步驟3: 向量化交易模擬
+            all_trade_results = self._simulate_all_trades_vectorized(
                 all_signals,
-                condition_pairs,
-                trading_params,  # 添加 trading_params 參數
-                parallel_progress,
-                progress_task,
-                total_backtests,
+                trading_params,
+                track_state=incremental_fingerprint is not None,
             )
+            if incremental_fingerprint is not None:
+                self._pending_incremental_state = self._capture_incremental_state(
+                    all_tasks,
+                    all_signals,
+                    all_trade_results,
+                    predictors,
+                    incremental_fingerprint,
+                )
 
-        return all_results
+            # 在創建進度條之前顯示配置信息
+            n_tasks = len(all_tasks["combinations"])
+            n_cores, _ = SpecMonitor.get_optimal_core_count()
+        
+            # 確認並行處理模式
+            console.print(
+                Panel(
+                    f"🔧 並行處理模式: {n_tasks} 個任務, {n_cores} 核心",
+                    title=Text("👨‍💻 交易回測 Backtester", style="bold #8f1511"),
+                    border_style="#dbac30",
+                )
+            )
 
-    def _generate_all_tasks_matrix(
-        self, all_combinations: List[Tuple], predictors: List[str]
-    ) -> Dict:
-        """一次性生成所有任務矩陣"""
-        all_tasks: Dict[str, List[Any]] = {
-            "combinations": [],
-            "predictors": [],
-            "backtest_ids": [],
-            "strategy_ids": [],
-            "entry_params_list": [],
-            "exit_params_list": [],
-        }
+            # 動態計算批次大小
+            batch_size = self._compute_result_batch_size(n_tasks, n_cores)
 
-        for combo in all_combinations:
-            for predictor in predictors:
-                backtest_id = str(uuid.uuid4())[:16]
-                strategy_id = combo[-1]  # 最後一個元素是strategy_id
+            # 計算批次數量
+            n_batches = (n_tasks + batch_size - 1) // batch_size
 
-                all_tasks["combinations"].append(combo)
-                all_tasks["predictors"].append(predictor)
-                all_tasks["backtest_ids"].append(backtest_id)
-                all_tasks["strategy_ids"].append(strategy_id)
+            # 顯示批次配置
+            if n_batches == 1:
+                console.print(
+                    Panel(
+                        f"🔧 單進程處理: {n_tasks} 個任務",
+                        title=Text("👨‍💻 交易回測 Backtester", style="bold #8f1511"),
+                        border_style="#dbac30",
+                    )
+                )
+            else:
+                console.print(
+                    Panel(
+                        f"🔧 批次配置: {n_batches} 個批次, 每批次約 {batch_size} 個任務",
+                        title=Text("👨‍💻 交易回測 Backtester", style="bold #8f1511"),
+                        border_style="#dbac30",
+                    )
+                )
+
+            # 步驟4: 並行結果生成（帶進度條）
+            with parallel_progress:
+                # 創建進度條任務
+                progress_task = parallel_progress.add_task(
+                    "📊 [3/3] 生成回測結果", total=total_backtests
+                )
+            
+                all_results = self._generate_all_results_vectorized(
+                    all_tasks,
+                    all_trade_results,
+                    all_signals,
+                    condition_pairs,
+                    trading_params,  # 添加 trading_params 參數
+                    parallel_progress,
+                    progress_task,
+                    total_backtests,
+                )
+        finally:
+            if self._shared_store is not None:
+                self._shared_store.close()
+                self._shared_store = None
 
-                # 初始化 entry_params_list 和 exit_params_list（將在分組處理中填充）
-                all_tasks["entry_params_list"].append([])
-                all_tasks["exit_params_list"].append([])
+        if self.sparse_records:
+            # 子進程返回的稀疏結果不攜帶價格上下文，在主進程統一綁定
+            bind_sparse_context(all_results, self._get_sparse_context(trading_params))
 
+        return all_results
+
+    def _generate_all_tasks_matrix(
+        self,
+        all_combinations: ParameterCombinationSpace,
+        predictors: List[str],
+        backtest_id_prefix: Optional[str] = None,
+        task_indices: Optional[np.ndarray] = None,
+    ) -> Dict:
+        """
+        生成任務視圖 - 任務索引 t 對應組合 t // 預測因子數、預測因子 t % 預測因子數
+
+        backtest_id_prefix 為 None 時使用本次執行的隨機前綴（增量回測沿用上次的前綴）；
+        task_indices 不為 None 時視圖只包含這些任務，Backtest_id 仍按原任務索引生成
+        """
+        n_predictors = len(predictors)
+        n_tasks = len(all_combinations) * n_predictors
+
+        all_tasks = {
+            "combinations": TaskCombinationView(all_combinations, n_predictors),
+            "predictors": TaskPredictorView(predictors, len(all_combinations)),
+            "backtest_ids": BacktestIdView(n_tasks, backtest_id_prefix),
+            "strategy_ids": TaskStrategyIdView(all_combinations, n_predictors),
+        }
+        if task_indices is not None:
+            all_tasks = {
+                key: TaskSubsetView(view, task_indices)
+                for key, view in all_tasks.items()
+            }
         return all_tasks
 
     def _generate_all_signals_vectorized(
@@ -653,9 +1531,13 @@ class VectorBacktestEngine:
         n_tasks = len(all_tasks["combinations"])
         n_time = len(self.data)
 
-        # 初始化信號矩陣
-        entry_signals = np.zeros((n_time, n_tasks))
-        exit_signals = np.zeros((n_time, n_tasks))
+        # 初始化信號矩陣（共享模式下直接分配在共享記憶體中）
+        entry_signals = self._allocate_matrix(
+            "entry_signals", (n_time, n_tasks), self._signal_dtype()
+        )
+        exit_signals = self._allocate_matrix(
+            "exit_signals", (n_time, n_tasks), self._signal_dtype()
+        )
 
         from rich.console import Console
         from rich.progress import (
@@ -704,20 +1586,14 @@ class VectorBacktestEngine:
                     group_result = self._process_strategy_group(group)
                     
                     # 將分組結果分配到對應位置
-                    for task_info in group["tasks"]:
-                        task_idx = task_info["task_idx"]
-                        local_idx = group["tasks"].index(task_info)
-                        
-                        entry_signals[:, task_idx] = group_result["entry_signals"][:, local_idx]
-                        exit_signals[:, task_idx] = group_result["exit_signals"][:, local_idx]
-                        
+                    self._scatter_group_signals(
+                        group, group_result, entry_signals, exit_signals
+                    )
+
                 except Exception as e:
                     self.logger.warning(f"策略分組處理失敗: {e}")
                     # 為失敗的分組設置零信號
-                    for task_info in group["tasks"]:
-                        task_idx = task_info["task_idx"]
-                        entry_signals[:, task_idx] = 0
-                        exit_signals[:, task_idx] = 0
+                    self._scatter_group_signals(group, None, entry_signals, exit_signals)
                 
                 # 更新進度條
                 completed_groups += 1
@@ -772,10 +1648,65 @@ class VectorBacktestEngine:
                 )
                 groups[group_key]["condition_pairs"].append(condition_pair)
 
+        # 分組內第 i 個策略對應的全局任務索引，結果分配與篩選列索引直接使用
+        for group in groups.values():
+            group["task_indices"] = np.fromiter(
+                (task_info["task_idx"] for task_info in group["tasks"]),
+                dtype=np.int64,
+                count=len(group["tasks"]),
+            )
+
         return list(groups.values())
 
+    @classmethod
+    def _scatter_group_signals(
+        cls,
+        group: Dict,
+        group_result: Optional[Dict],
+        entry_signals: np.ndarray,
+        exit_signals: np.ndarray,
+    ) -> None:
+        """以分組的任務索引數組單次賦值分配信號；group_result 為 None 時設為零信號"""
+        columns = cls._column_selector(group["task_indices"])
+        if group_result is None:
+            entry_signals[:, columns] = 0
+            exit_signals[:, columns] = 0
+        else:
+            entry_signals[:, columns] = group_result["entry_signals"]
+            exit_signals[:, columns] = group_result["exit_signals"]
+
+    @staticmethod
+    def _column_selector(indices: Any) -> Any:
+        """欄位索引為連續遞增範圍時返回切片（視圖），否則返回索引數組"""
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) and indices[-1] - indices[0] + 1 == len(indices):
+            if len(indices) == 1 or np.all(np.diff(indices) == 1):
+                return slice(int(indices[0]), int(indices[-1]) + 1)
+        return indices
+
     def _process_strategy_group(self, group: Dict) -> Dict:
         """處理單個策略分組"""
+        entry_bank, entry_index, exit_bank, exit_index = (
+            self._strategy_group_signal_banks(group)
+        )
+
+        # 合併信號（按索引從信號庫收集）
+        combined_entry_signals = self._vectorized_combine_signals(
+            entry_bank, entry_index, is_exit_signals=False
+        )
+        combined_exit_signals = self._vectorized_combine_signals(
+            exit_bank, exit_index, is_exit_signals=True
+        )
+
+        return {
+            "entry_signals": combined_entry_signals,
+            "exit_signals": combined_exit_signals,
+        }
+
+    def _strategy_group_signal_banks(
+        self, group: Dict
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """策略分組的開/平倉信號庫與索引：(entry_bank, entry_index, exit_bank, exit_index)"""
         entry_count = group["entry_count"]
         exit_count = group["exit_count"]
         tasks = group["tasks"]
@@ -800,31 +1731,23 @@ class VectorBacktestEngine:
             predictors_list.append(task_info["predictor"])
 
         # 生成信號（靜默模式，避免與外層進度條衝突）
-        entry_signals_matrix = self._vectorized_generate_signals(
+        # 笛卡兒積中同一組指標參數會重複出現，每個唯一信號只計算一次
+        entry_bank, entry_index = self._vectorized_generate_signals(
             entry_params_list, predictors_list
         )
-        exit_signals_matrix = self._vectorized_generate_signals(
+        exit_bank, exit_index = self._vectorized_generate_signals(
             exit_params_list, predictors_list
         )
-
-        # 合併信號
-        combined_entry_signals = self._vectorized_combine_signals(
-            entry_signals_matrix, is_exit_signals=False
-        )
-        combined_exit_signals = self._vectorized_combine_signals(
-            exit_signals_matrix, is_exit_signals=True
-        )
-
-        return {
-            "entry_signals": combined_entry_signals,
-            "exit_signals": combined_exit_signals,
-            "all_signals_matrix": entry_signals_matrix,
-        }
+        return entry_bank, entry_index, exit_bank, exit_index
 
     def _simulate_all_trades_vectorized(
-        self, all_signals: Dict, trading_params: Dict
+        self, all_signals: Dict, trading_params: Dict, track_state: bool = False
     ) -> Dict:
-        """向量化交易模擬 - 處理單個numpy數組格式的信號，帶進度條"""
+        """
+        向量化交易模擬 - 處理單個numpy數組格式的信號，帶進度條
+
+        track_state 為 True 時結果另含 simulation_state（各策略的模擬終止狀態）
+        """
 
         from rich.console import Console
         from rich.progress import (
@@ -857,9 +1780,12 @@ class VectorBacktestEngine:
         exit_signals = all_signals["exit_signals"]
         n_strategies = entry_signals.shape[1]
 
+        n_threads = self._simulation_threads(entry_signals.shape[0], n_strategies)
+        mode_info = f"（{n_threads} 執行緒並行）" if n_threads > 1 else ""
+
         with trade_progress:
             trade_task = trade_progress.add_task(
-                f"📈 [2/3] 交易模擬 - {n_strategies} 個策略", total=2
+                f"📈 [2/3] 交易模擬 - {n_strategies} 個策略{mode_info}", total=2
             )
             
             # 創建 TradeSimulator 實例
@@ -889,12 +1815,39 @@ class VectorBacktestEngine:
             
             trade_progress.update(trade_task, completed=1, description="📈 [2/3] 交易模擬 - 準備完成")
 
+            # 預先分配輸出矩陣（緊湊 dtype / 共享記憶體），由模擬器直接寫入
+            n_time = entry_signals.shape[0]
+            output_matrices = {
+                "positions": self._allocate_matrix(
+                    "positions", (n_time, n_strategies), self._signal_dtype()
+                ),
+                "returns": self._allocate_matrix(
+                    "returns", (n_time, n_strategies), self._value_dtype()
+                ),
+                "trade_actions": self._allocate_matrix(
+                    "trade_actions", (n_time, n_strategies), self._signal_dtype()
+                ),
+                "equity_values": self._allocate_matrix(
+                    "equity_values", (n_time, n_strategies), self._value_dtype()
+                ),
+            }
+
             # 調用 TradeSimulator 的向量化方法
+            simulation_state = (
+                initial_simulation_state(n_strategies) if track_state else None
+            )
             trade_results = simulator.simulate_trades_vectorized(
-                entry_signals, exit_signals, trading_params
+                entry_signals,
+                exit_signals,
+                trading_params,
+                out=output_matrices,
+                state=simulation_state,
+                n_threads=n_threads,
             )
+            if simulation_state is not None:
+                trade_results["simulation_state"] = simulation_state
             
-            trade_progress.update(trade_task, completed=2, description=f"📈 [2/3] 交易模擬 - 完成 {n_strategies} 個策略")
+            trade_progress.update(trade_task, completed=2, description=f"📈 [2/3] 交易模擬 - 完成 {n_strategies} 個策略{mode_info}")
 
         return trade_results
 
@@ -925,16 +1878,7 @@ class VectorBacktestEngine:
         n_cores, core_info = SpecMonitor.get_optimal_core_count()
 
         # 動態計算批次大小 - 基於核心數優化
-        if n_tasks <= 100:
-            # 小任務數也分批處理，避免單批次開銷
-            batch_size = max(20, n_tasks // 2)
-        elif n_tasks <= 1000:
-            # 中等任務數，基於核心數計算
-            batch_size = max(50, n_tasks // (n_cores * 2))
-        elif n_tasks <= 10000:
-            batch_size = max(200, n_tasks // (n_cores * 2))  # 基於核心數計算
-        else:
-            batch_size = max(400, n_tasks // (n_cores * 3))  # 基於核心數計算
+        batch_size = self._compute_result_batch_size(n_tasks, n_cores)
 
         # 準備批次索引
         batch_indices = []
@@ -974,16 +1918,50 @@ class VectorBacktestEngine:
             # 多批次並行處理
             results = []
             try:
-                with ProcessPoolExecutor(max_workers=n_cores) as executor:
-                    futures = {
-                        executor.submit(
-                            self._process_batch_results_optimized,
-                            self._prepare_batch_data(
-                                batch_idx_list, all_tasks, all_trade_results, all_signals, condition_pairs, trading_params
+                executor_kwargs: Dict[str, Any] = {"max_workers": max(1, n_cores)}
+                if self._shared_store is not None:
+                    # 共享模式：子進程只初始化一次，之後每個批次只傳遞欄位範圍
+                    executor_kwargs["initializer"] = _init_shared_result_worker
+                    executor_kwargs["initargs"] = (
+                        self.data,
+                        self.frequency,
+                        self.symbol,
+                        self._shared_store.descriptors(),
+                        {
+                            key: all_tasks[key]
+                            for key in (
+                                "combinations",
+                                "predictors",
+                                "backtest_ids",
+                                "strategy_ids",
                             )
-                        ): batch_idx
-                        for batch_idx, batch_idx_list in enumerate(batch_indices)
-                    }
+                        },
+                        condition_pairs,
+                        trading_params,
+                        self.sparse_records,
+                        self.float32_values,
+                    )
+
+                with ProcessPoolExecutor(**executor_kwargs) as executor:
+                    if self._shared_store is not None:
+                        futures = {
+                            executor.submit(
+                                _process_shared_result_batch,
+                                batch_idx_list[0],
+                                batch_idx_list[-1] + 1,
+                            ): batch_idx
+                            for batch_idx, batch_idx_list in enumerate(batch_indices)
+                        }
+                    else:
+                        futures = {
+                            executor.submit(
+                                self._process_batch_results_optimized,
+                                self._prepare_batch_data(
+                                    batch_idx_list, all_tasks, all_trade_results, all_signals, condition_pairs, trading_params
+                                )
+                            ): batch_idx
+                            for batch_idx, batch_idx_list in enumerate(batch_indices)
+                        }
 
                     completed_tasks = 0
                     best_sharpe_so_far = -float('inf') # Step 1: Initialize variable
@@ -1089,18 +2067,21 @@ class VectorBacktestEngine:
                 "combo": all_tasks["combinations"][idx],
             }
 
+        # 批次索引為連續範圍時使用切片視圖，避免複製欄位
+        columns = self._column_selector(batch_indices)
+
         # 直接使用單個numpy數組格式的信號
         batch_data["signals"] = {
-            "entry_signals": all_signals["entry_signals"][:, batch_indices],
-            "exit_signals": all_signals["exit_signals"][:, batch_indices],
+            "entry_signals": all_signals["entry_signals"][:, columns],
+            "exit_signals": all_signals["exit_signals"][:, columns],
         }
 
         # 提取交易結果數據，直接傳遞 numpy 數組
         batch_data["trade_results"] = {
-            "positions": all_trade_results["positions"][:, batch_indices],
-            "returns": all_trade_results["returns"][:, batch_indices],
-            "trade_actions": all_trade_results["trade_actions"][:, batch_indices],
-            "equity_values": all_trade_results["equity_values"][:, batch_indices],
+            "positions": all_trade_results["positions"][:, columns],
+            "returns": all_trade_results["returns"][:, columns],
+            "trade_actions": all_trade_results["trade_actions"][:, columns],
+            "equity_values": all_trade_results["equity_values"][:, columns],
         }
 
         # 添加 trading_params 到 batch_data
@@ -1128,6 +2109,12 @@ class VectorBacktestEngine:
                 task_idx: idx for idx, task_idx in enumerate(batch_indices)
             }
 
+            # 整個批次的臨時夏普值一次按欄計算 (不考慮無風險利率和年化)
+            try:
+                temp_sharpes = temp_sharpe_columns(trade_results["equity_values"])
+            except Exception:
+                temp_sharpes = np.full(len(batch_indices), -np.inf)  # 計算失敗則設為負無限大
+
             # 處理所有任務
             for task_idx in batch_indices:
                 try:
@@ -1170,20 +2157,8 @@ class VectorBacktestEngine:
                         trading_params,  # 使用完整的 trading_params
                     )
 
-                    # --- Step 2: Pre-calculate temporary Sharpe Ratio ---
-                    try:
-                        # 計算每日收益率 (百分比 -> 小數)
-                        daily_returns = pd.Series(equity_values).pct_change().fillna(0)
-
-                        # 只有在有交易時才計算 (避免標準差為0)
-                        if daily_returns.std() > 0:
-                            # 簡單計算夏普比率 (不考慮無風險利率和年化)
-                            temp_sharpe = daily_returns.mean() / daily_returns.std()
-                            result['temp_sharpe'] = temp_sharpe
-                        else:
-                            result['temp_sharpe'] = -np.inf
-                    except Exception:
-                        result['temp_sharpe'] = -np.inf # 計算失敗則設為負無限大
+                    # --- Step 2: Read batch temporary Sharpe Ratio ---
+                    result['temp_sharpe'] = float(temp_sharpes[batch_idx])
 
                     results.append(result)
 
@@ -1413,6 +2388,21 @@ class VectorBacktestEngine:
     ) -> Dict:
         """生成單個任務的結果 - 改為調用 TradeSimulator"""
 
+        if self.sparse_records:
+            # 稀疏模式：只保存交易事件與信號變化點
+            return build_sparse_result(
+                self._get_sparse_context(trading_params),
+                entry_signal,
+                exit_signal,
+                position,
+                trade_actions,
+                equity_values,
+                predictor,
+                backtest_id,
+                entry_params,
+                exit_params,
+            )
+
         # 創建 TradeSimulator 實例
         simulator = TradeSimulator_backtester(
             self.data,
@@ -1448,12 +2438,34 @@ class VectorBacktestEngine:
 
         return result
 
+    def _get_sparse_context(self, trading_params: Dict) -> SparseRecordContext:
+        """取得稀疏結果共用的價格上下文（交易參數不變時重複使用）"""
+        context = self._sparse_context
+        if (
+            context is None
+            or context.trading_params != trading_params
+            or context.value_dtype != np.dtype(self._value_dtype())
+        ):
+            context = SparseRecordContext(
+                self.data, trading_params, self.symbol, self._value_dtype()
+            )
+            self._sparse_context = context
+        return context
+
     # 參數轉換方法已移植到 TradeSimulator 中
 
     def _vectorized_generate_signals(  # pylint: disable=too-complex
         self, params_list: List[List[Any]], predictors: List[str]
-    ) -> np.ndarray:
-        """真正的向量化生成信號 - 批量計算指標，只生成純粹的 +1/-1/0 信號"""
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        真正的向量化生成信號 - 批量計算指標，只生成純粹的 +1/-1/0 信號
+
+        相同 (指標類型, 參數, 預測因子) 的信號只計算一次並存入信號庫。
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (信號庫 [時間點, 唯一信號數],
+            索引 [任務數, 指標數]，-1 表示該位置無指標)
+        """
 
         n_tasks = len(params_list)
 
@@ -1471,18 +2483,13 @@ class VectorBacktestEngine:
 
         n_time = len(self.data)
 
-        # 初始化信號矩陣
-        signals_matrix = np.zeros((n_time, n_tasks, n_indicators))
-
-        # 初始化全局快取
-        global_ma_cache: Dict[str, Any] = {}
-        global_boll_cache: Dict[str, Any] = {}
-        global_hl_cache: Dict[str, Any] = {}
-        global_value_cache: Dict[str, Any] = {}
-        global_percentile_cache: Dict[str, Any] = {}
+        # 去重：同一參數物件在組合中重複出現，雜湊按物件只計算一次
+        bank_index = np.full((n_tasks, n_indicators), -1, dtype=np.int64)
+        bank_columns: Dict[Tuple[str, str, str], int] = {}
+        param_hashes: Dict[int, str] = {}
 
-        # 按指標類型分組任務
-        indicator_groups: Dict[str, List[Any]] = {}
+        # 按指標類型分組唯一信號，任務位置 = 信號庫欄位，指標位置固定為 0
+        indicator_groups: Dict[Tuple[str, str], List[Any]] = {}
         for task_idx, params in enumerate(params_list):
             # 確保 params 是列表格式
             if not isinstance(params, list):
@@ -1492,14 +2499,34 @@ class VectorBacktestEngine:
                 if param is None:
                     continue
 
-                # 創建指標分組鍵
-                indicator_key = (param.indicator_type, predictors[task_idx])
-                if indicator_key not in indicator_groups:
-                    indicator_groups[indicator_key] = []
-                indicator_groups[indicator_key].append((task_idx, indicator_idx, param))
+                param_hash = param_hashes.get(id(param))
+                if param_hash is None:
+                    param_hash = param.get_param_hash()
+                    param_hashes[id(param)] = param_hash
+
+                bank_key = (param.indicator_type, param_hash, predictors[task_idx])
+                column = bank_columns.get(bank_key)
+                if column is None:
+                    column = len(bank_columns)
+                    bank_columns[bank_key] = column
+                    # 創建指標分組鍵
+                    indicator_key = (param.indicator_type, predictors[task_idx])
+                    indicator_groups.setdefault(indicator_key, []).append(
+                        (column, 0, param)
+                    )
+                bank_index[task_idx, indicator_idx] = column
+
+        # 初始化信號庫（指標向量化函數按 [時間點, 任務, 指標] 寫入）
+        signals_matrix = np.zeros(
+            (n_time, len(bank_columns), 1), dtype=self._signal_dtype()
+        )
 
         # 批量計算每種指標類型
         for (indicator_type, predictor), tasks in indicator_groups.items():
+            # 引擎級指標緩存視圖（跨開/平倉與策略分組共用，啟用時讀寫磁碟緩存）
+            indicator_cache = self.indicator_cache.namespace(
+                indicator_type, self._predictor_fingerprint(predictor)
+            )
             try:
                 # 批量生成信號
                 if indicator_type == "MA":
@@ -1509,19 +2536,19 @@ class VectorBacktestEngine:
                     )
 
                     MovingAverageIndicator.vectorized_calculate_ma_signals(
-                        tasks, predictor, signals_matrix, global_ma_cache, self.data
+                        tasks, predictor, signals_matrix, indicator_cache, self.data
                     )
                 elif indicator_type == "BOLL":
                     BollingerBandIndicator.vectorized_calculate_boll_signals(
-                        tasks, predictor, signals_matrix, global_boll_cache, self.data
+                        tasks, predictor, signals_matrix, indicator_cache, self.data
                     )
                 elif indicator_type == "HL":
                     HLIndicator.vectorized_calculate_hl_signals(
-                        tasks, predictor, signals_matrix, global_hl_cache, self.data
+                        tasks, predictor, signals_matrix, indicator_cache, self.data
                     )
                 elif indicator_type == "VALUE":
                     VALUEIndicator.vectorized_calculate_value_signals(
-                        tasks, predictor, signals_matrix, global_value_cache, self.data
+                        tasks, predictor, signals_matrix, indicator_cache, self.data
                     )
 
                 elif indicator_type == "PERC":
@@ -1532,7 +2559,7 @@ class VectorBacktestEngine:
                         tasks,
                         predictor,
                         signals_matrix,
-                        global_percentile_cache,
+                        indicator_cache,
                         self.data,
                     )
                 else:
@@ -1559,48 +2586,37 @@ class VectorBacktestEngine:
                 for task_idx, indicator_idx, param in tasks:
                     signals_matrix[:, task_idx, indicator_idx] = 0
 
+        # 批次結束後才按容量淘汰，避免指標函數讀取途中條目被移除
+        self.indicator_cache.end_batch()
+
         # 強制垃圾回收
         import gc
 
         gc.collect()
 
-        return signals_matrix
+        return signals_matrix[:, :, 0], bank_index
 
-    def _vectorized_combine_signals(  # pylint: disable=too-complex
-        self, signals_matrix: np.ndarray, is_exit_signals: bool = False
+    def _vectorized_combine_signals(
+        self,
+        signal_bank: np.ndarray,
+        bank_index: np.ndarray,
+        is_exit_signals: bool = False,
     ) -> np.ndarray:
-        """向量化合併信號"""
+        """向量化合併信號 - 按 bank_index 從信號庫收集每個任務的各指標信號"""
         if NUMBA_AVAILABLE:
-            return _vectorized_combine_signals_njit(signals_matrix, is_exit_signals)
+            return _vectorized_combine_signals_njit(
+                signal_bank, bank_index, is_exit_signals
+            )
         else:
-            # 備用實現
-            n_time, n_tasks, n_indicators = signals_matrix.shape
-            result = np.zeros((n_time, n_tasks))
-
-            for t in range(n_time):
-                for s in range(n_tasks):
-                    all_long = True
-                    all_short = True
-
-                    for i in range(n_indicators):
-                        if signals_matrix[t, s, i] != 1.0:
-                            all_long = False
-                        if signals_matrix[t, s, i] != -1.0:
-                            all_short = False
-
-                    if is_exit_signals:
-                        # 平倉信號：1 = 平多，-1 = 平空
-                        if all_long:  # 所有信號都是1
-                            result[t, s] = 1.0  # 平多
-                        elif all_short:  # 所有信號都是-1
-                            result[t, s] = -1.0  # 平空
-                    else:
-                        # 開倉信號：1 = 開多，-1 = 開空
-                        if all_long:  # 所有信號都是1
-                            result[t, s] = 1.0  # 開多
-                        elif all_short:  # 所有信號都是-1
-                            result[t, s] = -1.0  # 開空
-
+            # 備用實現：收集為 [時間點, 任務數, 指標數] 後判斷是否全部同向
+            gathered = signal_bank[:, np.maximum(bank_index, 0)]
+            gathered[:, bank_index < 0] = 0
+            all_long = np.all(gathered == 1, axis=2)
+            all_short = np.all(gathered == -1, axis=2)
+
+            result = np.zeros(gathered.shape[:2], dtype=signal_bank.dtype)
+            result[all_long] = 1  # 開多 / 平多
+            result[all_short & ~all_long] = -1  # 開空 / 平空
             return result
 
     def _vectorized_trade_simulation(
@@ -1762,3 +2778,50 @@ class VectorBacktestEngine:
             }
         except Exception:
             return {"strategy_idx": strategy_idx, "combo": combo}
+
+
+# 共享記憶體模式下的子進程狀態（每個子進程初始化一次）
+_SHARED_RESULT_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_shared_result_worker(
+    data: pd.DataFrame,
+    frequency: str,
+    symbol: str,
+    descriptors: Dict[str, Dict[str, Any]],
+    tasks: Dict[str, Any],
+    condition_pairs: List[Dict[str, Any]],
+    trading_params: Dict[str, Any],
+    sparse_records: bool = False,
+    float32_values: bool = False,
+) -> None:
+    """子進程初始化：附加共享矩陣並建立輕量引擎，避免每個批次重複序列化"""
+    arrays, handles = attach_matrices(descriptors)
+    engine = VectorBacktestEngine(data, frequency, symbol=symbol)
+    engine.sparse_records = sparse_records
+    engine.float32_values = float32_values
+    _SHARED_RESULT_WORKER_STATE.update(
+        {
+            "engine": engine,
+            "arrays": arrays,
+            "handles": handles,
+            "tasks": tasks,
+            "condition_pairs": condition_pairs,
+            "trading_params": trading_params,
+        }
+    )
+
+
+def _process_shared_result_batch(start: int, end: int) -> List[Dict]:
+    """子進程批次處理：按欄位範圍 [start, end) 讀取共享矩陣並生成結果"""
+    state = _SHARED_RESULT_WORKER_STATE
+    arrays = state["arrays"]
+    batch_data = state["engine"]._prepare_batch_data(  # pylint: disable=protected-access
+        list(range(start, end)),
+        state["tasks"],
+        arrays,
+        arrays,
+        state["condition_pairs"],
+        state["trading_params"],
+    )
+    return state["engine"]._process_batch_results_optimized(batch_data)  # pylint: disable=protected-access
@@ -20,11 +20,15 @@ flowchart TD
 ------------------------------------------------------------
 - 新增/刪除回測子模組時，請同步更新本檔案的 import 與 __all__
 - 若回測類別名稱或介面有變動，需同步調整本檔案與主流程
+- 匯入本套件時統一設定 numba 執行緒層（見下方 THREADING_LAYER），各子模組不應再自行修改
 
 【常見易錯點】
 ------------------------------------------------------------
 - 忘記將新模組加入 __all__，導致外部無法正確匯入
 - import 路徑錯誤會導致 ModuleNotFoundError
+- SMA/BOLL 多窗口核心與並行交易模擬使用 prange，而回測引擎之後會 fork 子進程生成結果；
+  TBB 執行緒層在 fork 後會使主進程無法正常退出，因此未指定時改用 workqueue。
+  如需其他執行緒層，請在匯入 backtester 之前設定環境變數 NUMBA_THREADING_LAYER
 
 【範例】
 ------------------------------------------------------------
@@ -42,6 +46,15 @@ flowchart TD
 - 其他模組如有依賴本模組，請於對應檔案頂部註解標明
 """
 
+# 須在任何子模組編譯/執行 prange 核心之前設定，因此放在子模組匯入之前
+try:
+    from numba import config as numba_config
+
+    if numba_config.THREADING_LAYER == "default":
+        numba_config.THREADING_LAYER = "workqueue"
+except ImportError:
+    pass
+
 from .Base_backtester import BaseBacktester
 from .DataImporter_backtester import DataImporter
 from .Indicators_backtester import IndicatorsBacktester
@@ -40,6 +40,7 @@ flowchart TD
 ------------------------------------------------------------
 - 執行完整績效分析：BaseMetricTracker().run_analysis()
 - 分析指定檔案：analyze(file_list)
+- 並行分析多個檔案：BaseMetricTracker().run_analysis(max_workers="auto")
 
 【與其他模組的關聯】
 ------------------------------------------------------------
@@ -51,6 +52,7 @@ flowchart TD
 - v1.0: 初始版本，支援基本績效分析
 - v1.1: 新增 Rich Panel 顯示和步驟跟蹤
 - v1.2: 支援多檔案批次分析
+- v1.3: 多檔案時可用相同參數以進程池並行分析（依檔案大小排程、記憶體上限），並顯示逐檔耗時
 
 【參考】
 ------------------------------------------------------------
@@ -64,6 +66,7 @@ import sys
 import pandas as pd
 from rich.console import Console
 from rich.panel import Panel
+from rich.table import Table
 
 from .DataImporter_metricstracker import (
     list_parquet_files,
@@ -71,6 +74,7 @@ from .DataImporter_metricstracker import (
     show_parquet_files,
 )
 from .MetricsExporter_metricstracker import MetricsExporter
+from .ParallelMetrics_metricstracker import export_metrics_files, resolve_worker_count
 
 console = Console()
 
@@ -108,11 +112,14 @@ class BaseMetricTracker:
         """實例方法，調用靜態方法"""
         BaseMetricTracker.print_step_panel(current_step, desc)
 
-    def run_analysis(self, directory=None):
+    def run_analysis(self, directory=None, max_workers=None, memory_limit_mb=None):
         """
         執行完整的 metricstracker 分析流程
         Args:
             directory: parquet 檔案目錄，如果為 None 則使用預設路徑
+            max_workers: 多檔案並行分析的進程數（"auto" 為 CPU 核心數、1 為逐個分析）；
+                None 時於互動模式詢問，非互動模式逐個分析
+            memory_limit_mb: 並行分析時同時處理檔案的預估記憶體上限（MB）
         """
         if directory is None:
             directory = os.path.join(
@@ -181,6 +188,11 @@ class BaseMetricTracker:
             )
         )
 
+        workers = self._resolve_parallel_workers(selected_files, max_workers)
+        if workers > 1:
+            self._run_parallel_analysis(selected_files, workers, memory_limit_mb)
+            return True
+
         # 分析每個選中的檔案
         for orig_parquet_path in selected_files:
             console.print(
@@ -218,6 +230,83 @@ class BaseMetricTracker:
 
         return True
 
+    def _resolve_parallel_workers(self, selected_files, max_workers):
+        """決定並行進程數；只有一個檔案時一律逐個分析"""
+        if len(selected_files) <= 1:
+            return 1
+        if max_workers is None:
+            if not sys.stdout.isatty():
+                return 1
+            console.print(
+                "[bold #dbac30]已選擇多個檔案，是否以相同參數並行分析？(y/n，留空為 y)：[/bold #dbac30]",
+                end="",
+            )
+            if input().strip().lower() in ("n", "no"):
+                return 1
+            max_workers = "auto"
+        return resolve_worker_count(max_workers, len(selected_files))
+
+    def _run_parallel_analysis(self, selected_files, workers, memory_limit_mb=None):
+        """以相同參數並行分析所有選中的檔案，最後按選擇順序顯示逐檔耗時"""
+        self._print_step_panel(
+            2,
+            "- 所有選中的檔案將使用相同的年化時間單位和無風險利率。\n"
+            "- 年化時間單位：日線股票通常為252，日線幣通常為365。\n"
+            "- 無風險利率：用於計算風險調整後報酬率，通常為2-5%。",
+        )
+        time_unit, risk_free_rate = self._get_analysis_params()
+
+        self._print_step_panel(
+            3,
+            f"- 以 {workers} 個進程並行計算 {len(selected_files)} 個檔案的績效指標。\n"
+            "- 較大的檔案會優先處理，同時處理的檔案受記憶體上限限制。\n"
+            "- 每個檔案完成後即顯示結果，最後按選擇順序顯示耗時摘要。",
+        )
+
+        def on_result(result):
+            name = os.path.basename(result.source_path)
+            if result.status == "success":
+                message = f"✅ 已完成：{name}（{result.total_seconds:.2f} 秒）"
+                border_style = "#dbac30"
+            else:
+                message = f"❌ 分析失敗：{name}\n{result.error}"
+                border_style = "#8f1511"
+            console.print(
+                Panel(
+                    message,
+                    title="[bold #8f1511]🚦 Metricstracker 交易分析[/bold #8f1511]",
+                    border_style=border_style,
+                )
+            )
+
+        results = export_metrics_files(
+            selected_files,
+            time_unit,
+            risk_free_rate,
+            max_workers=workers,
+            memory_limit_mb=memory_limit_mb,
+            on_result=on_result,
+        )
+
+        table = Table(title="📈 績效分析耗時", show_lines=True, border_style="#dbac30")
+        table.add_column("檔案", style="white")
+        table.add_column("狀態", style="white")
+        table.add_column("記錄數", style="white", justify="right")
+        table.add_column("讀取(秒)", style="white", justify="right")
+        table.add_column("計算與匯出(秒)", style="white", justify="right")
+        table.add_column("總耗時(秒)", style="#dbac30", justify="right")
+        for result in results:
+            table.add_row(
+                os.path.basename(result.source_path),
+                "✅ 成功" if result.status == "success" else "❌ 失敗",
+                f"{result.n_rows:,}",
+                f"{result.read_seconds:.2f}",
+                f"{result.export_seconds:.2f}",
+                f"{result.total_seconds:.2f}",
+            )
+        console.print(table)
+        return results
+
     def _get_analysis_params(self):
         """獲取分析參數"""
         if sys.stdout.isatty():
@@ -0,0 +1,513 @@
+"""
+BatchMetrics_metricstracker.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 績效分析框架的批量績效指標計算器，把同一個 Parquet 內所有 Backtest_id 的
+交易記錄重排為 (K線數 x 回測數) 的 numpy 矩陣，一次計算全部策略與 BAH 績效指標。
+- 取代 MetricsExporter 逐個 Backtest_id 的 groupby + add_drawdown_bah + MetricsCalculator 流程
+- 指標定義與 MetricsCalculatorMetricTracker 逐項一致（含 _safe_power/_safe_division 的邊界處理、None/NaN 返回值）
+- 同時生成 Drawdown、BAH_Equity、BAH_Return、BAH_Drawdown 每日欄位，輸出表格與逐組 concat 的結果相同
+
+【流程與數據流】
+------------------------------------------------------------
+- MetricsExporter.export 以 supports() 判斷記錄是否可批量計算，可以則使用本模組，否則退回逐組計算
+- 記錄按 Backtest_id 排序（與 groupby 順序一致）後重排為列優先矩陣，每個回測佔一欄
+
+```mermaid
+flowchart TD
+    A[交易記錄 DataFrame] -->|按 Backtest_id 排序| B[K線數 x 回測數 矩陣]
+    B -->|按欄向量化| C[策略指標 / BAH 指標]
+    B -->|Drawdown / BAH 欄位| D[records]
+    C -->|每個回測一筆| E[batch_metadata]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- MetricsCalculatorMetricTracker 新增或修改指標時，需同步更新 calc_strategy_metrics / calc_bah_metrics
+- 指標鍵順序決定 metadata JSON 的欄位順序，需與 MetricsCalculatorMetricTracker 保持一致
+- 只支援每個 Backtest_id K線數相同且含 Close 欄位的記錄，其他情況由 MetricsExporter 退回逐組計算
+
+【常見易錯點】
+------------------------------------------------------------
+- 均值、標準差與 pandas 一樣略過 NaN；Position_size 為 NaN 時與逐組計算相同視為持倉
+- float32 記錄的指標以 float64 計算，與逐組計算的差異在 float32 精度以內
+- 逐組 concat 時全為 NA 的欄位會被移除並影響欄位順序，records() 已按相同規則重排
+
+【範例】
+------------------------------------------------------------
+- if BatchMetricsCalculator.supports(df):
+      calculator = BatchMetricsCalculator(df, time_unit=365, risk_free_rate=0.02)
+      batch_metadata = calculator.batch_metadata()
+      records = calculator.records()
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 MetricsExporter.export 調用
+- 指標定義來自 MetricsCalculator_metricstracker.py
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .DrawdownStats_metricstracker import drawdown_statistics
+from .TradeStats_metricstracker import (
+    extract_trades,
+    longest_holding_run,
+    trade_statistics,
+)
+
+
+def _safe_sqrt(value: float, fallback: float = 0.0) -> float:
+    """安全的平方根運算（與 MetricsCalculatorMetricTracker._safe_sqrt 相同）"""
+    if value < 0 or np.isnan(value) or np.isinf(value):
+        return fallback
+    return float(np.sqrt(value))
+
+
+def _safe_division(
+    numerator: np.ndarray, denominator: np.ndarray, fallback: float = 0.0
+) -> np.ndarray:
+    """按元素的安全除法：分母為 0 或任一值非有限時返回 fallback"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    with np.errstate(all="ignore"):
+        result = numerator / denominator
+    invalid = (
+        (denominator == 0)
+        | ~np.isfinite(denominator)
+        | ~np.isfinite(numerator)
+        | ~np.isfinite(result)
+    )
+    return np.where(invalid, fallback, result)
+
+
+def _safe_power(base: np.ndarray, exponent: float, fallback: float = 0.0) -> np.ndarray:
+    """按元素的安全冪運算，邊界判斷順序與 MetricsCalculatorMetricTracker._safe_power 相同"""
+    base = np.asarray(base, dtype=np.float64)
+    result = np.full(base.shape, fallback)
+    if np.isnan(exponent):
+        return result
+    remaining = np.ones(base.shape, dtype=bool)
+
+    def assign(mask: np.ndarray, value: float) -> None:
+        hit = remaining & mask
+        result[hit] = value
+        remaining[hit] = False
+
+    with np.errstate(all="ignore"):
+        assign((base <= 0) & (exponent <= 0), fallback)
+        assign(base == 0, 0.0 if exponent > 0 else fallback)
+        assign(np.isnan(base), fallback)
+        if np.isinf(exponent):
+            assign(base == 1, 1.0)
+            return result
+        assign((np.abs(base) < 1e-10) & (abs(exponent) > 100), 0.0)
+        assign(np.abs(base - 1) < 1e-10, 1.0)
+
+        # 負數底數（含對數運算的無效值）一律返回 fallback
+        rest = remaining & (base > 0)
+        if abs(exponent) > 1000:
+            log_result = exponent * np.log(base[rest])
+            values = np.where(
+                log_result > 700,
+                fallback,
+                np.where(log_result < -700, 0.0, np.exp(np.clip(log_result, -700, 700))),
+            )
+        else:
+            values = np.power(base[rest], exponent)
+            values[~np.isfinite(values)] = fallback
+    result[rest] = values
+    return result
+
+
+def _column_moments(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """按欄均值與樣本變異數（ddof=1），與 pandas 一樣略過 NaN"""
+    valid = ~np.isnan(values)
+    with np.errstate(all="ignore"):
+        if valid.all():
+            count = np.full(values.shape[1], values.shape[0])
+            mean = values.mean(axis=0)
+            deviation = values - mean
+        else:
+            count = valid.sum(axis=0)
+            mean = np.where(valid, values, 0.0).sum(axis=0) / count
+            deviation = np.where(valid, values - mean, 0.0)
+        variance = np.square(deviation).sum(axis=0) / (count - 1)
+    return mean, np.where(count > 1, variance, np.nan)
+
+
+def _drawdown(equity: np.ndarray) -> np.ndarray:
+    """按欄回撤 (equity - cummax) / cummax，NaN 不參與 cummax（與 pandas cummax 一致）"""
+    roll_max = np.fmax.accumulate(equity, axis=0)
+    return (equity - roll_max) / roll_max
+
+
+class BatchMetricsCalculator:
+    """
+    批量績效指標計算器 - 所有 Backtest_id 的績效指標以 (K線數 x 回測數) 矩陣一次計算
+
+    Attributes:
+        backtest_ids (List[Optional[str]]): 按 groupby 順序排列的 Backtest_id（無該欄位時為 [None]）
+        n_time (int): 每個回測的K線數
+        years (float): 回測年數（K線數 / 年化時間單位）
+    """
+
+    REQUIRED_COLUMNS = ("Equity_value", "Return", "Close")
+
+    def __init__(self, df: pd.DataFrame, time_unit: float, risk_free_rate: float):
+        if not self.supports(df):
+            raise ValueError(
+                "記錄不支援批量計算：需含 Equity_value、Return、Close 欄位且每個 Backtest_id 的K線數相同"
+            )
+        self.time_unit = time_unit
+        self.risk_free_rate = risk_free_rate
+
+        codes, self.backtest_ids = self._group_codes(df)
+        rows = np.flatnonzero(codes >= 0)
+        order = rows[np.argsort(codes[rows], kind="stable")]
+        if len(order) == len(df) and np.array_equal(order, np.arange(len(df))):
+            self._df = df
+        else:
+            self._df = df.take(order)
+        self.n_backtests = len(self.backtest_ids)
+        self.n_time = len(order) // self.n_backtests
+        self.years = self.n_time / self.time_unit
+        if self.years <= 0:
+            self.years = 1.0
+
+        self._matrices: Dict[str, np.ndarray] = {}
+        self._drawdown_stats: Dict[str, Dict[str, np.ndarray]] = {}
+        self._strategy_metrics: Optional[Dict[str, List[Any]]] = None
+        self._bah_metrics: Optional[Dict[str, List[Any]]] = None
+
+    @staticmethod
+    def _group_codes(df: pd.DataFrame) -> Tuple[np.ndarray, List[Any]]:
+        """每列所屬回測的編號（按 Backtest_id 排序，與 groupby 一致；NaN 為 -1）"""
+        if "Backtest_id" not in df.columns:
+            return np.zeros(len(df), dtype=np.intp), [None]
+        codes, uniques = pd.factorize(df["Backtest_id"], sort=True)
+        return codes, list(uniques)
+
+    @classmethod
+    def supports(cls, df: pd.DataFrame) -> bool:
+        """記錄是否可批量計算：必要欄位為數值型且每個 Backtest_id 的K線數相同"""
+        if len(df) == 0:
+            return False
+        for column in cls.REQUIRED_COLUMNS:
+            if column not in df.columns or not pd.api.types.is_numeric_dtype(df[column]):
+                return False
+        codes, uniques = cls._group_codes(df)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        return len(uniques) > 0 and counts[0] > 0 and bool(np.all(counts == counts[0]))
+
+    def _has(self, column: str) -> bool:
+        return column in self._df.columns
+
+    def _matrix(self, column: str, native: bool = False) -> np.ndarray:
+        """欄位重排為 [K線數, 回測數] 列優先矩陣；native=False 時轉為 float64"""
+        key = f"{column}:{native}"
+        if key not in self._matrices:
+            values = self._df[column].to_numpy()
+            if not native:
+                values = values.astype(np.float64, copy=False)
+            self._matrices[key] = values.reshape(
+                (self.n_time, self.n_backtests), order="F"
+            )
+        return self._matrices[key]
+
+    def _bah_equity(self) -> np.ndarray:
+        """BAH_Equity = 初始權益 x Close / 初始價格"""
+        if "BAH_Equity" not in self._matrices:
+            equity = self._matrix("Equity_value", native=True)
+            close = self._matrix("Close", native=True)
+            self._matrices["BAH_Equity"] = equity[0] * (close / close[0])
+        return self._matrices["BAH_Equity"]
+
+    def _bah_return(self) -> np.ndarray:
+        """BAH_Return = BAH_Equity.pct_change().fillna(0)"""
+        if "BAH_Return" not in self._matrices:
+            bah_equity = self._bah_equity()
+            returns = np.zeros_like(bah_equity)
+            with np.errstate(all="ignore"):
+                returns[1:] = bah_equity[1:] / bah_equity[:-1] - 1
+            returns[np.isnan(returns)] = 0
+            self._matrices["BAH_Return"] = returns
+        return self._matrices["BAH_Return"]
+
+    def _source_metrics(
+        self,
+        equity: np.ndarray,
+        returns: np.ndarray,
+        drawdown_stats: Dict[str, np.ndarray],
+    ) -> Dict[str, np.ndarray]:
+        """策略與 BAH 共用的收益/風險指標（對應 MetricsCalculator 的 _calculate_* 方法）"""
+        equity = np.asarray(equity, dtype=np.float64)
+        returns = np.asarray(returns, dtype=np.float64)
+        sqrt_time_unit = _safe_sqrt(self.time_unit)
+        rf = self.risk_free_rate / self.time_unit
+
+        with np.errstate(all="ignore"):
+            total_return = equity[-1] / equity[0] - 1
+        annualized_return = _safe_power(1 + total_return, 1 / self.years) - 1
+        mean, variance = _column_moments(returns)
+        std = np.sqrt(variance)
+
+        # 下行風險：負收益平方的均值開根號，無負收益或非有限值時為 0.0
+        negative = returns < 0
+        with np.errstate(all="ignore"):
+            downside = np.sqrt(
+                np.where(negative, np.square(returns), 0.0).sum(axis=0)
+                / negative.sum(axis=0)
+            )
+        downside[~np.isfinite(downside)] = 0.0
+
+        max_drawdown = drawdown_stats["max_drawdown"]
+        abs_drawdown = np.abs(max_drawdown)
+        recovery = np.where(
+            abs_drawdown == 0, np.nan, _safe_division(total_return, abs_drawdown)
+        )
+        sharpe = np.where(
+            std == 0, np.nan, _safe_division(mean - rf, std) * sqrt_time_unit
+        )
+        sortino = np.where(
+            downside == 0, np.nan, _safe_division(mean - rf, downside) * sqrt_time_unit
+        )
+        calmar = np.where(
+            abs_drawdown == 0,
+            np.nan,
+            _safe_division(annualized_return - self.risk_free_rate, abs_drawdown),
+        )
+        return {
+            "total_return": total_return,
+            "annualized_return": annualized_return,
+            "mean": mean,
+            "std": std,
+            "annualized_std": std * sqrt_time_unit,
+            "downside": downside,
+            "annualized_downside": downside * sqrt_time_unit,
+            "max_drawdown": max_drawdown,
+            "recovery": recovery,
+            "sharpe": sharpe,
+            "sortino": sortino,
+            "calmar": calmar,
+        }
+
+    def drawdown(self) -> np.ndarray:
+        """策略回撤矩陣（保留 Equity_value 的 dtype）"""
+        if "Drawdown" not in self._matrices:
+            self._matrices["Drawdown"] = _drawdown(self._matrix("Equity_value", native=True))
+        return self._matrices["Drawdown"]
+
+    def bah_drawdown(self) -> np.ndarray:
+        if "BAH_Drawdown" not in self._matrices:
+            self._matrices["BAH_Drawdown"] = _drawdown(self._bah_equity())
+        return self._matrices["BAH_Drawdown"]
+
+    def drawdown_stats(self, source_type: str = "strategy") -> Dict[str, np.ndarray]:
+        """每個回測的回撤統計（DrawdownStats 內核單次掃描，策略與 BAH 各計算一次）"""
+        key = "bah" if source_type == "bah" else "strategy"
+        if key not in self._drawdown_stats:
+            drawdown = self.bah_drawdown() if key == "bah" else self.drawdown()
+            self._drawdown_stats[key] = drawdown_statistics(drawdown)
+        return self._drawdown_stats[key]
+
+    def _trade_metrics(self) -> Dict[str, List[Any]]:
+        """交易效率指標；缺少所需欄位時與逐組計算相同返回 None"""
+        n_time, n_backtests = self.n_time, self.n_backtests
+        none = [None] * n_backtests
+        metrics: Dict[str, List[Any]] = {}
+
+        has_action = self._has("Trade_action")
+        has_trade_return = self._has("Trade_return")
+        if has_action or has_trade_return:
+            trade_returns = self._matrix("Trade_return") if has_trade_return else None
+            if has_action:
+                actions = self._matrix("Trade_action")
+            else:
+                # 與逐組計算相同：缺少 Trade_action 時把非 NaN 的 Trade_return 視為平倉
+                actions = np.where(np.isnan(trade_returns), 0.0, 4.0)
+            stats = trade_statistics(
+                extract_trades(actions, trade_returns, self._matrix("Equity_value")),
+                n_backtests,
+            )
+
+        if has_action:
+            metrics["Trade_count"] = [int(v) for v in stats["trade_count"]]
+        else:
+            metrics["Trade_count"] = none
+
+        if has_action and has_trade_return:
+            metrics["Win_rate"] = [
+                float(w / c) if c else None
+                for w, c in zip(stats["win_count"], stats["closed_count"])
+            ]
+        else:
+            metrics["Win_rate"] = none
+
+        if has_trade_return:
+            losses = stats["loss_sum"]
+            profit_factor = _safe_division(stats["profit_sum"], np.abs(losses))
+            metrics["Profit_factor"] = [
+                None if loss == 0 else float(value)
+                for value, loss in zip(profit_factor, losses)
+            ]
+            metrics["Avg_trade_return"] = stats["return_mean"].tolist()
+            metrics["Max_consecutive_losses"] = stats["max_consecutive_losses"].tolist()
+        else:
+            metrics["Profit_factor"] = none
+            metrics["Avg_trade_return"] = none
+            metrics["Max_consecutive_losses"] = none
+
+        if self._has("Position_size"):
+            # NaN != 0 為 True，與逐組計算相同視為持倉
+            holding = self._matrix("Position_size") != 0
+            metrics["Exposure_time"] = (holding.sum(axis=0) / n_time * 100).tolist()
+        else:
+            metrics["Exposure_time"] = none
+        if self._has("Position_size"):
+            max_holding = (
+                stats["max_holding"]
+                if has_action
+                else longest_holding_run(self._matrix("Position_size"))
+            )
+            metrics["Max_holding_period_ratio"] = (max_holding / n_time).tolist()
+        else:
+            metrics["Max_holding_period_ratio"] = none
+        return metrics
+
+    def _relative_metrics(
+        self, strategy: Dict[str, np.ndarray]
+    ) -> Dict[str, List[Any]]:
+        """Information_ratio、Alpha、Beta（策略相對 BAH）"""
+        returns = self._matrix("Return")
+        bah_returns = self._bah_return()
+        rf = self.risk_free_rate / self.time_unit
+
+        excess_mean, excess_variance = _column_moments(returns - bah_returns)
+        with np.errstate(all="ignore"):
+            tracking_error = np.sqrt(excess_variance)
+            information_ratio = excess_mean / tracking_error
+            # np.cov 不略過 NaN，np.var(Series) 則與 pandas 一樣略過 NaN
+            covariance = (
+                (returns - returns.mean(axis=0)) * (bah_returns - bah_returns.mean(axis=0))
+            ).sum(axis=0) / (self.n_time - 1)
+            bah_mean, bah_variance = _column_moments(bah_returns)
+            beta = covariance / bah_variance
+            alpha = strategy["mean"] - (rf + beta * (bah_mean - rf))
+
+        return {
+            "Information_ratio": [
+                None if te == 0 else float(ir)
+                for ir, te in zip(information_ratio, tracking_error)
+            ],
+            "Alpha": [
+                None if var == 0 else float(a) for a, var in zip(alpha, bah_variance)
+            ],
+            "Beta": [
+                None if var == 0 else float(b) for b, var in zip(beta, bah_variance)
+            ],
+        }
+
+    def calc_strategy_metrics(self) -> Dict[str, List[Any]]:
+        """所有回測的策略指標，鍵順序與 MetricsCalculatorMetricTracker.calc_strategy_metrics 相同"""
+        if self._strategy_metrics is None:
+            drawdown_stats = self.drawdown_stats()
+            strategy = self._source_metrics(
+                self._matrix("Equity_value"), self._matrix("Return"), drawdown_stats
+            )
+            relative = self._relative_metrics(strategy)
+            trades = self._trade_metrics()
+            self._strategy_metrics = {
+                "Total_return": strategy["total_return"].tolist(),
+                "Annualized_return (CAGR)": strategy["annualized_return"].tolist(),
+                "Std": strategy["std"].tolist(),
+                "Annualized_std": strategy["annualized_std"].tolist(),
+                "Downside_risk": strategy["downside"].tolist(),
+                "Annualized_downside_risk": strategy["annualized_downside"].tolist(),
+                "Max_drawdown": strategy["max_drawdown"].tolist(),
+                "Average_drawdown": drawdown_stats["average_drawdown"].tolist(),
+                "Recovery_factor": strategy["recovery"].tolist(),
+                "Sharpe": strategy["sharpe"].tolist(),
+                "Sortino": strategy["sortino"].tolist(),
+                "Calmar": strategy["calmar"].tolist(),
+                **relative,
+                **trades,
+            }
+        return self._strategy_metrics
+
+    def calc_bah_metrics(self) -> Dict[str, List[Any]]:
+        """所有回測的 BAH 指標，鍵順序與 MetricsCalculatorMetricTracker.calc_bah_metrics 相同"""
+        if self._bah_metrics is None:
+            bah_stats = self.drawdown_stats("bah")
+            bah = self._source_metrics(self._bah_equity(), self._bah_return(), bah_stats)
+            self._bah_metrics = {
+                "BAH_Total_return": bah["total_return"].tolist(),
+                "BAH_Annualized_return (CAGR)": bah["annualized_return"].tolist(),
+                "BAH_Std": bah["std"].tolist(),
+                "BAH_Annualized_std": bah["annualized_std"].tolist(),
+                "BAH_Downside_risk": bah["downside"].tolist(),
+                "BAH_Annualized_downside_risk": bah["annualized_downside"].tolist(),
+                "BAH_Max_drawdown": bah["max_drawdown"].tolist(),
+                # BAH 平均回撤為所有負回撤值的平均（非按回撤區段）
+                "BAH_Average_drawdown": bah_stats["mean_negative_drawdown"].tolist(),
+                "BAH_Recovery_factor": bah["recovery"].tolist(),
+                "BAH_Sharpe": bah["sharpe"].tolist(),
+                "BAH_Sortino": bah["sortino"].tolist(),
+                "BAH_Calmar": bah["calmar"].tolist(),
+            }
+        return self._bah_metrics
+
+    def batch_metadata(self) -> List[Dict[str, Any]]:
+        """每個回測一筆績效 metadata（Backtest_id + 策略指標 + BAH 指標）"""
+        metrics = {**self.calc_strategy_metrics(), **self.calc_bah_metrics()}
+        batch_metadata = []
+        for j, backtest_id in enumerate(self.backtest_ids):
+            meta = {"Backtest_id": backtest_id} if backtest_id is not None else {}
+            for key, values in metrics.items():
+                meta[key] = values[j]
+            batch_metadata.append(meta)
+        return batch_metadata
+
+    def records(self) -> pd.DataFrame:
+        """
+        含 Drawdown / BAH 每日欄位的交易記錄，與逐組 add_drawdown_bah 後
+        移除全 NA 欄位再 concat 的結果相同（列順序、欄位順序與 dtype）
+        """
+        frame = self._df.reset_index(drop=True)
+        frame["Drawdown"] = self.drawdown().ravel(order="F")
+        frame["BAH_Equity"] = self._bah_equity().ravel(order="F")
+        frame["BAH_Return"] = self._bah_return().ravel(order="F")
+        frame["BAH_Drawdown"] = self.bah_drawdown().ravel(order="F")
+
+        # 每個欄位在哪些回測中不全為 NA
+        present = {
+            column: frame[column]
+            .notna()
+            .to_numpy()
+            .reshape((self.n_time, self.n_backtests), order="F")
+            .any(axis=0)
+            for column in frame.columns
+        }
+        # 逐組 concat 時欄位按首次出現的回測排列
+        columns = sorted(
+            (column for column in frame.columns if present[column].any()),
+            key=lambda column: int(np.argmax(present[column])),
+        )
+        frame = frame[columns]
+        for column in columns:
+            if not present[column].all():
+                # 部分回測缺少此欄位時，concat 以 NA 補齊，可能改變 dtype 與 NA 表示（如 None -> NaN）
+                first_valid = frame[column].first_valid_index()
+                filled = pd.concat(
+                    [frame.loc[[first_valid], [column]], pd.DataFrame({"_": [0]})],
+                    ignore_index=True,
+                    sort=False,
+                )[column]
+                if filled.dtype != frame[column].dtype:
+                    frame[column] = frame[column].astype(filled.dtype)
+                missing = np.repeat(~present[column], self.n_time)
+                frame.loc[missing, column] = filled.iloc[-1]
+        return frame
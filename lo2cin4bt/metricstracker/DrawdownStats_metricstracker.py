@@ -0,0 +1,144 @@
+"""
+DrawdownStats_metricstracker.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 績效分析框架的回撤統計核心，以 numba 內核單次掃描回撤序列，同時得到：
+- 最大回撤（max_drawdown）
+- 平均回撤（average_drawdown，各段回撤谷底的平均）
+- 負回撤值平均（mean_negative_drawdown，BAH 平均回撤的定義）
+- 最長回撤持續K線數（longest_duration）
+- 最深谷底到回復的K線數（time_to_recover）
+- 回撤段數（episode_count）
+MetricsCalculatorMetricTracker 與 BatchMetricsCalculator 共用本模組結果，不再各自重算 cummax/回撤
+
+【流程與數據流】
+------------------------------------------------------------
+- 輸入為 MetricsExporter.add_drawdown_bah 已生成的 Drawdown / BAH_Drawdown（單一序列或 K線數 x 回測數 矩陣）
+- 內核逐欄掃描一次，輸出每欄的 DRAWDOWN_STATS 統計
+
+```mermaid
+flowchart TD
+    A[Drawdown / BAH_Drawdown] -->|drawdown_statistics| B[_drawdown_stats_njit]
+    B -->|每欄一列| C[回撤統計]
+    C --> D[MetricsCalculator]
+    C --> E[BatchMetricsCalculator]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 新增統計量時，需同步更新 DRAWDOWN_STATS 與內核輸出欄位順序
+- 回撤區段定義（連續 drawdown < 0，非負值或 NaN 結束區段）需與舊版 average_drawdown 保持一致
+
+【常見易錯點】
+------------------------------------------------------------
+- NaN 不參與最大回撤，但會結束當前回撤區段
+- 無回撤時 average_drawdown / mean_negative_drawdown / time_to_recover 為 0.0；最深谷底之後未回到高點時 time_to_recover 為 NaN
+- 整欄為 NaN 時 max_drawdown 為 NaN（與 pandas min 相同）
+
+【範例】
+------------------------------------------------------------
+- stats = drawdown_statistics(df["Drawdown"].to_numpy())
+  max_dd = stats["max_drawdown"][0]
+- stats = drawdown_statistics(drawdown_matrix)  # 每個回測一欄
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 MetricsCalculator_metricstracker.py、BatchMetrics_metricstracker.py 調用
+- 回撤序列由 MetricsExporter.add_drawdown_bah 生成
+"""
+
+from typing import Dict
+
+import numpy as np
+from numba import njit
+
+DRAWDOWN_STATS = (
+    "max_drawdown",
+    "average_drawdown",
+    "mean_negative_drawdown",
+    "longest_duration",
+    "time_to_recover",
+    "episode_count",
+)
+
+
+@njit(cache=True)
+def _drawdown_stats_njit(drawdown, out):
+    """逐欄單次掃描回撤序列，結果寫入 out[欄, DRAWDOWN_STATS]"""
+    n_time, n_columns = drawdown.shape
+    for col in range(n_columns):
+        max_drawdown = np.nan
+        trough_sum = 0.0
+        episodes = 0
+        negative_sum = 0.0
+        negative_count = 0
+        longest = 0
+        in_drawdown = False
+        trough = 0.0
+        length = 0
+        deepest = 0.0
+        deepest_index = -1
+        recover = 0.0
+        for t in range(n_time):
+            value = drawdown[t, col]
+            if value != value:
+                # NaN 結束回撤區段，但不代表已回到高點
+                if in_drawdown:
+                    trough_sum += trough
+                    episodes += 1
+                    in_drawdown = False
+                continue
+            if max_drawdown != max_drawdown or value < max_drawdown:
+                max_drawdown = value
+            if value < 0:
+                negative_sum += value
+                negative_count += 1
+                if not in_drawdown:
+                    in_drawdown = True
+                    trough = value
+                    length = 0
+                elif value < trough:
+                    trough = value
+                length += 1
+                if length > longest:
+                    longest = length
+                if value < deepest:
+                    deepest = value
+                    deepest_index = t
+                    recover = np.nan
+            else:
+                if in_drawdown:
+                    trough_sum += trough
+                    episodes += 1
+                    in_drawdown = False
+                if deepest_index >= 0 and recover != recover:
+                    recover = t - deepest_index
+        if in_drawdown:
+            trough_sum += trough
+            episodes += 1
+        out[col, 0] = max_drawdown
+        out[col, 1] = trough_sum / episodes if episodes > 0 else 0.0
+        out[col, 2] = negative_sum / negative_count if negative_count > 0 else 0.0
+        out[col, 3] = longest
+        out[col, 4] = recover
+        out[col, 5] = episodes
+
+
+def drawdown_statistics(drawdown: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    計算回撤統計
+
+    Args:
+        drawdown: 回撤序列（一維）或 K線數 x 回測數 矩陣（每欄一個回測）
+
+    Returns:
+        Dict[str, np.ndarray]: DRAWDOWN_STATS 中每個統計量對應一個長度為欄數的陣列
+    """
+    values = np.asarray(drawdown, dtype=np.float64)
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    values = np.asfortranarray(values)
+    out = np.empty((values.shape[1], len(DRAWDOWN_STATS)))
+    _drawdown_stats_njit(values, out)
+    return {name: out[:, i] for i, name in enumerate(DRAWDOWN_STATS)}
@@ -30,6 +30,7 @@ flowchart TD
 ------------------------------------------------------------
 - 績效指標計算邏輯錯誤會導致結果不準確
 - 數據結構變動會影響計算結果
+- 計算器不再複製傳入的 DataFrame 且會快取中間量，建立後請勿修改該 DataFrame
 - 績效指標定義不一致會影響比較分析
 
 【錯誤處理】
@@ -53,6 +54,9 @@ flowchart TD
 - v1.0: 初始版本，支援基本績效指標
 - v1.1: 新增風險調整指標
 - v1.2: 新增多維度績效分析
+- v1.3: 最大回撤、平均回撤、恢復因子改用 DrawdownStats 單次掃描內核，並重用 Drawdown/BAH_Drawdown 欄位
+- v1.4: 新增惰性中間量快取（mean/std/下行標準差/cummax/交易回報陣列），初始化不再複製 DataFrame
+- v1.5: 交易效率指標改由 TradeStats 交易表向量化計算，最長持倉改按每筆交易的持倉K線數（缺少 Trade_action 時按最長連續持倉段）
 
 【參考】
 ------------------------------------------------------------
@@ -63,10 +67,18 @@ flowchart TD
 import numpy as np
 import pandas as pd
 
+from .DrawdownStats_metricstracker import drawdown_statistics
+from .TradeStats_metricstracker import (
+    extract_trades,
+    longest_holding_run,
+    trade_statistics,
+)
+
 
 class MetricsCalculatorMetricTracker:
     def __init__(self, df, time_unit, risk_free_rate):
-        self.df = df.copy()
+        # 只讀取 df，不複製；中間量快取依賴 df 在計算期間不被修改
+        self.df = df
         self.time_unit = time_unit
         self.risk_free_rate = risk_free_rate
         self.daily_returns = self.df["Return"]  # Return 已是小數
@@ -76,22 +88,91 @@ class MetricsCalculatorMetricTracker:
         self.years = total_periods / self.time_unit
         if self.years <= 0:
             self.years = 1.0
+        self._sources = {}
+        self._moments = {}
+        self._drawdown_stats = {}
         ##print(f"[Metrics] 自動偵測回測年數: {self.years:.3f} 年 (總週期: {total_periods}, 年化單位: {self.time_unit})")
 
     def _get_data_source(self, source_type="strategy"):
         """獲取數據源（策略或BAH）"""
-        if source_type == "bah":
-            return {
-                "equity": self.df.get("BAH_Equity", self.df["Equity_value"]),
-                "returns": self.df.get("BAH_Return", self.df["Return"]),
-                "drawdown": self.df.get("BAH_Drawdown", None),
-            }
+        if source_type not in self._sources:
+            if source_type == "bah":
+                self._sources[source_type] = {
+                    "equity": self.df.get("BAH_Equity", self.df["Equity_value"]),
+                    "returns": self.df.get("BAH_Return", self.df["Return"]),
+                    "drawdown": self.df.get("BAH_Drawdown", None),
+                }
+            else:
+                self._sources[source_type] = {
+                    "equity": self.df["Equity_value"],
+                    "returns": self.df["Return"],
+                    "drawdown": self.df.get("Drawdown", None),
+                }
+        return self._sources[source_type]
+
+    def _moment(self, source_type, name):
+        """
+        惰性計算並快取中間量，每個 source_type 只計算一次
+
+        name: "mean"（收益均值）、"std"（樣本標準差）、"downside"（target=0 的下行標準差）、
+              "cummax"（淨值歷史高點）、"trades"（交易表，Trade_action 與 Trade_return 皆缺少時為 None）
+        """
+        key = (source_type, name)
+        if key not in self._moments:
+            data = self._get_data_source(source_type)
+            if name == "mean":
+                value = data["returns"].mean()
+            elif name == "std":
+                value = data["returns"].std(ddof=1)
+            elif name == "downside":
+                value = self._downside_deviation(data["returns"], 0)
+            elif name == "cummax":
+                value = data["equity"].cummax()
+            elif name == "trades":
+                value = self._extract_trades()
+            else:
+                raise KeyError(f"未知的中間量: {name}")
+            self._moments[key] = value
+        return self._moments[key]
+
+    def _extract_trades(self):
+        """
+        由 Trade_action/Trade_return/Equity_value 生成交易表
+        缺少 Trade_action 時把非 NaN 的 Trade_return 視為平倉，與舊版只依 Trade_return 計算的指標一致
+        """
+        has_action = "Trade_action" in self.df.columns
+        has_return = "Trade_return" in self.df.columns
+        if not has_action and not has_return:
+            return None
+        trade_return = None
+        if has_return:
+            trade_return = self.df["Trade_return"].to_numpy(dtype=np.float64)
+        if has_action:
+            actions = self.df["Trade_action"].to_numpy(dtype=np.float64)
         else:
-            return {
-                "equity": self.df["Equity_value"],
-                "returns": self.df["Return"],
-                "drawdown": None,
-            }
+            actions = np.where(np.isnan(trade_return), 0.0, 4.0)
+        return extract_trades(actions, trade_return, self.df["Equity_value"].to_numpy())
+
+    def trade_stats(self):
+        """交易統計（開倉/平倉次數、勝場、盈虧總和、平均收益、連續虧損、最長持倉），由交易表計算一次"""
+        key = ("strategy", "trade_stats")
+        if key not in self._moments:
+            trades = self._moment("strategy", "trades")
+            self._moments[key] = (
+                None
+                if trades is None
+                else {
+                    name: values[0]
+                    for name, values in trade_statistics(trades, 1).items()
+                }
+            )
+        return self._moments[key]
+
+    def _downside_deviation(self, returns, target):
+        downside = returns[returns < target]
+        if len(downside) == 0:
+            return 0.0
+        return self._safe_sqrt(np.mean((downside - target) ** 2))
 
     def _calculate_total_return(self, source_type="strategy"):
         """總回報率計算"""
@@ -112,9 +193,7 @@ class MetricsCalculatorMetricTracker:
 
     def _calculate_std(self, source_type="strategy"):
         """標準差計算"""
-        data = self._get_data_source(source_type)
-        returns = data["returns"]
-        return np.std(returns, ddof=1)
+        return self._moment(source_type, "std")
 
     def _calculate_annualized_std(self, source_type="strategy"):
         """年化標準差計算"""
@@ -123,28 +202,38 @@ class MetricsCalculatorMetricTracker:
 
     def _calculate_downside_risk(self, source_type="strategy", target=0):
         """下行風險計算"""
+        if target == 0:
+            return self._moment(source_type, "downside")
         data = self._get_data_source(source_type)
-        returns = data["returns"]
-        downside = returns[returns < target]
-        if len(downside) == 0:
-            return 0.0
-        return self._safe_sqrt(np.mean((downside - target) ** 2))
+        return self._downside_deviation(data["returns"], target)
 
     def _calculate_annualized_downside_risk(self, source_type="strategy", target=0):
         """年化下行風險計算"""
         downside = self._calculate_downside_risk(source_type, target)
         return downside * self._safe_sqrt(self.time_unit)
 
+    def drawdown_stats(self, source_type="strategy"):
+        """
+        回撤統計（最大回撤、平均回撤、最長持續期、回復時間、回撤段數）
+
+        優先重用 add_drawdown_bah 生成的 Drawdown/BAH_Drawdown 欄位，
+        每個 source_type 只掃描一次，結果由所有回撤相關指標共用
+        """
+        if source_type not in self._drawdown_stats:
+            data = self._get_data_source(source_type)
+            drawdown = data["drawdown"]
+            if drawdown is None:
+                roll_max = self._moment(source_type, "cummax")
+                drawdown = (data["equity"] - roll_max) / roll_max
+            stats = drawdown_statistics(drawdown.to_numpy(dtype=np.float64))
+            self._drawdown_stats[source_type] = {
+                name: values[0] for name, values in stats.items()
+            }
+        return self._drawdown_stats[source_type]
+
     def _calculate_max_drawdown(self, source_type="strategy"):
         """最大回撤計算"""
-        data = self._get_data_source(source_type)
-        if source_type == "bah" and data["drawdown"] is not None:
-            return data["drawdown"].min()
-
-        equity = data["equity"]
-        roll_max = equity.cummax()
-        drawdown = (equity - roll_max) / roll_max
-        return drawdown.min()
+        return self.drawdown_stats(source_type)["max_drawdown"]
 
     def _calculate_recovery_factor(self, source_type="strategy"):
         """恢復因子計算"""
@@ -156,10 +245,8 @@ class MetricsCalculatorMetricTracker:
 
     def _calculate_sharpe(self, source_type="strategy"):
         """夏普比率計算"""
-        data = self._get_data_source(source_type)
-        returns = data["returns"]
-        mean = returns.mean()
-        std = returns.std(ddof=1)
+        mean = self._moment(source_type, "mean")
+        std = self._moment(source_type, "std")
         rf = self.risk_free_rate / self.time_unit
         if std == 0:
             return np.nan
@@ -167,10 +254,8 @@ class MetricsCalculatorMetricTracker:
 
     def _calculate_sortino(self, source_type="strategy"):
         """索提諾比率計算"""
-        data = self._get_data_source(source_type)
-        returns = data["returns"]
-        mean = returns.mean()
-        downside = self._calculate_downside_risk(source_type)
+        mean = self._moment(source_type, "mean")
+        downside = self._moment(source_type, "downside")
         rf = self.risk_free_rate / self.time_unit
         if downside == 0:
             return np.nan
@@ -220,33 +305,8 @@ class MetricsCalculatorMetricTracker:
         return self._calculate_max_drawdown("strategy")
 
     def average_drawdown(self):
-        # 平均回撤（小數值）
-        equity = self.df["Equity_value"]
-        roll_max = equity.cummax()
-        drawdown = (equity - roll_max) / roll_max
-        dd = drawdown[drawdown < 0]
-        if len(dd) == 0:
-            return 0.0
-        # 分段計算每次回撤
-        in_drawdown = False
-        dds = []
-        cur_dd = 0
-        for val in drawdown:
-            if val < 0:
-                if not in_drawdown:
-                    in_drawdown = True
-                    cur_dd = val
-                else:
-                    cur_dd = min(cur_dd, val)
-            else:
-                if in_drawdown:
-                    dds.append(cur_dd)
-                    in_drawdown = False
-        if in_drawdown:
-            dds.append(cur_dd)
-        if len(dds) == 0:
-            return 0.0
-        return np.mean(dds)
+        # 平均回撤（小數值）：各段回撤（連續 drawdown < 0）谷底的平均
+        return self.drawdown_stats("strategy")["average_drawdown"]
 
     def recovery_factor(self):
         # 恢復因子 = 總回報率 / abs(最大回撤)
@@ -287,24 +347,11 @@ class MetricsCalculatorMetricTracker:
         return self._calculate_annualized_downside_risk("bah", target)
 
     def bah_max_drawdown(self):
-        if "BAH_Drawdown" in self.df.columns:
-            return self.df["BAH_Drawdown"].min()
-        bah_equity = self.df["BAH_Equity"]
-        roll_max = bah_equity.cummax()
-        drawdown = (bah_equity - roll_max) / roll_max
-        return drawdown.min()
+        return self._calculate_max_drawdown("bah")
 
     def bah_average_drawdown(self):
-        if "BAH_Drawdown" in self.df.columns:
-            dd = self.df["BAH_Drawdown"][self.df["BAH_Drawdown"] < 0]
-        else:
-            bah_equity = self.df["BAH_Equity"]
-            roll_max = bah_equity.cummax()
-            dd = (bah_equity - roll_max) / roll_max
-            dd = dd[dd < 0]
-        if len(dd) == 0:
-            return 0.0
-        return dd.mean()
+        # BAH 平均回撤為所有負回撤值的平均（非按回撤區段）
+        return self.drawdown_stats("bah")["mean_negative_drawdown"]
 
     def bah_recovery_factor(self):
         return self._calculate_recovery_factor("bah")
@@ -349,13 +396,14 @@ class MetricsCalculatorMetricTracker:
         """Beta：衡量策略與市場（B&H）的相關性和系統性風險敞口"""
         if "Return" not in self.df.columns or "BAH_Return" not in self.df.columns:
             return None
-        x = self.df["Return"]
-        y = self.df["BAH_Return"]
-        cov = np.cov(x, y, ddof=1)[0, 1]
-        var = np.var(y, ddof=1)
-        if var == 0:
-            return None
-        return cov / var
+        key = ("relative", "beta")
+        if key not in self._moments:
+            x = self.df["Return"]
+            y = self.df["BAH_Return"]
+            cov = np.cov(x, y, ddof=1)[0, 1]
+            var = np.var(y, ddof=1)
+            self._moments[key] = None if var == 0 else cov / var
+        return self._moments[key]
 
     def alpha(self):
         """Alpha：策略相對市場的超額回報，基於CAPM模型"""
@@ -367,17 +415,17 @@ class MetricsCalculatorMetricTracker:
             else 0
         )
         beta = self.beta()
-        mean_return = self.df["Return"].mean()
-        mean_bah = self.df["BAH_Return"].mean()
         if beta is None:
             return None
+        mean_return = self._moment("strategy", "mean")
+        mean_bah = self._moment("bah", "mean")
         return mean_return - (rf + beta * (mean_bah - rf))
 
     def trade_count(self):
         """交易次數 (Trade_count)：只計算開倉次數 (Trade_action == 1)"""
         if "Trade_action" not in self.df.columns:
             return None
-        return int((self.df["Trade_action"] == 1).sum())
+        return int(self.trade_stats()["trade_count"])
 
     def win_rate(self):
         """勝率 (Win_rate)：盈利交易佔總平倉交易的比例"""
@@ -386,27 +434,25 @@ class MetricsCalculatorMetricTracker:
             or "Trade_return" not in self.df.columns
         ):
             return None
-        closed = self.df[self.df["Trade_action"] == 4]
-        if len(closed) == 0:
+        stats = self.trade_stats()
+        if stats["closed_count"] == 0:
             return None
-        wins = (closed["Trade_return"] > 0).sum()
-        return wins / len(closed)
+        return stats["win_count"] / stats["closed_count"]
 
     def profit_factor(self):
         """盈虧比 (Profit_factor)：總盈利除以總虧損"""
         if "Trade_return" not in self.df.columns:
             return None
-        profits = self.df["Trade_return"][self.df["Trade_return"] > 0].sum()
-        losses = self.df["Trade_return"][self.df["Trade_return"] < 0].sum()
-        if losses == 0:
+        stats = self.trade_stats()
+        if stats["loss_sum"] == 0:
             return None
-        return self._safe_division(profits, abs(losses))
+        return self._safe_division(stats["profit_sum"], abs(stats["loss_sum"]))
 
     def avg_trade_return(self):
         """平均交易回報 (Avg_trade_return)：每筆交易的平均收益"""
         if "Trade_return" not in self.df.columns:
             return None
-        return self.df["Trade_return"].mean()
+        return self.trade_stats()["return_mean"]
 
     # expectancy 方法與相關調用已刪除
 
@@ -414,15 +460,7 @@ class MetricsCalculatorMetricTracker:
         """最大連續虧損 (Max_consecutive_losses)：連續虧損交易的最大次數"""
         if "Trade_return" not in self.df.columns:
             return None
-        trade_returns = self.df["Trade_return"].dropna()
-        max_count = count = 0
-        for r in trade_returns:
-            if r < 0:
-                count += 1
-                max_count = max(max_count, count)
-            else:
-                count = 0
-        return max_count
+        return int(self.trade_stats()["max_consecutive_losses"])
 
     def exposure_time(self):
         """持倉時間比例 (Exposure_time)：持倉時間佔總時間的比例"""
@@ -433,19 +471,17 @@ class MetricsCalculatorMetricTracker:
         )
 
     def max_holding_period_ratio(self):
-        """最長持倉時間比例 (Max_holding_period_ratio)：單次持倉時間的最長持續時間佔總回測時間的比例"""
+        """最長持倉時間比例 (Max_holding_period_ratio)：單筆交易的最長持倉K線數佔總回測時間的比例"""
         if "Position_size" not in self.df.columns:
             return None
-        max_period = period = 0
-        for p in self.df["Position_size"]:
-            if p != 0:
-                period += 1
-                max_period = max(max_period, period)
-            else:
-                period = 0
-        if len(self.df["Position_size"]) == 0:
+        if len(self.df) == 0:
             return None
-        return max_period / len(self.df["Position_size"])
+        if "Trade_action" in self.df.columns:
+            max_holding = self.trade_stats()["max_holding"]
+        else:
+            # 無法劃分交易時，以非零 Position_size 的最長連續K線數計算
+            max_holding = longest_holding_run(self.df["Position_size"].to_numpy())[0]
+        return max_holding / len(self.df)
 
     def calc_strategy_metrics(self):
         return {
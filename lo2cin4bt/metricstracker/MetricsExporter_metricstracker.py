@@ -8,6 +8,8 @@ MetricsExporter_metricstracker.py
 【流程與數據流】
 ------------------------------------------------------------
 - 由 BaseMetricTracker 調用，導出績效分析結果
+- 所有 Backtest_id K線數相同時以 BatchMetricsCalculator 一次計算全部指標與每日欄位，
+  否則逐個 Backtest_id 以 MetricsCalculatorMetricTracker 計算
 - 導出結果供用戶或下游模組分析
 
 ```mermaid
@@ -27,6 +29,7 @@ flowchart TD
 - 導出格式錯誤或欄位缺失會導致導出失敗
 - 檔案權限不足會導致寫入失敗
 - 數據結構變動會影響下游分析
+- 增量回測的來源為 part 檔資料夾，metadata 需經 read_source_metadata 讀取 _common_metadata
 
 【範例】
 ------------------------------------------------------------
@@ -41,7 +44,7 @@ flowchart TD
 【參考】
 ------------------------------------------------------------
 - pandas 官方文件
-- Base_metricstracker.py、MetricsCalculator_metricstracker.py
+- Base_metricstracker.py、MetricsCalculator_metricstracker.py、BatchMetrics_metricstracker.py
 - 專案 README
 """
 
@@ -54,6 +57,7 @@ import pyarrow.parquet as pq
 from rich.console import Console
 from rich.panel import Panel
 
+from .BatchMetrics_metricstracker import BatchMetricsCalculator
 from .MetricsCalculator_metricstracker import MetricsCalculatorMetricTracker
 
 console = Console()
@@ -76,12 +80,72 @@ class MetricsExporter:
             df["BAH_Drawdown"] = (df["BAH_Equity"] - bah_roll_max) / bah_roll_max
         return df
 
+    @staticmethod
+    def _per_backtest_metrics(df, time_unit, risk_free_rate):
+        """逐個 Backtest_id 計算績效指標（批量計算不適用時的備用方案）"""
+        grouped = (
+            df.groupby("Backtest_id") if "Backtest_id" in df.columns else [(None, df)]
+        )
+        batch_metadata = []
+        all_df = []
+        for Backtest_id, group in grouped:
+            group = MetricsExporter.add_drawdown_bah(group)
+            all_df.append(group)
+            calc = MetricsCalculatorMetricTracker(group, time_unit, risk_free_rate)
+            strategy_metrics = calc.calc_strategy_metrics()
+            bah_metrics = calc.calc_bah_metrics()
+            meta = {"Backtest_id": Backtest_id} if Backtest_id is not None else {}
+            for k in strategy_metrics:
+                meta[k] = strategy_metrics[k]
+            for k in bah_metrics:
+                meta[k] = bah_metrics[k]
+            batch_metadata.append(meta)
+
+        # 過濾空的 DataFrame 以避免 FutureWarning
+        filtered_df = []
+        for df_item in all_df:
+            if not df_item.empty and len(df_item.columns) > 0:
+                # 清理 DataFrame：移除全為 NA 的列
+                cleaned_df = df_item.dropna(axis=1, how="all")
+                if not cleaned_df.empty:
+                    filtered_df.append(cleaned_df)
+
+        if filtered_df:
+            # 使用更安全的 concat 方式
+            try:
+                df = pd.concat(filtered_df, ignore_index=True, sort=False)
+            except Exception:
+                # 如果 concat 失敗，嘗試逐個合併
+                df = filtered_df[0]
+                for df_item in filtered_df[1:]:
+                    df = pd.concat([df, df_item], ignore_index=True, sort=False)
+        else:
+            df = pd.DataFrame()
+        return batch_metadata, df
+
+    @staticmethod
+    def read_source_metadata(orig_parquet_path):
+        """
+        讀取回測 Parquet 的 schema metadata（只讀 footer，不讀數據）
+
+        增量回測追加後輸出為資料夾，最新 metadata 位於 _common_metadata；
+        part 檔保留的是首次導出時的 metadata
+        """
+        path = orig_parquet_path
+        if os.path.isdir(path):
+            common_metadata = os.path.join(path, "_common_metadata")
+            path = (
+                common_metadata
+                if os.path.exists(common_metadata)
+                else pq.ParquetDataset(path).files[0]
+            )
+        return pq.read_schema(path).metadata or {}
+
     @staticmethod
     def export(df, orig_parquet_path, time_unit, risk_free_rate):
         # 嘗試讀取原始 parquet 檔案
         try:
-            orig_table = pq.read_table(orig_parquet_path)
-            orig_meta = orig_table.schema.metadata or {}
+            orig_meta = MetricsExporter.read_source_metadata(orig_parquet_path)
         except Exception as e:
             console.print(
                 Panel(
@@ -101,13 +165,6 @@ class MetricsExporter:
                 )
             )
 
-        # 統一 batch_metadata 寫入，不論單/多策略
-        grouped = (
-            df.groupby("Backtest_id") if "Backtest_id" in df.columns else [(None, df)]
-        )
-        batch_metadata = []
-        all_df = []
-
         # 先讀取舊的 batch_metadata（從分離的 JSON 檔案）
         old_batch_metadata = []
         orig_name = os.path.splitext(os.path.basename(orig_parquet_path))[0]
@@ -153,18 +210,17 @@ class MetricsExporter:
                         border_style="#8f1511",
                     )
                 )
-        for Backtest_id, group in grouped:
-            group = MetricsExporter.add_drawdown_bah(group)
-            all_df.append(group)
-            calc = MetricsCalculatorMetricTracker(group, time_unit, risk_free_rate)
-            strategy_metrics = calc.calc_strategy_metrics()
-            bah_metrics = calc.calc_bah_metrics()
-            meta = {"Backtest_id": Backtest_id} if Backtest_id is not None else {}
-            for k in strategy_metrics:
-                meta[k] = strategy_metrics[k]
-            for k in bah_metrics:
-                meta[k] = bah_metrics[k]
-            batch_metadata.append(meta)
+
+        # 統一 batch_metadata 寫入，不論單/多策略；所有 Backtest_id K線數相同時批量計算
+        if BatchMetricsCalculator.supports(df):
+            calculator = BatchMetricsCalculator(df, time_unit, risk_free_rate)
+            batch_metadata = calculator.batch_metadata()
+            df = calculator.records()
+        else:
+            batch_metadata, df = MetricsExporter._per_backtest_metrics(
+                df, time_unit, risk_free_rate
+            )
+
         # 合併舊的 batch_metadata（欄位級合併）
         if old_batch_metadata:
             old_map = {
@@ -173,7 +229,8 @@ class MetricsExporter:
             new_map = {
                 m["Backtest_id"]: m for m in batch_metadata if "Backtest_id" in m
             }
-            all_ids = set(old_map.keys()) | set(new_map.keys())
+            # 先按本次計算順序，再接上只存在於舊 metadata 的回測，輸出順序固定
+            all_ids = list(new_map) + [bid for bid in old_map if bid not in new_map]
             merged = []
             for bid in all_ids:
                 if bid in old_map and bid in new_map:
@@ -185,26 +242,7 @@ class MetricsExporter:
                 else:
                     merged.append(old_map[bid])
             batch_metadata = merged
-        # 過濾空的 DataFrame 以避免 FutureWarning
-        filtered_df = []
-        for df_item in all_df:
-            if not df_item.empty and len(df_item.columns) > 0:
-                # 清理 DataFrame：移除全為 NA 的列
-                cleaned_df = df_item.dropna(axis=1, how="all")
-                if not cleaned_df.empty:
-                    filtered_df.append(cleaned_df)
 
-        if filtered_df:
-            # 使用更安全的 concat 方式
-            try:
-                df = pd.concat(filtered_df, ignore_index=True, sort=False)
-            except Exception:
-                # 如果 concat 失敗，嘗試逐個合併
-                df = filtered_df[0]
-                for df_item in filtered_df[1:]:
-                    df = pd.concat([df, df_item], ignore_index=True, sort=False)
-        else:
-            df = pd.DataFrame()
         # 將 batch_metadata 儲存到獨立的 JSON 檔案
         os.makedirs(out_dir, exist_ok=True)
         with open(metadata_json_path, "w", encoding="utf-8") as f:
@@ -0,0 +1,256 @@
+"""
+ParallelMetrics_metricstracker.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 績效分析框架的多檔案並行分析器，以進程池同時分析多個回測 Parquet 檔：
+- 每個檔案在子進程內完成 read_parquet → MetricsExporter.export，並記錄讀取/匯出耗時
+- 依檔案大小排程：先送出最大的檔案，同時執行中檔案的預估記憶體總和不超過上限
+- 結果按輸入檔案順序返回，與完成先後無關
+
+【流程與數據流】
+------------------------------------------------------------
+- 由 MetricsRunner_autorunner 與 BaseMetricTracker.run_analysis 調用
+- 單一 worker 或單一檔案時於主進程逐個執行，輸出與逐檔分析相同
+
+```mermaid
+flowchart TD
+    A[Parquet 檔案列表] -->|estimate_file_memory_mb| B[按大小排序]
+    B -->|記憶體上限內送出| C[ProcessPoolExecutor]
+    C -->|export_metrics_file| D[FileMetricsResult]
+    D -->|按輸入順序| E[結果列表 / 耗時摘要]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- export_metrics_file 需保持為模組層級函數，才能被子進程 pickle 調用
+- MetricsExporter.export 的輸出路徑由來源檔名決定，不同檔案的輸出互不干擾
+- 記憶體預估使用 Parquet 未壓縮大小乘以 MEMORY_EXPANSION，指標計算流程有大幅變動時需重新評估
+
+【常見易錯點】
+------------------------------------------------------------
+- 子進程的 Rich 輸出已關閉，進度與錯誤由主進程透過 on_result 回呼顯示
+- 單一檔案預估記憶體超過上限時仍會執行，但只在沒有其他檔案執行時送出
+- 同一來源檔不可重複出現在列表中，否則多個進程會同時寫入相同輸出檔
+
+【範例】
+------------------------------------------------------------
+- results = export_metrics_files(paths, time_unit=365, risk_free_rate=0.04, max_workers="auto")
+- results = export_metrics_files(paths, 252, 0.02, max_workers=4, memory_limit_mb=8000)
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 調用 MetricsExporter.export 完成單一檔案的績效計算與匯出
+- 由 autorunner/MetricsRunner_autorunner.py、Base_metricstracker.py 調用
+"""
+
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Union
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from . import MetricsExporter_metricstracker
+from .MetricsExporter_metricstracker import MetricsExporter
+
+# 嘗試導入 psutil
+try:
+    import psutil
+
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# 讀入 DataFrame、指標計算矩陣與輸出表格相對 Parquet 未壓縮大小的記憶體倍數
+MEMORY_EXPANSION = 4.0
+# 未指定記憶體上限時可使用的可用記憶體比例
+DEFAULT_MEMORY_FRACTION = 0.6
+
+
+@dataclass
+class FileMetricsResult:
+    """單一檔案的績效分析結果與耗時"""
+
+    source_path: str
+    status: str
+    error: Optional[str] = None
+    n_rows: int = 0
+    estimated_mb: float = 0.0
+    read_seconds: float = 0.0
+    export_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+
+def _uncompressed_size(path: str) -> int:
+    """單一 Parquet 檔案所有 row group 的未壓縮大小；讀取失敗時為檔案大小"""
+    try:
+        metadata = pq.ParquetFile(path).metadata
+        return sum(
+            metadata.row_group(i).total_byte_size
+            for i in range(metadata.num_row_groups)
+        )
+    except Exception:
+        return os.path.getsize(path) if os.path.isfile(path) else 0
+
+
+def estimate_file_memory_mb(path: str) -> float:
+    """以 Parquet metadata 的未壓縮大小預估分析單一檔案或增量 part 檔資料夾所需記憶體（MB）"""
+    if os.path.isdir(path):
+        size = sum(
+            _uncompressed_size(os.path.join(path, name))
+            for name in os.listdir(path)
+            if name.endswith(".parquet") and not name.startswith(("_", "."))
+        )
+    else:
+        size = _uncompressed_size(path)
+    return size * MEMORY_EXPANSION / 1024**2
+
+
+def resolve_worker_count(max_workers: Union[int, str, None], n_files: int) -> int:
+    """解析 worker 數量："auto" 為 CPU 核心數，None/小於 1 為 1，不超過檔案數"""
+    if isinstance(max_workers, str):
+        value = max_workers.strip().lower()
+        max_workers = multiprocessing.cpu_count() if value == "auto" else int(value)
+    workers = int(max_workers or 1)
+    return max(1, min(workers, n_files))
+
+
+def default_memory_limit_mb() -> Optional[float]:
+    """可用記憶體的 DEFAULT_MEMORY_FRACTION；無 psutil 時不限制"""
+    if not PSUTIL_AVAILABLE:
+        return None
+    return psutil.virtual_memory().available / 1024**2 * DEFAULT_MEMORY_FRACTION
+
+
+def export_metrics_file(
+    path: str, time_unit: float, risk_free_rate: float
+) -> FileMetricsResult:
+    """讀取並匯出單一檔案的績效指標，錯誤記錄在結果中而不拋出"""
+    abs_path = os.path.abspath(path)
+    start = time.perf_counter()
+    result = FileMetricsResult(abs_path, "failed")
+    if not os.path.exists(abs_path):
+        result.error = f"找不到檔案：{abs_path}"
+        return result
+    try:
+        df = pd.read_parquet(abs_path)
+        result.n_rows = len(df)
+        result.read_seconds = time.perf_counter() - start
+        MetricsExporter.export(df, abs_path, time_unit, risk_free_rate)
+        result.export_seconds = time.perf_counter() - start - result.read_seconds
+        result.status = "success"
+    except Exception as exc:
+        result.error = str(exc)
+    result.total_seconds = time.perf_counter() - start
+    return result
+
+
+def _failed(path: str, exc: BaseException) -> FileMetricsResult:
+    """進程池本身出錯（例如子進程異常終止）時的失敗結果"""
+    return FileMetricsResult(os.path.abspath(path), "failed", str(exc))
+
+
+def _init_quiet_worker() -> None:
+    """子進程初始化：關閉 MetricsExporter 的 Rich 輸出，避免多個進程的面板交錯"""
+    MetricsExporter_metricstracker.console.quiet = True
+
+
+def export_metrics_files(
+    paths: List[str],
+    time_unit: float,
+    risk_free_rate: float,
+    max_workers: Union[int, str, None] = "auto",
+    memory_limit_mb: Optional[float] = None,
+    on_result: Optional[Callable[[FileMetricsResult], None]] = None,
+) -> List[FileMetricsResult]:
+    """
+    並行分析多個 Parquet 檔案
+
+    Args:
+        paths: 回測交易記錄 Parquet 路徑
+        time_unit: 年化時間單位
+        risk_free_rate: 無風險利率（小數）
+        max_workers: 進程數，"auto" 為 CPU 核心數；1 時於主進程逐個執行
+        memory_limit_mb: 同時執行檔案的預估記憶體上限（MB），
+            None 時使用可用記憶體的 DEFAULT_MEMORY_FRACTION
+        on_result: 每個檔案完成時的回呼（按完成順序調用）
+
+    Returns:
+        List[FileMetricsResult]: 與 paths 順序相同的結果
+    """
+    n_files = len(paths)
+    workers = resolve_worker_count(max_workers, n_files)
+    estimates = [estimate_file_memory_mb(path) for path in paths]
+
+    if workers <= 1:
+        results = []
+        for path, estimate in zip(paths, estimates):
+            result = export_metrics_file(path, time_unit, risk_free_rate)
+            result.estimated_mb = estimate
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+        return results
+
+    if memory_limit_mb is None:
+        memory_limit_mb = default_memory_limit_mb()
+
+    # 最大的檔案先送出，縮短總耗時；相同大小時保持輸入順序
+    pending = deque(sorted(range(n_files), key=lambda i: (-estimates[i], i)))
+    results: List[Optional[FileMetricsResult]] = [None] * n_files
+    running: Dict[object, int] = {}
+    in_flight_mb = 0.0
+
+    def finish(index: int, result: FileMetricsResult) -> None:
+        result.estimated_mb = estimates[index]
+        results[index] = result
+        if on_result is not None:
+            on_result(result)
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_quiet_worker
+    ) as executor:
+        while pending or running:
+            while pending and len(running) < workers:
+                index = pending[0]
+                if running and memory_limit_mb is not None:
+                    # 最大的檔案放不下時，改送出仍在上限內的較小檔案
+                    index = next(
+                        (
+                            i
+                            for i in pending
+                            if in_flight_mb + estimates[i] <= memory_limit_mb
+                        ),
+                        None,
+                    )
+                    if index is None:
+                        break
+                pending.remove(index)
+                try:
+                    future = executor.submit(
+                        export_metrics_file, paths[index], time_unit, risk_free_rate
+                    )
+                except Exception as exc:
+                    finish(index, _failed(paths[index], exc))
+                    continue
+                running[future] = index
+                in_flight_mb += estimates[index]
+
+            if not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                in_flight_mb -= estimates[index]
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    result = _failed(paths[index], exc)
+                finish(index, result)
+
+    return results
@@ -0,0 +1,250 @@
+"""
+TradeStats_metricstracker.py
+
+【功能說明】
+------------------------------------------------------------
+本模組為 Lo2cin4BT 績效分析框架的交易統計核心，以 numba 內核把一個或多個回測的
+Trade_action / Trade_return / Equity_value 欄位轉為精簡的交易表（每筆交易一列），
+再以向量化方式得到所有交易效率指標：
+- Trade_count、Win_rate、Profit_factor、Avg_trade_return、Max_consecutive_losses、最長持倉K線數
+MetricsCalculatorMetricTracker 與 BatchMetricsCalculator 共用本模組，交易數量達數萬筆時仍只需一次掃描
+
+【流程與數據流】
+------------------------------------------------------------
+- extract_trades 逐欄掃描 Trade_action（1 = 開倉、4 = 平倉），輸出交易表
+- trade_statistics 以 bincount / 累積最大值按回測彙總交易表
+- longest_holding_run 在缺少 Trade_action 時按 Position_size 的最長連續持倉段代替最長持倉
+
+```mermaid
+flowchart TD
+    A[Trade_action / Trade_return / Equity_value] -->|extract_trades| B[_extract_trades_njit]
+    B -->|每筆交易一列| C[交易表]
+    C -->|trade_statistics| D[每個回測的交易統計]
+    D --> E[MetricsCalculator]
+    D --> F[BatchMetricsCalculator]
+```
+
+【維護與擴充重點】
+------------------------------------------------------------
+- 交易表欄位固定為 TRADE_COLUMNS，新增欄位需同步更新內核與 trade_statistics
+- 開平倉判斷需與 TradeSimulator 的 Trade_action 編碼（1 開倉、4 平倉）保持一致
+
+【常見易錯點】
+------------------------------------------------------------
+- 沒有對應開倉的平倉仍算一筆交易（open_index 為 -1），與舊版以平倉列計算勝率一致
+- 未平倉即再次開倉時，前一筆交易視為未平倉（close_index 為 -1），持倉K線數計到再次開倉為止
+- 收益率優先使用平倉列的 Trade_return；未提供時以 Equity_value 由開倉前一根K線計算
+
+【範例】
+------------------------------------------------------------
+- trades = extract_trades(df["Trade_action"].to_numpy(), df["Trade_return"].to_numpy())
+  stats = trade_statistics(trades, n_backtests=1)
+- trades = extract_trades(action_matrix, return_matrix)  # K線數 x 回測數，每欄一個回測
+
+【與其他模組的關聯】
+------------------------------------------------------------
+- 由 MetricsCalculator_metricstracker.py、BatchMetrics_metricstracker.py 調用
+- Trade_action / Trade_return 由 backtester 的 TradeSimulator 生成
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+from numba import njit
+
+TRADE_COLUMNS = ("backtest", "open_index", "close_index", "trade_return", "holding")
+
+
+@njit(cache=True)
+def _extract_trades_njit(actions, trade_return, equity):
+    """
+    逐欄掃描開平倉動作生成交易表
+
+    trade_return 或 equity 的列數為 0 時表示未提供；兩者皆未提供時收益率為 NaN
+    """
+    n_time, n_columns = actions.shape
+    use_trade_return = trade_return.shape[0] == n_time
+    use_equity = equity.shape[0] == n_time
+
+    n_trades = 0
+    for col in range(n_columns):
+        active = False
+        for t in range(n_time):
+            action = actions[t, col]
+            if action == 1:
+                n_trades += 1
+                active = True
+            elif action == 4:
+                if not active:
+                    n_trades += 1
+                active = False
+
+    backtest = np.empty(n_trades, dtype=np.int64)
+    open_index = np.empty(n_trades, dtype=np.int64)
+    close_index = np.empty(n_trades, dtype=np.int64)
+    returns = np.full(n_trades, np.nan)
+    holding = np.zeros(n_trades, dtype=np.int64)
+
+    row = 0
+    for col in range(n_columns):
+        current = -1
+        for t in range(n_time):
+            action = actions[t, col]
+            if action == 1:
+                if current >= 0:
+                    # 未平倉即再次開倉：前一筆交易持倉到此為止
+                    holding[current] = t - open_index[current]
+                current = row
+                row += 1
+                backtest[current] = col
+                open_index[current] = t
+                close_index[current] = -1
+                holding[current] = n_time - t
+            elif action == 4:
+                if current < 0:
+                    current = row
+                    row += 1
+                    backtest[current] = col
+                    open_index[current] = -1
+                else:
+                    holding[current] = t - open_index[current]
+                close_index[current] = t
+                if use_trade_return:
+                    returns[current] = trade_return[t, col]
+                elif use_equity and open_index[current] >= 0:
+                    start = open_index[current]
+                    base = equity[start - 1, col] if start > 0 else equity[start, col]
+                    if base > 0:
+                        returns[current] = equity[t, col] / base - 1
+                current = -1
+    return backtest, open_index, close_index, returns, holding
+
+
+def _as_columns(values: Optional[np.ndarray], n_time: int) -> np.ndarray:
+    """一維序列轉為單欄矩陣；None 轉為 0 列矩陣（表示未提供）"""
+    if values is None:
+        return np.empty((0, 1))
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    if values.shape[0] != n_time:
+        raise ValueError("交易欄位長度需與 Trade_action 相同")
+    return values
+
+
+def extract_trades(
+    trade_action: np.ndarray,
+    trade_return: Optional[np.ndarray] = None,
+    equity_value: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    生成交易表
+
+    Args:
+        trade_action: Trade_action 序列（一維）或 K線數 x 回測數 矩陣
+        trade_return: 對應的 Trade_return（可選，優先作為每筆交易的收益率）
+        equity_value: 對應的 Equity_value（可選，未提供 trade_return 時用於計算收益率）
+
+    Returns:
+        Dict[str, np.ndarray]: TRADE_COLUMNS 各欄，按回測、開倉時間排序；
+            backtest 為欄索引，open_index / close_index 為 -1 表示無開倉 / 未平倉，
+            holding 為持倉K線數
+    """
+    actions = np.asarray(trade_action, dtype=np.float64)
+    if actions.ndim == 1:
+        actions = actions.reshape(-1, 1)
+    n_time = actions.shape[0]
+    trade_return = _as_columns(trade_return, n_time)
+    # 提供 Trade_return 時不需要 Equity_value
+    equity_value = _as_columns(
+        None if trade_return.shape[0] else equity_value, n_time
+    )
+    columns = _extract_trades_njit(
+        np.asfortranarray(actions),
+        np.asfortranarray(trade_return),
+        np.asfortranarray(equity_value),
+    )
+    return dict(zip(TRADE_COLUMNS, columns))
+
+
+def _running_length(mask: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    一維布林序列的連續 True 長度（False 處為 0），starts 標記各段的起點（段間不連續計算）
+    """
+    index = np.arange(len(mask))
+    resets = np.where(~mask, index, np.where(starts, index - 1, -1))
+    return index - np.maximum.accumulate(resets)
+
+
+def longest_holding_run(position_size: np.ndarray) -> np.ndarray:
+    """
+    最長連續持倉K線數：Position_size 非零（NaN 視為持倉）的最長連續段長度
+
+    缺少 Trade_action 無法劃分交易時，以此代替交易表的 max_holding
+
+    Args:
+        position_size: Position_size 序列（一維）或 K線數 x 回測數 矩陣
+
+    Returns:
+        np.ndarray: 每個回測（欄）的最長連續持倉K線數
+    """
+    holding = np.asarray(position_size, dtype=np.float64) != 0
+    if holding.ndim == 1:
+        holding = holding.reshape(-1, 1)
+    if holding.shape[0] == 0:
+        return np.zeros(holding.shape[1], dtype=np.int64)
+    index = np.arange(holding.shape[0]).reshape(-1, 1)
+    resets = np.maximum.accumulate(np.where(holding, -1, index), axis=0)
+    return (index - resets).max(axis=0)
+
+
+def trade_statistics(
+    trades: Dict[str, np.ndarray], n_backtests: int
+) -> Dict[str, np.ndarray]:
+    """
+    按回測彙總交易表
+
+    Returns:
+        Dict[str, np.ndarray]: 每個統計量一個長度為 n_backtests 的陣列：
+            trade_count（開倉次數）、closed_count（平倉次數）、win_count（平倉且收益 > 0）、
+            profit_sum / loss_sum（正 / 負收益總和）、return_count / return_mean（非 NaN 收益）、
+            max_consecutive_losses（連續虧損最大次數，略過 NaN）、max_holding（最長持倉K線數）
+    """
+    backtest = trades["backtest"]
+    returns = trades["trade_return"]
+    closed = trades["close_index"] >= 0
+    valid = ~np.isnan(returns)
+
+    def count(mask: np.ndarray) -> np.ndarray:
+        return np.bincount(backtest[mask], minlength=n_backtests)
+
+    def total(mask: np.ndarray) -> np.ndarray:
+        return np.bincount(backtest[mask], weights=returns[mask], minlength=n_backtests)
+
+    return_count = count(valid)
+    return_sum = total(valid)
+    return_mean = np.full(n_backtests, np.nan)
+    np.divide(return_sum, return_count, out=return_mean, where=return_count > 0)
+
+    max_consecutive_losses = np.zeros(n_backtests, dtype=np.int64)
+    valid_backtest = backtest[valid]
+    if len(valid_backtest):
+        starts = np.ones(len(valid_backtest), dtype=bool)
+        starts[1:] = valid_backtest[1:] != valid_backtest[:-1]
+        runs = _running_length(returns[valid] < 0, starts)
+        np.maximum.at(max_consecutive_losses, valid_backtest, runs)
+
+    max_holding = np.zeros(n_backtests, dtype=np.int64)
+    np.maximum.at(max_holding, backtest, trades["holding"])
+
+    return {
+        "trade_count": count(trades["open_index"] >= 0),
+        "closed_count": count(closed),
+        "win_count": count(closed & (returns > 0)),
+        "profit_sum": total(valid & (returns > 0)),
+        "loss_sum": total(valid & (returns < 0)),
+        "return_count": return_count,
+        "return_mean": return_mean,
+        "max_consecutive_losses": max_consecutive_losses,
+        "max_holding": max_holding,
+    }
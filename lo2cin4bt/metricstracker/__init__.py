@@ -30,6 +30,7 @@ flowchart TD
 ------------------------------------------------------------
 - from metricstracker import BaseMetricTracker, MetricsCalculator
 - from metricstracker import MetricsExporter
+- from metricstracker import BatchMetricsCalculator
 
 【與其他模組的關聯】
 ------------------------------------------------------------
@@ -43,6 +44,7 @@ flowchart TD
 """
 
 from .Base_metricstracker import BaseMetricTracker
+from .BatchMetrics_metricstracker import BatchMetricsCalculator
 from .MetricsCalculator_metricstracker import (
     MetricsCalculatorMetricTracker,
 )
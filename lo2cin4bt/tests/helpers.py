@@ -0,0 +1,56 @@
+# lo2cin4bt/tests/helpers.py
+import numpy as np
+
+SERIES_KINDS = ["price", "large_offset", "mixed_scale", "integers"]
+
+
+def random_series(seed, n, kind):
+    rng = np.random.default_rng(seed)
+    if kind == "price":
+        return 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    if kind == "large_offset":
+        # 大均值、小波動：樸素滾動求和最容易失準的情況
+        return 1e8 + rng.normal(0, 1e-2, n)
+    if kind == "mixed_scale":
+        return rng.normal(0, 1, n) * 10.0 ** rng.integers(-6, 6, n)
+    return rng.integers(-5, 6, n).astype(np.float64)
+
+
+def price_frame(n_time=300, seed=0):
+    """含 OHLC 與預測因子 X 的日線數據"""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_time)))
+    return pd.DataFrame(
+        {
+            "Time": pd.date_range("2020-01-01", periods=n_time),
+            "Open": close * (1 + rng.normal(0, 0.002, n_time)),
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Close": close,
+            "X": close,
+        }
+    )
+
+
+def engine_config(condition_pairs, indicator_params, **performance_params):
+    """將 {指標_strategy_N: 參數範圍} 轉為 VectorBacktestEngine.run_backtests 的配置"""
+    from lo2cin4bt.backtester.Indicators_backtester import IndicatorsBacktester
+
+    helper = IndicatorsBacktester()
+    return {
+        "condition_pairs": condition_pairs,
+        "indicator_params": {
+            key: helper.get_indicator_params(key.split("_strategy_")[0], dict(value))
+            for key, value in indicator_params.items()
+        },
+        "predictors": ["X"],
+        "trading_params": {
+            "transaction_cost": 0.001,
+            "slippage": 0.0005,
+            "trade_delay": 1,
+            "trade_price": "open",
+        },
+        "performance_params": performance_params,
+    }
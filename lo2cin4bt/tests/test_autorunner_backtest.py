@@ -0,0 +1,127 @@
+# lo2cin4bt/tests/test_autorunner_backtest.py
+import os
+
+import pandas as pd
+import pytest
+
+from lo2cin4bt.autorunner.BacktestRunner_autorunner import BacktestRunnerAutorunner
+from lo2cin4bt.backtester.TradeRecordExporter_backtester import (
+    TradeRecordExporter_backtester,
+)
+from lo2cin4bt.metricstracker.MetricsExporter_metricstracker import MetricsExporter
+from lo2cin4bt.tests.helpers import price_frame
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    """導出檔寫到暫存目錄，而非 records/backtester"""
+    original_init = TradeRecordExporter_backtester.__init__
+
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        self.output_dir = str(tmp_path / "backtester")
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    monkeypatch.setattr(TradeRecordExporter_backtester, "__init__", init)
+    return tmp_path / "backtester"
+
+
+def _config(**performance_params):
+    return {
+        "dataloader": {"frequency": "1D"},
+        "backtester": {
+            "selected_predictor": "X",
+            "condition_pairs": [
+                {"entry": ["MA1"], "exit": ["MA4"]},
+                {"entry": ["BOLL1"], "exit": ["BOLL4"]},
+            ],
+            "indicator_params": {
+                "MA1_strategy_1": {"ma_type": "SMA", "ma_range": "5:20:5"},
+                "MA4_strategy_1": {"ma_type": "SMA", "ma_range": "10:10:1"},
+                "BOLL1_strategy_2": {"ma_range": "10:20:10", "sd_multi": "2,3"},
+                "BOLL4_strategy_2": {"ma_range": "10:10:10", "sd_multi": "2"},
+            },
+            "trading_params": {
+                "transaction_cost": 0.001,
+                "slippage": 0.0005,
+                "trade_delay": 1,
+                "trade_price": "open",
+            },
+            "performance_params": {
+                "streaming": True,
+                "stream_chunk_size": 2,
+                **performance_params,
+            },
+        },
+    }
+
+
+def _sorted_records(path):
+    """按任務索引（去掉隨機前綴）與時間排序，忽略各次執行不同的 Backtest_id 前綴"""
+    df = pd.read_parquet(path)
+    df["task"] = df["Backtest_id"].str.split("-").str[-1]
+    df = df.drop(columns=["Backtest_id"])
+    return df.sort_values(["task", "Time"], kind="stable").reset_index(drop=True)
+
+
+def test_streaming_exports_one_file_per_chunk(output_dir):
+    result = BacktestRunnerAutorunner().run_backtest(price_frame(), _config())
+
+    # 8 個任務、每區塊 2 個任務
+    assert len(result["exported_files"]) == 4
+    assert sorted(os.listdir(output_dir)) == sorted(
+        os.path.basename(path) for path in result["exported_files"]
+    )
+    assert all(r["records"].empty for r in result["results"])
+
+
+def test_incremental_with_streaming_appends_new_bars(output_dir, tmp_path):
+    runner = BacktestRunnerAutorunner()
+    data = price_frame()
+    config = _config(incremental_state=str(tmp_path / "state.npz"))
+
+    first = runner.run_backtest(data.iloc[:250], config)
+    assert len(first["exported_files"]) == 1
+    output_path = first["exported_files"][0]
+    assert os.path.isfile(output_path)
+    assert os.path.exists(tmp_path / "state.npz")
+
+    # 新增 50 根K線：只寫出新的 part 檔，既有檔案不重寫
+    first_bytes = open(output_path, "rb").read()
+    second = runner.run_backtest(data, config)
+    assert second["exported_files"] == [output_path]
+    parts = sorted(os.listdir(output_path))
+    assert parts == ["_common_metadata", "part-00000.parquet", "part-00001.parquet"]
+    assert open(os.path.join(output_path, "part-00000.parquet"), "rb").read() == (
+        first_bytes
+    )
+    new_rows = pd.read_parquet(os.path.join(output_path, "part-00001.parquet"))
+    assert new_rows["Time"].min() == data["Time"].iloc[250]
+
+    metadata = MetricsExporter.read_source_metadata(output_path)
+    assert b"batch_metadata" in metadata
+    assert str(data["Time"].max()) in metadata[b"batch_metadata"].decode("utf-8")
+
+    # 追加後的完整歷史與一次完整回測相同
+    full = BacktestRunnerAutorunner().run_backtest(data, _config(streaming=False))
+    pd.testing.assert_frame_equal(
+        _sorted_records(output_path), _sorted_records(full["exported_files"][0])
+    )
+
+    # 沒有新增K線：不寫出任何檔案，仍指向既有輸出
+    before = sorted(os.listdir(output_dir))
+    third = runner.run_backtest(data, config)
+    assert third["exported_files"] == [output_path]
+    assert sorted(os.listdir(output_dir)) == before
+    assert sorted(os.listdir(output_path)) == parts
+
+
+def test_screening_with_streaming_exports_selected_tasks(output_dir):
+    result = BacktestRunnerAutorunner().run_backtest(
+        price_frame(), _config(screening_top_k=3)
+    )
+
+    assert len(result["exported_files"]) == 1
+    df = pd.read_parquet(result["exported_files"][0])
+    assert df["Backtest_id"].nunique() == 3
+    assert len(df) == 3 * 300
@@ -0,0 +1,279 @@
+# lo2cin4bt/tests/test_batch_metrics.py
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lo2cin4bt.metricstracker.BatchMetrics_metricstracker import BatchMetricsCalculator
+from lo2cin4bt.metricstracker.DrawdownStats_metricstracker import (
+    DRAWDOWN_STATS,
+    drawdown_statistics,
+)
+from lo2cin4bt.metricstracker.MetricsCalculator_metricstracker import (
+    MetricsCalculatorMetricTracker,
+)
+from lo2cin4bt.metricstracker.MetricsExporter_metricstracker import MetricsExporter
+from lo2cin4bt.metricstracker.ParallelMetrics_metricstracker import export_metrics_files
+from lo2cin4bt.metricstracker.TradeStats_metricstracker import (
+    extract_trades,
+    longest_holding_run,
+    trade_statistics,
+)
+
+
+def _records(n_time=120, n_backtests=6, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_time)))
+    frames = []
+    for j in range(n_backtests):
+        returns = rng.normal(0, 0.01, n_time) * (rng.random(n_time) < 0.6)
+        returns[0] = 0.0
+        actions = rng.choice([0, 1, 4], size=n_time, p=[0.9, 0.05, 0.05])
+        trade_returns = np.where(actions == 4, rng.normal(0, 0.02, n_time), np.nan)
+        position_type = np.where(actions == 1, "long", None)
+        if j == 0:
+            # 無交易：Trade_return 與 Position_type 全為 NA
+            returns[:] = 0.0
+            actions[:] = 0
+            trade_returns[:] = np.nan
+            position_type[:] = None
+        frames.append(
+            pd.DataFrame(
+                {
+                    "Time": pd.date_range("2021-01-01", periods=n_time),
+                    "Close": close,
+                    "Position_type": position_type,
+                    "Position_size": (rng.random(n_time) < 0.5).astype(float),
+                    "Return": returns,
+                    "Trade_action": actions,
+                    "Equity_value": 100 * np.cumprod(1 + returns),
+                    "Trade_return": trade_returns,
+                    "Backtest_id": f"bt-{j:03d}",
+                }
+            )
+        )
+    df = pd.concat(frames, ignore_index=True)
+    # 交錯排列：批量計算需與 groupby 的排序一致
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def _assert_metadata_equal(expected, actual):
+    assert len(expected) == len(actual)
+    for exp, act in zip(expected, actual):
+        assert list(exp) == list(act)
+        for key in exp:
+            a, b = exp[key], act[key]
+            if a is None or isinstance(a, str):
+                assert a == b, key
+            elif math.isnan(a):
+                assert math.isnan(b), key
+            else:
+                assert b == pytest.approx(a, rel=1e-9, abs=1e-14), key
+
+
+@pytest.mark.parametrize("time_unit", [252, 1])
+def test_batch_metrics_match_per_backtest_metrics(time_unit):
+    df = _records()
+    df.loc[df.index[::29], "Return"] = np.nan
+
+    expected_meta, expected_df = MetricsExporter._per_backtest_metrics(df, time_unit, 0.02)
+    calculator = BatchMetricsCalculator(df, time_unit, 0.02)
+
+    _assert_metadata_equal(expected_meta, calculator.batch_metadata())
+    pd.testing.assert_frame_equal(calculator.records(), expected_df)
+
+
+def test_batch_metrics_requires_equal_lengths():
+    df = _records()
+    assert BatchMetricsCalculator.supports(df)
+    assert not BatchMetricsCalculator.supports(df.iloc[1:])
+    assert not BatchMetricsCalculator.supports(df.drop(columns=["Close"]))
+
+
+def test_metrics_calculator_shares_input_and_cached_moments():
+    group = MetricsExporter.add_drawdown_bah(
+        _records(n_backtests=2).query("Backtest_id == 'bt-001'").sort_index()
+    )
+    snapshot = group.copy()
+    calc = MetricsCalculatorMetricTracker(group, 252, 0.02)
+    assert calc.df is group
+
+    first = {**calc.calc_strategy_metrics(), **calc.calc_bah_metrics()}
+    assert first == {**calc.calc_strategy_metrics(), **calc.calc_bah_metrics()}
+    pd.testing.assert_frame_equal(group, snapshot)
+
+    # 沒有 Drawdown 欄位時由快取的 cummax 計算，結果相同
+    plain = MetricsCalculatorMetricTracker(
+        group.drop(columns=["Drawdown", "BAH_Drawdown"]), 252, 0.02
+    )
+    assert plain.calc_strategy_metrics() == calc.calc_strategy_metrics()
+    assert plain.calc_bah_metrics() == calc.calc_bah_metrics()
+    assert calc.sharpe() == pytest.approx(
+        (group["Return"].mean() - 0.02 / 252) / group["Return"].std(ddof=1) * 252**0.5
+    )
+
+
+def _reference_drawdown_stats(drawdown):
+    valid = [v for v in drawdown if not math.isnan(v)]
+    episodes, lengths, trough, length = [], [], None, 0
+    for v in list(drawdown) + [float("nan")]:
+        if v < 0:
+            trough = v if trough is None else min(trough, v)
+            length += 1
+        elif trough is not None:
+            episodes.append(trough)
+            lengths.append(length)
+            trough, length = None, 0
+    negatives = [v for v in valid if v < 0]
+    recover = 0.0
+    if negatives:
+        deepest = int(np.nanargmin(drawdown))
+        later = [t for t in range(deepest + 1, len(drawdown)) if drawdown[t] >= 0]
+        recover = float(later[0] - deepest) if later else float("nan")
+    return {
+        "max_drawdown": min(valid) if valid else float("nan"),
+        "average_drawdown": float(np.mean(episodes)) if episodes else 0.0,
+        "mean_negative_drawdown": float(np.mean(negatives)) if negatives else 0.0,
+        "longest_duration": float(max(lengths, default=0)),
+        "time_to_recover": recover,
+        "episode_count": float(len(episodes)),
+    }
+
+
+def test_drawdown_statistics_match_reference():
+    rng = np.random.default_rng(3)
+    equity = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (200, 8)), axis=0))
+    drawdown = (equity - np.maximum.accumulate(equity, axis=0)) / np.maximum.accumulate(
+        equity, axis=0
+    )
+    drawdown[50:53, 1] = np.nan
+    drawdown[:, 2] = 0.0
+    drawdown[:, 3] = np.nan
+    drawdown[-5:, 4] = -0.5
+    columns = [drawdown[:, j] for j in range(drawdown.shape[1])]
+    columns.append(np.array([0.0, -0.1, np.nan, 0.0, -0.2, -0.3, 0.0, -0.05]))
+
+    for column in columns:
+        stats = drawdown_statistics(column)
+        expected = _reference_drawdown_stats(column)
+        for name in DRAWDOWN_STATS:
+            assert stats[name][0] == pytest.approx(expected[name], nan_ok=True), name
+
+    batch = drawdown_statistics(drawdown)
+    for j in range(drawdown.shape[1]):
+        single = drawdown_statistics(drawdown[:, j])
+        for name in DRAWDOWN_STATS:
+            np.testing.assert_array_equal(batch[name][j], single[name][0])
+
+
+def test_extract_trades_table():
+    # 平倉無開倉、未平倉即再次開倉、期末未平倉
+    actions = np.array([4, 0, 1, 0, 0, 4, 1, 0, 1, 0, 4, 0, 1, 0])
+    equity = np.linspace(100, 113, len(actions))
+    trade_returns = np.full(len(actions), np.nan)
+    trade_returns[[0, 5, 10]] = [0.1, -0.2, 0.3]
+
+    trades = extract_trades(actions, trade_returns)
+    np.testing.assert_array_equal(trades["open_index"], [-1, 2, 6, 8, 12])
+    np.testing.assert_array_equal(trades["close_index"], [0, 5, -1, 10, -1])
+    np.testing.assert_array_equal(trades["holding"], [0, 3, 2, 2, 2])
+    np.testing.assert_array_equal(trades["trade_return"], [0.1, -0.2, np.nan, 0.3, np.nan])
+
+    by_equity = extract_trades(actions, equity_value=equity)
+    assert by_equity["trade_return"][1] == pytest.approx(equity[5] / equity[1] - 1)
+    assert math.isnan(by_equity["trade_return"][0])
+
+    stats = trade_statistics(trades, 1)
+    assert stats["trade_count"][0] == 4
+    assert stats["closed_count"][0] == 3
+    assert stats["win_count"][0] == 2
+    assert stats["max_holding"][0] == 3
+    assert stats["return_mean"][0] == pytest.approx(0.2 / 3)
+
+
+def test_trade_statistics_many_trades():
+    rng = np.random.default_rng(5)
+    n_time, n_backtests = 60_000, 3
+    actions = np.zeros((n_time, n_backtests))
+    actions[0::2] = 1
+    actions[1::2] = 4
+    trade_returns = np.where(actions == 4, rng.normal(0, 0.01, actions.shape), np.nan)
+
+    stats = trade_statistics(extract_trades(actions, trade_returns), n_backtests)
+    for j in range(n_backtests):
+        closed = trade_returns[1::2, j]
+        longest = run = 0
+        for r in closed:
+            run = run + 1 if r < 0 else 0
+            longest = max(longest, run)
+        assert stats["trade_count"][j] == n_time // 2
+        assert stats["win_count"][j] == (closed > 0).sum()
+        assert stats["profit_sum"][j] == pytest.approx(closed[closed > 0].sum())
+        assert stats["max_consecutive_losses"][j] == longest
+        assert stats["max_holding"][j] == 1
+
+
+def _reference_longest_run(position_size):
+    """原本逐列迴圈：非零 Position_size 的最長連續K線數"""
+    longest = run = 0
+    for p in position_size:
+        run = run + 1 if p != 0 else 0
+        longest = max(longest, run)
+    return longest
+
+
+def test_max_holding_without_trade_action_uses_position_runs():
+    df = _records()
+    df.loc[df.index[::17], "Position_size"] = np.nan
+    df = df.drop(columns=["Trade_action"])
+
+    batch = BatchMetricsCalculator(df, 252, 0.02).batch_metadata()
+    assert len(batch) == 6
+    for meta, (_, group) in zip(batch, df.groupby("Backtest_id", sort=True)):
+        group = group.sort_index()
+        expected = _reference_longest_run(group["Position_size"]) / len(group)
+        assert expected > 0
+        calc = MetricsCalculatorMetricTracker(group, 252, 0.02)
+        assert calc.max_holding_period_ratio() == pytest.approx(expected)
+        assert meta["Max_holding_period_ratio"] == pytest.approx(expected)
+
+    # 全部空倉、全部持倉與空序列
+    np.testing.assert_array_equal(
+        longest_holding_run(np.array([[0.0, 1.0], [0.0, -1.0], [0.0, 2.0]])), [0, 3]
+    )
+    assert longest_holding_run(np.array([])).tolist() == [0]
+
+
+def test_parallel_metrics_export_matches_serial(tmp_path):
+    outputs = {}
+    for mode, workers in (("serial", 1), ("pool", 2)):
+        source_dir = tmp_path / mode / "bt"
+        source_dir.mkdir(parents=True)
+        paths = []
+        for i, n_time in enumerate([40, 160, 80]):
+            path = source_dir / f"rec_{i}.parquet"
+            _records(n_time=n_time, n_backtests=3, seed=i).to_parquet(path)
+            paths.append(str(path))
+        paths.append(str(source_dir / "missing.parquet"))
+
+        results = export_metrics_files(
+            paths, 252, 0.02, max_workers=workers, memory_limit_mb=0.001
+        )
+        # 結果按輸入順序返回，與完成先後無關
+        assert [r.source_path for r in results] == paths
+        assert [r.status for r in results] == ["success"] * 3 + ["failed"]
+        out_dir = tmp_path / mode / "metricstracker"
+        outputs[mode] = [
+            (
+                pd.read_parquet(out_dir / f"rec_{i}_metrics.parquet"),
+                (out_dir / f"rec_{i}_metadata.json").read_text(encoding="utf-8"),
+            )
+            for i in range(3)
+        ]
+
+    for (serial_df, serial_meta), (pool_df, pool_meta) in zip(
+        outputs["serial"], outputs["pool"]
+    ):
+        pd.testing.assert_frame_equal(pool_df, serial_df)
+        assert pool_meta == serial_meta
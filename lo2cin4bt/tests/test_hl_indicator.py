@@ -0,0 +1,156 @@
+# lo2cin4bt/tests/test_hl_indicator.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from lo2cin4bt.backtester.HL_Indicator_backtester import (
+    NUMBA_AVAILABLE,
+    HLIndicator,
+)
+from lo2cin4bt.backtester.IndicatorCache_backtester import IndicatorCache
+from lo2cin4bt.tests.helpers import SERIES_KINDS, random_series
+
+if NUMBA_AVAILABLE:
+    from lo2cin4bt.backtester.HL_Indicator_backtester import (
+        _calculate_hl_extremes_njit,
+        _generate_hl_signals_njit,
+        _hl_signals_from_runs_njit,
+        _rolling_max_min_njit,
+    )
+
+pytestmark = pytest.mark.skipif(not NUMBA_AVAILABLE, reason="需要 numba")
+
+HL_KINDS = SERIES_KINDS + ["plateaus", "monotonic"]
+
+
+def _hl_series(seed, n, kind):
+    """random_series 之外加入大量平手的序列：平台段與單調段最容易觸發連續等同極值"""
+    rng = np.random.default_rng(seed)
+    if kind == "plateaus":
+        return np.repeat(rng.integers(0, 4, n), rng.integers(1, 6, n))[:n].astype(
+            np.float64
+        )
+    if kind == "monotonic":
+        steps = rng.choice([-1.0, 0.0, 1.0], size=n, p=[0.2, 0.3, 0.5])
+        return np.cumsum(steps)
+    return random_series(seed, n, kind)
+
+
+def _reference_hl_signals(values, n_length, m_length, strat_idx):
+    """原本的 O(n·n·m) 迴圈：第 i 天往前連續 n 天，每天都以切片重新計算過去 m 天的極值"""
+    n = len(values)
+    signals = np.zeros(n)
+    use_high = strat_idx in (1, 2)
+    signal_value = 1.0 if strat_idx in (1, 3) else -1.0
+    if strat_idx not in (1, 2, 3, 4):
+        return signals
+    for i in range(m_length + n_length - 1, n):
+        all_equal = True
+        for j in range(i - n_length + 1, i + 1):
+            window = values[max(0, j - m_length + 1) : j + 1]
+            extreme = window.max() if use_high else window.min()
+            if abs(values[j] - extreme) > 1e-10:
+                all_equal = False
+                break
+        if all_equal:
+            signals[i] = signal_value
+    return signals
+
+
+def _hl_params(strat_idx, n_range, m_range):
+    return HLIndicator.get_params(strat_idx, {"n_range": n_range, "m_range": m_range})
+
+
+@pytest.mark.parametrize("kind", HL_KINDS)
+@pytest.mark.parametrize("m_length", [1, 2, 3, 7, 20])
+def test_rolling_max_min_matches_slices(kind, m_length):
+    values = _hl_series(m_length, 200, kind)
+    rolling_max, rolling_min = _rolling_max_min_njit(values, m_length)
+    for i in range(len(values)):
+        window = values[max(0, i - m_length + 1) : i + 1]
+        assert rolling_max[i] == window.max()
+        assert rolling_min[i] == window.min()
+
+
+@pytest.mark.parametrize("kind", HL_KINDS)
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_hl_signals_match_reference_loop(kind, seed):
+    values = _hl_series(seed, 120, kind)
+    fired = 0
+    for m_length in (1, 2, 3, 5, 10, 30):
+        extremes = _calculate_hl_extremes_njit(values, m_length)
+        for n_length in (1, 2, 3, 5):
+            for strat_idx in (1, 2, 3, 4):
+                expected = _reference_hl_signals(values, n_length, m_length, strat_idx)
+                _, _, high_run, low_run = extremes
+                np.testing.assert_array_equal(
+                    _hl_signals_from_runs_njit(
+                        high_run, low_run, n_length, m_length, strat_idx
+                    ),
+                    expected,
+                    err_msg=f"n={n_length} m={m_length} HL{strat_idx}",
+                )
+                np.testing.assert_array_equal(
+                    _generate_hl_signals_njit(values, n_length, m_length, strat_idx),
+                    expected,
+                )
+                fired += int(np.count_nonzero(expected))
+    assert fired > 0
+
+
+def test_rolling_max_min_rejects_empty_window():
+    with pytest.raises(ValueError):
+        _rolling_max_min_njit(np.arange(5.0), 0)
+
+
+def _vectorized_signals(data, params, cache):
+    tasks = [(task_idx, 0, param) for task_idx, param in enumerate(params)]
+    signals = np.zeros((len(data), len(params), 1))
+    HLIndicator.vectorized_calculate_hl_signals(tasks, "X", signals, cache, data)
+    return signals[:, :, 0]
+
+
+def test_vectorized_signals_reuse_global_hl_cache():
+    values = _hl_series(3, 150, "plateaus")
+    data = pd.DataFrame({"X": values})
+    params = [
+        param
+        for strat_idx in (1, 2, 3, 4)
+        for param in _hl_params(strat_idx, "1:3:1", "2:6:2")
+    ]
+    expected = np.column_stack(
+        [
+            _reference_hl_signals(
+                values,
+                p.get_param("n_length"),
+                p.get_param("m_length"),
+                p.get_param("strat_idx"),
+            )
+            for p in params
+        ]
+    )
+    assert np.count_nonzero(expected) > 0
+
+    # 中間結果只按 (m_length, 預測因子) 計算一次，供所有 n_length 與策略共用
+    cache = {}
+    np.testing.assert_array_equal(_vectorized_signals(data, params, cache), expected)
+    assert sorted(cache) == [(2, "X"), (4, "X"), (6, "X")]
+
+    # 已緩存的中間結果直接重用，不重新計算：替換為全等同的連續天數後信號隨之改變
+    n_time = len(values)
+    always = np.arange(1, n_time + 1, dtype=np.int64)
+    cached = {key: (None, None, always, always) for key in cache}
+    reused = _vectorized_signals(data, params, cached)
+    for column, param in enumerate(params):
+        start = param.get_param("m_length") + param.get_param("n_length") - 1
+        value = 1.0 if param.get_param("strat_idx") in (1, 3) else -1.0
+        assert (reused[:start, column] == 0).all()
+        assert (reused[start:, column] == value).all()
+
+    # 引擎級 IndicatorCache 視圖：第二批次全部命中
+    indicator_cache = IndicatorCache(max_mb=None)
+    view = indicator_cache.namespace("HL")
+    np.testing.assert_array_equal(_vectorized_signals(data, params, view), expected)
+    indicator_cache.end_batch()
+    np.testing.assert_array_equal(_vectorized_signals(data, params, view), expected)
+    assert indicator_cache.misses == 3 and indicator_cache.hits == 3
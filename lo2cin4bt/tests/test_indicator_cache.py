@@ -0,0 +1,243 @@
+# lo2cin4bt/tests/test_indicator_cache.py
+import logging
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lo2cin4bt.backtester.IndicatorCache_backtester import (
+    DiskIndicatorStore,
+    IndicatorCache,
+    predictor_fingerprint,
+)
+from lo2cin4bt.backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from lo2cin4bt.tests.helpers import engine_config, price_frame
+
+# 每個條目 1024 個 float64 = 8 KB
+ENTRY_BYTES = 1024 * 8
+
+
+def _entry(value):
+    return np.full(1024, float(value))
+
+
+def _cache(n_entries):
+    """容量剛好容納 n_entries 個條目的緩存"""
+    return IndicatorCache(max_mb=n_entries * ENTRY_BYTES / (1024 * 1024))
+
+
+def test_eviction_waits_for_end_batch():
+    cache = _cache(2)
+    view = cache.namespace("MA")
+    for i in range(4):
+        view[i] = _entry(i)
+
+    # 批次內可暫時超過上限，已寫入的條目全部可讀
+    assert len(cache) == 4 and cache.total_bytes == 4 * ENTRY_BYTES
+    assert all(i in view for i in range(4))
+
+    # 最近讀取的條目保留，最久未使用的先淘汰
+    view[0]
+    cache.end_batch()
+    assert sorted(view) == [0, 3]
+    assert cache.evictions == 2
+    assert cache.total_bytes == 2 * ENTRY_BYTES
+
+
+def test_zero_capacity_clears_after_each_batch():
+    cache = IndicatorCache(max_mb=0)
+    view = cache.namespace("BOLL")
+    view["a"] = _entry(1)
+    assert "a" in view
+    cache.end_batch()
+    assert len(cache) == 0 and cache.total_bytes == 0
+
+
+def test_hits_count_once_per_batch():
+    cache = IndicatorCache(max_mb=None)
+    ma = cache.namespace("MA")
+    boll = cache.namespace("BOLL")
+    ma[5] = _entry(5)
+    boll[5] = _entry(6)
+
+    # 本批次寫入的條目不算命中；同一鍵在不同指標核心下互不干擾
+    for _ in range(3):
+        np.testing.assert_array_equal(ma[5], _entry(5))
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    cache.end_batch()
+    for _ in range(3):
+        ma[5]
+    assert 7 not in ma
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    ma[5] = _entry(7)  # 覆寫不算新的計算
+    stats = cache.stats()
+    assert stats["misses"] == 2 and stats["entries"] == 2
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+    np.testing.assert_array_equal(ma[5], _entry(7))
+
+
+def test_disk_store_round_trips_arrays_and_tuples(tmp_path):
+    store = DiskIndicatorStore(str(tmp_path), max_mb=None)
+    array = np.arange(12.0).reshape(3, 4)
+    pair = (np.arange(5.0), np.arange(5, dtype=np.int64))
+    store.save("array", array)
+    store.save("pair", pair)
+    store.save("other", {"not": "cached"})
+
+    assert sorted(os.listdir(tmp_path)) == ["array.npy", "pair.npz"]
+    assert store.writes == 2
+
+    # 新的實例由目錄掃描重建索引
+    reopened = DiskIndicatorStore(str(tmp_path), max_mb=None)
+    assert len(reopened) == 2 and reopened.total_bytes == store.total_bytes
+    found, value = reopened.load("array")
+    assert found
+    np.testing.assert_array_equal(value, array)
+    found, value = reopened.load("pair")
+    assert found and isinstance(value, tuple) and len(value) == 2
+    for loaded, expected in zip(value, pair):
+        np.testing.assert_array_equal(loaded, expected)
+        assert loaded.dtype == expected.dtype
+    assert reopened.load("missing") == (False, None)
+    assert reopened.hits == 2
+
+
+def test_corrupt_disk_file_is_removed(tmp_path, caplog):
+    store = DiskIndicatorStore(str(tmp_path), max_mb=None)
+    store.save("broken", np.arange(100.0))
+    path = tmp_path / "broken.npy"
+    path.write_bytes(b"not a numpy file")
+
+    with caplog.at_level(logging.WARNING, logger="DiskIndicatorStore"):
+        assert store.load("broken") == (False, None)
+    assert "讀取失敗" in caplog.text
+    assert not path.exists()
+    assert "broken" not in store and store.total_bytes == 0
+
+
+def test_trim_removes_least_recently_used_files(tmp_path):
+    store = DiskIndicatorStore(str(tmp_path), max_mb=None)
+    for name in ("a", "b", "c"):
+        store.save(name, _entry(1))
+    size = os.path.getsize(tmp_path / "a.npy")
+    store.load("a")
+
+    store.max_bytes = 2 * size
+    store.trim()
+    assert sorted(os.listdir(tmp_path)) == ["a.npy", "c.npy"]
+    assert store.evictions == 1 and store.total_bytes == 2 * size
+
+    # 未超出上限時不刪除
+    store.trim()
+    assert len(store) == 2
+
+
+def test_disk_cache_is_keyed_by_predictor_fingerprint(tmp_path):
+    data = price_frame()
+    fingerprint = predictor_fingerprint(data, "X")
+    cache = IndicatorCache(max_mb=None)
+    cache.attach_disk_store(DiskIndicatorStore(str(tmp_path), max_mb=None))
+    cache.namespace("MA", fingerprint)[(10, "X")] = _entry(10)
+    cache.namespace("MA")[(20, "X")] = _entry(20)  # 無指紋：只留在記憶體
+    assert len(os.listdir(tmp_path)) == 1
+
+    # 相同數據：新的緩存由磁碟載入
+    reloaded = IndicatorCache(max_mb=None)
+    reloaded.attach_disk_store(DiskIndicatorStore(str(tmp_path), max_mb=None))
+    np.testing.assert_array_equal(
+        reloaded.namespace("MA", fingerprint)[(10, "X")], _entry(10)
+    )
+    assert reloaded.disk_hits == 1
+
+    # 預測因子數值改變：指紋不同，不得命中舊的磁碟緩存
+    changed = data.copy()
+    changed.loc[changed.index[-1], "X"] += 1.0
+    changed_fingerprint = predictor_fingerprint(changed, "X")
+    assert changed_fingerprint != fingerprint
+    fresh = IndicatorCache(max_mb=None)
+    fresh.attach_disk_store(DiskIndicatorStore(str(tmp_path), max_mb=None))
+    assert (10, "X") not in fresh.namespace("MA", changed_fingerprint)
+    assert fresh.disk_hits == 0
+
+
+CONDITION_PAIRS = [
+    {"entry": ["MA1"], "exit": ["MA4"]},
+    {"entry": ["BOLL1"], "exit": ["BOLL4"]},
+]
+INDICATOR_PARAMS = {
+    "MA1_strategy_1": {"ma_type": "SMA", "ma_range": "5:20:5"},
+    "MA4_strategy_1": {"ma_type": "SMA", "ma_range": "10:10:1"},
+    "BOLL1_strategy_2": {"ma_range": "10:20:10", "sd_multi": "2,3"},
+    "BOLL4_strategy_2": {"ma_range": "10:10:10", "sd_multi": "2"},
+}
+
+
+def _records(results):
+    return [r["records"].drop(columns=["Backtest_id"]) for r in results]
+
+
+def test_engine_reuses_disk_cache_across_runs(tmp_path):
+    data = price_frame()
+    config = engine_config(
+        CONDITION_PAIRS,
+        INDICATOR_PARAMS,
+        disk_cache=True,
+        disk_cache_dir=str(tmp_path),
+    )
+    first_engine = VectorBacktestEngine(data, "1D")
+    first = first_engine.run_backtests(config)
+    assert first_engine.indicator_cache.stats()["misses"] > 0
+    assert len(os.listdir(tmp_path)) > 0
+
+    second_engine = VectorBacktestEngine(data, "1D")
+    second = second_engine.run_backtests(config)
+    stats = second_engine.indicator_cache.stats()
+    assert stats["misses"] == 0 and stats["disk_hits"] > 0
+    for records, expected in zip(_records(second), _records(first)):
+        pd.testing.assert_frame_equal(records, expected)
+
+    # 價格數據改變：不得重用舊數據的指標
+    changed = data.copy()
+    changed["X"] = changed["X"] * 1.01
+    changed_engine = VectorBacktestEngine(changed, "1D")
+    changed_engine.run_backtests(config)
+    assert changed_engine.indicator_cache.stats()["disk_hits"] == 0
+
+
+def test_submitted_batch_method_does_not_pickle_cache():
+    engine = VectorBacktestEngine(price_frame(), "1D")
+    config = engine_config(CONDITION_PAIRS, INDICATOR_PARAMS)
+    engine.run_backtests(config)
+    # 非共享記憶體路徑提交給進程池的可調用對象
+    submitted = engine._process_batch_results_optimized
+    size = len(pickle.dumps(submitted))
+
+    # 緩存增加 512 KB 後，序列化大小不變
+    view = engine.indicator_cache.namespace("MA")
+    for i in range(64):
+        view[("filler", i)] = _entry(i)
+    assert engine.indicator_cache.total_bytes > 64 * ENTRY_BYTES
+    assert len(pickle.dumps(submitted)) == size
+    assert size < len(pickle.dumps(engine.data)) + 64 * ENTRY_BYTES
+
+    # 子進程端的引擎使用空緩存，生成的結果與主進程相同
+    restored = pickle.loads(pickle.dumps(submitted))
+    assert len(restored.__self__.indicator_cache) == 0
+    combinations = engine.generate_parameter_combinations(config)
+    all_tasks = engine._generate_all_tasks_matrix(combinations, ["X"])
+    signals = engine._generate_all_signals_vectorized(all_tasks, CONDITION_PAIRS)
+    trades = engine._simulate_all_trades_vectorized(signals, config["trading_params"])
+    batch_data = engine._prepare_batch_data(
+        list(range(len(all_tasks["combinations"]))),
+        all_tasks,
+        trades,
+        signals,
+        CONDITION_PAIRS,
+        config["trading_params"],
+    )
+    for result, expected in zip(restored(batch_data), submitted(batch_data)):
+        pd.testing.assert_frame_equal(result["records"], expected["records"])
@@ -0,0 +1,156 @@
+# lo2cin4bt/tests/test_parameter_space.py
+import itertools
+import pickle
+
+import pytest
+
+from lo2cin4bt.backtester.ParameterSpace_backtester import (
+    BacktestIdView,
+    ParameterCombinationSpace,
+    TaskCombinationView,
+    TaskPredictorView,
+    TaskStrategyIdView,
+    TaskSubsetView,
+)
+from lo2cin4bt.backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from lo2cin4bt.tests.helpers import engine_config, price_frame
+
+# 第 3 個配對缺少 MA4_strategy_3 的參數：組合數為 0，需被跳過
+CONDITION_PAIRS = [
+    {"entry": ["MA1", "BOLL1"], "exit": ["MA4"]},
+    {"entry": ["HL1"], "exit": ["BOLL4", "MA4"]},
+    {"entry": ["MA1"], "exit": ["MA4"]},
+    {"entry": ["MA1"], "exit": []},
+]
+INDICATOR_PARAMS = {
+    "MA1_strategy_1": {"ma_type": "SMA", "ma_range": "5:20:5"},
+    "BOLL1_strategy_1": {"ma_range": "10:20:10", "sd_multi": "2,3"},
+    "MA4_strategy_1": {"ma_type": "SMA", "ma_range": "10:30:10"},
+    "HL1_strategy_2": {"n_range": "1:2:1", "m_range": "5:10:5"},
+    "BOLL4_strategy_2": {"ma_range": "10:10:10", "sd_multi": "1,2"},
+    "MA4_strategy_2": {"ma_type": "SMA", "ma_range": "10:20:10"},
+    "MA1_strategy_3": {"ma_type": "SMA", "ma_range": "5:10:5"},
+    "MA1_strategy_4": {"ma_type": "SMA", "ma_range": "5:15:5"},
+}
+
+
+def _config(**indicator_overrides):
+    return engine_config(CONDITION_PAIRS, {**INDICATOR_PARAMS, **indicator_overrides})
+
+
+def _materialized(config):
+    """原本的做法：逐配對以 itertools.product 展開所有組合"""
+    combinations = []
+    for i, pair in enumerate(config["condition_pairs"]):
+        param_lists = [
+            config["indicator_params"].get(f"{indicator}_strategy_{i + 1}", [])
+            for indicator in pair["entry"] + pair["exit"]
+        ]
+        for combo in itertools.product(*param_lists):
+            combinations.append(combo + (f"strategy_{i + 1}",))
+    return combinations
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return VectorBacktestEngine(price_frame(), "1D")
+
+
+@pytest.fixture(scope="module")
+def config():
+    return _config()
+
+
+@pytest.fixture(scope="module")
+def space(engine, config):
+    return engine.generate_parameter_combinations(config)
+
+
+def test_space_matches_itertools_product(space, config):
+    expected = _materialized(config)
+
+    assert isinstance(space, ParameterCombinationSpace)
+    assert len(space) == len(expected) == 4 * 4 * 3 + 4 * 2 * 2 + 0 + 3
+    assert list(space) == expected
+    for i, combo in enumerate(expected):
+        assert space[i] == combo
+        assert space[i - len(expected)] == combo
+        assert space.strategy_id(i) == combo[-1]
+    with pytest.raises(IndexError):
+        space[len(expected)]
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        slice(None, 10),
+        slice(10, None),
+        slice(5, 30, 3),
+        slice(-7, None),
+        slice(None, None, -1),
+        slice(40, 5, -4),
+        slice(100, 200),
+    ],
+)
+def test_slices_match_list_slices(space, config, key):
+    expected = _materialized(config)[key]
+    sliced = space[key]
+
+    assert isinstance(sliced, ParameterCombinationSpace)
+    assert len(sliced) == len(expected)
+    assert list(sliced) == expected
+    # 切片的切片與索引同樣對應原列表
+    assert list(sliced[1::2]) == expected[1::2]
+    for i, combo in enumerate(expected):
+        assert sliced[i] == combo
+        assert sliced.strategy_id(i) == combo[-1]
+
+
+def test_fingerprint_is_stable(engine, space):
+    # 參數物件重新建立、序列化後，指紋不變
+    rebuilt = engine.generate_parameter_combinations(_config())
+    assert rebuilt is not space
+    assert rebuilt.fingerprint() == space.fingerprint()
+    assert pickle.loads(pickle.dumps(space)).fingerprint() == space.fingerprint()
+    assert space[:10].fingerprint() == rebuilt[:10].fingerprint()
+
+    # 參數網格或索引範圍改變時指紋不同
+    changed = engine.generate_parameter_combinations(
+        _config(MA1_strategy_1={"ma_type": "SMA", "ma_range": "5:25:5"})
+    )
+    fingerprints = {
+        space.fingerprint(),
+        changed.fingerprint(),
+        space[:10].fingerprint(),
+        space[10:].fingerprint(),
+        space[::2].fingerprint(),
+    }
+    assert len(fingerprints) == 5
+
+
+def test_task_views_follow_combination_order(space):
+    predictors = ["X", "Y"]
+    n_tasks = len(space) * len(predictors)
+    combinations = TaskCombinationView(space, len(predictors))
+    predictor_view = TaskPredictorView(predictors, len(space))
+    strategy_ids = TaskStrategyIdView(space, len(predictors))
+    backtest_ids = BacktestIdView(n_tasks, prefix="abcd1234")
+
+    assert len(combinations) == len(predictor_view) == len(strategy_ids) == n_tasks
+    for task_idx in range(n_tasks):
+        combo = space[task_idx // len(predictors)]
+        assert combinations[task_idx] == combo
+        assert predictor_view[task_idx] == predictors[task_idx % len(predictors)]
+        assert strategy_ids[task_idx] == combo[-1]
+    assert combinations[-1] == space[-1]
+    assert backtest_ids[26] == "abcd1234-000001a"
+    with pytest.raises(IndexError):
+        combinations[n_tasks]
+
+    subset = TaskSubsetView(backtest_ids, [5, 42])
+    assert list(subset) == [backtest_ids[5], backtest_ids[42]]
+    # 子進程收到的視圖解碼出相同參數（IndicatorParams 以參數雜湊比較）
+    restored = pickle.loads(pickle.dumps(combinations))
+    assert [p.get_param_hash() for p in restored[7][:-1]] == [
+        p.get_param_hash() for p in combinations[7][:-1]
+    ]
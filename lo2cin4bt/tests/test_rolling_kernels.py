@@ -0,0 +1,202 @@
+# lo2cin4bt/tests/test_rolling_kernels.py
+import numpy as np
+import pytest
+
+from lo2cin4bt.backtester.BollingerBand_Indicator_backtester import (
+    NUMBA_AVAILABLE,
+    _calculate_rolling_mean_njit,
+    _calculate_rolling_std_multi_njit,
+    _calculate_rolling_std_njit,
+)
+from lo2cin4bt.backtester.MovingAverage_Indicator_backtester import (
+    _calculate_sma_multi_njit,
+    _calculate_sma_njit,
+    _calculate_wma_njit,
+)
+from lo2cin4bt.backtester.Percentile_Indicator_backtester import (
+    _calculate_rolling_percentile_njit,
+    _calculate_rolling_percentiles_njit,
+)
+from lo2cin4bt.tests.helpers import SERIES_KINDS, random_series
+
+pytestmark = pytest.mark.skipif(not NUMBA_AVAILABLE, reason="需要 numba")
+
+
+# --- 參考實作：原本逐窗重新求和的 O(n·w) 版本 ---
+
+def _reference_sma(data, window):
+    result = np.zeros(len(data))
+    for i in range(window - 1, len(data)):
+        result[i] = np.sum(data[i - window + 1 : i + 1]) / window
+    return result
+
+
+def _reference_wma(data, period):
+    result = np.zeros(len(data))
+    weights = np.arange(1, period + 1, dtype=np.float64)
+    for i in range(period - 1, len(data)):
+        result[i] = np.sum(weights * data[i - period + 1 : i + 1]) / np.sum(weights)
+    return result
+
+
+def _reference_std(data, window):
+    result = np.zeros(len(data))
+    for i in range(window - 1, len(data)):
+        segment = data[i - window + 1 : i + 1]
+        result[i] = np.sqrt(np.sum((segment - segment.mean()) ** 2) / window)
+    return result
+
+
+def _reference_percentiles(data, window, percentiles):
+    result = np.zeros((len(data), len(percentiles)))
+    for i in range(window - 1, len(data)):
+        result[i] = np.percentile(data[i - window + 1 : i + 1], percentiles)
+    return result
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("kind", SERIES_KINDS)
+@pytest.mark.parametrize("window", [1, 2, 7, 30, 199])
+def test_sma_and_rolling_mean_match_reference(seed, kind, window):
+    data = random_series(seed, 1500, kind)
+    expected = _reference_sma(data, window)
+    scale = np.max(np.abs(data))
+    np.testing.assert_allclose(
+        _calculate_sma_njit(data, window), expected, rtol=1e-12, atol=1e-12 * scale
+    )
+    np.testing.assert_allclose(
+        _calculate_rolling_mean_njit(data, window),
+        expected,
+        rtol=1e-12,
+        atol=1e-12 * scale,
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("kind", SERIES_KINDS)
+@pytest.mark.parametrize("period", [1, 2, 7, 30, 199])
+def test_wma_matches_reference(seed, kind, period):
+    data = random_series(seed, 1500, kind)
+    scale = np.max(np.abs(data))
+    np.testing.assert_allclose(
+        _calculate_wma_njit(data, period),
+        _reference_wma(data, period),
+        rtol=1e-11,
+        atol=1e-11 * scale,
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("kind", SERIES_KINDS)
+@pytest.mark.parametrize("window", [1, 2, 7, 30, 199])
+def test_rolling_std_matches_reference(seed, kind, window):
+    data = random_series(seed, 3000, kind)
+    expected = _reference_std(data, window)
+    # 參考實作本身的誤差與數值量級相關（大均值時兩遍法也會失準），容差同時考慮兩者
+    scale = np.max(np.abs(data - np.median(data)))
+    np.testing.assert_allclose(
+        _calculate_rolling_std_njit(data, window),
+        expected,
+        rtol=1e-9,
+        atol=1e-9 * scale + 1e-14 * np.max(np.abs(data)),
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rolling_std_is_exact_for_two_point_windows_with_large_offset(seed):
+    # 兩點窗口的母體標準差恰為 |a - b| / 2，可作為精確參考
+    data = random_series(seed, 3000, "large_offset")
+    expected = np.zeros(len(data))
+    expected[1:] = np.abs(np.diff(data)) / 2
+    np.testing.assert_allclose(
+        _calculate_rolling_std_njit(data, 2), expected, rtol=1e-12, atol=1e-15
+    )
+
+
+@pytest.mark.parametrize(
+    "kernel, reference",
+    [
+        (_calculate_sma_njit, _reference_sma),
+        (_calculate_rolling_mean_njit, _reference_sma),
+        (_calculate_wma_njit, _reference_wma),
+        (_calculate_rolling_std_njit, _reference_std),
+    ],
+)
+def test_non_finite_values_only_affect_their_windows(kernel, reference):
+    data = random_series(0, 400, "price")
+    data[[50, 51, 200]] = np.nan
+    data[320] = np.inf
+    window = 10
+
+    result = kernel(data, window)
+    expected = reference(data, window)
+
+    np.testing.assert_array_equal(np.isfinite(result), np.isfinite(expected))
+    finite = np.isfinite(expected)
+    np.testing.assert_allclose(result[finite], expected[finite], rtol=1e-10)
+
+
+@pytest.mark.parametrize(
+    "kernel",
+    [_calculate_sma_njit, _calculate_rolling_mean_njit, _calculate_wma_njit, _calculate_rolling_std_njit],
+)
+def test_window_longer_than_series_returns_zeros(kernel):
+    data = random_series(1, 5, "price")
+    np.testing.assert_array_equal(kernel(data, 10), np.zeros(5))
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("kind", SERIES_KINDS)
+def test_multi_window_sma_matches_single_window_kernels(seed, kind):
+    data = random_series(seed, 2000, kind)
+    windows = np.array([1, 3, 10, 50, 120, 400, 2500], dtype=np.int64)
+    result = _calculate_sma_multi_njit(data, windows)
+    assert result.shape == (len(data), len(windows))
+    scale = np.max(np.abs(data))
+    for k, window in enumerate(windows):
+        np.testing.assert_allclose(
+            result[:, k],
+            _calculate_sma_njit(data, window),
+            rtol=1e-12,
+            atol=1e-12 * scale,
+        )
+
+
+def test_multi_window_kernels_handle_non_finite_values():
+    data = random_series(0, 400, "price")
+    data[[50, 200]] = np.nan
+    windows = np.array([5, 20, 60], dtype=np.int64)
+    means = _calculate_sma_multi_njit(data, windows)
+    stds = _calculate_rolling_std_multi_njit(data, windows)
+    for k, window in enumerate(windows):
+        np.testing.assert_array_equal(means[:, k], _calculate_sma_njit(data, window))
+        np.testing.assert_array_equal(
+            stds[:, k], _calculate_rolling_std_njit(data, window)
+        )
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("kind", SERIES_KINDS)
+@pytest.mark.parametrize("window", [1, 2, 7, 30, 199])
+def test_rolling_percentiles_match_reference(seed, kind, window):
+    # integers 序列含大量重複值，檢查排序緩衝區的移除/取代
+    data = random_series(seed, 1000, kind)
+    percentiles = np.array([0, 5, 25, 33.3, 50, 80, 99.5, 100], dtype=np.float64)
+    expected = _reference_percentiles(data, window, percentiles)
+    scale = np.max(np.abs(data))
+    result = _calculate_rolling_percentiles_njit(data, window, percentiles)
+    np.testing.assert_allclose(result, expected, rtol=1e-12, atol=1e-14 * scale)
+    np.testing.assert_array_equal(
+        _calculate_rolling_percentile_njit(data, window, 80), result[:, 5]
+    )
+
+
+def test_rolling_percentiles_non_finite_windows_follow_np_percentile():
+    data = random_series(0, 300, "price")
+    data[[40, 41, 150]] = np.nan
+    data[220] = np.inf
+    percentiles = np.array([10.0, 50.0, 90.0])
+    result = _calculate_rolling_percentiles_njit(data, 12, percentiles)
+    np.testing.assert_allclose(
+        result, _reference_percentiles(data, 12, percentiles), rtol=1e-12
+    )
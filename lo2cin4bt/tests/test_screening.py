@@ -0,0 +1,124 @@
+# lo2cin4bt/tests/test_screening.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from lo2cin4bt.backtester.Screening_backtester import (
+    SCREENING_STATS,
+    equity_column_stats,
+    screen_strategy_signals,
+    select_screened_tasks,
+    temp_sharpe_columns,
+)
+from lo2cin4bt.backtester.TradeSimulator_backtester import (
+    _vectorized_trade_simulation_njit,
+)
+from lo2cin4bt.backtester.VectorBacktestEngine_backtester import (
+    _vectorized_combine_signals_njit,
+)
+from lo2cin4bt.tests.helpers import random_series
+
+
+@pytest.mark.parametrize("trade_price", ["open", "close"])
+@pytest.mark.parametrize("trade_delay", [0, 1])
+def test_screening_matches_full_simulation(trade_price, trade_delay):
+    rng = np.random.default_rng(21 + trade_delay)
+    n_time, n_unique, n_strategies = 300, 6, 40
+    entry_bank = rng.choice([-1.0, 0.0, 1.0], size=(n_time, n_unique), p=[0.2, 0.6, 0.2])
+    exit_bank = rng.choice([-1.0, 0.0, 1.0], size=(n_time, n_unique), p=[0.3, 0.4, 0.3])
+    entry_index = rng.integers(-1, n_unique, size=(n_strategies, 2))
+    exit_index = rng.integers(0, n_unique, size=(n_strategies, 1))
+    close = random_series(9, n_time, "price")
+    open_ = close * (1 + rng.normal(0, 0.002, n_time))
+    trading_params = {
+        "transaction_cost": 0.001,
+        "slippage": 0.0005,
+        "trade_price": trade_price,
+        "trade_delay": trade_delay,
+    }
+
+    # 篩選結果寫入打亂後的列
+    rows = rng.permutation(n_strategies)
+    stats = np.full((n_strategies, len(SCREENING_STATS)), np.nan)
+    screen_strategy_signals(
+        entry_bank,
+        entry_index,
+        exit_bank,
+        exit_index,
+        close,
+        open_,
+        trading_params,
+        rows,
+        stats,
+    )
+
+    simulated = _vectorized_trade_simulation_njit(
+        _vectorized_combine_signals_njit(entry_bank, entry_index, False),
+        _vectorized_combine_signals_njit(exit_bank, exit_index, True),
+        close,
+        open_,
+        0.001,
+        0.0005,
+        trade_price,
+        trade_delay,
+    )
+    for s in range(n_strategies):
+        equity = pd.Series(simulated["equity_values"][:, s])
+        changes = equity.pct_change().fillna(0)
+        sharpe = changes.mean() / changes.std() if changes.std() > 0 else -np.inf
+        expected = [
+            equity.iloc[-1] / equity.iloc[0] - 1,
+            sharpe,
+            ((equity - equity.cummax()) / equity.cummax()).min(),
+            (simulated["trade_actions"][:, s] == 1).sum(),
+        ]
+        np.testing.assert_allclose(stats[rows[s]], expected, rtol=1e-9, atol=1e-15)
+
+
+def test_select_screened_tasks_top_k_and_filters():
+    rng = np.random.default_rng(5)
+    stats = rng.normal(size=(200, len(SCREENING_STATS)))
+    stats[:, 3] = rng.integers(0, 10, size=200)
+    stats[7] = np.nan
+    # 同分時任務索引小者優先
+    stats[[20, 40], 1] = 10.0
+
+    selected = select_screened_tasks(
+        stats, "temp_sharpe", top_k=15, filters={"trade_count": [3, None]}
+    )
+
+    candidates = [
+        i for i in range(len(stats)) if stats[i, 3] >= 3 and not np.isnan(stats[i, 1])
+    ]
+    ranked = sorted(candidates, key=lambda i: (-stats[i, 1], i))[:15]
+    np.testing.assert_array_equal(selected, sorted(ranked))
+    assert 7 not in select_screened_tasks(stats, "total_return")
+    assert select_screened_tasks(stats, top_k=1).tolist() == [20]
+    with pytest.raises(ValueError):
+        select_screened_tasks(stats, "Sharpe")
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_equity_column_stats_match_pandas(dtype):
+    rng = np.random.default_rng(13)
+    n_time, n_columns = 250, 12
+    equity = 100 * np.cumprod(1 + rng.normal(0, 0.01, (n_time, n_columns)), axis=0)
+    equity[:, 3] = 100.0  # 無交易：標準差為 0
+    equity = np.asfortranarray(equity.astype(dtype))
+    actions = rng.choice([0, 1, 4], size=(n_time, n_columns), p=[0.9, 0.05, 0.05])
+
+    stats = equity_column_stats(equity, actions)
+
+    for c in range(n_columns):
+        series = pd.Series(equity[:, c].astype(np.float64))
+        changes = series.pct_change().fillna(0)
+        sharpe = changes.mean() / changes.std() if changes.std() > 0 else -np.inf
+        expected = [
+            series.iloc[-1] / series.iloc[0] - 1,
+            sharpe,
+            ((series - series.cummax()) / series.cummax()).min(),
+            (actions[:, c] == 1).sum(),
+        ]
+        np.testing.assert_allclose(stats[c], expected, rtol=1e-9, atol=1e-15)
+    np.testing.assert_array_equal(temp_sharpe_columns(equity), stats[:, 1])
+    assert temp_sharpe_columns(equity[:1]).tolist() == [-np.inf] * n_columns
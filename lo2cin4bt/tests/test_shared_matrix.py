@@ -0,0 +1,199 @@
+# lo2cin4bt/tests/test_shared_matrix.py
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lo2cin4bt.backtester.SharedMatrix_backtester import (
+    SHARED_MEMORY_AVAILABLE,
+    SharedMatrixStore,
+    attach_matrices,
+)
+from lo2cin4bt.backtester.VectorBacktestEngine_backtester import (
+    VectorBacktestEngine,
+    _init_shared_result_worker,
+    _process_shared_result_batch,
+)
+from lo2cin4bt.tests.helpers import engine_config, price_frame
+
+SHM_DIR = "/dev/shm"
+BACKENDS = [
+    pytest.param(
+        "shm",
+        marks=pytest.mark.skipif(
+            not (SHARED_MEMORY_AVAILABLE and os.path.isdir(SHM_DIR)),
+            reason="需要 POSIX 共享記憶體",
+        ),
+    ),
+    "mmap",
+]
+
+# 12 x 4 = 48 個任務：超過單批次大小，結果生成走多進程
+CONDITION_PAIRS = [{"entry": ["MA1"], "exit": ["MA4"]}]
+INDICATOR_PARAMS = {
+    "MA1_strategy_1": {"ma_type": "SMA", "ma_range": "5:60:5"},
+    "MA4_strategy_1": {"ma_type": "SMA", "ma_range": "10:40:10"},
+}
+
+
+def _shm_segments():
+    if not os.path.isdir(SHM_DIR):
+        return set()
+    return {name for name in os.listdir(SHM_DIR) if name.startswith("psm_")}
+
+
+@pytest.fixture
+def scratch_dir(tmp_path, monkeypatch):
+    """mmap 後端的暫存目錄建在 tmp_path 下，便於檢查是否清理"""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def created_stores(monkeypatch):
+    """記錄引擎建立的共享矩陣儲存器，確認測試確實走共享記憶體路徑"""
+    stores = []
+    original = VectorBacktestEngine._create_shared_store
+
+    def create(self, n_tasks):
+        store = original(self, n_tasks)
+        stores.append(store)
+        return store
+
+    monkeypatch.setattr(VectorBacktestEngine, "_create_shared_store", create)
+    return stores
+
+
+def _records_by_task(results):
+    # 各次執行的 Backtest_id 前綴不同，按任務索引比較
+    return {
+        r["Backtest_id"].split("-")[-1]: r["records"].drop(columns=["Backtest_id"])
+        for r in results
+    }
+
+
+def _run(data, monkeypatch=None, **performance_params):
+    engine = VectorBacktestEngine(data, "1D")
+    if monkeypatch is not None:
+        # 單一批次：結果在主進程內串行生成
+        monkeypatch.setattr(
+            VectorBacktestEngine,
+            "_compute_result_batch_size",
+            staticmethod(lambda n_tasks, n_cores: n_tasks),
+        )
+    return engine.run_backtests(
+        engine_config(CONDITION_PAIRS, INDICATOR_PARAMS, **performance_params)
+    )
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("order", ["C", "F"])
+def test_store_round_trips_matrices(backend, order, scratch_dir):
+    rng = np.random.default_rng(0)
+    matrix = np.asarray(rng.normal(size=(50, 7)), order=order)
+    before = _shm_segments()
+
+    with SharedMatrixStore(backend=backend) as store:
+        shared = store.put("values", matrix)
+        flags = store.allocate("flags", (50, 7), np.int8, order="F")
+        flags[3, 2] = 1
+        arrays, handles = attach_matrices(store.descriptors())
+        np.testing.assert_array_equal(arrays["values"], matrix)
+        assert arrays["values"].flags.f_contiguous == (order == "F")
+        assert arrays["flags"].dtype == np.int8 and arrays["flags"][3, 2] == 1
+        del arrays, handles, shared, flags
+
+    assert _shm_segments() == before
+    assert os.listdir(scratch_dir) == []
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_worker_batches_match_in_process_batches(backend, scratch_dir):
+    engine = VectorBacktestEngine(price_frame(), "1D")
+    config = engine_config(CONDITION_PAIRS, INDICATOR_PARAMS)
+    trading_params = config["trading_params"]
+    combinations = engine.generate_parameter_combinations(config)
+    all_tasks = engine._generate_all_tasks_matrix(combinations, ["X"])
+    signals = engine._generate_all_signals_vectorized(all_tasks, CONDITION_PAIRS)
+    trades = engine._simulate_all_trades_vectorized(signals, trading_params)
+    n_tasks = len(all_tasks["combinations"])
+    before = _shm_segments()
+
+    with SharedMatrixStore(backend=backend) as store:
+        matrices = {
+            key: trades[key]
+            for key in ("positions", "returns", "trade_actions", "equity_values")
+        }
+        matrices.update(signals)
+        for key, matrix in matrices.items():
+            store.put(key, np.asfortranarray(matrix))
+        _init_shared_result_worker(
+            engine.data,
+            engine.frequency,
+            engine.symbol,
+            store.descriptors(),
+            {
+                key: all_tasks[key]
+                for key in ("combinations", "predictors", "backtest_ids", "strategy_ids")
+            },
+            CONDITION_PAIRS,
+            trading_params,
+        )
+        worker_results = _process_shared_result_batch(5, n_tasks)
+
+    expected = engine._process_batch_results_optimized(
+        engine._prepare_batch_data(
+            list(range(5, n_tasks)),
+            all_tasks,
+            trades,
+            signals,
+            CONDITION_PAIRS,
+            trading_params,
+        )
+    )
+    assert len(worker_results) == len(expected) == n_tasks - 5
+    for result, reference in zip(worker_results, expected):
+        assert result["Backtest_id"] == reference["Backtest_id"]
+        pd.testing.assert_frame_equal(result["records"], reference["records"])
+    assert _shm_segments() == before
+    assert os.listdir(scratch_dir) == []
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_shared_result_workers_match_serial_results(
+    backend, scratch_dir, monkeypatch, created_stores
+):
+    data = price_frame()
+    before = _shm_segments()
+
+    shared = _run(data, shared_memory=True, shared_memory_backend=backend)
+    assert created_stores[0] is not None and created_stores[0].backend == backend
+    assert _shm_segments() == before
+    assert os.listdir(scratch_dir) == []
+
+    serial = _run(data, monkeypatch, shared_memory=False)
+    shared_records = _records_by_task(shared)
+    serial_records = _records_by_task(serial)
+    assert len(shared_records) == len(serial_records) == 48
+    for task, records in serial_records.items():
+        pd.testing.assert_frame_equal(shared_records[task], records)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_shared_segments_are_released_on_error(
+    backend, scratch_dir, monkeypatch, created_stores
+):
+    def fail(self, *args, **kwargs):
+        raise RuntimeError("結果生成失敗")
+
+    monkeypatch.setattr(VectorBacktestEngine, "_generate_all_results_vectorized", fail)
+    before = _shm_segments()
+
+    with pytest.raises(RuntimeError, match="結果生成失敗"):
+        _run(price_frame(), shared_memory=True, shared_memory_backend=backend)
+
+    assert created_stores[0] is not None
+    assert _shm_segments() == before
+    assert os.listdir(scratch_dir) == []
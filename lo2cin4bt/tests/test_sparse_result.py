@@ -0,0 +1,115 @@
+# lo2cin4bt/tests/test_sparse_result.py
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lo2cin4bt.backtester.SparseResult_backtester import (
+    SparseBacktestResult,
+    bind_sparse_context,
+)
+from lo2cin4bt.backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from lo2cin4bt.tests.helpers import engine_config, price_frame
+
+CONDITION_PAIRS = [
+    {"entry": ["MA1"], "exit": ["MA4"]},
+    {"entry": ["BOLL1"], "exit": ["BOLL4"]},
+]
+INDICATOR_PARAMS = {
+    "MA1_strategy_1": {"ma_type": "SMA", "ma_range": "5:20:5"},
+    "MA4_strategy_1": {"ma_type": "SMA", "ma_range": "10:10:1"},
+    "BOLL1_strategy_2": {"ma_range": "10:20:10", "sd_multi": "2,3"},
+    "BOLL4_strategy_2": {"ma_range": "10:10:10", "sd_multi": "2"},
+}
+
+
+def _dense_and_sparse(trading_params=None, **performance_params):
+    """同一組信號與模擬矩陣，分別以完整模式與稀疏模式生成所有任務的結果"""
+    engine = VectorBacktestEngine(price_frame(), "1D")
+    config = engine_config(CONDITION_PAIRS, INDICATOR_PARAMS, **performance_params)
+    config["trading_params"].update(trading_params or {})
+    engine._apply_performance_params(config["performance_params"])
+    combinations = engine.generate_parameter_combinations(config)
+    all_tasks = engine._generate_all_tasks_matrix(combinations, ["X"])
+    signals = engine._generate_all_signals_vectorized(all_tasks, CONDITION_PAIRS)
+    trades = engine._simulate_all_trades_vectorized(signals, config["trading_params"])
+    batch_data = engine._prepare_batch_data(
+        list(range(len(all_tasks["combinations"]))),
+        all_tasks,
+        trades,
+        signals,
+        CONDITION_PAIRS,
+        config["trading_params"],
+    )
+
+    engine.sparse_records = False
+    dense = engine._process_batch_results_optimized(batch_data)
+    engine.sparse_records = True
+    sparse = engine._process_batch_results_optimized(batch_data)
+    return dense, sparse
+
+
+def _assert_records_equal(sparse, dense):
+    records = sparse["records"]
+    expected = dense["records"]
+    assert list(records.columns) == list(expected.columns)
+    for column in expected.columns:
+        pd.testing.assert_series_equal(
+            records[column], expected[column], check_exact=True, obj=column
+        )
+
+
+@pytest.mark.parametrize("trade_price", ["open", "close"])
+@pytest.mark.parametrize("trade_delay", [0, 1, 3])
+def test_sparse_records_match_dense_records(trade_price, trade_delay):
+    dense, sparse = _dense_and_sparse(
+        {"trade_price": trade_price, "trade_delay": trade_delay}
+    )
+
+    assert len(sparse) == len(dense) == 8
+    assert any((r["records"]["Trade_action"] == 1).any() for r in dense)
+    for result, reference in zip(sparse, dense):
+        assert isinstance(result, SparseBacktestResult)
+        assert result["Backtest_id"] == reference["Backtest_id"]
+        _assert_records_equal(result, reference)
+
+
+def test_sparse_records_match_dense_records_with_compact_dtypes():
+    dense, sparse = _dense_and_sparse(compact_dtypes=True, float32_values=True)
+    for result, reference in zip(sparse, dense):
+        _assert_records_equal(result, reference)
+
+
+def test_pickled_sparse_result_needs_rebinding():
+    dense, sparse = _dense_and_sparse()
+    context = sparse[0].context
+    restored = pickle.loads(pickle.dumps(sparse))
+
+    assert restored[0].context is None
+    with pytest.raises(RuntimeError, match="未綁定價格上下文"):
+        restored[0]["records"]
+
+    bind_sparse_context(restored, context)
+    for result, reference in zip(restored, dense):
+        _assert_records_equal(result, reference)
+
+
+def test_sparse_engine_run_matches_dense_run():
+    data = price_frame()
+    dense = VectorBacktestEngine(data, "1D").run_backtests(
+        engine_config(CONDITION_PAIRS, INDICATOR_PARAMS)
+    )
+    sparse = VectorBacktestEngine(data, "1D").run_backtests(
+        engine_config(CONDITION_PAIRS, INDICATOR_PARAMS, sparse_records=True)
+    )
+
+    assert len(sparse) == len(dense) == 8
+    for result, reference in zip(sparse, dense):
+        records = result["records"].drop(columns=["Backtest_id"])
+        expected = reference["records"].drop(columns=["Backtest_id"])
+        pd.testing.assert_frame_equal(records, expected, check_exact=True)
+        np.testing.assert_array_equal(
+            result["trade_events"]["open_index"],
+            np.flatnonzero(expected["Trade_action"].to_numpy() == 1),
+        )
@@ -0,0 +1,376 @@
+# lo2cin4bt/tests/test_trade_simulator.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from lo2cin4bt.backtester.IndicatorParams_backtester import IndicatorParams
+from lo2cin4bt.backtester.TradeSimulator_backtester import (
+    TradeSimulator_backtester,
+    _vectorized_trade_simulation_njit,
+    _vectorized_trade_simulation_parallel_resume_into_njit,
+    _vectorized_trade_simulation_resume_into_njit,
+    initial_simulation_state,
+)
+from lo2cin4bt.tests.helpers import price_frame, random_series
+
+
+def _reference_trade_simulation(entry, exit_, close, open_, cost, slip, trade_price, delay):
+    """逐K線、逐策略的純 Python 交易狀態機，與原始 TradeSimulator 規則一致"""
+    n_time, n_strategies = entry.shape
+    out = {
+        key: np.zeros((n_time, n_strategies))
+        for key in ("positions", "returns", "trade_actions", "equity_values")
+    }
+    prices = close if trade_price == "close" else open_
+    for s in range(n_strategies):
+        state, equity, open_price, open_equity, prev_value = 0.0, 1.0, 0.0, 1.0, 100.0
+        for t in range(n_time):
+            i = t - delay
+            entry_sig = entry[i, s] if 0 <= i < n_time else 0
+            exit_sig = exit_[i, s] if 0 <= i < n_time else 0
+            if t > 0 and state != 0 and open_price > 0:
+                if state == 1:
+                    price_return = (prices[t] - open_price) / open_price
+                else:
+                    price_return = (open_price - prices[t]) / open_price
+                equity = open_equity * (1.0 + price_return)
+                if prev_value > 0:
+                    out["returns"][t, s] = (equity * 100.0) / prev_value - 1.0
+            if state == 0 and entry_sig in (1, -1):
+                state, open_price = float(entry_sig), prices[t]
+                equity *= (1.0 - slip) * (1.0 - cost)
+                open_equity = equity
+                out["trade_actions"][t, s] = 1
+            elif state != 0 and exit_sig == -state:
+                state, open_price, open_equity = 0.0, 0.0, 1.0
+                equity *= (1.0 - slip) * (1.0 - cost)
+                out["trade_actions"][t, s] = 4
+            out["positions"][t, s] = state
+            prev_value = equity * 100.0
+            out["equity_values"][t, s] = prev_value
+    return out
+
+
+@pytest.mark.parametrize("trade_price", ["open", "close"])
+@pytest.mark.parametrize("trade_delay", [0, 1, 3])
+@pytest.mark.parametrize("split", [1, 57, 299])
+def test_trade_simulation_resumes_from_terminal_state(trade_price, trade_delay, split):
+    # 先模擬前 split 根K線，再以終止狀態續跑，結果需與一次模擬完全相同
+    rng = np.random.default_rng(split + trade_delay)
+    n_time, n_strategies = 300, 12
+    entry = rng.choice([-1.0, 0.0, 1.0], size=(n_time, n_strategies), p=[0.05, 0.9, 0.05])
+    exit_ = rng.choice([-1.0, 0.0, 1.0], size=(n_time, n_strategies), p=[0.1, 0.8, 0.1])
+    close = random_series(split, n_time, "price")
+    open_ = close * (1 + rng.normal(0, 0.002, n_time))
+    args = (close, open_, 0.001, 0.0005, trade_price, trade_delay)
+
+    expected = _vectorized_trade_simulation_njit(entry, exit_, *args)
+
+    state = initial_simulation_state(n_strategies)
+    keys = ("positions", "returns", "trade_actions", "equity_values")
+    head = {key: np.zeros((split, n_strategies)) for key in keys}
+    _vectorized_trade_simulation_resume_into_njit(
+        entry[:split], exit_[:split], *args, 0, state, *(head[key] for key in keys)
+    )
+    tail = {key: np.zeros((n_time, n_strategies)) for key in keys}
+    _vectorized_trade_simulation_resume_into_njit(
+        entry, exit_, *args, split, state, *(tail[key] for key in keys)
+    )
+
+    for key in keys:
+        np.testing.assert_array_equal(head[key], expected[key][:split])
+        np.testing.assert_array_equal(tail[key][split:], expected[key][split:])
+
+
+@pytest.mark.parametrize("order", ["C", "F"])
+@pytest.mark.parametrize("trade_price", ["open", "close"])
+def test_parallel_trade_simulation_matches_serial(order, trade_price):
+    rng = np.random.default_rng(7)
+    n_time, n_strategies = 250, 33
+    entry = rng.choice([-1.0, 0.0, 1.0], size=(n_time, n_strategies), p=[0.05, 0.9, 0.05])
+    exit_ = rng.choice([-1.0, 0.0, 1.0], size=(n_time, n_strategies), p=[0.1, 0.8, 0.1])
+    close = random_series(11, n_time, "price")
+    open_ = close * (1 + rng.normal(0, 0.002, n_time))
+
+    expected = _vectorized_trade_simulation_njit(
+        entry, exit_, close, open_, 0.001, 0.0005, trade_price, 2
+    )
+
+    keys = ("positions", "returns", "trade_actions", "equity_values")
+    out = {key: np.zeros((n_time, n_strategies), order=order) for key in keys}
+    state = initial_simulation_state(n_strategies)
+    _vectorized_trade_simulation_parallel_resume_into_njit(
+        np.asarray(entry, order=order),
+        np.asarray(exit_, order=order),
+        close,
+        open_,
+        0.001,
+        0.0005,
+        trade_price,
+        2,
+        0,
+        state,
+        *(out[key] for key in keys),
+    )
+
+    for key in keys:
+        np.testing.assert_array_equal(out[key], expected[key])
+
+
+@pytest.mark.parametrize("signal_dtype", [np.float64, np.int8])
+@pytest.mark.parametrize("trade_price", ["open", "close"])
+@pytest.mark.parametrize("trade_delay", [-1, 0, 2])
+def test_trade_simulation_matches_reference(signal_dtype, trade_price, trade_delay):
+    rng = np.random.default_rng(trade_delay + 5)
+    n_time, n_strategies = 120, 9
+    entry = rng.choice([-1, 0, 1], size=(n_time, n_strategies), p=[0.08, 0.84, 0.08])
+    exit_ = rng.choice([-1, 0, 1], size=(n_time, n_strategies), p=[0.15, 0.7, 0.15])
+    close = random_series(3, n_time, "price")
+    open_ = close * (1 + rng.normal(0, 0.002, n_time))
+
+    expected = _reference_trade_simulation(
+        entry, exit_, close, open_, 0.001, 0.0005, trade_price, trade_delay
+    )
+    result = _vectorized_trade_simulation_njit(
+        np.asfortranarray(entry, dtype=signal_dtype),
+        np.asfortranarray(exit_, dtype=signal_dtype),
+        close,
+        open_,
+        0.001,
+        0.0005,
+        trade_price,
+        trade_delay,
+    )
+
+    for key, values in expected.items():
+        np.testing.assert_allclose(result[key], values, rtol=1e-12, atol=1e-15)
+
+
+def _reference_records(
+    simulator,
+    entry_signal,
+    exit_signal,
+    position,
+    returns,
+    trade_actions,
+    equity_values,
+    predictor,
+    backtest_id,
+    entry_params,
+    exit_params,
+    trading_params,
+):
+    """原本逐列 iloc 的記錄構建，Trade_group_id 以遞增序號取代隨機 uuid"""
+    records = []
+    current_trade_group_id = None
+    open_price_map = {}
+    open_time_map = {}
+    holding_period_count = 0
+    n_groups = 0
+    parameter_set_id = simulator._generate_parameter_set_id(
+        entry_params, exit_params, predictor
+    )
+
+    for i in range(len(position)):
+        row = simulator.data.iloc[i]
+        if isinstance(simulator.data.index, pd.DatetimeIndex):
+            time_index = simulator.data.index[i]
+        elif "Time" in simulator.data.columns:
+            time_index = row["Time"]
+        else:
+            time_index = i
+
+        position_type = None
+        open_position_price = 0.0
+        close_position_price = 0.0
+        open_time = None
+        close_time = None
+        trade_group_id = None
+        transaction_cost = 0.0
+        slippage_cost = 0.0
+        holding_period = None
+        trade_return = None
+
+        trade_price = trading_params.get("trade_price", "close")
+        current_price = row["Open"] if trade_price == "open" else row["Close"]
+
+        if trade_actions[i] == 1:
+            position_type = "new_long" if position[i] > 0 else "new_short"
+            open_position_price = current_price
+            open_time = time_index
+            n_groups += 1
+            trade_group_id = f"T{n_groups:08d}"
+            current_trade_group_id = trade_group_id
+            open_price_map[trade_group_id] = open_position_price
+            open_time_map[trade_group_id] = open_time
+            transaction_cost = trading_params.get("transaction_cost", 0.001)
+            slippage_cost = trading_params.get("slippage", 0.0005)
+            holding_period_count = 0
+        elif trade_actions[i] == 4:
+            close_position_price = current_price
+            close_time = time_index
+            if i > 0:
+                if position[i - 1] > 0:
+                    position_type = "close_long"
+                elif position[i - 1] < 0:
+                    position_type = "close_short"
+            trade_group_id = current_trade_group_id
+            transaction_cost = trading_params.get("transaction_cost", 0.001)
+            slippage_cost = trading_params.get("slippage", 0.0005)
+            if trade_group_id and trade_group_id in open_time_map:
+                open_time = open_time_map[trade_group_id]
+                open_price = open_price_map[trade_group_id]
+                holding_period_count += 1
+                holding_period = holding_period_count
+                if open_price > 0:
+                    if position_type == "close_long":
+                        trade_return = (close_position_price - open_price) / open_price
+                    else:
+                        trade_return = (open_price - close_position_price) / open_price
+            open_price_map.pop(trade_group_id, None)
+            open_time_map.pop(trade_group_id, None)
+            current_trade_group_id = None
+            holding_period_count = 0
+        elif current_trade_group_id is not None:
+            holding_period_count += 1
+            trade_group_id = current_trade_group_id
+
+        records.append(
+            {
+                "Time": time_index,
+                "Open": row["Open"],
+                "High": row["High"],
+                "Low": row["Low"],
+                "Close": row["Close"],
+                "Trading_instrument": simulator.trading_instrument,
+                "Position_type": position_type,
+                "Open_position_price": open_position_price,
+                "Close_position_price": close_position_price,
+                "Position_size": position[i],
+                "Return": returns[i],
+                "Trade_group_id": trade_group_id,
+                "Trade_action": int(trade_actions[i]),
+                "Open_time": open_time,
+                "Close_time": close_time,
+                "Parameter_set_id": parameter_set_id,
+                "Equity_value": equity_values[i],
+                "Transaction_cost": transaction_cost,
+                "Slippage_cost": slippage_cost,
+                "Predictor_value": (
+                    row[predictor] if predictor in simulator.data.columns else 0.0
+                ),
+                "Entry_signal": entry_signal[i],
+                "Exit_signal": exit_signal[i],
+                "Holding_period_count": holding_period_count,
+                "Holding_period": holding_period,
+                "Trade_return": trade_return,
+                "Backtest_id": backtest_id,
+            }
+        )
+    return pd.DataFrame(records)
+
+
+def _ma_params(period):
+    param = IndicatorParams("MA")
+    param.add_param("period", period)
+    param.add_param("strat_idx", 1)
+    return param
+
+
+def _single_result_inputs(trade_price, seed):
+    rng = np.random.default_rng(seed)
+    data = price_frame(n_time=200, seed=seed)
+    n_time = len(data)
+    entry = rng.choice([-1.0, 0.0, 1.0], size=(n_time, 1), p=[0.06, 0.88, 0.06])
+    exit_ = rng.choice([-1.0, 0.0, 1.0], size=(n_time, 1), p=[0.1, 0.8, 0.1])
+    sim = _reference_trade_simulation(
+        entry,
+        exit_,
+        data["Close"].to_numpy(),
+        data["Open"].to_numpy(),
+        0.001,
+        0.0005,
+        trade_price,
+        1,
+    )
+    columns = {key: values[:, 0].copy() for key, values in sim.items()}
+    # 邊界情況：第一根K線沒有對應開倉的平倉、最後一根K線開倉未平倉
+    columns["trade_actions"][0] = 4
+    columns["trade_actions"][-1] = 1
+    columns["positions"][-1] = -1.0
+    return data, entry[:, 0], exit_[:, 0], columns
+
+
+@pytest.mark.parametrize("time_layout", ["column", "datetime_index", "range_index"])
+@pytest.mark.parametrize("trade_price", ["open", "close"])
+@pytest.mark.parametrize("predictor", ["X", "missing"])
+def test_records_frame_matches_row_loop(time_layout, trade_price, predictor):
+    data, entry, exit_, columns = _single_result_inputs(trade_price, seed=4)
+    if time_layout == "datetime_index":
+        data = data.set_index("Time")
+    elif time_layout == "range_index":
+        data = data.drop(columns=["Time"])
+    trading_params = {
+        "transaction_cost": 0.001,
+        "slippage": 0.0005,
+        "trade_delay": 1,
+        "trade_price": trade_price,
+    }
+    simulator = TradeSimulator_backtester(
+        data, pd.Series(entry), pd.Series(exit_), trading_instrument="BTC"
+    )
+    args = (
+        entry,
+        exit_,
+        columns["positions"],
+        columns["returns"],
+        columns["trade_actions"],
+        columns["equity_values"],
+        predictor,
+        "abcd1234-0000001",
+        [_ma_params(10)],
+        [_ma_params(20)],
+        trading_params,
+    )
+
+    result = simulator.generate_single_result(0, *args)
+    expected = _reference_records(simulator, *args)
+
+    records = result["records"]
+    assert list(records.columns) == list(expected.columns)
+    assert (records["Trade_action"] == 1).sum() > 2
+    pd.testing.assert_frame_equal(records, expected, check_exact=True)
+
+
+def test_trade_group_id_is_deterministic_sequence():
+    data, entry, exit_, columns = _single_result_inputs("open", seed=9)
+    simulator = TradeSimulator_backtester(data, pd.Series(entry), pd.Series(exit_))
+    args = (
+        entry,
+        exit_,
+        columns["positions"],
+        columns["returns"],
+        columns["trade_actions"],
+        columns["equity_values"],
+        "X",
+        "abcd1234-0000001",
+        [_ma_params(10)],
+        [_ma_params(20)],
+        {"trade_price": "open"},
+    )
+
+    first = simulator.generate_single_result(0, *args)["records"]
+    second = simulator.generate_single_result(0, *args)["records"]
+    pd.testing.assert_series_equal(first["Trade_group_id"], second["Trade_group_id"])
+
+    # 每次開倉取得下一個序號，持倉與平倉K線沿用該序號
+    opens = first.loc[first["Trade_action"] == 1, "Trade_group_id"]
+    assert list(opens) == [f"T{k:08d}" for k in range(1, len(opens) + 1)]
+    in_trade = first["Trade_group_id"].notna()
+    assert first.loc[~in_trade, "Trade_action"].isin([0, 4]).all()
+    group_starts = first["Trade_group_id"].where(first["Trade_action"] == 1).ffill()
+    pd.testing.assert_series_equal(
+        first.loc[in_trade, "Trade_group_id"],
+        group_starts[in_trade],
+        check_names=False,
+    )
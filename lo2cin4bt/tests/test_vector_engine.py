@@ -0,0 +1,300 @@
+# lo2cin4bt/tests/test_vector_engine.py
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lo2cin4bt.backtester import VectorBacktestEngine_backtester
+from lo2cin4bt.backtester.BollingerBand_Indicator_backtester import (
+    BollingerBandIndicator,
+)
+from lo2cin4bt.backtester.HL_Indicator_backtester import HLIndicator
+from lo2cin4bt.backtester.MovingAverage_Indicator_backtester import (
+    MovingAverageIndicator,
+)
+from lo2cin4bt.backtester.VectorBacktestEngine_backtester import VectorBacktestEngine
+from lo2cin4bt.tests.helpers import engine_config, price_frame
+
+CONDITION_PAIRS = [
+    {"entry": ["MA1"], "exit": ["MA4"]},
+    {"entry": ["BOLL1"], "exit": ["BOLL4"]},
+]
+INDICATOR_PARAMS = {
+    "MA1_strategy_1": {"ma_type": "SMA", "ma_range": "5:20:5"},
+    "MA4_strategy_1": {"ma_type": "SMA", "ma_range": "10:10:1"},
+    "BOLL1_strategy_2": {"ma_range": "10:20:10", "sd_multi": "2,3"},
+    "BOLL4_strategy_2": {"ma_range": "10:10:10", "sd_multi": "2"},
+}
+
+
+SCATTER_TIME = 16
+SCATTER_CONDITION_PAIRS = [
+    {"entry": ["MA1"], "exit": ["MA4"]},
+    {"entry": ["MA1", "MA9"], "exit": ["MA4"]},
+]
+
+
+def _scatter_tasks(engine, n_tasks):
+    """兩個策略交錯排列（分組後任務索引不連續），每個任務的信號值為其任務索引"""
+    all_tasks = {
+        "combinations": [
+            (None,) * (2 + i % 2) + (f"strategy_{i % 2 + 1}",) for i in range(n_tasks)
+        ],
+        "predictors": ["X"] * n_tasks,
+    }
+    entry = np.zeros((SCATTER_TIME, n_tasks), order="F")
+    exit_ = np.zeros((SCATTER_TIME, n_tasks), order="F")
+    groups = engine._group_strategies_by_indicator_count(
+        all_tasks, SCATTER_CONDITION_PAIRS
+    )
+    for group in groups:
+        values = np.broadcast_to(
+            group["task_indices"].astype(np.float64),
+            (SCATTER_TIME, len(group["tasks"])),
+        )
+        engine._scatter_group_signals(
+            group, {"entry_signals": values, "exit_signals": -values}, entry, exit_
+        )
+    return groups, entry, exit_
+
+
+def _scatter_engine():
+    return VectorBacktestEngine(
+        pd.DataFrame({"Close": np.linspace(100, 101, SCATTER_TIME)}), "1D"
+    )
+
+
+@pytest.mark.parametrize("n_tasks", [1, 2, 7, 500])
+def test_signal_group_scatter_writes_task_columns(n_tasks):
+    groups, entry, exit_ = _scatter_tasks(_scatter_engine(), n_tasks)
+
+    assert sorted(i for g in groups for i in g["task_indices"]) == list(range(n_tasks))
+    np.testing.assert_array_equal(entry[-1], np.arange(n_tasks))
+    np.testing.assert_array_equal(exit_[0], -np.arange(n_tasks))
+
+
+@pytest.mark.benchmark
+def test_signal_group_scatter_scales_linearly():
+    engine = _scatter_engine()
+
+    def elapsed(n_tasks):
+        start = time.perf_counter()
+        _scatter_tasks(engine, n_tasks)
+        return time.perf_counter() - start
+
+    # 任務數放大 8 倍，線性耗時約 8 倍，逐任務 list.index() 的平方耗時約 64 倍
+    small = min(elapsed(4_000) for _ in range(3))
+    large = min(elapsed(32_000) for _ in range(3))
+    assert large / small < 24
+
+
+def _records_without_ids(result):
+    # 各區塊的 Backtest_id 前綴不同，其餘欄位需完全相同
+    return result["records"].drop(columns=["Backtest_id"]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 8])
+def test_streaming_chunks_match_single_pass(chunk_size):
+    data = price_frame()
+    expected = VectorBacktestEngine(data, "1D").run_backtests(
+        engine_config(CONDITION_PAIRS, INDICATOR_PARAMS)
+    )
+
+    sunk = []
+
+    def sink(chunk_results):
+        assert 0 < len(chunk_results) <= chunk_size
+        sunk.extend(chunk_results)
+
+    results = VectorBacktestEngine(data, "1D").run_backtests(
+        engine_config(
+            CONDITION_PAIRS,
+            INDICATOR_PARAMS,
+            streaming=True,
+            stream_chunk_size=chunk_size,
+        ),
+        result_sink=sink,
+    )
+
+    assert len(sunk) == len(results) == len(expected) == 8
+    for streamed, summary, reference in zip(sunk, results, expected):
+        pd.testing.assert_frame_equal(
+            _records_without_ids(streamed), _records_without_ids(reference)
+        )
+        # 導出後只保留摘要
+        assert summary["records"].empty
+        assert summary["Backtest_id"] == streamed["Backtest_id"]
+        records = reference["records"]
+        assert summary["trade_count"] == (records["Trade_action"] == 1).sum()
+        assert summary["final_equity"] == records["Equity_value"].iloc[-1]
+
+
+def test_streaming_requires_result_sink():
+    engine = VectorBacktestEngine(price_frame(), "1D")
+    with pytest.raises(ValueError, match="result_sink"):
+        engine.run_backtests(
+            engine_config(CONDITION_PAIRS, INDICATOR_PARAMS, streaming=True)
+        )
+
+
+# float32 收益/權益：相對 float64 的誤差上限（float32 機器精度約 1.2e-7，300 根K線累積後仍在此範圍內）
+FLOAT32_RTOL = 1e-6
+FLOAT32_ATOL = 1e-7
+FLOAT32_COLUMNS = ["Equity_value", "Return", "Trade_return"]
+
+
+def _simulated_matrices(data, **performance_params):
+    """以指定效能選項生成信號並模擬，返回所有中間矩陣"""
+    engine = VectorBacktestEngine(data, "1D")
+    config = engine_config(CONDITION_PAIRS, INDICATOR_PARAMS, **performance_params)
+    engine._apply_performance_params(config["performance_params"])
+    combinations = engine.generate_parameter_combinations(config)
+    all_tasks = engine._generate_all_tasks_matrix(combinations, ["X"])
+    signals = engine._generate_all_signals_vectorized(all_tasks, CONDITION_PAIRS)
+    trades = engine._simulate_all_trades_vectorized(signals, config["trading_params"])
+    return {**signals, **trades}
+
+
+def test_compact_dtypes_give_identical_trades():
+    data = price_frame()
+    matrices = _simulated_matrices(data, compact_dtypes=True)
+    for key in ("entry_signals", "exit_signals", "positions", "trade_actions"):
+        assert matrices[key].dtype == np.int8
+    assert matrices["equity_values"].dtype == np.float64
+
+    expected = VectorBacktestEngine(data, "1D").run_backtests(
+        engine_config(CONDITION_PAIRS, INDICATOR_PARAMS)
+    )
+    results = VectorBacktestEngine(data, "1D").run_backtests(
+        engine_config(CONDITION_PAIRS, INDICATOR_PARAMS, compact_dtypes=True)
+    )
+    assert len(results) == len(expected) == 8
+    for result, reference in zip(results, expected):
+        pd.testing.assert_frame_equal(
+            _records_without_ids(result), _records_without_ids(reference)
+        )
+
+
+def test_float32_values_stay_within_tolerance():
+    data = price_frame()
+    matrices = _simulated_matrices(data, compact_dtypes=True, float32_values=True)
+    for key in ("returns", "equity_values"):
+        assert matrices[key].dtype == np.float32
+    expected = VectorBacktestEngine(data, "1D").run_backtests(
+        engine_config(CONDITION_PAIRS, INDICATOR_PARAMS)
+    )
+    results = VectorBacktestEngine(data, "1D").run_backtests(
+        engine_config(
+            CONDITION_PAIRS,
+            INDICATOR_PARAMS,
+            compact_dtypes=True,
+            float32_values=True,
+        )
+    )
+
+    assert len(results) == len(expected) == 8
+    for result, reference in zip(results, expected):
+        records = _records_without_ids(result)
+        reference_records = _records_without_ids(reference)
+        # 開平倉時點與其餘欄位不受 float32 影響
+        pd.testing.assert_frame_equal(
+            records.drop(columns=FLOAT32_COLUMNS),
+            reference_records.drop(columns=FLOAT32_COLUMNS),
+        )
+        for column in FLOAT32_COLUMNS:
+            np.testing.assert_allclose(
+                records[column],
+                reference_records[column],
+                rtol=FLOAT32_RTOL,
+                atol=FLOAT32_ATOL,
+                err_msg=column,
+            )
+
+
+# 多指標條件：開倉參數在平倉參數之間重複出現，MA1 同時出現在兩個策略分組
+BANK_CONDITION_PAIRS = [
+    {"entry": ["MA1", "HL1"], "exit": ["BOLL4"]},
+    {"entry": ["MA1"], "exit": ["MA4", "BOLL4"]},
+]
+BANK_INDICATOR_PARAMS = {
+    "MA1_strategy_1": {"ma_type": "SMA", "ma_range": "5:15:5"},
+    "HL1_strategy_1": {"n_range": "1:2:1", "m_range": "10:20:10"},
+    "BOLL4_strategy_1": {"ma_range": "10:20:10", "sd_multi": "2"},
+    "MA1_strategy_2": {"ma_type": "SMA", "ma_range": "5:15:5"},
+    "MA4_strategy_2": {"ma_type": "SMA", "ma_range": "10:20:10"},
+    "BOLL4_strategy_2": {"ma_range": "10:10:10", "sd_multi": "1,2"},
+}
+VECTORIZED_SIGNALS = {
+    "MA": MovingAverageIndicator.vectorized_calculate_ma_signals,
+    "BOLL": BollingerBandIndicator.vectorized_calculate_boll_signals,
+    "HL": HLIndicator.vectorized_calculate_hl_signals,
+}
+
+
+def _undeduplicated_signals(data, params_list, predictors):
+    """去重前的做法：每個 (任務, 指標位置) 各自計算一欄，再要求所有指標同向"""
+    n_indicators = max(len(params) for params in params_list)
+    signals = np.zeros((len(data), len(params_list), n_indicators))
+    groups = {}
+    for task_idx, params in enumerate(params_list):
+        for indicator_idx, param in enumerate(params):
+            groups.setdefault((param.indicator_type, predictors[task_idx]), []).append(
+                (task_idx, indicator_idx, param)
+            )
+    for (indicator_type, predictor), tasks in groups.items():
+        VECTORIZED_SIGNALS[indicator_type](tasks, predictor, signals, {}, data)
+
+    all_long = np.all(signals == 1, axis=2)
+    all_short = np.all(signals == -1, axis=2)
+    return np.where(all_long, 1.0, np.where(all_short, -1.0, 0.0))
+
+
+@pytest.mark.parametrize("numba_available", [True, False])
+def test_signal_bank_matches_undeduplicated_signals(numba_available, monkeypatch):
+    monkeypatch.setattr(
+        VectorBacktestEngine_backtester, "NUMBA_AVAILABLE", numba_available
+    )
+    data = price_frame()
+    engine = VectorBacktestEngine(data, "1D")
+    config = engine_config(BANK_CONDITION_PAIRS, BANK_INDICATOR_PARAMS)
+    combinations = engine.generate_parameter_combinations(config)
+    all_tasks = engine._generate_all_tasks_matrix(combinations, ["X"])
+    # 部分任務改用內容相同的參數副本：按參數雜湊而非物件去重
+    all_tasks["combinations"] = [
+        tuple(copy.deepcopy(combo[:-1])) + combo[-1:] if i % 3 == 0 else combo
+        for i, combo in enumerate(all_tasks["combinations"])
+    ]
+    groups = engine._group_strategies_by_indicator_count(
+        all_tasks, BANK_CONDITION_PAIRS
+    )
+    assert len(groups) == 2
+
+    for group in groups:
+        entry_count = group["entry_count"]
+        entry_params = [list(t["combo"][:entry_count]) for t in group["tasks"]]
+        exit_params = [
+            list(t["combo"][entry_count : entry_count + group["exit_count"]])
+            for t in group["tasks"]
+        ]
+        predictors = [t["predictor"] for t in group["tasks"]]
+        entry_bank, entry_index, exit_bank, exit_index = (
+            engine._strategy_group_signal_banks(group)
+        )
+
+        for bank, index, params_list, is_exit in (
+            (entry_bank, entry_index, entry_params, False),
+            (exit_bank, exit_index, exit_params, True),
+        ):
+            unique = {
+                (p.indicator_type, p.get_param_hash(), predictor)
+                for params, predictor in zip(params_list, predictors)
+                for p in params
+            }
+            assert bank.shape == (len(data), len(unique))
+            assert bank.shape[1] < index.size
+            combined = engine._vectorized_combine_signals(bank, index, is_exit)
+            expected = _undeduplicated_signals(data, params_list, predictors)
+            assert (expected != 0).any()
+            np.testing.assert_array_equal(combined, expected)
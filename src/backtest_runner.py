@@ -26,7 +26,7 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger("BacktestRunner")
 # ---
 
-def run_backtest(ticker: str, start_date: str, end_date: str, strategy: str = "defaultlong", smoke_test: bool = False, limit_combinations: int = None):
+def run_backtest(ticker: str, start_date: str, end_date: str, strategy: str = "defaultlong", smoke_test: bool = False, limit_combinations: int = None, disk_cache: bool = False, incremental_state: str = None):
     """
     執行一次完整的回測流程。
 
@@ -37,6 +37,8 @@ def run_backtest(ticker: str, start_date: str, end_date: str, strategy: str = "d
         strategy (str): 要使用的策略 ('defaultlong', 'defaultshort', 'defaultall')。
         smoke_test (bool): 如果為 True，則只執行一小部分回測用於快速測試。
         limit_combinations (int, optional): 限制執行的參數組合數量. Defaults to None.
+        disk_cache (bool): 如果為 True，指標中間結果保存到 records/cache，下次執行時重用。
+        incremental_state (str): 增量回測狀態檔路徑；數據只追加新K線時只推進新K線並追加到上次的 Parquet。
     """
     logger.info(f"===== 開始執行回測任務 =====")
     logger.info(f"目標標的: {ticker}")
@@ -140,6 +142,7 @@ def run_backtest(ticker: str, start_date: str, end_date: str, strategy: str = "d
             "trade_price": "open"
         },
         "initial_capital": 1000000,
+        "performance_params": {"disk_cache": disk_cache, "incremental_state": incremental_state},
     }
 
     logger.info("非互動式設定檔建構完成。")
@@ -177,10 +180,12 @@ if __name__ == '__main__':
     parser.add_argument("--strategy", type=str, default="defaultlong", help="使用的策略 ('defaultlong', 'defaultshort', 'defaultall')")
     parser.add_argument("--smoke-test", action="store_true", help="啟用煙霧測試模式，只執行一小部分回測。")
     parser.add_argument("--limit-combinations", type=int, default=None, help="限制回測的參數組合數量")
+    parser.add_argument("--disk-cache", action="store_true", help="啟用磁碟指標緩存 (records/cache)，數據未變時重用上次計算的指標。")
+    parser.add_argument("--incremental-state", type=str, default=None, help="增量回測狀態檔路徑，每日追加新K線時只推進新K線並追加到上次的 Parquet。")
 
 
     args = parser.parse_args()
 
     ticker_processed = args.ticker.replace('F.1!', ' F.1!')
 
-    run_backtest(ticker_processed, args.start_date, args.end_date, args.strategy, smoke_test=args.smoke_test, limit_combinations=args.limit_combinations)
+    run_backtest(ticker_processed, args.start_date, args.end_date, args.strategy, smoke_test=args.smoke_test, limit_combinations=args.limit_combinations, disk_cache=args.disk_cache, incremental_state=args.incremental_state)